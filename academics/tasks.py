@@ -3,7 +3,6 @@ from datetime import timedelta
 
 from celery import shared_task
 from django.utils import timezone
-from django_tenants.utils import schema_context
 
 logger = logging.getLogger(__name__)
 
@@ -26,23 +25,16 @@ def notify_consecutive_absences(self):
     Only sends one notification per student per absence streak
     (tracks last notified date to avoid duplicates).
     """
-    from schools.models import School
+    from core.tasks import fan_out_to_tenants
 
-    tenants = School.objects.exclude(schema_name='public')
-    total_notified = 0
+    return fan_out_to_tenants(self, 'academics.tasks._notify_tenant_absences')
 
-    for tenant in tenants:
-        try:
-            with schema_context(tenant.schema_name):
-                notified = _process_tenant_absences(tenant)
-                total_notified += notified
-        except Exception as e:
-            logger.error(
-                f"Error checking absences for {tenant.schema_name}: {e}"
-            )
 
-    logger.info(f"Consecutive absence check complete: {total_notified} notifications sent")
-    return {'total_notified': total_notified}
+def _notify_tenant_absences(tenant):
+    """Fan-out entry point: absence notifications for one tenant."""
+    notified = _process_tenant_absences(tenant)
+    logger.info(f"[{tenant.schema_name}] Consecutive absence check complete: {notified} notifications sent")
+    return {'total_notified': notified}
 
 
 def _process_tenant_absences(tenant):
@@ -109,6 +101,9 @@ def _process_tenant_absences(tenant):
     for sid, d in absent_records:
         absent_dates_by_student[sid].add(d)
 
+    from students.contacts import get_guardian_contacts
+    contacts = get_guardian_contacts(absent_student_ids)
+
     for student in active_students:
         student_absent_dates = absent_dates_by_student.get(student.id, set())
         absent_count = len(student_absent_dates)
@@ -124,12 +119,12 @@ def _process_tenant_absences(tenant):
             continue
 
         # Get guardian and notification preference
-        guardian = student.get_primary_guardian() if hasattr(student, 'get_primary_guardian') else None
-        phone = getattr(student, 'guardian_phone', None) or getattr(student, 'parent_phone', None)
-        if not phone:
+        contact = contacts.get(student.id)
+        if not contact or not contact['phone']:
             continue
+        phone = contact['phone']
 
-        pref = getattr(guardian, 'notification_preference', 'sms') if guardian else 'sms'
+        pref = contact['notification_preference'] or 'sms'
         if pref == 'none':
             continue
 
@@ -147,13 +142,13 @@ def _process_tenant_absences(tenant):
         try:
             if pref in ('sms', 'both'):
                 send_sms(phone, message)
-            if pref in ('email', 'both') and guardian and guardian.email:
+            if pref in ('email', 'both') and contact['email']:
                 from django.core.mail import send_mail
                 send_mail(
                     subject=f"Absence Alert - {student.first_name}",
                     message=message,
                     from_email=None,
-                    recipient_list=[guardian.email],
+                    recipient_list=[contact['email']],
                     fail_silently=True,
                 )
             notified += 1
@@ -35,7 +35,7 @@ def format_phone_ghana(phone):
     return normalized.lstrip('+')
 
 
-def send_via_arkesel(recipient, message, sender_id=None, api_key=None):
+def send_via_arkesel(recipient, message, sender_id=None, api_key=None, session=None):
     """
     Send SMS via Arkesel API v2.
     API Documentation: https://developers.arkesel.com/
@@ -57,7 +57,7 @@ def send_via_arkesel(recipient, message, sender_id=None, api_key=None):
         'recipients': [recipient],
     }
 
-    response = requests.post(ARKESEL_API_URL, json=payload, headers=headers, timeout=30)
+    response = (session or requests).post(ARKESEL_API_URL, json=payload, headers=headers, timeout=30)
     response.raise_for_status()
 
     result = response.json()
@@ -67,7 +67,37 @@ def send_via_arkesel(recipient, message, sender_id=None, api_key=None):
     return result
 
 
-def send_via_hubtel(recipient, message, sender_id=None, api_key=None):
+def send_batch_via_arkesel(recipients, message, sender_id=None, api_key=None, session=None):
+    """
+    Send the same SMS to several recipients in one Arkesel API v2 request.
+
+    The request succeeds or fails as a whole.
+    """
+    if not api_key:
+        raise ValueError("Arkesel API key is required")
+
+    headers = {
+        'api-key': api_key,
+        'Content-Type': 'application/json',
+    }
+
+    payload = {
+        'sender': (sender_id or 'SchoolSMS')[:11],
+        'message': message,
+        'recipients': [format_phone_ghana(recipient) for recipient in recipients],
+    }
+
+    response = (session or requests).post(ARKESEL_API_URL, json=payload, headers=headers, timeout=30)
+    response.raise_for_status()
+
+    result = response.json()
+    if result.get('status') != 'success':
+        raise ValueError(f"Arkesel API error: {result.get('message', 'Unknown error')}")
+
+    return result
+
+
+def send_via_hubtel(recipient, message, sender_id=None, api_key=None, session=None):
     """
     Send SMS via Hubtel API.
     API Documentation: https://developers.hubtel.com/
@@ -89,7 +119,7 @@ def send_via_hubtel(recipient, message, sender_id=None, api_key=None):
         'Content': message,
     }
 
-    response = requests.get(
+    response = (session or requests).get(
         HUBTEL_API_URL,
         params=params,
         auth=tuple(api_key.split(':', 1)),
@@ -104,7 +134,7 @@ def send_via_hubtel(recipient, message, sender_id=None, api_key=None):
     return result
 
 
-def send_via_africastalking(recipient, message, sender_id=None, api_key=None):
+def send_via_africastalking(recipient, message, sender_id=None, api_key=None, session=None):
     """
     Send SMS via Africa's Talking REST API (no SDK, avoids global state).
     API Documentation: https://africastalking.com/docs/sms
@@ -139,7 +169,7 @@ def send_via_africastalking(recipient, message, sender_id=None, api_key=None):
     if sender:
         payload['from'] = sender
 
-    response = requests.post(api_url, data=payload, headers=headers, timeout=30)
+    response = (session or requests).post(api_url, data=payload, headers=headers, timeout=30)
     response.raise_for_status()
 
     result = response.json()
@@ -155,6 +185,59 @@ def send_via_africastalking(recipient, message, sender_id=None, api_key=None):
     raise ValueError("Africa's Talking: No recipients in response")
 
 
+def send_batch_via_africastalking(recipients, message, sender_id=None, api_key=None, session=None):
+    """
+    Send the same SMS to several recipients in one Africa's Talking request.
+
+    Returns:
+        list of {'success', 'response' or 'error'} dicts, one per recipient
+    """
+    if not api_key:
+        raise ValueError("Africa's Talking API key is required")
+
+    if ':' not in api_key:
+        raise ValueError("Africa's Talking API key must be in format 'username:api_key'")
+
+    username, at_api_key = api_key.split(':', 1)
+
+    numbers = ['+' + format_phone_ghana(recipient).lstrip('+') for recipient in recipients]
+    api_url = AT_SANDBOX_URL if username == 'sandbox' else AT_API_URL
+
+    headers = {
+        'apiKey': at_api_key,
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'Accept': 'application/json',
+    }
+
+    payload = {
+        'username': username,
+        'to': ','.join(numbers),
+        'message': message,
+    }
+    if sender_id:
+        payload['from'] = sender_id[:11]
+
+    response = (session or requests).post(api_url, data=payload, headers=headers, timeout=30)
+    response.raise_for_status()
+
+    result = response.json()
+    by_number = {
+        recipient_data.get('number'): recipient_data
+        for recipient_data in result.get('SMSMessageData', {}).get('Recipients', [])
+    }
+
+    statuses = []
+    for number in numbers:
+        recipient_data = by_number.get(number)
+        if recipient_data is None:
+            statuses.append({'success': False, 'error': "Africa's Talking: No recipient in response"})
+        elif recipient_data.get('status') == 'Success':
+            statuses.append({'success': True, 'response': recipient_data})
+        else:
+            statuses.append({'success': False, 'error': f"Africa's Talking error: {recipient_data.get('status')}"})
+    return statuses
+
+
 def get_school_sms_settings():
     """
     Get SMS settings from SchoolSettings model.
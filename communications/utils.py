@@ -234,7 +234,8 @@ def validate_phone_number(phone):
     return phone
 
 
-def send_sms(to_phone, message, student=None, message_type='general', created_by=None):
+def send_sms(to_phone, message, student=None, message_type='general', created_by=None,
+             recipient_name=None):
     """
     Queue an SMS message for delivery.
 
@@ -244,6 +245,8 @@ def send_sms(to_phone, message, student=None, message_type='general', created_by
         student: Optional Student instance to link message to
         message_type: Type of message (general, attendance, fee, announcement, report)
         created_by: Optional User who initiated the send
+        recipient_name: Optional recipient name; looked up from the
+            student's primary guardian when not given
 
     Returns:
         dict: Result with 'success', 'message_id', 'error' keys
@@ -272,18 +275,20 @@ def send_sms(to_phone, message, student=None, message_type='general', created_by
 
         # Create SMSMessage record for tracking
         # Get recipient name from student's primary guardian if available
-        recipient_name = ''
-        if student:
+        if recipient_name is None and student:
+            recipient_name = ''
             try:
-                guardian = student.get_primary_guardian()
-                if guardian:
-                    recipient_name = guardian.full_name
+                from students.contacts import get_guardian_contact
+
+                contact = get_guardian_contact(student)
+                if contact:
+                    recipient_name = contact['name']
             except Exception:
                 pass
 
         sms_record = SMSMessage.objects.create(
             recipient_phone=validated_phone,
-            recipient_name=recipient_name,
+            recipient_name=recipient_name or '',
             student=student,
             message=message,
             message_type=message_type,
@@ -367,4 +372,103 @@ def send_sms_sync(to_phone, message, sender_id=None, api_key=None):
 
     except Exception as e:
         logger.error(f"SMS send error to {_mask_phone(to_phone)}: {e}")
-        return {'success': False, 'error': str(e)}
\ No newline at end of file
+        return {'success': False, 'error': str(e)}
+
+# Recipients per provider request when the same text goes to many numbers
+SMS_BATCH_SIZE = 100
+
+
+def send_sms_batch(messages, sender_id=None, api_key=None):
+    """
+    Send many SMS synchronously (blocking). Use within Celery tasks.
+
+    SMS settings are loaded once and every request goes over one HTTP
+    session. Messages with identical text are sent to up to SMS_BATCH_SIZE
+    recipients per request on providers with a multi-recipient API
+    (Arkesel, Africa's Talking); Hubtel messages are sent one by one.
+
+    Args:
+        messages: list of (to_phone, message) pairs
+        sender_id: Optional sender ID override
+        api_key: Optional API key override
+
+    Returns:
+        list: send_sms_sync() style result dicts, in the order of messages
+    """
+    import requests
+    from .tasks import (
+        get_school_sms_settings, send_batch_via_africastalking, send_batch_via_arkesel, send_via_hubtel,
+    )
+
+    results = [None] * len(messages)
+    by_text = {}
+    for index, (to_phone, message) in enumerate(messages):
+        validated_phone = normalize_phone_number(to_phone) if to_phone else None
+        if validated_phone:
+            by_text.setdefault(message, []).append((index, validated_phone))
+        else:
+            results[index] = {'success': False, 'error': 'Invalid phone number'}
+
+    if not by_text:
+        return results
+
+    def _fill(result):
+        for index, result_value in enumerate(results):
+            if result_value is None:
+                results[index] = dict(result)
+        return results
+
+    sms_settings = get_school_sms_settings()
+    if not sms_settings['enabled']:
+        logger.info(f"[SMS DISABLED] {len(messages)} messages not sent")
+        return _fill({'success': False, 'error': 'SMS not enabled for this school'})
+
+    backend = sms_settings['backend']
+    sender = sender_id or sms_settings['sender_id']
+    key = api_key or sms_settings['api_key']
+
+    provider_names = {'arkesel': 'Arkesel', 'hubtel': 'Hubtel', 'africastalking': "Africa's Talking"}
+    if backend not in provider_names:
+        # Console backend
+        for recipients in by_text.values():
+            for index, validated_phone in recipients:
+                logger.info(f"[CONSOLE SMS] To: {_mask_phone(validated_phone)}, From: {sender}")
+        return _fill({'success': True, 'response': 'logged', 'provider': 'console'})
+
+    if not key:
+        return _fill({'success': False, 'error': f'{provider_names[backend]} API key not configured'})
+
+    with requests.Session() as session:
+        for message, recipients in by_text.items():
+            for start in range(0, len(recipients), SMS_BATCH_SIZE):
+                batch = recipients[start:start + SMS_BATCH_SIZE]
+                phones = [validated_phone for _, validated_phone in batch]
+                try:
+                    if backend == 'arkesel':
+                        response = send_batch_via_arkesel(
+                            phones, message, sender_id=sender, api_key=key, session=session
+                        )
+                        statuses = [{'success': True, 'response': response}] * len(batch)
+                    elif backend == 'africastalking':
+                        statuses = send_batch_via_africastalking(
+                            phones, message, sender_id=sender, api_key=key, session=session
+                        )
+                    else:
+                        statuses = []
+                        for validated_phone in phones:
+                            try:
+                                response = send_via_hubtel(
+                                    validated_phone, message, sender_id=sender, api_key=key, session=session
+                                )
+                                statuses.append({'success': True, 'response': response})
+                            except Exception as e:
+                                logger.error(f"SMS send error to {_mask_phone(validated_phone)}: {e}")
+                                statuses.append({'success': False, 'error': str(e)})
+                except Exception as e:
+                    logger.error(f"SMS batch send error ({len(batch)} recipients): {e}")
+                    statuses = [{'success': False, 'error': str(e)}] * len(batch)
+
+                for (index, _), status in zip(batch, statuses):
+                    results[index] = {**status, 'provider': backend}
+
+    return results
@@ -302,6 +302,10 @@ CELERY_TIMEZONE = 'UTC'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 
+# Periodic tasks run per tenant in parallel lanes (see core/tasks.py)
+TENANT_FANOUT_CONCURRENCY = int(os.getenv('TENANT_FANOUT_CONCURRENCY', '8'))  # tenants processed at once
+TENANT_FANOUT_TIMEOUT = int(os.getenv('TENANT_FANOUT_TIMEOUT', '300'))  # seconds per tenant
+
 # --- 7.1 CACHING ---
 # Use Redis for caching to ensure cache is shared across workers and Celery
 # Use database 1 for cache (database 0 is used by Celery)
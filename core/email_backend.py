@@ -119,5 +119,6 @@ class TenantEmailBackend:
 
     def send_messages(self, email_messages):
         """Send one or more EmailMessage objects and return the number sent."""
-        backend = self._get_backend()
+        # Reuse the connection opened by open() so bulk senders share one session
+        backend = self._backend or self._get_backend()
         return backend.send_messages(email_messages)
@@ -223,12 +223,12 @@ class AcademicYear(models.Model):
             self._purge_old_audit_logs()
 
     def _purge_old_audit_logs(self):
-        """Delete score audit logs older than 6 months."""
+        """Drop score audit log partitions older than 6 months."""
         from datetime import timedelta
         try:
-            from gradebook.models import ScoreAuditLog
+            from gradebook.audit_log import drop_partitions_before
             cutoff = timezone.now() - timedelta(days=180)
-            deleted, _ = ScoreAuditLog.objects.filter(created_at__lt=cutoff).delete()
+            deleted = sum(rows for _, _, rows in drop_partitions_before(cutoff))
             if deleted:
                 logger.info(f'Purged {deleted} old score audit log(s) for {connection.schema_name}')
         except Exception as e:
@@ -354,6 +354,32 @@ class Term(models.Model):
                 cache.set(cache_key, term, 60 * 60)  # Cache for 1 hour
         return term
 
+    @classmethod
+    def locked_for_score_writes(cls, term_ids):
+        """
+        Return the ids of the given terms whose grades are locked.
+
+        Takes a shared (FOR SHARE) lock on each term row until the current
+        transaction ends, so it must be called inside transaction.atomic()
+        before writing scores. Shared locks don't conflict with each other,
+        so concurrent score writers don't queue behind one row lock. They do
+        conflict with the UPDATE in lock_grades(): locking waits for
+        in-flight score writes to commit, and score writes that start after
+        it wait for the lock to commit and then see grades_locked=True.
+        """
+        term_ids = sorted({str(term_id) for term_id in term_ids})
+        if not term_ids:
+            return set()
+        table = connection.ops.quote_name(cls._meta.db_table)
+        with connection.cursor() as cursor:
+            # Rows are locked in id order so writers never deadlock each other
+            cursor.execute(
+                f'SELECT id, grades_locked FROM {table} '
+                f'WHERE id = ANY(%s::uuid[]) ORDER BY id FOR SHARE',
+                [term_ids],
+            )
+            return {pk for pk, locked in cursor.fetchall() if locked}
+
     def lock_grades(self, user):
         """Lock grades for this term."""
         from django.utils import timezone
@@ -685,8 +711,21 @@ class DocumentVerification(models.Model):
     @classmethod
     def create_for_document(cls, document_type, title, user=None, term=None, academic_year=None,
                             student=None, teacher=None):
+        """Create and save a verification record for a document (see build_for_document)."""
+        verification = cls.build_for_document(
+            document_type, title, user=user, term=term, academic_year=academic_year,
+            student=student, teacher=teacher,
+        )
+        verification.save(force_insert=True)
+        return verification
+
+    @classmethod
+    def build_for_document(cls, document_type, title, user=None, term=None, academic_year=None,
+                           student=None, teacher=None):
         """
-        Create a verification record for a document.
+        Build an unsaved verification record for a document.
+
+        Bulk exports build many and save them with bulk_create.
 
         Args:
             document_type: One of DocumentType choices
@@ -698,7 +737,7 @@ class DocumentVerification(models.Model):
             teacher: Teacher model instance (optional)
 
         Returns:
-            DocumentVerification instance
+            Unsaved DocumentVerification instance
         """
         # Handle both student and teacher documents
         if student:
@@ -712,7 +751,7 @@ class DocumentVerification(models.Model):
         else:
             raise ValueError("Either student or teacher must be provided")
 
-        return cls.objects.create(
+        return cls(
             document_type=document_type,
             student_name=person_name,  # Using same field for both (name field)
             student_admission_number=person_id_number,  # Using same field for both (ID number field)
@@ -101,6 +101,58 @@ def notify_guardians_bulk(students, title, message, category='system',
     return result
 
 
+def notify_guardians_each(messages, title, category='system',
+                          notification_type='info', icon='', link=''):
+    """
+    Send each message to its student's primary guardians, in bulk.
+
+    Unlike notify_guardians_bulk, messages differ per student and are not
+    deduplicated: a student may have several messages (e.g. one per
+    payment) and a guardian of two students gets both.
+
+    Args:
+        messages: list of (student_id, message text) pairs
+    """
+    from collections import defaultdict
+    from django.core.cache import cache
+    from students.models import StudentGuardian
+
+    messages = list(messages)
+    guardian_users = defaultdict(list)
+    for student_id, user_id in StudentGuardian.objects.filter(
+        student_id__in={student_id for student_id, _ in messages},
+        is_primary=True,
+        guardian__user__isnull=False,
+    ).values_list('student_id', 'guardian__user_id'):
+        guardian_users[student_id].append(user_id)
+
+    notifications = []
+    user_ids = set()
+    for student_id, message in messages:
+        for user_id in guardian_users.get(student_id, ()):
+            user_ids.add(user_id)
+            notifications.append(Notification(
+                user_id=user_id,
+                title=title,
+                message=message,
+                notification_type=notification_type,
+                category=category,
+                icon=icon,
+                link=link,
+            ))
+
+    if not notifications:
+        return []
+
+    result = Notification.objects.bulk_create(notifications)
+
+    for user_id in user_ids:
+        cache_key = f'notif_unread_{connection.schema_name}_{user_id}'
+        cache.delete(cache_key)
+
+    return result
+
+
 def notify_students_bulk(students, title, message, category='system',
                           notification_type='info', icon='', link=''):
     """
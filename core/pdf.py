@@ -0,0 +1,219 @@
+"""
+Shared WeasyPrint rendering for report cards, transcripts and invoices.
+
+Rendering used to rebuild everything per document: the template's <style>
+block was re-parsed, fonts were reconfigured and the school logo and
+signature were read and base64-encoded again. render_pdf() keeps that state
+per worker process instead:
+
+- one FontConfiguration per process;
+- each document's stylesheet (a CSS template rendered with the school's
+  brand colours) is parsed into a weasyprint CSS object once per tenant;
+- branding images are encoded once per tenant (branding_assets()) and
+  WeasyPrint's image cache is shared, so the embedded logo and signature
+  are decoded once rather than per document.
+
+Tenant state is keyed by the school's branding version (updated_at plus the
+logo and signature file names), so a new logo or signature saved by any
+process is picked up on the next render.
+"""
+import base64
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.db import connection
+from django.template.loader import render_to_string
+
+logger = logging.getLogger(__name__)
+
+# WeasyPrint's image cache also holds per-document images (student photos,
+# QR codes); clear it past this many entries to bound worker memory.
+IMAGE_CACHE_MAX_ENTRIES = 256
+
+# Threads used by load_images_base64() to read image files
+IMAGE_LOAD_WORKERS = 8
+
+_MIME_TYPES = {
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'webp': 'image/webp',
+}
+
+_lock = threading.Lock()
+_font_config = None
+_tenant_states = {}
+
+
+class _TenantRenderState:
+    """Parsed stylesheets, branding and image cache for one tenant."""
+
+    def __init__(self, version):
+        self.version = version
+        self.stylesheets = {}
+        self.image_cache = {}
+        self.branding = None
+
+
+def _branding_version(school):
+    if school is None:
+        return None
+    return (
+        school.pk,
+        getattr(school, 'updated_at', None),
+        school.logo.name if school.logo else '',
+        school.headmaster_signature.name if school.headmaster_signature else '',
+    )
+
+
+def _get_font_config():
+    global _font_config
+    if _font_config is None:
+        from weasyprint.text.fonts import FontConfiguration
+        _font_config = FontConfiguration()
+    return _font_config
+
+
+def _get_state(tenant_schema, school):
+    version = _branding_version(school)
+    with _lock:
+        state = _tenant_states.get(tenant_schema)
+        if state is None or state.version != version:
+            state = _TenantRenderState(version)
+            _tenant_states[tenant_schema] = state
+        return state
+
+
+def clear_render_state(tenant_schema=None):
+    """Drop cached render state for one tenant, or for all tenants."""
+    with _lock:
+        if tenant_schema is None:
+            _tenant_states.clear()
+        else:
+            _tenant_states.pop(tenant_schema, None)
+
+
+def branding_assets(school, tenant_schema=None):
+    """
+    Return the school's logo and headmaster signature as data URIs.
+
+    Encoded once per worker and tenant, and re-encoded when the school's
+    branding changes.
+
+    Returns:
+        dict: {'logo_base64': str or None, 'signature_base64': str or None}
+    """
+    from gradebook.utils import encode_image_base64, encode_logo_base64
+
+    tenant_schema = tenant_schema or connection.schema_name
+    state = _get_state(tenant_schema, school)
+    if state.branding is None:
+        logo = signature = None
+        if school is not None:
+            if school.logo:
+                logo = (
+                    encode_image_base64(school.logo)
+                    or encode_logo_base64(school.logo, tenant_schema)
+                )
+            if school.headmaster_signature:
+                signature = encode_image_base64(school.headmaster_signature)
+        state.branding = {'logo_base64': logo, 'signature_base64': signature}
+    return dict(state.branding)
+
+
+def _read_data_uri(path):
+    try:
+        with open(path, 'rb') as fh:
+            encoded = base64.b64encode(fh.read()).decode('utf-8')
+    except OSError as e:
+        logger.debug(f"Error reading image {path}: {e}")
+        return None
+    mime_type = _MIME_TYPES.get(path.lower().rsplit('.', 1)[-1], 'image/jpeg')
+    return f"data:{mime_type};base64,{encoded}"
+
+
+def load_images_base64(image_fields):
+    """
+    Encode many ImageFields as data URIs, reading the files concurrently.
+
+    File paths are resolved on the calling thread (tenant storage depends on
+    the current connection's schema) and the files are read by a small
+    thread pool. Fields on storage without local paths fall back to
+    encode_image_base64.
+
+    Returns:
+        list: Data URI or None for each field, in order.
+    """
+    from gradebook.utils import encode_image_base64
+
+    image_fields = list(image_fields)
+    results = [None] * len(image_fields)
+    paths = {}
+    for i, field in enumerate(image_fields):
+        if not field or not field.name:
+            continue
+        try:
+            paths[i] = field.path
+        except NotImplementedError:
+            results[i] = encode_image_base64(field)
+
+    if paths:
+        workers = min(IMAGE_LOAD_WORKERS, len(paths))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for i, data_uri in zip(paths, executor.map(_read_data_uri, paths.values())):
+                results[i] = data_uri
+    return results
+
+
+def render_pdf(template_name, context, stylesheet=None, school=None, tenant_schema=None):
+    """
+    Render a template to PDF, reusing fonts, stylesheets and images.
+
+    Args:
+        template_name: HTML template. It is rendered with
+            external_stylesheet=True and should skip its inline <style>.
+        context: Template context
+        stylesheet: Optional CSS template name, rendered with {'school': school}
+            and parsed once per worker and tenant.
+        school: School whose branding the document uses
+        tenant_schema: Defaults to the current connection's schema
+
+    Returns:
+        BytesIO: PDF content as bytes buffer
+    """
+    from weasyprint import CSS, HTML
+
+    tenant_schema = tenant_schema or connection.schema_name
+    state = _get_state(tenant_schema, school)
+    font_config = _get_font_config()
+    base_url = str(settings.BASE_DIR)
+
+    stylesheets = []
+    if stylesheet:
+        css = state.stylesheets.get(stylesheet)
+        if css is None:
+            css = CSS(
+                string=render_to_string(stylesheet, {'school': school}),
+                base_url=base_url,
+                font_config=font_config,
+            )
+            state.stylesheets[stylesheet] = css
+        stylesheets.append(css)
+
+    if len(state.image_cache) > IMAGE_CACHE_MAX_ENTRIES:
+        state.image_cache.clear()
+
+    html_string = render_to_string(template_name, {**context, 'external_stylesheet': True})
+    pdf_buffer = BytesIO()
+    HTML(string=html_string, base_url=base_url).write_pdf(
+        pdf_buffer,
+        stylesheets=stylesheets,
+        font_config=font_config,
+        cache=state.image_cache,
+    )
+    pdf_buffer.seek(0)
+    return pdf_buffer
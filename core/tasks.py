@@ -0,0 +1,136 @@
+"""
+Cross-tenant fan-out for periodic tasks.
+
+A periodic task that visits every school should not walk the tenants one
+after another: a slow school delays the rest and the run overshoots its
+beat period. fan_out_to_tenants() spreads the tenants over
+TENANT_FANOUT_CONCURRENCY lanes that run in parallel. Each lane is a chain
+of run_tenant_step tasks, one per tenant, and each step runs under its own
+soft time limit (TENANT_FANOUT_TIMEOUT). The lanes are the header of a
+chord whose callback, collect_tenant_results, reduces the per-tenant
+results into the periodic task's result.
+
+Per-tenant work is a plain function taking the School, referenced by
+dotted path so it can be sent to the workers:
+
+    @shared_task(bind=True)
+    def check_overdue_exeats(self):
+        return fan_out_to_tenants(self, 'students.tasks._check_overdue_exeats_for_tenant')
+
+Errors and timeouts in one tenant are logged and recorded in the results
+without stopping the other tenants.
+"""
+import logging
+
+from celery import chain, chord, shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+from django.utils.module_loading import import_string
+from django_tenants.utils import tenant_context
+
+logger = logging.getLogger(__name__)
+
+
+def sum_counts(results):
+    """
+    Default reducer: add up the numbers each tenant returned.
+
+    Args:
+        results: dict mapping schema name to the tenant function's result dict
+
+    Returns:
+        dict with every numeric key summed across tenants, plus 'tenants'
+        (tenants processed) and 'failed' (schema names that errored)
+    """
+    summary = {}
+    failed = []
+    for schema_name, result in results.items():
+        if not isinstance(result, dict):
+            continue
+        if 'error' in result:
+            failed.append(schema_name)
+            continue
+        for key, value in result.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                summary[key] = summary.get(key, 0) + value
+    summary['tenants'] = len(results) - len(failed)
+    summary['failed'] = sorted(failed)
+    return summary
+
+
+def fan_out_to_tenants(task, func_path, kwargs=None, reducer='core.tasks.sum_counts',
+                       concurrency=None, timeout=None):
+    """
+    Run func_path(tenant, **kwargs) for every tenant in parallel.
+
+    task replaces itself with the fan-out chord, so its result is the
+    reducer's summary of every tenant's result.
+
+    Args:
+        task: The bound periodic task
+        func_path: Dotted path of the per-tenant function
+        kwargs: Extra keyword arguments for the function (JSON-serialisable)
+        reducer: Dotted path of a function reducing {schema_name: result}
+        concurrency: Tenants processed at once (TENANT_FANOUT_CONCURRENCY)
+        timeout: Soft time limit per tenant in seconds (TENANT_FANOUT_TIMEOUT)
+    """
+    from schools.models import School
+
+    schema_names = list(
+        School.objects.exclude(schema_name='public').order_by('schema_name')
+        .values_list('schema_name', flat=True)
+    )
+    if not schema_names:
+        return import_string(reducer)({})
+
+    concurrency = concurrency or settings.TENANT_FANOUT_CONCURRENCY
+    timeout = timeout or settings.TENANT_FANOUT_TIMEOUT
+    lanes = [schema_names[i::concurrency] for i in range(min(concurrency, len(schema_names)))]
+
+    def _step(schema_name, first):
+        args = (func_path, schema_name, kwargs or {})
+        signature = run_tenant_step.s({}, *args) if first else run_tenant_step.s(*args)
+        # Hard limit a little later so the soft limit can be handled
+        return signature.set(soft_time_limit=timeout, time_limit=timeout + 30)
+
+    return task.replace(chord(
+        (
+            chain(*(_step(schema_name, i == 0) for i, schema_name in enumerate(lane)))
+            for lane in lanes
+        ),
+        collect_tenant_results.s(func_path, reducer),
+    ))
+
+
+@shared_task(bind=True, max_retries=0)
+def run_tenant_step(self, results, func_path, schema_name, kwargs):
+    """
+    Run one tenant's work in a fan-out lane.
+
+    Returns the lane's results so far with this tenant's result added, so
+    the last step of each lane carries the whole lane to the chord.
+    """
+    from schools.models import School
+
+    try:
+        tenant = School.objects.get(schema_name=schema_name)
+        with tenant_context(tenant):
+            results[schema_name] = import_string(func_path)(tenant, **kwargs)
+    except SoftTimeLimitExceeded:
+        logger.error(f"[{schema_name}] {func_path} timed out")
+        results[schema_name] = {'error': 'timeout'}
+    except Exception as e:
+        logger.error(f"[{schema_name}] {func_path} failed: {e}")
+        results[schema_name] = {'error': str(e)[:200]}
+    return results
+
+
+@shared_task(bind=True, max_retries=0)
+def collect_tenant_results(self, lane_results, func_path, reducer):
+    """Chord callback: merge every lane's results and reduce them."""
+    results = {}
+    for lane in lane_results:
+        results.update(lane)
+    summary = import_string(reducer)(results)
+    logger.info(f"{func_path} finished for {len(results)} tenants: {summary}")
+    return summary
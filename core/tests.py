@@ -1,6 +1,6 @@
 from datetime import date
 
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
@@ -202,6 +202,20 @@ class TermModelTests(TenantTestCase):
         self.assertIsNone(term.grades_locked_at)
         self.assertIsNone(term.grades_locked_by)
 
+    def test_locked_for_score_writes(self):
+        from django.db import transaction
+
+        first = self._create_term()
+        second = self._create_term(name='Second Term', term_number=2)
+        user = User.objects.create_user(email='admin@test.com', password='pass')
+        second.lock_grades(user)
+
+        with transaction.atomic():
+            locked = Term.locked_for_score_writes([first.pk, str(second.pk), second.pk])
+
+        self.assertEqual(locked, {second.pk})
+        self.assertEqual(Term.locked_for_score_writes([]), set())
+
     def test_unique_together_academic_year_term_number(self):
         self._create_term(term_number=1)
         with self.assertRaises(Exception):
@@ -298,3 +312,194 @@ class DocumentVerificationModelTests(TenantTestCase):
         )
         self.assertIn(doc.verification_code, str(doc))
         self.assertIn('Report Card', str(doc))
+
+
+class PdfRenderReuseTests(SimpleTestCase):
+    """core.pdf.render_pdf parses each tenant's stylesheet and encodes its
+    branding once per worker, and starts over when the branding changes."""
+
+    def setUp(self):
+        import sys
+        from types import ModuleType
+        from unittest.mock import patch
+        from core import pdf
+
+        self.parsed = []
+        self.rendered = []
+        parsed, rendered = self.parsed, self.rendered
+
+        class FakeCSS:
+            def __init__(self, string, **kwargs):
+                parsed.append(string)
+
+        class FakeHTML:
+            def __init__(self, string, base_url=None):
+                self.string = string
+
+            def write_pdf(self, target, stylesheets=None, **options):
+                rendered.append((self.string, stylesheets))
+                target.write(b'%PDF')
+
+        weasyprint = ModuleType('weasyprint')
+        weasyprint.HTML = FakeHTML
+        weasyprint.CSS = FakeCSS
+        original = sys.modules.get('weasyprint')
+        sys.modules['weasyprint'] = weasyprint
+        if original is None:
+            self.addCleanup(sys.modules.pop, 'weasyprint', None)
+        else:
+            self.addCleanup(sys.modules.__setitem__, 'weasyprint', original)
+
+        font_patch = patch.object(pdf, '_font_config', object())
+        font_patch.start()
+        self.addCleanup(font_patch.stop)
+        self.addCleanup(pdf.clear_render_state)
+
+    def _school(self, **kwargs):
+        from datetime import datetime
+        from types import SimpleNamespace
+
+        defaults = {
+            'pk': 1, 'updated_at': datetime(2025, 1, 1), 'logo': None,
+            'headmaster_signature': None, 'primary_color': '#123456',
+        }
+        return SimpleNamespace(**{**defaults, **kwargs})
+
+    def _render(self, school):
+        from core.pdf import render_pdf
+
+        return render_pdf(
+            'finance/invoice_pdf.html', {}, stylesheet='gradebook/transcript_pdf.css',
+            school=school, tenant_schema='school_a',
+        )
+
+    def test_stylesheet_parsed_once_per_tenant(self):
+        school = self._school()
+        for _ in range(3):
+            self.assertEqual(self._render(school).getvalue(), b'%PDF')
+
+        self.assertEqual(len(self.parsed), 1)
+        self.assertIn('#123456', self.parsed[0])
+        # The inline <style> is skipped when the stylesheet is passed separately
+        html, stylesheets = self.rendered[-1]
+        self.assertNotIn('<style>', html)
+        self.assertEqual(len(stylesheets), 1)
+
+    def test_branding_change_reparses_stylesheet(self):
+        from datetime import datetime
+
+        self._render(self._school())
+        self._render(self._school(primary_color='#abcdef', updated_at=datetime(2025, 2, 1)))
+
+        self.assertEqual(len(self.parsed), 2)
+        self.assertIn('#abcdef', self.parsed[1])
+
+    def test_branding_assets_encoded_once(self):
+        from types import SimpleNamespace
+        from unittest.mock import patch
+        from core.pdf import branding_assets
+
+        logo = SimpleNamespace(name='logo.png')
+        with patch('gradebook.utils.encode_image_base64', return_value='data:image/png;base64,AA') as encode:
+            for _ in range(3):
+                assets = branding_assets(self._school(logo=logo), 'school_a')
+            branding_assets(self._school(logo=SimpleNamespace(name='logo_new.png')), 'school_a')
+
+        self.assertEqual(assets['logo_base64'], 'data:image/png;base64,AA')
+        self.assertIsNone(assets['signature_base64'])
+        # Once for the first logo, once more after it was replaced
+        self.assertEqual(encode.call_count, 2)
+
+    def test_load_images_base64_keeps_order(self):
+        import os
+        import shutil
+        import tempfile
+        from types import SimpleNamespace
+        from core.pdf import load_images_base64
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        fields = []
+        for i in range(3):
+            path = os.path.join(directory, f'photo{i}.png')
+            with open(path, 'wb') as fh:
+                fh.write(bytes([i]))
+            fields.append(SimpleNamespace(name=f'photo{i}.png', path=path))
+        fields.insert(1, None)
+
+        self.assertEqual(load_images_base64(fields), [
+            'data:image/png;base64,AA==',
+            None,
+            'data:image/png;base64,AQ==',
+            'data:image/png;base64,Ag==',
+        ])
+
+
+class TenantFanOutTests(TenantTestCase):
+    """Periodic tasks run their per-tenant work through fan_out_to_tenants
+    and reduce the tenants' results into one summary."""
+
+    def setUp(self):
+        super().setUp()
+        from config import celery_app
+
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', False)
+
+    def test_sum_counts_adds_numbers_and_lists_failures(self):
+        from core.tasks import sum_counts
+
+        self.assertEqual(
+            sum_counts({
+                'school_a': {'overdue': 2, 'notified': 1},
+                'school_b': {'overdue': 3, 'notified': 0, 'note': 'x'},
+                'school_c': {'error': 'timeout'},
+            }),
+            {'overdue': 5, 'notified': 1, 'tenants': 2, 'failed': ['school_c']},
+        )
+
+    def test_periodic_task_collects_tenant_results(self):
+        from students.tasks import check_overdue_exeats
+
+        result = check_overdue_exeats.apply().get()
+
+        self.assertEqual(result['failed'], [])
+        self.assertGreaterEqual(result['tenants'], 1)
+        self.assertEqual(result['overdue'], 0)
+
+    def test_failing_tenant_does_not_stop_the_run(self):
+        from unittest.mock import patch
+        from students.tasks import check_overdue_exeats
+
+        with patch('students.tasks._check_overdue_exeats_for_tenant', side_effect=RuntimeError('boom')):
+            result = check_overdue_exeats.apply().get()
+
+        self.assertIn(self.tenant.schema_name, result['failed'])
+
+
+class NotifyGuardiansEachTests(TenantTestCase):
+    """notify_guardians_each sends every message to its student's primary
+    guardians, including several messages for one student."""
+
+    def test_each_message_reaches_the_primary_guardian(self):
+        from core.models import Notification
+        from core.notifications import notify_guardians_each
+        from students.models import Guardian, Student, StudentGuardian
+
+        student = Student.objects.create(
+            first_name='Kwame', last_name='Mensah', date_of_birth=date(2010, 5, 15),
+            gender='M', admission_number='STU-NG-001', admission_date=date(2024, 9, 1),
+        )
+        user = User.objects.create_user(email='parent@school.com', password='pass123')
+        guardian = Guardian.objects.create(full_name='Ama Mensah', phone_number='0240000001', user=user)
+        StudentGuardian.objects.create(student=student, guardian=guardian, is_primary=True)
+
+        notify_guardians_each(
+            [(student.pk, 'Payment of GHS 100 received.'), (student.pk, 'Payment of GHS 50 received.')],
+            title='Payment Confirmed',
+        )
+
+        self.assertEqual(
+            sorted(Notification.objects.filter(user=user).values_list('message', flat=True)),
+            ['Payment of GHS 100 received.', 'Payment of GHS 50 received.'],
+        )
@@ -14,7 +14,7 @@ from django.views.decorators.vary import vary_on_headers
 from django.db import connection
 
 from .models import SchoolSettings, AcademicYear, Term
-from .utils import ratelimit, admin_required, htmx_render
+from .utils import ratelimit, admin_required, get_client_ip, htmx_render
 from .forms import (
     SchoolBasicInfoForm,
     SchoolBrandingForm,
@@ -3802,7 +3802,6 @@ def import_scores_confirm(request, class_id, subject_id):
     import json
     from django.http import HttpResponse
     from academics.models import Class, Subject, ClassSubject
-    from gradebook.models import Score
 
     user = request.user
 
@@ -3841,28 +3840,31 @@ def import_scores_confirm(request, class_id, subject_id):
     except json.JSONDecodeError:
         return HttpResponse('<div class="alert alert-error">Invalid session data.</div>')
 
-    # Import scores
-    saved_count = 0
-    updated_count = 0
-
+    # Import scores with batched upserts; recalculation is queued once
     from django.db import transaction
-    with transaction.atomic():
-        for row in import_data:
-            student_id = row['student_id']
-            for score_data in row['scores']:
-                assignment_id = score_data['assignment_id']
-                value = score_data['value']
+    from gradebook import score_import
+    from gradebook.signals import signals_disabled
 
-                score, created = Score.objects.update_or_create(
-                    student_id=student_id,
-                    assignment_id=assignment_id,
-                    defaults={'points': value}
-                )
+    entries = [
+        (row['student_id'], score_data['assignment_id'], str(score_data['value']))
+        for row in import_data
+        for score_data in row['scores']
+    ]
+    user_agent = request.META.get('HTTP_USER_AGENT', '')[:240]
+    with signals_disabled(), transaction.atomic():
+        # Re-check the grade lock now that the import is about to write
+        if current_term and Term.locked_for_score_writes([current_term.pk]):
+            return HttpResponse('<div class="alert alert-warning">Grades are locked for this term.</div>')
+
+        result = score_import.upsert_scores(
+            entries, user=user, ip_address=get_client_ip(request),
+            user_agent=f"BULK_IMPORT: {user_agent}",
+        )
+        if current_term:
+            score_import.queue_recalculation(result['student_ids'], subject.pk, current_term.pk)
 
-                if created:
-                    saved_count += 1
-                else:
-                    updated_count += 1
+    saved_count = result['created']
+    updated_count = result['updated']
 
     # Clear session
     del request.session[session_key]
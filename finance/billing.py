@@ -0,0 +1,223 @@
+"""
+Bulk invoice generation.
+
+Billing a class one create_student_invoice() call at a time re-reads the
+fee structures, the student's scholarships and the last invoice number
+for every student. generate_invoices() does the same work set-based:
+
+- fee structures are read once and resolved once per class
+- scholarships and existing invoices are loaded for a whole batch at once
+- invoice numbers are allocated in one block per batch (see numbering.py)
+- invoices and their items are written with bulk_create
+
+The amounts match create_student_invoice(), which now delegates here.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import FeeStructure, Invoice, InvoiceItem, StudentScholarship
+from .numbering import allocate_numbers
+
+INVOICE_BATCH_SIZE = 500  # students billed per transaction
+
+ZERO = Decimal('0.00')
+
+
+def get_fee_structures(academic_year, term):
+    """Active fee structures of the year that apply to the term or the full year."""
+    return list(
+        FeeStructure.objects.filter(
+            academic_year=academic_year,
+            is_active=True,
+        ).filter(
+            Q(term=term) | Q(term__isnull=True)
+        ).select_related('term')
+    )
+
+
+def structures_for_class(fee_structures, class_obj):
+    """
+    Fee structures that apply to students of a class.
+
+    A structure assigned to a class applies to that class only, one with a
+    level type to every class of that level, and one with neither to all.
+    """
+    applicable = []
+    for structure in fee_structures:
+        if structure.class_assigned_id:
+            if class_obj is not None and structure.class_assigned_id == class_obj.pk:
+                applicable.append(structure)
+        elif structure.level_type:
+            if class_obj is not None and class_obj.level_type == structure.level_type:
+                applicable.append(structure)
+        else:
+            applicable.append(structure)
+    return applicable
+
+
+def _applies_to_student(structure, student):
+    if hasattr(student, 'is_boarding'):
+        if student.is_boarding and not structure.applies_to_boarding:
+            return False
+        if not student.is_boarding and not structure.applies_to_day:
+            return False
+    return True
+
+
+def calculate_discount(subtotal, structures, scholarships):
+    """
+    Total scholarship discount for an invoice, capped at the subtotal.
+
+    Category scholarships apply to the class's structures of those
+    categories, the others to the whole subtotal.
+    """
+    category_subtotals = defaultdict(lambda: ZERO)
+    for structure in structures:
+        category_subtotals[structure.category] += structure.amount
+
+    discount = ZERO
+    for scholarship in scholarships:
+        if scholarship.applies_to_categories:
+            applicable_amount = sum(
+                (category_subtotals[cat] for cat in scholarship.applies_to_categories), ZERO
+            )
+        else:
+            applicable_amount = subtotal
+
+        if scholarship.discount_type == 'FULL':
+            discount += applicable_amount
+        elif scholarship.discount_type == 'PERCENTAGE':
+            discount += applicable_amount * (scholarship.discount_value / Decimal('100'))
+        elif scholarship.discount_type == 'FIXED':
+            discount += scholarship.discount_value
+
+    return min(discount, subtotal)
+
+
+def _bill_batch(students, fee_structures, structures_by_class, academic_year, term,
+                due_date, created_by):
+    from students.models import Student
+
+    student_ids = [student.pk for student in students]
+    scholarships = defaultdict(list)
+
+    with transaction.atomic():
+        # Lock the students so two runs over the same class cannot both bill them.
+        # NO KEY UPDATE still serialises runs but doesn't block rows that only
+        # reference the students (invoices, ledger entries, attendance).
+        list(Student.objects.select_for_update(no_key=True).filter(
+            pk__in=student_ids
+        ).order_by('pk').values_list('pk'))
+        already_billed = set(
+            Invoice.objects.filter(
+                student_id__in=student_ids,
+                academic_year=academic_year,
+                term=term,
+            ).values_list('student_id', flat=True)
+        )
+
+        for ss in StudentScholarship.objects.filter(
+            student_id__in=student_ids,
+            academic_year=academic_year,
+            is_active=True,
+        ).select_related('scholarship'):
+            scholarships[ss.student_id].append(ss.scholarship)
+
+        invoices = []
+        items = []
+        for student in students:
+            if student.pk in already_billed:
+                continue
+
+            class_obj = student.current_class
+            if student.current_class_id not in structures_by_class:
+                structures_by_class[student.current_class_id] = structures_for_class(
+                    fee_structures, class_obj
+                )
+            structures = structures_by_class[student.current_class_id]
+            if not structures:
+                continue
+
+            invoice = Invoice(
+                student=student,
+                academic_year=academic_year,
+                term=term,
+                due_date=due_date,
+                created_by=created_by,
+                status='DRAFT',
+            )
+            subtotal = ZERO
+            for structure in structures:
+                if not _applies_to_student(structure, student):
+                    continue
+                items.append(InvoiceItem(
+                    invoice=invoice,
+                    category=structure.category,
+                    description=structure.get_description(),
+                    amount=structure.amount,
+                ))
+                subtotal += structure.amount
+
+            invoice.subtotal = subtotal
+            invoice.discount = calculate_discount(
+                subtotal, structures, scholarships.get(student.pk, [])
+            )
+            invoice.total_amount = subtotal - invoice.discount
+            invoice.balance = invoice.total_amount
+            invoices.append(invoice)
+
+        if not invoices:
+            return []
+
+        for invoice, number in zip(invoices, allocate_numbers('invoice', len(invoices))):
+            invoice.invoice_number = number
+        Invoice.objects.bulk_create(invoices)
+        InvoiceItem.objects.bulk_create(items)
+
+    return invoices
+
+
+def generate_invoices(students, academic_year, term, due_date, created_by=None,
+                      progress=None, batch_size=INVOICE_BATCH_SIZE):
+    """
+    Create draft invoices for many students from the applicable fee structures.
+
+    Students that already have an invoice for the term, or that no fee
+    structure applies to, are skipped. Each batch is billed in its own
+    transaction.
+
+    Args:
+        students: Students (or a queryset) to bill
+        academic_year: AcademicYear of the fee structures
+        term: Term being billed
+        due_date: Due date of the invoices
+        created_by: User recorded on the invoices
+        progress: Optional callable(current, total) called after each batch
+
+    Returns:
+        List of created invoices
+    """
+    if hasattr(students, 'select_related'):
+        students = students.select_related('current_class')
+    students = list(students)
+
+    fee_structures = get_fee_structures(academic_year, term)
+    if not fee_structures:
+        return []
+
+    structures_by_class = {}
+    created = []
+    total = len(students)
+    for start in range(0, total, batch_size):
+        batch = students[start:start + batch_size]
+        created.extend(_bill_batch(
+            batch, fee_structures, structures_by_class,
+            academic_year, term, due_date, created_by,
+        ))
+        if progress:
+            progress(start + len(batch), total)
+
+    return created
@@ -174,6 +174,13 @@ class InvoiceGenerateForm(forms.Form):
         }),
         label='Or select individual student'
     )
+    all_students = forms.BooleanField(
+        required=False,
+        widget=forms.CheckboxInput(attrs={
+            'class': 'checkbox checkbox-primary checkbox-sm'
+        }),
+        label='Or bill every class'
+    )
     term = forms.ModelChoiceField(
         queryset=Term.objects.all(),
         widget=forms.Select(attrs={
@@ -191,9 +198,10 @@ class InvoiceGenerateForm(forms.Form):
         cleaned_data = super().clean()
         class_assigned = cleaned_data.get('class_assigned')
         student = cleaned_data.get('student')
+        all_students = cleaned_data.get('all_students')
 
-        if not class_assigned and not student:
-            raise forms.ValidationError('Please select either a class or a student.')
+        if not class_assigned and not student and not all_students:
+            raise forms.ValidationError('Please select a class, a student or every class.')
 
         return cleaned_data
 
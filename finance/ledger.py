@@ -0,0 +1,302 @@
+"""
+Per-student fee ledger.
+
+FeeLedgerEntry is an append-only record of what each student has been
+charged and has paid, with the student's running balance on every entry.
+StudentFeeBalance (per student and academic year) and FeeBalanceRollup
+(per term and class) hold the totals, so balance pages and reports read
+a few indexed rows instead of aggregating every invoice and payment.
+The dashboard's FinanceMetrics are updated from the same entries (see
+finance.metrics).
+
+sync_ledger() brings the ledger in line with invoices and payments: an
+invoice is charged its total_amount once issued (any status but DRAFT or
+CANCELLED) and a payment is credited while COMPLETED. Any difference
+from what is already posted becomes a new entry, so calling it again is
+a no-op. Invoice.save() and Payment.save() call it in their transaction;
+bulk writers (invoice_bulk_issue, posting.post_payments) call it once
+per batch.
+
+``manage.py rebuild_fee_ledger`` rebuilds it from invoices and payments.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .metrics import record_entries
+from .models import (
+    FeeBalanceRollup, FeeLedgerEntry, Invoice, Payment, StudentFeeBalance,
+)
+
+ZERO = Decimal('0.00')
+
+UNCHARGED_STATUSES = ('DRAFT', 'CANCELLED')
+
+LEDGER_BATCH_SIZE = 1000
+
+_INVOICE_FIELDS = (
+    'pk', 'student_id', 'academic_year_id', 'term_id', 'student__current_class_id',
+    'invoice_number', 'status', 'total_amount', 'issue_date',
+)
+
+
+def invoice_charge(status, total_amount):
+    """Amount an invoice in this status contributes to the ledger."""
+    return ZERO if status in UNCHARGED_STATUSES else total_amount
+
+
+def payment_credit(status, amount):
+    """Amount a payment in this status contributes to the ledger."""
+    return amount if status == 'COMPLETED' else ZERO
+
+
+def student_balance(student):
+    """A student's current ledger balance (positive: amount owed)."""
+    balance = FeeLedgerEntry.objects.filter(student=student).order_by('-id').values_list(
+        'balance', flat=True
+    ).first()
+    return balance if balance is not None else ZERO
+
+
+def _entry(invoice, entry_type, description, entry_date, net, payment_id=None):
+    """Unsaved entry for an invoice row (_INVOICE_FIELDS) and a net debit."""
+    pk, student_id, academic_year_id, term_id, class_id = invoice[:5]
+    return FeeLedgerEntry(
+        student_id=student_id,
+        academic_year_id=academic_year_id,
+        term_id=term_id,
+        class_assigned_id=class_id,
+        invoice_id=pk,
+        payment_id=payment_id,
+        entry_type=entry_type,
+        description=description,
+        entry_date=entry_date,
+        debit=max(net, ZERO),
+        credit=max(-net, ZERO),
+    )
+
+
+def _posted(entries, key):
+    """Net amount (debit - credit) already posted, by key."""
+    return dict(
+        entries.order_by().values(key).annotate(net=Sum('debit') - Sum('credit')).values_list(key, 'net')
+    )
+
+
+def _lock_students(student_ids):
+    # Serialise postings per student so running balances cannot interleave.
+    # NO KEY UPDATE doesn't block inserts that only reference the students.
+    from students.models import Student
+
+    list(Student.objects.select_for_update(no_key=True).filter(
+        pk__in=student_ids
+    ).order_by('pk').values_list('pk'))
+
+
+def sync_ledger(invoice_ids=(), payment_ids=()):
+    """
+    Post ledger entries for changes to the given invoices and payments.
+
+    Invoices of the payments are synced too, so a draft invoice that
+    receives a payment is charged before the payment is credited.
+
+    Returns:
+        The new FeeLedgerEntry instances
+    """
+    invoice_ids = set(invoice_ids)
+    payment_ids = set(payment_ids)
+    if not invoice_ids and not payment_ids:
+        return []
+
+    with transaction.atomic():
+        if payment_ids:
+            invoice_ids.update(
+                Payment.objects.filter(pk__in=payment_ids).values_list('invoice_id', flat=True)
+            )
+        _lock_students(set(
+            Invoice.objects.filter(pk__in=invoice_ids).values_list('student_id', flat=True)
+        ))
+
+        invoices = {
+            row[0]: row for row in Invoice.objects.filter(pk__in=invoice_ids).values_list(*_INVOICE_FIELDS)
+        }
+        charged = _posted(
+            FeeLedgerEntry.objects.filter(invoice_id__in=invoice_ids, payment__isnull=True), 'invoice_id'
+        )
+        credited = _posted(FeeLedgerEntry.objects.filter(payment_id__in=payment_ids), 'payment_id')
+        today = timezone.localdate()
+
+        entries = []
+        for invoice in invoices.values():
+            number, status, total_amount, issue_date = invoice[5:]
+            posted = charged.get(invoice[0], ZERO)
+            net = invoice_charge(status, total_amount) - posted
+            if not net:
+                continue
+            if not posted:
+                entries.append(_entry(invoice, 'INVOICE', f'Invoice {number}', issue_date, net))
+            elif status == 'CANCELLED':
+                entries.append(_entry(invoice, 'CANCELLATION', f'Cancelled invoice {number}', today, net))
+            else:
+                entries.append(_entry(invoice, 'ADJUSTMENT', f'Adjustment to invoice {number}', today, net))
+
+        for pk, invoice_id, amount, status, receipt_number, transaction_date in Payment.objects.filter(
+            pk__in=payment_ids
+        ).order_by('transaction_date').values_list(
+            'pk', 'invoice_id', 'amount', 'status', 'receipt_number', 'transaction_date'
+        ):
+            net = -payment_credit(status, amount) - credited.get(pk, ZERO)
+            if not net:
+                continue
+            invoice = invoices[invoice_id]
+            if net < 0:
+                entries.append(_entry(
+                    invoice, 'PAYMENT', f'Payment {receipt_number}',
+                    timezone.localdate(transaction_date), net, payment_id=pk,
+                ))
+            else:
+                entries.append(_entry(
+                    invoice, 'REVERSAL', f'Reversed payment {receipt_number}', today, net, payment_id=pk,
+                ))
+
+        _post(entries)
+    return entries
+
+
+def _post(entries, opening_balances=None, metrics=True):
+    """Give entries their running balances, save them and update the totals."""
+    if not entries:
+        return
+
+    student_ids = {entry.student_id for entry in entries}
+    if opening_balances is None:
+        opening_balances = dict(
+            FeeLedgerEntry.objects.filter(student_id__in=student_ids)
+            .order_by('student_id', '-id').distinct('student_id')
+            .values_list('student_id', 'balance')
+        )
+    balances = defaultdict(lambda: ZERO, opening_balances)
+    for entry in entries:
+        balances[entry.student_id] += entry.debit - entry.credit
+        entry.balance = balances[entry.student_id]
+
+    FeeLedgerEntry.objects.bulk_create(entries, batch_size=LEDGER_BATCH_SIZE)
+    _update_totals(entries, metrics)
+
+
+def _update_totals(entries, metrics=True):
+    """Add the entries to StudentFeeBalance, FeeBalanceRollup and (optionally) FinanceMetrics."""
+    student_totals = defaultdict(lambda: [ZERO, ZERO])
+    rollup_totals = defaultdict(lambda: [ZERO, ZERO])
+    term_years = {}
+    for entry in entries:
+        net = entry.debit - entry.credit
+        invoiced, paid = (ZERO, -net) if entry.payment_id else (net, ZERO)
+        for totals in (
+            student_totals[entry.student_id, entry.academic_year_id],
+            rollup_totals[entry.term_id, entry.class_assigned_id],
+        ):
+            totals[0] += invoiced
+            totals[1] += paid
+        term_years[entry.term_id] = entry.academic_year_id
+
+    # Create missing rows, then lock and add to them
+    StudentFeeBalance.objects.bulk_create(
+        [StudentFeeBalance(student_id=student_id, academic_year_id=year_id)
+         for student_id, year_id in student_totals],
+        ignore_conflicts=True,
+    )
+    FeeBalanceRollup.objects.bulk_create(
+        [FeeBalanceRollup(academic_year_id=term_years[term_id], term_id=term_id, class_assigned_id=class_id)
+         for term_id, class_id in rollup_totals],
+        ignore_conflicts=True,
+    )
+
+    owing_changes = defaultdict(int)
+    for row, previous_balance in _add_totals(
+        StudentFeeBalance.objects.filter(student_id__in={key[0] for key in student_totals}),
+        student_totals,
+        lambda row: (row.student_id, row.academic_year_id),
+    ):
+        owing_changes[row.academic_year_id] += (row.balance > 0) - (previous_balance > 0)
+    _add_totals(
+        FeeBalanceRollup.objects.filter(term_id__in=term_years),
+        rollup_totals,
+        lambda row: (row.term_id, row.class_assigned_id),
+    )
+    if metrics:
+        record_entries(entries, owing_changes)
+
+
+def _add_totals(queryset, totals, key):
+    """Add totals to the locked rows; returns (row, previous balance) pairs."""
+    now = timezone.now()
+    changed = []
+    for row in queryset.select_for_update().order_by('pk'):
+        change = totals.get(key(row))
+        if change is None:
+            continue
+        changed.append((row, row.balance))
+        row.total_invoiced += change[0]
+        row.total_paid += change[1]
+        row.balance += change[0] - change[1]
+        row.updated_at = now
+    queryset.model.objects.bulk_update(
+        [row for row, _ in changed],
+        ['total_invoiced', 'total_paid', 'balance', 'updated_at'],
+        batch_size=LEDGER_BATCH_SIZE,
+    )
+    return changed
+
+
+def rebuild_ledger():
+    """
+    Replace the ledger with one built from the current invoices and payments.
+
+    Each charged invoice and completed payment becomes one entry, in date
+    order. As in sync_ledger, draft and cancelled invoices leave no charge
+    but their completed payments are still credited, and refunded payments
+    leave no entries. Entries take the student's current class.
+
+    FinanceMetrics are left alone; follow with
+    finance.metrics.rebuild_metrics().
+
+    Returns:
+        Number of entries written
+    """
+    from students.models import Student
+
+    with transaction.atomic():
+        list(Student.objects.select_for_update(no_key=True).order_by('pk').values_list('pk'))
+        FeeLedgerEntry.objects.all().delete()
+        StudentFeeBalance.objects.all().delete()
+        FeeBalanceRollup.objects.all().delete()
+
+        invoices = {row[0]: row for row in Invoice.objects.values_list(*_INVOICE_FIELDS)}
+        dated = []
+        for invoice in invoices.values():
+            number, status, total_amount, issue_date = invoice[5:]
+            charge = invoice_charge(status, total_amount)
+            if charge:
+                dated.append((issue_date, 0, _entry(
+                    invoice, 'INVOICE', f'Invoice {number}', issue_date, charge,
+                )))
+
+        payments = Payment.objects.filter(status='COMPLETED').values_list(
+            'pk', 'invoice_id', 'amount', 'receipt_number', 'transaction_date'
+        )
+        for pk, invoice_id, amount, receipt_number, transaction_date in payments:
+            entry_date = timezone.localdate(transaction_date)
+            dated.append((entry_date, 1, _entry(
+                invoices[invoice_id], 'PAYMENT', f'Payment {receipt_number}', entry_date, -amount,
+                payment_id=pk,
+            )))
+
+        # Charges before payments on the same day
+        dated.sort(key=lambda item: item[:2])
+        entries = [entry for _, _, entry in dated]
+        _post(entries, opening_balances={}, metrics=False)
+    return len(entries)
@@ -0,0 +1,47 @@
+"""
+Rebuild the fee ledger (FeeLedgerEntry, StudentFeeBalance, FeeBalanceRollup)
+and the finance dashboard metrics (FinanceMetrics).
+
+The ledger is posted automatically whenever invoices and payments are
+saved; migrations 0011 and 0012 build the ledger and the metrics for
+existing invoices and payments.
+Run this after changing invoices or payments outside the models (e.g.
+QuerySet.update() or the Django shell).
+
+The rebuilt ledger has one entry per charged invoice and completed
+payment, in date order; the history of adjustments, cancellations and
+reversals is not kept.
+
+Usage:
+    python manage.py tenant_command rebuild_fee_ledger --schema=<tenant>
+"""
+from django.core.management.base import BaseCommand
+from django_tenants.utils import schema_context
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-student fee ledger from invoices and payments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', type=str, help='Tenant schema name')
+
+    def handle(self, *args, **options):
+        schema = options.get('schema')
+        if schema:
+            with schema_context(schema):
+                self._run()
+        else:
+            self._run()
+
+    def _run(self):
+        from finance.ledger import rebuild_ledger
+        from finance.metrics import rebuild_metrics
+        from finance.models import FeeBalanceRollup, StudentFeeBalance
+
+        entries = rebuild_ledger()
+        rebuild_metrics()
+        self.stdout.write(
+            f'{entries} ledger entries, {StudentFeeBalance.objects.count()} student balances, '
+            f'{FeeBalanceRollup.objects.count()} term/class rollups'
+        )
+        self.stdout.write(self.style.SUCCESS('Fee ledger and metrics rebuilt.'))
@@ -0,0 +1,190 @@
+"""
+Finance dashboard metrics.
+
+FinanceMetrics keeps, per term and per academic year (the row with no
+term), the totals the finance dashboard shows: invoiced, collected,
+outstanding, collections per payment method and, on the year row, the
+number of students owing. record_entries() is called by the fee ledger
+(finance.ledger) for every batch of entries it posts, so the metrics
+change in the same transaction as the invoice issue, cancellation or
+payment that caused them. rebuild_metrics() recomputes them from the
+ledger (``manage.py rebuild_fee_ledger``).
+
+Each year and term has METRICS_SHARDS counter rows. A transaction locks
+and adds to the rows of one shard, picked by its database connection, so
+postings from different connections rarely wait for each other and one
+transaction never holds two shards. Readers sum the shards
+(year_metrics, term_metrics).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import FeeLedgerEntry, FinanceMetrics, Payment, StudentFeeBalance
+
+ZERO = Decimal('0.00')
+
+METRICS_SHARDS = 8
+
+REBUILD_BATCH_SIZE = 2000
+
+_SUMMED_FIELDS = (
+    'total_invoiced', 'total_collected', 'total_outstanding', 'payment_count', 'students_with_balance',
+)
+
+
+class _Change:
+    __slots__ = ('invoiced', 'collected', 'payments', 'methods')
+
+    def __init__(self):
+        self.invoiced = ZERO
+        self.collected = ZERO
+        self.payments = 0
+        self.methods = defaultdict(lambda: [ZERO, 0])
+
+
+def _current_shard():
+    # Fixed for the connection, and so for the whole transaction
+    connection.ensure_connection()
+    return connection.connection.get_backend_pid() % METRICS_SHARDS
+
+
+def _sum_shards(rows, metrics):
+    """Add the shard rows' figures to an unsaved FinanceMetrics."""
+    for row in rows:
+        for field in _SUMMED_FIELDS:
+            setattr(metrics, field, getattr(metrics, field) + getattr(row, field))
+        for method, values in row.collected_by_method.items():
+            current = metrics.collected_by_method.get(method, {'total': '0.00', 'count': 0})
+            metrics.collected_by_method[method] = {
+                'total': str(Decimal(current['total']) + Decimal(values['total'])),
+                'count': current['count'] + values['count'],
+            }
+        metrics.updated_at = max(filter(None, (metrics.updated_at, row.updated_at)))
+    return metrics
+
+
+def year_metrics(academic_year):
+    """Whole-year figures, summed over the shards (unsaved; empty if none yet)."""
+    return _sum_shards(
+        FinanceMetrics.objects.filter(academic_year=academic_year, term__isnull=True),
+        FinanceMetrics(academic_year=academic_year),
+    )
+
+
+def term_metrics(term):
+    """A term's figures, summed over the shards (unsaved; empty if none yet)."""
+    return _sum_shards(
+        FinanceMetrics.objects.filter(term=term),
+        FinanceMetrics(academic_year_id=term.academic_year_id, term=term),
+    )
+
+
+def record_entries(entries, owing_changes=None):
+    """
+    Add fee ledger entries to the metrics of their terms and years.
+
+    Args:
+        entries: Saved FeeLedgerEntry instances
+        owing_changes: Optional {academic_year_id: change in the number of
+            students owing}
+    """
+    owing_changes = owing_changes or {}
+    methods = dict(
+        Payment.objects.filter(
+            pk__in={entry.payment_id for entry in entries if entry.payment_id}
+        ).values_list('pk', 'method')
+    )
+
+    changes = defaultdict(_Change)
+    for entry in entries:
+        net = entry.debit - entry.credit
+        for key in ((entry.academic_year_id, entry.term_id), (entry.academic_year_id, None)):
+            change = changes[key]
+            if entry.payment_id:
+                count = 1 if net < 0 else -1
+                change.collected -= net
+                change.payments += count
+                method = change.methods[methods[entry.payment_id]]
+                method[0] -= net
+                method[1] += count
+            else:
+                change.invoiced += net
+    for year_id in owing_changes:
+        changes.setdefault((year_id, None), _Change())
+
+    shard = _current_shard()
+    FinanceMetrics.objects.bulk_create(
+        [FinanceMetrics(academic_year_id=year_id, term_id=term_id, shard=shard)
+         for year_id, term_id in changes],
+        ignore_conflicts=True,
+    )
+
+    # Year rows first, so transactions meet on the same row before taking others
+    now = timezone.now()
+    rows = FinanceMetrics.objects.select_for_update().filter(
+        academic_year_id__in={year_id for year_id, _ in changes}, shard=shard
+    ).order_by(F('term_id').asc(nulls_first=True), 'pk')
+    changed = []
+    for row in rows:
+        change = changes.get((row.academic_year_id, row.term_id))
+        if change is None:
+            continue
+        row.total_invoiced += change.invoiced
+        row.total_collected += change.collected
+        row.total_outstanding += change.invoiced - change.collected
+        row.payment_count += change.payments
+        for method, (total, count) in change.methods.items():
+            current = row.collected_by_method.get(method, {'total': '0.00', 'count': 0})
+            row.collected_by_method[method] = {
+                'total': str(Decimal(current['total']) + total),
+                'count': current['count'] + count,
+            }
+        if row.term_id is None:
+            row.students_with_balance += owing_changes.get(row.academic_year_id, 0)
+        row.updated_at = now
+        changed.append(row)
+
+    FinanceMetrics.objects.bulk_update(changed, [
+        'total_invoiced', 'total_collected', 'total_outstanding', 'payment_count',
+        'collected_by_method', 'students_with_balance', 'updated_at',
+    ])
+
+
+def rebuild_metrics():
+    """
+    Replace the metrics with ones computed from the fee ledger.
+
+    Returns:
+        Number of ledger entries counted
+    """
+    from students.models import Student
+
+    with transaction.atomic():
+        # Hold off postings, which lock their students first
+        list(Student.objects.select_for_update(no_key=True).order_by('pk').values_list('pk'))
+        FinanceMetrics.objects.all().delete()
+
+        owing = dict(
+            StudentFeeBalance.objects.filter(balance__gt=0).order_by().values('academic_year_id')
+            .annotate(students=Count('pk')).values_list('academic_year_id', 'students')
+        )
+        record_entries([], owing)
+
+        count = 0
+        batch = []
+        entries = FeeLedgerEntry.objects.only(
+            'academic_year_id', 'term_id', 'payment_id', 'debit', 'credit'
+        ).order_by('pk')
+        for entry in entries.iterator(chunk_size=REBUILD_BATCH_SIZE):
+            batch.append(entry)
+            if len(batch) == REBUILD_BATCH_SIZE:
+                record_entries(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            record_entries(batch)
+    return count + len(batch)
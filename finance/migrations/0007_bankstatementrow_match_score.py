@@ -0,0 +1,24 @@
+# Generated by Django 5.2.9 on 2026-10-16 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("finance", "0006_bankreconciliation_bankstatementrow"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bankstatementrow",
+            name="match_score",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=2,
+                help_text="0-1, see finance.reconciliation",
+                max_digits=3,
+                null=True,
+            ),
+        ),
+    ]
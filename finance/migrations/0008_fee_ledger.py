@@ -0,0 +1,245 @@
+# Generated by Django 5.2.9 on 2026-10-16 14:05
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("academics", "0024_add_absence_excuse"),
+        ("core", "0023_add_school_days"),
+        ("finance", "0007_bankstatementrow_match_score"),
+        ("students", "0025_add_guardian_notification_pref"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeeLedgerEntry",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "entry_type",
+                    models.CharField(
+                        choices=[
+                            ("INVOICE", "Invoice"),
+                            ("ADJUSTMENT", "Adjustment"),
+                            ("CANCELLATION", "Cancellation"),
+                            ("PAYMENT", "Payment"),
+                            ("REVERSAL", "Payment Reversal"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("description", models.CharField(max_length=255)),
+                ("entry_date", models.DateField()),
+                (
+                    "debit",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=12
+                    ),
+                ),
+                (
+                    "credit",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=12
+                    ),
+                ),
+                ("balance", models.DecimalField(decimal_places=2, max_digits=12)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "academic_year",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="ledger_entries",
+                        to="core.academicyear",
+                    ),
+                ),
+                (
+                    "class_assigned",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Student's class when the entry was posted",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="ledger_entries",
+                        to="academics.class",
+                    ),
+                ),
+                (
+                    "invoice",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ledger_entries",
+                        to="finance.invoice",
+                    ),
+                ),
+                (
+                    "payment",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ledger_entries",
+                        to="finance.payment",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ledger_entries",
+                        to="students.student",
+                    ),
+                ),
+                (
+                    "term",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="ledger_entries",
+                        to="core.term",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Fee ledger entries",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        fields=["student", "id"], name="finance_fee_student_116e9b_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="FeeBalanceRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "total_invoiced",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=14
+                    ),
+                ),
+                (
+                    "total_paid",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=14
+                    ),
+                ),
+                (
+                    "balance",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=14
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "academic_year",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fee_balance_rollups",
+                        to="core.academicyear",
+                    ),
+                ),
+                (
+                    "class_assigned",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fee_balance_rollups",
+                        to="academics.class",
+                    ),
+                ),
+                (
+                    "term",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fee_balance_rollups",
+                        to="core.term",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("term", "class_assigned"),
+                        name="unique_fee_rollup_class",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("class_assigned__isnull", True)),
+                        fields=("term",),
+                        name="unique_fee_rollup_no_class",
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="StudentFeeBalance",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "total_invoiced",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=12
+                    ),
+                ),
+                (
+                    "total_paid",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=12
+                    ),
+                ),
+                (
+                    "balance",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=12
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "academic_year",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="student_fee_balances",
+                        to="core.academicyear",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fee_balances",
+                        to="students.student",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["academic_year", "balance"],
+                        name="finance_stu_academi_29663c_idx",
+                    )
+                ],
+                "unique_together": {("student", "academic_year")},
+            },
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.9 on 2026-10-16 16:20
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0023_add_school_days"),
+        ("finance", "0008_fee_ledger"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FinanceMetrics",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "total_invoiced",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=14
+                    ),
+                ),
+                (
+                    "total_collected",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=14
+                    ),
+                ),
+                (
+                    "total_outstanding",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=14
+                    ),
+                ),
+                ("payment_count", models.IntegerField(default=0)),
+                (
+                    "collected_by_method",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text='Per payment method, e.g. {"CASH": {"total": "150.00", "count": 2}}',
+                    ),
+                ),
+                (
+                    "students_with_balance",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Students owing for the year (whole-year row only)",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "academic_year",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="finance_metrics",
+                        to="core.academicyear",
+                    ),
+                ),
+                (
+                    "term",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Empty for the whole-year row",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="finance_metrics",
+                        to="core.term",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Finance metrics",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("academic_year", "term"),
+                        name="unique_finance_metrics_term",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("term__isnull", True)),
+                        fields=("academic_year",),
+                        name="unique_finance_metrics_year",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.9 on 2026-10-16 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0023_add_school_days"),
+        ("finance", "0009_financemetrics"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="financemetrics",
+            name="unique_finance_metrics_term",
+        ),
+        migrations.RemoveConstraint(
+            model_name="financemetrics",
+            name="unique_finance_metrics_year",
+        ),
+        migrations.AddField(
+            model_name="financemetrics",
+            name="shard",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name="financemetrics",
+            constraint=models.UniqueConstraint(
+                fields=("academic_year", "term", "shard"),
+                name="unique_finance_metrics_term",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="financemetrics",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("term__isnull", True)),
+                fields=("academic_year", "shard"),
+                name="unique_finance_metrics_year",
+            ),
+        ),
+    ]
@@ -0,0 +1,110 @@
+"""
+Build the fee ledger for invoices and payments that predate it.
+
+The ledger tables (0008) start empty and are only posted to as invoices and
+payments are saved, so balances, statements and reports would read zero for
+existing data. This posts what ``manage.py rebuild_fee_ledger`` would: one
+entry per charged invoice (any status but DRAFT or CANCELLED) and completed
+payment, charges before payments on the same day, with the student's running
+balance and current class, then the StudentFeeBalance and FeeBalanceRollup
+totals. It is written in SQL against the historical tables so later changes
+to the ledger code or models don't affect it. A tenant whose ledger already
+has entries is left alone.
+"""
+from django.conf import settings
+from django.db import migrations
+
+
+def backfill_fee_ledger(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    FeeLedgerEntry = apps.get_model('finance', 'FeeLedgerEntry')
+    if FeeLedgerEntry.objects.exists():
+        return
+
+    quote = connection.ops.quote_name
+    ledger = quote(FeeLedgerEntry._meta.db_table)
+    invoice = quote(apps.get_model('finance', 'Invoice')._meta.db_table)
+    payment = quote(apps.get_model('finance', 'Payment')._meta.db_table)
+    student = quote(apps.get_model('students', 'Student')._meta.db_table)
+    balance = quote(apps.get_model('finance', 'StudentFeeBalance')._meta.db_table)
+    rollup = quote(apps.get_model('finance', 'FeeBalanceRollup')._meta.db_table)
+
+    with connection.cursor() as cursor:
+        # Ids follow the running-balance order, as they do when posting
+        cursor.execute(
+            f"""
+            INSERT INTO {ledger} (
+                student_id, academic_year_id, term_id, class_assigned_id, invoice_id, payment_id,
+                entry_type, description, entry_date, debit, credit, balance, created_at
+            )
+            SELECT e.student_id, e.academic_year_id, e.term_id, s.current_class_id, e.invoice_id,
+                   e.payment_id, e.entry_type, e.description, e.entry_date, e.debit, e.credit,
+                   SUM(e.debit - e.credit) OVER (
+                       PARTITION BY e.student_id ORDER BY e.entry_date, e.kind, e.source_id
+                       ROWS UNBOUNDED PRECEDING
+                   ),
+                   NOW()
+            FROM (
+                SELECT i.student_id, i.academic_year_id, i.term_id, i.id AS invoice_id,
+                       NULL::uuid AS payment_id, 'INVOICE' AS entry_type,
+                       'Invoice ' || i.invoice_number AS description, i.issue_date AS entry_date,
+                       i.total_amount AS debit, 0 AS credit, 0 AS kind, i.id AS source_id
+                FROM {invoice} i
+                WHERE i.status NOT IN ('DRAFT', 'CANCELLED') AND i.total_amount <> 0
+                UNION ALL
+                SELECT i.student_id, i.academic_year_id, i.term_id, i.id, p.id, 'PAYMENT',
+                       'Payment ' || p.receipt_number, (p.transaction_date AT TIME ZONE %s)::date,
+                       0, p.amount, 1, p.id
+                FROM {payment} p
+                JOIN {invoice} i ON i.id = p.invoice_id
+                WHERE p.status = 'COMPLETED'
+            ) e
+            JOIN {student} s ON s.id = e.student_id
+            ORDER BY e.entry_date, e.kind, e.source_id
+            """,
+            [settings.TIME_ZONE],
+        )
+
+        cursor.execute(
+            f"""
+            INSERT INTO {balance} (
+                student_id, academic_year_id, total_invoiced, total_paid, balance, updated_at
+            )
+            SELECT student_id, academic_year_id,
+                   SUM(CASE WHEN payment_id IS NULL THEN debit - credit ELSE 0 END),
+                   SUM(CASE WHEN payment_id IS NULL THEN 0 ELSE credit - debit END),
+                   SUM(debit - credit), NOW()
+            FROM {ledger}
+            GROUP BY student_id, academic_year_id
+            """
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {rollup} (
+                academic_year_id, term_id, class_assigned_id, total_invoiced, total_paid, balance,
+                updated_at
+            )
+            SELECT academic_year_id, term_id, class_assigned_id,
+                   SUM(CASE WHEN payment_id IS NULL THEN debit - credit ELSE 0 END),
+                   SUM(CASE WHEN payment_id IS NULL THEN 0 ELSE credit - debit END),
+                   SUM(debit - credit), NOW()
+            FROM {ledger}
+            GROUP BY academic_year_id, term_id, class_assigned_id
+            """
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("finance", "0010_financemetrics_shard"),
+        ("students", "0025_add_guardian_notification_pref"),
+    ]
+
+    operations = [
+        # The ledger tables are dropped on reverse, so there is nothing to undo
+        migrations.RunPython(backfill_fee_ledger, migrations.RunPython.noop),
+    ]
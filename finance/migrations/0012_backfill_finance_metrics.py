@@ -0,0 +1,95 @@
+"""
+Compute the finance dashboard metrics for ledger entries that predate them.
+
+FinanceMetrics rows (0009) are only added to as the ledger is posted, so the
+dashboard would read zero for the entries backfilled by 0011. This writes
+what finance.metrics.rebuild_metrics() would, as one row (shard 0) per term
+and per academic year: invoiced, collected and outstanding totals, the
+payment count, collections per payment method and, on the year row, the
+number of students owing. Like 0011 it is written in SQL against the
+historical tables, and a tenant that already has metrics is left alone.
+"""
+from django.db import migrations
+
+
+def backfill_finance_metrics(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    FinanceMetrics = apps.get_model('finance', 'FinanceMetrics')
+    if FinanceMetrics.objects.exists():
+        return
+
+    quote = connection.ops.quote_name
+    metrics = quote(FinanceMetrics._meta.db_table)
+    ledger = quote(apps.get_model('finance', 'FeeLedgerEntry')._meta.db_table)
+    payment = quote(apps.get_model('finance', 'Payment')._meta.db_table)
+    balance = quote(apps.get_model('finance', 'StudentFeeBalance')._meta.db_table)
+
+    # Ledger entries always have a term, so a NULL term_id is the year row
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH totals AS (
+                SELECT academic_year_id, term_id,
+                       SUM(CASE WHEN payment_id IS NULL THEN debit - credit ELSE 0 END) AS invoiced,
+                       SUM(CASE WHEN payment_id IS NULL THEN 0 ELSE credit - debit END) AS collected,
+                       SUM(CASE WHEN payment_id IS NULL THEN 0
+                                WHEN credit > debit THEN 1 ELSE -1 END) AS payments
+                FROM {ledger}
+                GROUP BY GROUPING SETS ((academic_year_id, term_id), (academic_year_id))
+            ),
+            by_method AS (
+                SELECT l.academic_year_id, l.term_id, p.method,
+                       SUM(l.credit - l.debit) AS total,
+                       SUM(CASE WHEN l.credit > l.debit THEN 1 ELSE -1 END) AS count
+                FROM {ledger} l
+                JOIN {payment} p ON p.id = l.payment_id
+                GROUP BY GROUPING SETS (
+                    (l.academic_year_id, l.term_id, p.method), (l.academic_year_id, p.method)
+                )
+            ),
+            methods AS (
+                SELECT academic_year_id, term_id,
+                       jsonb_object_agg(
+                           method, jsonb_build_object('total', total::text, 'count', count)
+                       ) AS collected_by_method
+                FROM by_method
+                GROUP BY academic_year_id, term_id
+            ),
+            owing AS (
+                SELECT academic_year_id, COUNT(*) AS students
+                FROM {balance}
+                WHERE balance > 0
+                GROUP BY academic_year_id
+            )
+            INSERT INTO {metrics} (
+                academic_year_id, term_id, shard, total_invoiced, total_collected,
+                total_outstanding, payment_count, collected_by_method, students_with_balance,
+                updated_at
+            )
+            SELECT t.academic_year_id, t.term_id, 0, t.invoiced, t.collected,
+                   t.invoiced - t.collected, t.payments,
+                   COALESCE(m.collected_by_method, '{{}}'::jsonb),
+                   CASE WHEN t.term_id IS NULL THEN COALESCE(o.students, 0) ELSE 0 END,
+                   NOW()
+            FROM totals t
+            LEFT JOIN methods m
+                ON m.academic_year_id = t.academic_year_id
+                AND m.term_id IS NOT DISTINCT FROM t.term_id
+            LEFT JOIN owing o ON o.academic_year_id = t.academic_year_id
+            """
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("finance", "0011_backfill_fee_ledger"),
+    ]
+
+    operations = [
+        # The metrics table is dropped on reverse, so there is nothing to undo
+        migrations.RunPython(backfill_finance_metrics, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Sum
 from django.core.validators import MinValueValidator
 from decimal import Decimal
@@ -378,22 +378,8 @@ class Invoice(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.invoice_number:
-            from django.db import transaction
-            # Generate invoice number: INV-YYYY-XXXXX
-            # Use select_for_update to prevent race conditions
-            year = timezone.now().year
-            with transaction.atomic():
-                last_invoice = Invoice.objects.select_for_update().filter(
-                    invoice_number__startswith=f'INV-{year}'
-                ).order_by('-invoice_number').first()
-
-                if last_invoice:
-                    last_num = int(last_invoice.invoice_number.split('-')[-1])
-                    new_num = last_num + 1
-                else:
-                    new_num = 1
-
-                self.invoice_number = f'INV-{year}-{new_num:05d}'
+            from .numbering import next_number
+            self.invoice_number = next_number('invoice')
 
         # Calculate balance
         self.balance = self.total_amount - self.amount_paid
@@ -407,12 +393,15 @@ class Invoice(models.Model):
             elif self.status not in ['DRAFT'] and self.due_date and self.due_date < timezone.now().date():
                 self.status = 'OVERDUE'
 
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            # Post issue, discount and cancellation changes to the fee ledger
+            from .ledger import sync_ledger
+            sync_ledger(invoice_ids=[self.pk])
 
     def update_totals(self):
         """Recalculate totals from line items using efficient aggregate queries."""
-        from django.db import transaction
-
         with transaction.atomic():
             # Lock this invoice row to prevent concurrent updates
             Invoice.objects.select_for_update().filter(pk=self.pk).exists()
@@ -508,28 +497,18 @@ class Payment(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.receipt_number:
-            from django.db import transaction
-            # Generate receipt number: RCP-YYYY-XXXXX
-            # Use select_for_update to prevent race conditions
-            year = timezone.now().year
-            with transaction.atomic():
-                last_payment = Payment.objects.select_for_update().filter(
-                    receipt_number__startswith=f'RCP-{year}'
-                ).order_by('-receipt_number').first()
-
-                if last_payment:
-                    last_num = int(last_payment.receipt_number.split('-')[-1])
-                    new_num = last_num + 1
-                else:
-                    new_num = 1
-
-                self.receipt_number = f'RCP-{year}-{new_num:05d}'
+            from .numbering import next_number
+            self.receipt_number = next_number('receipt')
 
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
-        # Update invoice totals after payment
-        if self.status == 'COMPLETED':
-            self.invoice.update_totals()
+            # Update invoice totals after payment
+            if self.status == 'COMPLETED':
+                self.invoice.update_totals()
+
+            from .ledger import sync_ledger
+            sync_ledger(payment_ids=[self.pk])
 
 
 class PaymentGatewayTransaction(models.Model):
@@ -765,6 +744,10 @@ class BankStatementRow(models.Model):
     match_confidence = models.CharField(
         max_length=10, blank=True, help_text="high / medium / low"
     )
+    match_score = models.DecimalField(
+        max_digits=3, decimal_places=2, null=True, blank=True,
+        help_text="0-1, see finance.reconciliation"
+    )
 
     # After confirmation
     payment = models.ForeignKey(
@@ -782,4 +765,225 @@ class BankStatementRow(models.Model):
         ]
 
     def __str__(self):
-        return f"Row {self.row_number}: {self.description[:50]}"
\ No newline at end of file
+        return f"Row {self.row_number}: {self.description[:50]}"
+
+
+# =============================================================================
+# FEE LEDGER
+# =============================================================================
+
+LEDGER_ENTRY_TYPES = [
+    ('INVOICE', 'Invoice'),
+    ('ADJUSTMENT', 'Adjustment'),
+    ('CANCELLATION', 'Cancellation'),
+    ('PAYMENT', 'Payment'),
+    ('REVERSAL', 'Payment Reversal'),
+]
+
+
+class FeeLedgerEntry(models.Model):
+    """
+    One line of a student's fee ledger. Append-only.
+
+    Issued invoices are debited, completed payments credited; discount
+    changes, cancellations and refunds add correcting entries rather than
+    editing old ones. balance is the student's running balance after the
+    entry. Written by finance.ledger.sync_ledger().
+    """
+    id = models.BigAutoField(primary_key=True)
+    student = models.ForeignKey(
+        'students.Student',
+        on_delete=models.CASCADE,
+        related_name='ledger_entries'
+    )
+    academic_year = models.ForeignKey(
+        'core.AcademicYear',
+        on_delete=models.PROTECT,
+        related_name='ledger_entries'
+    )
+    term = models.ForeignKey(
+        'core.Term',
+        on_delete=models.PROTECT,
+        related_name='ledger_entries'
+    )
+    class_assigned = models.ForeignKey(
+        'academics.Class',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='ledger_entries',
+        help_text="Student's class when the entry was posted"
+    )
+    invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name='ledger_entries')
+    payment = models.ForeignKey(
+        Payment,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='ledger_entries'
+    )
+    entry_type = models.CharField(max_length=20, choices=LEDGER_ENTRY_TYPES)
+    description = models.CharField(max_length=255)
+    entry_date = models.DateField()
+    debit = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    credit = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    balance = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name_plural = 'Fee ledger entries'
+        indexes = [
+            # Statement and latest balance of a student
+            models.Index(fields=['student', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.entry_date} {self.description}: {self.debit - self.credit}"
+
+
+class StudentFeeBalance(models.Model):
+    """A student's ledger totals for one academic year."""
+    student = models.ForeignKey(
+        'students.Student',
+        on_delete=models.CASCADE,
+        related_name='fee_balances'
+    )
+    academic_year = models.ForeignKey(
+        'core.AcademicYear',
+        on_delete=models.CASCADE,
+        related_name='student_fee_balances'
+    )
+    total_invoiced = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    total_paid = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['student', 'academic_year']
+        indexes = [
+            # Outstanding report: students owing in a year
+            models.Index(fields=['academic_year', 'balance']),
+        ]
+
+    def __str__(self):
+        return f"{self.student} - {self.academic_year}: {self.balance}"
+
+
+class FeeBalanceRollup(models.Model):
+    """
+    Ledger totals for one term and class (class at posting time).
+
+    Rows with no class cover students without one.
+    """
+    academic_year = models.ForeignKey(
+        'core.AcademicYear',
+        on_delete=models.CASCADE,
+        related_name='fee_balance_rollups'
+    )
+    term = models.ForeignKey(
+        'core.Term',
+        on_delete=models.CASCADE,
+        related_name='fee_balance_rollups'
+    )
+    class_assigned = models.ForeignKey(
+        'academics.Class',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='fee_balance_rollups'
+    )
+    total_invoiced = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_paid = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'class_assigned'],
+                name='unique_fee_rollup_class',
+            ),
+            # NULL classes bypass the constraint above
+            models.UniqueConstraint(
+                fields=['term'],
+                condition=models.Q(class_assigned__isnull=True),
+                name='unique_fee_rollup_no_class',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.term} - {self.class_assigned or 'No class'}: {self.balance}"
+
+
+class FinanceMetrics(models.Model):
+    """
+    Finance dashboard figures for one term, or a whole academic year when
+    term is empty, split over a few counter shards.
+
+    Updated with the fee ledger (see finance.metrics), in the same
+    transaction as the invoice or payment change, so the dashboard is never
+    stale. Each transaction adds to one shard, so concurrent postings rarely
+    wait on the same row; the dashboard sums the shards.
+    """
+    academic_year = models.ForeignKey(
+        'core.AcademicYear',
+        on_delete=models.CASCADE,
+        related_name='finance_metrics'
+    )
+    term = models.ForeignKey(
+        'core.Term',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='finance_metrics',
+        help_text='Empty for the whole-year row'
+    )
+    shard = models.PositiveSmallIntegerField(default=0)
+    total_invoiced = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_collected = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_outstanding = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    payment_count = models.IntegerField(default=0)
+    collected_by_method = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Per payment method, e.g. {"CASH": {"total": "150.00", "count": 2}}'
+    )
+    students_with_balance = models.IntegerField(
+        default=0,
+        help_text='Students owing for the year (whole-year row only)'
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Finance metrics'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['academic_year', 'term', 'shard'],
+                name='unique_finance_metrics_term',
+            ),
+            # One whole-year row per shard; NULL terms bypass the constraint above
+            models.UniqueConstraint(
+                fields=['academic_year', 'shard'],
+                condition=models.Q(term__isnull=True),
+                name='unique_finance_metrics_year',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.term or self.academic_year} metrics"
+
+    @property
+    def collection_rate(self):
+        if self.total_invoiced <= 0:
+            return 0
+        return self.total_collected / self.total_invoiced * 100
+
+    def method_totals(self):
+        """Collections per method as [{'method', 'total', 'count'}], largest first."""
+        totals = [
+            {'method': method, 'total': Decimal(values['total']), 'count': values['count']}
+            for method, values in self.collected_by_method.items()
+            if values['count'] or Decimal(values['total'])
+        ]
+        return sorted(totals, key=lambda item: item['total'], reverse=True)
\ No newline at end of file
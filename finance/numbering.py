@@ -0,0 +1,93 @@
+"""
+Invoice and receipt numbers (INV-2026-00012, RCP-2026-00012).
+
+Numbers come from one Postgres sequence per tenant, document type and
+year (finance_invoice_number_2026 in the tenant's schema). nextval()
+never waits for other transactions, so invoices and payments created at
+the same time (bulk billing, the cashier's desk, gateway webhooks) no
+longer queue behind a row lock on the latest number.
+
+A sequence is created on first use in its year, starting after the
+highest number already issued. Numbers taken by a transaction that rolls
+back are not reused, so the series can have gaps.
+"""
+from django.apps import apps
+from django.db import IntegrityError, ProgrammingError, connection, transaction
+from django.utils import timezone
+
+# Document type: (number prefix, model, number field)
+DOCUMENT_TYPES = {
+    'invoice': ('INV', 'finance.Invoice', 'invoice_number'),
+    'receipt': ('RCP', 'finance.Payment', 'receipt_number'),
+}
+
+
+def format_number(prefix, year, value):
+    return f'{prefix}-{year}-{value:05d}'
+
+
+def _sequence_name(kind, year):
+    return f'finance_{kind}_number_{int(year)}'
+
+
+def _last_issued(kind, year):
+    """Highest number issued for the year before its sequence existed."""
+    prefix, model_label, field = DOCUMENT_TYPES[kind]
+    last = apps.get_model(model_label).objects.filter(
+        **{f'{field}__startswith': f'{prefix}-{year}-'}
+    ).order_by(f'-{field}').values_list(field, flat=True).first()
+    return int(last.split('-')[-1]) if last else 0
+
+
+def _create_sequence(kind, year):
+    start = _last_issued(kind, year) + 1
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE SEQUENCE IF NOT EXISTS {_sequence_name(kind, year)} START WITH {start}'
+            )
+    except (IntegrityError, ProgrammingError):
+        pass  # Created by a concurrent transaction
+
+
+def _next_values(kind, year, count):
+    # Savepoint, so a missing sequence does not abort the caller's transaction
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(%s) FROM generate_series(1, %s)',
+            [_sequence_name(kind, year), count],
+        )
+        return sorted(row[0] for row in cursor.fetchall())
+
+
+def allocate_numbers(kind, count=1, year=None):
+    """
+    Allocate a block of document numbers.
+
+    The numbers are unique but only consecutive when no other allocation
+    runs at the same time.
+
+    Args:
+        kind: 'invoice' or 'receipt'
+        count: How many numbers to allocate
+        year: Numbering year (current year by default)
+
+    Returns:
+        List of formatted numbers in ascending order
+    """
+    if count < 1:
+        return []
+    prefix = DOCUMENT_TYPES[kind][0]
+    year = year or timezone.now().year
+
+    try:
+        values = _next_values(kind, year, count)
+    except ProgrammingError:
+        _create_sequence(kind, year)
+        values = _next_values(kind, year, count)
+    return [format_number(prefix, year, value) for value in values]
+
+
+def next_number(kind, year=None):
+    """Allocate a single document number, e.g. next_number('invoice')."""
+    return allocate_numbers(kind, 1, year)[0]
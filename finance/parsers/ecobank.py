@@ -1,5 +1,4 @@
-from datetime import date, datetime
-from typing import Dict, Optional
+from typing import Dict
 
 from .base import BaseStatementParser
 
@@ -7,6 +6,8 @@ from .base import BaseStatementParser
 class EcobankParser(BaseStatementParser):
     bank_name = "Ecobank"
     bank_code = "ECOBANK"
+    date_formats = ("%Y-%m-%d",)
+    date_text_length = 10
 
     def _get_column_mapping(self) -> Dict[str, str]:
         return {
@@ -16,11 +17,3 @@ class EcobankParser(BaseStatementParser):
             "credit": "credit",
             "debit": "debit",
         }
-
-    def _parse_date(self, value) -> Optional[date]:
-        if value is None:
-            return None
-        try:
-            return datetime.strptime(str(value).strip()[:10], "%Y-%m-%d").date()
-        except (ValueError, TypeError):
-            return None
@@ -1,5 +1,4 @@
-from datetime import date, datetime
-from typing import Dict, Optional
+from typing import Dict
 
 from .base import BaseStatementParser
 
@@ -7,6 +6,7 @@ from .base import BaseStatementParser
 class FidelityParser(BaseStatementParser):
     bank_name = "Fidelity Bank"
     bank_code = "FIDELITY"
+    date_formats = ("%d/%m/%Y",)
 
     def _get_column_mapping(self) -> Dict[str, str]:
         return {
@@ -16,11 +16,3 @@ class FidelityParser(BaseStatementParser):
             "credit": "credit",
             "debit": "debit",
         }
-
-    def _parse_date(self, value) -> Optional[date]:
-        if value is None:
-            return None
-        try:
-            return datetime.strptime(str(value).strip(), "%d/%m/%Y").date()
-        except (ValueError, TypeError):
-            return None
@@ -1,5 +1,4 @@
-from datetime import date, datetime
-from typing import Dict, Optional
+from typing import Dict
 
 from .base import BaseStatementParser
 
@@ -7,6 +6,7 @@ from .base import BaseStatementParser
 class StanbicParser(BaseStatementParser):
     bank_name = "Stanbic Bank"
     bank_code = "STANBIC"
+    date_formats = ("%d-%b-%Y",)
 
     def _get_column_mapping(self) -> Dict[str, str]:
         return {
@@ -16,11 +16,3 @@ class StanbicParser(BaseStatementParser):
             "credit": "credits",
             "debit": "debits",
         }
-
-    def _parse_date(self, value) -> Optional[date]:
-        if value is None:
-            return None
-        try:
-            return datetime.strptime(str(value).strip(), "%d-%b-%Y").date()
-        except (ValueError, TypeError):
-            return None
@@ -0,0 +1,137 @@
+"""
+Bulk payment posting.
+
+Payment.save() allocates a receipt number and calls
+invoice.update_totals() for every payment. Posting a whole bank statement
+that way re-aggregates each invoice once per payment. post_payments()
+creates the payments with one bulk_create and then recalculates each
+affected invoice once, with set-based UPDATEs.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import (
+    Case, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .ledger import sync_ledger
+from .models import BankStatementRow, Invoice, InvoiceItem, Payment
+from .numbering import allocate_numbers
+
+
+def _sum_subquery(queryset):
+    zero = Value(Decimal('0.00'), output_field=DecimalField(max_digits=10, decimal_places=2))
+    return Coalesce(
+        Subquery(
+            queryset.filter(invoice=OuterRef('pk'))
+            .values('invoice')
+            .annotate(total=Sum('amount'))
+            .values('total')
+        ),
+        zero,
+    )
+
+
+def recalculate_invoice_totals(invoice_ids):
+    """
+    Recalculate the totals and status of many invoices at once.
+
+    Applies the same rules as Invoice.update_totals() and Invoice.save():
+    subtotal from the items, amount paid from completed payments, then the
+    PAID / PARTIALLY_PAID / OVERDUE status (cancelled invoices keep theirs),
+    and posts any change in the amount charged to the fee ledger.
+
+    Returns:
+        Number of invoices updated
+    """
+    invoice_ids = list(invoice_ids)
+    if not invoice_ids:
+        return 0
+
+    subtotal = _sum_subquery(InvoiceItem.objects.all())
+    amount_paid = _sum_subquery(Payment.objects.filter(status='COMPLETED'))
+    invoices = Invoice.objects.filter(pk__in=invoice_ids)
+
+    with transaction.atomic():
+        updated = invoices.update(
+            subtotal=subtotal,
+            total_amount=subtotal - F('discount'),
+            amount_paid=amount_paid,
+            balance=subtotal - F('discount') - amount_paid,
+            updated_at=timezone.now(),
+        )
+        invoices.exclude(status='CANCELLED').update(status=Case(
+            When(total_amount__gt=0, amount_paid__gte=F('total_amount'), then=Value('PAID')),
+            When(amount_paid__gt=0, then=Value('PARTIALLY_PAID')),
+            When(
+                ~Q(status='DRAFT') & Q(due_date__lt=timezone.now().date()),
+                then=Value('OVERDUE'),
+            ),
+            default=F('status'),
+        ))
+        sync_ledger(invoice_ids=invoice_ids)
+    return updated
+
+
+def post_payments(payments):
+    """
+    Save many new completed payments and update their invoices once.
+
+    Receipt numbers are allocated as one block. Unlike Payment.save(),
+    invoice totals are recalculated once per invoice, not per payment, and
+    the fee ledger is posted in one go.
+
+    Args:
+        payments: Unsaved Payment instances
+
+    Returns:
+        The saved payments
+    """
+    if not payments:
+        return []
+
+    for payment, number in zip(payments, allocate_numbers('receipt', len(payments))):
+        payment.receipt_number = number
+
+    with transaction.atomic():
+        Payment.objects.bulk_create(payments)
+        recalculate_invoice_totals({payment.invoice_id for payment in payments})
+        sync_ledger(payment_ids=[payment.pk for payment in payments])
+    return payments
+
+
+def post_reconciliation_payments(rows, reconciliation, received_by):
+    """
+    Create a bank transfer payment for each matched statement row and
+    mark the rows confirmed.
+
+    Args:
+        rows: Matched BankStatementRow instances
+        reconciliation: Their BankReconciliation
+        received_by: User confirming the statement
+
+    Returns:
+        The created payments, in the order of rows
+    """
+    payments = []
+    for row in rows:
+        payment = Payment(
+            invoice_id=row.matched_invoice_id,
+            amount=row.credit_amount,
+            method='BANK_TRANSFER',
+            status='COMPLETED',
+            reference=row.reference or f"RECON-{reconciliation.pk}-R{row.row_number}",
+            transaction_date=row.transaction_date or timezone.now(),
+            received_by=received_by,
+            notes=f"Bank reconciliation: {reconciliation.file_name} (row {row.row_number})",
+        )
+        payments.append(payment)
+        row.match_status = 'CONFIRMED'
+        row.payment = payment
+
+    with transaction.atomic():
+        post_payments(payments)
+        BankStatementRow.objects.bulk_update(rows, ['match_status', 'payment'], batch_size=500)
+    return payments
@@ -2,13 +2,31 @@
 Matching engine for bank statement reconciliation.
 
 Takes parsed rows and attempts to match each credit row to an existing invoice.
+
+The statement is matched as a whole DataFrame: the invoice lookups come
+from one Invoice query and tokens are extracted with pandas string
+operations over every row at once. Credit rows are matched, strongest
+first, by:
+
+1. an invoice number in the description or reference (high confidence)
+2. the admission number of a student with an unpaid invoice (medium)
+3. amount and date tolerance: the one open invoice whose balance is
+   within AMOUNT_TOLERANCE of the credit and whose issue-to-due window
+   is near the transaction date (low)
+
+Each match stores a match_score between 0 and 1.
 """
 
 import re
 import logging
+from dataclasses import asdict
 from decimal import Decimal
 
+import numpy as np
+import pandas as pd
+
 from .models import BankStatementRow, Invoice, Payment
+from .parsers.base import FRAME_COLUMNS
 
 logger = logging.getLogger(__name__)
 
@@ -18,48 +36,167 @@ _INV_RE = re.compile(r"INV-\d{4}-\d{5}")
 # Broad regex for admission-number-like tokens (alphanumeric, 4–20 chars)
 _ADM_RE = re.compile(r"\b([A-Za-z0-9/-]{4,20})\b")
 
+PAYABLE_STATUSES = ("ISSUED", "PARTIALLY_PAID", "OVERDUE")
 
-def match_rows_to_invoices(parsed_rows, reconciliation):
+# Tolerance matching
+AMOUNT_TOLERANCE = 1.00  # GHS either side of the invoice balance
+DATE_TOLERANCE_DAYS = 30  # days before issue or after the due date
+MAX_CANDIDATES = 25  # more invoices with a similar balance is too ambiguous
+MIN_TOLERANCE_SCORE = 0.5
+MIN_SCORE_MARGIN = 0.1  # lead the best candidate needs over the runner-up
+
+# Scores of the reference-based methods; tolerance scores stay below 0.7
+METHOD_SCORES = {"invoice_number": 1.0, "admission_number": 0.8}
+
+
+def confidence_label(score):
+    """Map a match score to the high / medium / low confidence label."""
+    if score >= 0.9:
+        return "high"
+    if score >= 0.75:
+        return "medium"
+    return "low"
+
+
+def _statement_frame(parsed_rows):
+    """The statement as a DataFrame with FRAME_COLUMNS."""
+    if isinstance(parsed_rows, pd.DataFrame):
+        frame = parsed_rows.reset_index(drop=True)
+    else:
+        frame = pd.DataFrame([asdict(row) for row in parsed_rows], columns=FRAME_COLUMNS)
+    return frame.assign(
+        credit_amount=frame["credit_amount"].astype(float),
+        debit_amount=frame["debit_amount"].astype(float),
+    )
+
+
+def load_open_invoices():
+    """Every payable invoice with the fields the matchers need, in one query."""
+    columns = [
+        "invoice_id", "invoice_number", "admission_number", "student_status",
+        "balance", "issue_date", "due_date", "created_at",
+    ]
+    invoices = pd.DataFrame.from_records(
+        list(
+            Invoice.objects.filter(status__in=PAYABLE_STATUSES).values_list(
+                "pk", "invoice_number", "student__admission_number", "student__status",
+                "balance", "issue_date", "due_date", "created_at",
+            )
+        ),
+        columns=columns,
+    )
+    return invoices.assign(balance=invoices["balance"].astype(float))
+
+
+def _lookup_maps(invoices):
     """
-    Match a list of ParsedRow objects to invoices and bulk-create
-    BankStatementRow records under the given BankReconciliation.
+    Invoice id lookups by invoice number and by admission number.
 
-    Returns the list of created BankStatementRow instances.
+    An admission number maps to the student's most recent unpaid invoice
+    (active students only).
     """
-    from students.models import Student
+    by_number = pd.Series(
+        invoices["invoice_id"].to_numpy(), index=invoices["invoice_number"].to_numpy()
+    )
+    latest = invoices[invoices["student_status"] == "active"].assign(
+        key=lambda df: df["admission_number"].str.upper()
+    ).sort_values("created_at", ascending=False).drop_duplicates("key")
+    by_admission = pd.Series(latest["invoice_id"].to_numpy(), index=latest["key"].to_numpy())
+    return by_number, by_admission
 
-    # ---- Pre-fetch lookups ----
 
-    payable_statuses = {"ISSUED", "PARTIALLY_PAID", "OVERDUE"}
+def _admission_matches(text, by_admission):
+    """First admission-number token of each row that has an unpaid invoice."""
+    if text.empty or by_admission.empty:
+        return pd.Series(dtype=object)
+    tokens = text.str.upper().str.extractall(_ADM_RE)[0]
+    return tokens.map(by_admission).dropna().groupby(level=0).first()
 
-    # {invoice_number: invoice}
-    invoice_map = {
-        inv.invoice_number: inv
-        for inv in Invoice.objects.filter(status__in=payable_statuses).select_related(
-            "student"
-        )
-    }
-
-    # {admission_number: invoice} — student's most recent unpaid invoice
-    adm_invoice_map = {}
-    students_with_invoices = (
-        Student.objects.filter(
-            invoices__status__in=payable_statuses,
-            status="active",
-        )
-        .values_list("admission_number", flat=True)
-        .distinct()
+
+def tolerance_matches(rows, invoices):
+    """
+    Match credits to open invoices by amount and date.
+
+    Each row is paired with every invoice whose balance is within
+    AMOUNT_TOLERANCE of its credit (rows with more than MAX_CANDIDATES
+    are left alone) and scored on how close the amount is and how far
+    the transaction date falls outside the invoice's issue-to-due window.
+    A row is matched only when its best candidate scores at least
+    MIN_TOLERANCE_SCORE and leads the runner-up by MIN_SCORE_MARGIN, so
+    fees shared by a whole class do not produce guesses.
+
+    Args:
+        rows: DataFrame with credit_amount and transaction_date
+        invoices: DataFrame from load_open_invoices()
+
+    Returns:
+        DataFrame indexed like rows (matched rows only) with
+        invoice_id and score columns
+    """
+    empty = pd.DataFrame(columns=["invoice_id", "score"])
+    invoices = invoices[invoices["balance"] > 0].sort_values("balance")
+    if rows.empty or invoices.empty:
+        return empty
+
+    balances = invoices["balance"].to_numpy(dtype=float)
+    amounts = rows["credit_amount"].to_numpy(dtype=float)
+    lo = np.searchsorted(balances, amounts - AMOUNT_TOLERANCE, side="left")
+    counts = np.searchsorted(balances, amounts + AMOUNT_TOLERANCE, side="right") - lo
+    keep = (counts > 0) & (counts <= MAX_CANDIDATES)
+    if not keep.any():
+        return empty
+
+    # One (row, invoice) pair per candidate
+    lo, counts = lo[keep], counts[keep]
+    row_pos = np.repeat(np.flatnonzero(keep), counts)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    inv_pos = np.arange(counts.sum()) + np.repeat(lo - offsets, counts)
+
+    amount_score = 1 - np.abs(balances[inv_pos] - amounts[row_pos]) / AMOUNT_TOLERANCE
+
+    day = np.timedelta64(1, "D")
+    tx_dates = pd.to_datetime(rows["transaction_date"]).to_numpy()[row_pos]
+    days_before = (pd.to_datetime(invoices["issue_date"]).to_numpy()[inv_pos] - tx_dates) / day
+    days_after = (tx_dates - pd.to_datetime(invoices["due_date"]).to_numpy()[inv_pos]) / day
+    days_outside = np.maximum(np.maximum(days_before, days_after), 0)
+    # Rows without a date get a neutral date score
+    date_score = np.where(np.isnan(days_outside), 0.5, 1 - days_outside / DATE_TOLERANCE_DAYS)
+
+    pairs = pd.DataFrame({
+        "row": rows.index.to_numpy()[row_pos],
+        "invoice_id": invoices["invoice_id"].to_numpy()[inv_pos],
+        "score": 0.7 * (0.6 * amount_score + 0.4 * date_score),
+    })[date_score >= 0]
+    if pairs.empty:
+        return empty
+
+    pairs = pairs.sort_values(["row", "score"], ascending=[True, False])
+    rank = pairs.groupby("row").cumcount()
+    best = pairs[rank == 0].set_index("row")
+    runner_up = pairs[rank == 1].set_index("row")["score"].reindex(best.index, fill_value=0)
+    accepted = (best["score"] >= MIN_TOLERANCE_SCORE) & (
+        best["score"] - runner_up >= MIN_SCORE_MARGIN
     )
-    for adm in students_with_invoices:
-        inv = (
-            Invoice.objects.filter(
-                student__admission_number=adm, status__in=payable_statuses
-            )
-            .order_by("-created_at")
-            .first()
-        )
-        if inv:
-            adm_invoice_map[adm.upper()] = inv
+    return best.loc[accepted, ["invoice_id", "score"]]
+
+
+def _decimal(value):
+    return Decimal(f"{value:.2f}")
+
+
+def match_rows_to_invoices(parsed_rows, reconciliation):
+    """
+    Match a statement to invoices and bulk-create BankStatementRow
+    records under the given BankReconciliation.
+
+    parsed_rows is the DataFrame from BaseStatementParser.parse_frame()
+    or a list of ParsedRow objects.
+
+    Returns the list of created BankStatementRow instances.
+    """
+    frame = _statement_frame(parsed_rows)
+    invoices = load_open_invoices()
+    by_number, by_admission = _lookup_maps(invoices)
 
     # Existing payment references for dedup
     existing_refs = set(
@@ -68,71 +205,65 @@ def match_rows_to_invoices(parsed_rows, reconciliation):
         .values_list("reference", flat=True)
     )
 
-    # ---- Match each row ----
+    status = pd.Series("UNMATCHED", index=frame.index, dtype=object)
+    method = pd.Series("", index=frame.index, dtype=object)
+    invoice_id = pd.Series(None, index=frame.index, dtype=object)
+    score = pd.Series(np.nan, index=frame.index)
+
+    # Skip debit rows (no credit), then references already paid
+    debit = frame["credit_amount"] <= 0
+    status[debit] = "SKIPPED"
+    method[debit] = "debit_row"
 
-    rows_to_create = []
+    reference = frame["reference"].str.strip()
+    duplicate = ~debit & (reference != "") & reference.isin(existing_refs)
+    status[duplicate] = "DUPLICATE"
+    method[duplicate] = "reference_exists"
 
-    for parsed in parsed_rows:
-        row = BankStatementRow(
+    def assign(matched_ids, match_method, match_scores):
+        status[matched_ids.index] = "MATCHED"
+        method[matched_ids.index] = match_method
+        invoice_id[matched_ids.index] = matched_ids
+        score[matched_ids.index] = match_scores
+
+    # Primary match: invoice number in text
+    text = (frame["description"] + " " + frame["reference"])[status == "UNMATCHED"]
+    numbers = text.str.extract(f"({_INV_RE.pattern})", expand=False)
+    matched = numbers.map(by_number).dropna()
+    assign(matched, "invoice_number", METHOD_SCORES["invoice_number"])
+
+    # Secondary match: admission number in text
+    matched = _admission_matches(text[status[text.index] == "UNMATCHED"], by_admission)
+    assign(matched, "admission_number", METHOD_SCORES["admission_number"])
+
+    # Last resort: amount and date, against invoices not matched above
+    unmatched = frame[status == "UNMATCHED"]
+    candidates = invoices[~invoices["invoice_id"].isin(set(invoice_id.dropna()))]
+    matched = tolerance_matches(unmatched, candidates)
+    assign(matched["invoice_id"], "amount_date", matched["score"])
+
+    rows_to_create = [
+        BankStatementRow(
             reconciliation=reconciliation,
-            row_number=parsed.row_number,
-            transaction_date=parsed.transaction_date,
-            description=parsed.description,
-            reference=parsed.reference,
-            credit_amount=parsed.credit_amount,
-            debit_amount=parsed.debit_amount,
+            row_number=int(row.row_number),
+            transaction_date=row.transaction_date if pd.notna(row.transaction_date) else None,
+            description=row.description,
+            reference=row.reference,
+            credit_amount=_decimal(row.credit_amount),
+            debit_amount=_decimal(row.debit_amount),
+            match_status=row_status,
+            match_method=row_method,
+            matched_invoice_id=row_invoice if pd.notna(row_invoice) else None,
+            match_confidence=confidence_label(row_score) if pd.notna(row_score) else "",
+            match_score=_decimal(row_score) if pd.notna(row_score) else None,
         )
-
-        # Skip debit rows (no credit)
-        if parsed.credit_amount <= Decimal("0"):
-            row.match_status = "SKIPPED"
-            row.match_method = "debit_row"
-            rows_to_create.append(row)
-            continue
-
-        combined_text = f"{parsed.description} {parsed.reference}"
-
-        # Dedup: check if reference already used in a completed payment
-        ref_for_dedup = parsed.reference.strip()
-        if ref_for_dedup and ref_for_dedup in existing_refs:
-            row.match_status = "DUPLICATE"
-            row.match_method = "reference_exists"
-            rows_to_create.append(row)
-            continue
-
-        # Primary match: invoice number in text
-        inv_match = _INV_RE.search(combined_text)
-        if inv_match:
-            inv_num = inv_match.group(0)
-            invoice = invoice_map.get(inv_num)
-            if invoice:
-                row.match_status = "MATCHED"
-                row.matched_invoice = invoice
-                row.match_method = "invoice_number"
-                row.match_confidence = "high"
-                rows_to_create.append(row)
-                continue
-
-        # Secondary match: admission number in text
-        matched_via_adm = False
-        for token_match in _ADM_RE.finditer(combined_text):
-            token = token_match.group(1).upper()
-            invoice = adm_invoice_map.get(token)
-            if invoice:
-                row.match_status = "MATCHED"
-                row.matched_invoice = invoice
-                row.match_method = "admission_number"
-                row.match_confidence = "medium"
-                matched_via_adm = True
-                break
-
-        if not matched_via_adm:
-            row.match_status = "UNMATCHED"
-
-        rows_to_create.append(row)
+        for row, row_status, row_method, row_invoice, row_score in zip(
+            frame.itertuples(index=False), status, method, invoice_id, score
+        )
+    ]
 
     # Bulk create
-    created = BankStatementRow.objects.bulk_create(rows_to_create)
+    created = BankStatementRow.objects.bulk_create(rows_to_create, batch_size=1000)
     logger.info(
         "Reconciliation %s: %d rows created (%d matched)",
         reconciliation.pk,
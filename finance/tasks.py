@@ -3,7 +3,6 @@ Finance notification tasks.
 Handles async invoice/payment notifications via email (with PDF) and SMS.
 """
 import logging
-from io import BytesIO
 from celery import shared_task
 from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
@@ -17,6 +16,8 @@ logger = logging.getLogger(__name__)
 # Configuration
 TASK_MAX_RETRIES = 3
 TASK_RETRY_DELAY = 60  # seconds
+BULK_TASK_SOFT_TIME_LIMIT = 1800  # 30 min for invoice generation runs
+BULK_TASK_TIME_LIMIT = 1860
 SMS_MAX_LENGTH = 320
 
 
@@ -44,10 +45,18 @@ FINANCE_SMS_TEMPLATES = {
 }
 
 
-def build_invoice_context(invoice):
-    """Build context dictionary from invoice for SMS/email personalization."""
+def build_invoice_context(invoice, contact=None):
+    """
+    Build context dictionary from invoice for SMS/email personalization.
+
+    contact is the student's guardian contact from students.contacts,
+    looked up when not passed in.
+    """
+    from students.contacts import get_guardian_contact
+
     student = invoice.student
-    primary_guardian = student.get_primary_guardian() if hasattr(student, 'get_primary_guardian') else None
+    if contact is None:
+        contact = get_guardian_contact(student)
 
     # Get school name from tenant
     school_name = "School"
@@ -82,16 +91,16 @@ def build_invoice_context(invoice):
         'term': invoice.term.name if invoice.term else 'N/A',
         'academic_year': invoice.academic_year.name if invoice.academic_year else 'N/A',
         'school_name': school_name,
-        'guardian_name': primary_guardian.full_name if primary_guardian else 'Parent/Guardian',
+        'guardian_name': contact['name'] if contact else 'Parent/Guardian',
         'date': timezone.now().strftime('%b %d, %Y'),
         'pay_url': pay_url,
     }
 
 
-def build_payment_context(payment):
+def build_payment_context(payment, contact=None):
     """Build context dictionary from payment for SMS/email personalization."""
     invoice = payment.invoice
-    context = build_invoice_context(invoice)
+    context = build_invoice_context(invoice, contact=contact)
     context.update({
         'receipt_number': payment.receipt_number,
         'payment_amount': f"{payment.amount:.2f}",
@@ -132,13 +141,16 @@ def generate_invoice_pdf(invoice, tenant_schema):
     """
     Generate PDF invoice using WeasyPrint.
     Returns BytesIO buffer containing PDF data.
+
+    Rendered through core.pdf.render_pdf, so the stylesheet, fonts and
+    school logo are prepared once per worker and tenant.
     """
     from django_tenants.utils import schema_context
-    from weasyprint import HTML
-    import base64
+    from core.pdf import branding_assets, render_pdf
 
     with schema_context(tenant_schema):
         # Get school info
+        school = None
         school_name = "School"
         school_logo_base64 = None
         school_address = ""
@@ -149,18 +161,15 @@ def generate_invoice_pdf(invoice, tenant_schema):
             from django.db import connection
             if hasattr(connection, 'tenant'):
                 tenant = connection.tenant
+                school = tenant
                 school_name = tenant.name
                 school_address = getattr(tenant, 'address', '')
                 school_phone = getattr(tenant, 'phone', '')
                 school_email = getattr(tenant, 'email', '')
 
-                # Encode logo as base64
+                # Logo as a data URI, encoded once per worker
                 if hasattr(tenant, 'logo') and tenant.logo:
-                    try:
-                        with tenant.logo.open('rb') as f:
-                            school_logo_base64 = base64.b64encode(f.read()).decode('utf-8')
-                    except Exception as e:
-                        logger.warning(f"Could not load school logo: {e}")
+                    school_logo_base64 = branding_assets(tenant, tenant_schema)['logo_base64']
         except Exception as e:
             logger.warning(f"Error getting tenant info: {e}")
 
@@ -177,15 +186,11 @@ def generate_invoice_pdf(invoice, tenant_schema):
             'generated_at': timezone.now(),
         }
 
-        # Render HTML
-        html_string = render_to_string('finance/invoice_pdf.html', context)
-
-        # Generate PDF
-        pdf_buffer = BytesIO()
-        HTML(string=html_string).write_pdf(pdf_buffer)
-        pdf_buffer.seek(0)
-
-        return pdf_buffer
+        return render_pdf(
+            'finance/invoice_pdf.html', context,
+            stylesheet='finance/invoice_pdf.css',
+            school=school, tenant_schema=tenant_schema,
+        )
 
 
 # =============================================================================
@@ -246,18 +251,13 @@ def send_invoice_notification(self, invoice_id, notification_type, distribution_
         )
 
         # Get guardian contact info
-        primary_guardian = student.get_primary_guardian() if hasattr(student, 'get_primary_guardian') else None
-        guardian_email = primary_guardian.email if primary_guardian and primary_guardian.email else None
-        guardian_phone = primary_guardian.phone_number if primary_guardian else None
-
-        # Fallback to legacy fields if available
-        if not guardian_email:
-            guardian_email = getattr(student, 'guardian_email', None)
-        if not guardian_phone:
-            guardian_phone = getattr(student, 'guardian_phone', None)
+        from students.contacts import get_guardian_contact
+        contact = get_guardian_contact(student)
+        guardian_email = contact['email'] if contact else None
+        guardian_phone = contact['phone'] if contact else None
 
         results = {'email': None, 'sms': None}
-        context = build_invoice_context(invoice)
+        context = build_invoice_context(invoice, contact=contact)
 
         # Warn if no contact info available for the requested distribution type
         if distribution_type in ('EMAIL', 'BOTH') and not guardian_email:
@@ -436,11 +436,17 @@ def send_bulk_notifications(self, notification_type, distribution_type, tenant_s
 
         # Queue individual tasks (limit batch size to prevent queue flooding)
         MAX_BATCH = 500
+        batch = list(invoices[:MAX_BATCH + 1])
+        if len(batch) > MAX_BATCH:
+            logger.warning(f"Bulk notification batch limit ({MAX_BATCH}) reached, remaining invoices skipped")
+            batch = batch[:MAX_BATCH]
+
+        # Resolve every guardian in one query; the queued tasks read them from the cache
+        from students.contacts import get_guardian_contacts
+        get_guardian_contacts(invoice.student_id for invoice in batch)
+
         queued_count = 0
-        for invoice in invoices.iterator():
-            if queued_count >= MAX_BATCH:
-                logger.warning(f"Bulk notification batch limit ({MAX_BATCH}) reached, remaining invoices skipped")
-                break
+        for invoice in batch:
             send_invoice_notification.delay(
                 invoice_id=str(invoice.pk),
                 notification_type=notification_type,
@@ -486,17 +492,16 @@ def send_payment_confirmation_sms(self, payment_id, tenant_schema):
         student = invoice.student
 
         # Get guardian phone
-        primary_guardian = student.get_primary_guardian() if hasattr(student, 'get_primary_guardian') else None
-        guardian_phone = primary_guardian.phone_number if primary_guardian else None
-        if not guardian_phone:
-            guardian_phone = getattr(student, 'guardian_phone', None)
+        from students.contacts import get_guardian_contact
+        contact = get_guardian_contact(student)
+        guardian_phone = contact['phone'] if contact else None
 
         if not guardian_phone:
             logger.warning(f"No guardian phone for student {student.full_name} (payment {payment_id})")
             return {'success': False, 'error': 'No guardian phone number'}
 
         # Build and render SMS
-        context = build_payment_context(payment)
+        context = build_payment_context(payment, contact=contact)
         sms_text = render_sms_template('payment_received', context)
 
         try:
@@ -538,3 +543,224 @@ def send_payment_confirmation_sms(self, payment_id, tenant_schema):
         except Exception as e:
             logger.error(f"Failed to send payment confirmation SMS for {payment_id}: {e}")
             return {'success': False, 'error': str(e)}
+
+
+@shared_task(
+    bind=True,
+    max_retries=0,
+    soft_time_limit=BULK_TASK_SOFT_TIME_LIMIT,
+    time_limit=BULK_TASK_TIME_LIMIT,
+)
+def send_payment_confirmations(self, payment_ids, tenant_schema):
+    """
+    Notify guardians of many payments at once (e.g. a confirmed bank statement).
+
+    Sends the in-app notifications in one insert and the confirmation SMS
+    through send_sms_batch, instead of one send_payment_confirmation_sms
+    task per payment.
+
+    Args:
+        payment_ids: UUIDs of the Payments
+        tenant_schema: Schema name for tenant context
+    """
+    from django_tenants.utils import schema_context
+
+    with schema_context(tenant_schema):
+        from .models import Payment, FinanceNotificationLog
+        from communications.models import SMSMessage
+        from communications.utils import send_sms_batch
+        from core.notifications import notify_guardians_each
+        from students.contacts import get_guardian_contacts
+
+        payments = list(Payment.objects.select_related(
+            'invoice__student', 'invoice__term', 'invoice__academic_year'
+        ).filter(pk__in=payment_ids))
+        if not payments:
+            return {'success': False, 'error': 'Payments not found'}
+
+        notify_guardians_each(
+            [
+                (
+                    payment.invoice.student_id,
+                    f'Payment of GHS {payment.amount} received for '
+                    f'{payment.invoice.student.full_name}.',
+                )
+                for payment in payments
+            ],
+            title='Payment Confirmed',
+            category='finance',
+            notification_type='success',
+            icon='fa-solid fa-circle-check',
+        )
+
+        contacts = get_guardian_contacts([payment.invoice.student_id for payment in payments])
+        with_phone = []
+        for payment in payments:
+            contact = contacts.get(payment.invoice.student_id)
+            if contact and contact['phone']:
+                with_phone.append((payment, contact))
+            else:
+                logger.warning(f"No guardian phone for student {payment.invoice.student.full_name} (payment {payment.pk})")
+
+        records = SMSMessage.objects.bulk_create([
+            SMSMessage(
+                recipient_phone=contact['phone'],
+                recipient_name=contact['name'] or '',
+                student=payment.invoice.student,
+                message=render_sms_template(
+                    'payment_received', build_payment_context(payment, contact=contact)
+                ),
+                message_type=SMSMessage.MessageType.FEE_REMINDER,
+                status=SMSMessage.Status.PENDING,
+            )
+            for payment, contact in with_phone
+        ])
+
+        results = send_sms_batch([(record.recipient_phone, record.message) for record in records])
+
+        sent = 0
+        now = timezone.now()
+        logs = []
+        for (payment, contact), record, sms_result in zip(with_phone, records, results):
+            log = FinanceNotificationLog(
+                invoice=payment.invoice,
+                notification_type='PAYMENT_RECEIVED',
+                distribution_type='SMS',
+            )
+            if sms_result.get('success'):
+                record.status = SMSMessage.Status.SENT
+                record.sent_at = now
+                record.provider_response = str(sms_result.get('response', ''))
+                log.sms_status = 'SENT'
+                log.sms_sent_to = record.recipient_phone
+                log.sms_sent_at = now
+                log.sms_message = record
+                sent += 1
+            else:
+                record.status = SMSMessage.Status.FAILED
+                record.error_message = str(sms_result.get('error', ''))
+                log.sms_status = 'FAILED'
+                log.sms_error = sms_result.get('error', 'Unknown error')[:500]
+            logs.append(log)
+
+        SMSMessage.objects.bulk_update(
+            records, ['status', 'sent_at', 'provider_response', 'error_message'], batch_size=500
+        )
+        FinanceNotificationLog.objects.bulk_create(logs)
+
+        return {
+            'success': True,
+            'payments': len(payments),
+            'sms_sent': sent,
+            'sms_failed': len(records) - sent,
+            'no_phone': len(payments) - len(records),
+        }
+
+
+# =============================================================================
+# INVOICE GENERATION
+# =============================================================================
+
+@shared_task(
+    bind=True,
+    max_retries=0,
+    soft_time_limit=BULK_TASK_SOFT_TIME_LIMIT,
+    time_limit=BULK_TASK_TIME_LIMIT,
+)
+def generate_invoices_task(self, tenant_schema, term_id, due_date, class_id=None, created_by_id=None):
+    """
+    Generate term invoices for one class, or every active student, in the background.
+
+    Reports {'current', 'total'} progress via task state so the invoice
+    generation modal can poll it.
+
+    Args:
+        tenant_schema: Schema name for tenant context
+        term_id: ID of the Term being billed
+        due_date: Invoice due date (ISO format)
+        class_id: Optional Class ID; all active students when omitted
+        created_by_id: ID of the user who started the run
+
+    Returns:
+        dict with success, created, students (or error)
+    """
+    from datetime import date
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+    from django_tenants.utils import schema_context
+
+    with schema_context(tenant_schema):
+        from core.models import AcademicYear, Term
+        from core.notifications import notify_guardians_bulk
+        from students.models import Student
+        from .billing import generate_invoices
+
+        term = Term.objects.filter(pk=term_id).first()
+        academic_year = AcademicYear.get_current()
+        if term is None or academic_year is None:
+            return {'success': False, 'error': 'Term or academic year not found'}
+
+        students = Student.objects.filter(status='active')
+        if class_id:
+            students = students.filter(current_class_id=class_id)
+        created_by = get_user_model().objects.filter(pk=created_by_id).first() if created_by_id else None
+
+        def progress(current, total):
+            if self.request.id:
+                self.update_state(state='PROGRESS', meta={'current': current, 'total': total})
+
+        invoices = generate_invoices(
+            students, academic_year, term, date.fromisoformat(due_date),
+            created_by=created_by, progress=progress,
+        )
+
+        if invoices:
+            notify_guardians_bulk(
+                [invoice.student for invoice in invoices],
+                title='New Invoice Generated',
+                message=f'New fee invoices have been generated for {term.name}.',
+                category='finance',
+                notification_type='info',
+                icon='fa-solid fa-file-invoice-dollar',
+                link=reverse('finance:fee_payments'),
+            )
+
+        logger.info(f"[{tenant_schema}] Generated {len(invoices)} invoice(s) for {term}")
+        return {
+            'success': True,
+            'created': len(invoices),
+            'students': students.count(),
+        }
+
+
+# =============================================================================
+# PERIODIC TASKS
+# =============================================================================
+
+@shared_task(bind=True)
+def mark_overdue_invoices(self):
+    """
+    Periodic task: mark every tenant's unpaid invoices past their due date
+    as overdue.
+
+    Invoice.save() applies the same rule, but only when an invoice is next
+    saved, so overdue counts would otherwise lag. Run daily via
+    django-celery-beat.
+    """
+    from core.tasks import fan_out_to_tenants
+
+    return fan_out_to_tenants(self, 'finance.tasks._mark_overdue_invoices_for_tenant')
+
+
+def _mark_overdue_invoices_for_tenant(tenant):
+    """Mark a tenant's unpaid, past-due invoices as overdue."""
+    from .models import Invoice
+
+    overdue = Invoice.objects.filter(
+        status='ISSUED',
+        amount_paid=0,
+        due_date__lt=timezone.now().date(),
+    ).update(status='OVERDUE')
+    if overdue:
+        logger.info(f"[{tenant.schema_name}] Marked {overdue} invoice(s) as overdue")
+    return {'overdue': overdue}
@@ -1,13 +1,26 @@
+import io
+import threading
 from datetime import date
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.db import connection, transaction
 from django_tenants.test.cases import TenantTestCase
+from django_tenants.utils import schema_context
 
 from finance.models import (
     FeeStructure, Scholarship, StudentScholarship,
-    Invoice, InvoiceItem, Payment,
+    Invoice, InvoiceItem, Payment, BankReconciliation, BankStatementRow,
+    FeeLedgerEntry, StudentFeeBalance, FeeBalanceRollup, FinanceMetrics,
 )
+from academics.models import Class
+from finance.billing import generate_invoices
+from finance.ledger import rebuild_ledger, student_balance
+from finance.metrics import rebuild_metrics, term_metrics, year_metrics
+from finance.numbering import allocate_numbers, next_number
+from finance.parsers import GCBParser, GenericParser
+from finance.posting import post_reconciliation_payments
+from finance.reconciliation import match_rows_to_invoices
 from students.models import Student
 from core.models import AcademicYear, Term
 
@@ -383,3 +396,620 @@ class PaymentModelTests(FinanceTestBase):
             status='PENDING',
         )
         self.assertIn(payment.receipt_number, str(payment))
+
+
+class InvoiceGenerationTests(FinanceTestBase):
+    """Tests for bulk invoice generation (finance.billing)."""
+
+    def setUp(self):
+        super().setUp()
+        self.basic_class = Class.objects.create(
+            level_type=Class.LevelType.BASIC,
+            level_number=7,
+            section='A',
+            name='B7A',
+        )
+        self.other_class = Class.objects.create(
+            level_type=Class.LevelType.BASIC,
+            level_number=8,
+            section='A',
+            name='B8A',
+        )
+        self.student.current_class = self.basic_class
+        self.student.save()
+        self.classmate = Student.objects.create(
+            first_name='Ama',
+            last_name='Owusu',
+            date_of_birth=date(2010, 3, 2),
+            gender='F',
+            admission_number='STU-2024-002',
+            admission_date=date(2024, 9, 1),
+            current_class=self.basic_class,
+        )
+        FeeStructure.objects.create(
+            category='TUITION', academic_year=self.ay, term=self.term,
+            class_assigned=self.basic_class, amount=Decimal('800.00'),
+        )
+        FeeStructure.objects.create(
+            category='PTA', academic_year=self.ay,
+            level_type='basic', amount=Decimal('100.00'),
+        )
+        FeeStructure.objects.create(
+            category='TUITION', academic_year=self.ay, term=self.term,
+            class_assigned=self.other_class, amount=Decimal('950.00'),
+        )
+        scholarship = Scholarship.objects.create(
+            name='Tuition Bursary',
+            discount_type='PERCENTAGE',
+            discount_value=Decimal('50.00'),
+            applies_to_categories=['TUITION'],
+        )
+        StudentScholarship.objects.create(
+            student=self.classmate, scholarship=scholarship, academic_year=self.ay,
+        )
+
+    def _generate(self, students):
+        return generate_invoices(
+            students, self.ay, self.term, date(2024, 10, 1), created_by=self.admin
+        )
+
+    def test_bills_class_structures_and_scholarships(self):
+        invoices = self._generate(Student.objects.filter(current_class=self.basic_class))
+
+        self.assertEqual(len(invoices), 2)
+        invoice = Invoice.objects.get(student=self.student)
+        self.assertEqual(invoice.status, 'DRAFT')
+        self.assertEqual(invoice.subtotal, Decimal('900.00'))
+        self.assertEqual(invoice.balance, Decimal('900.00'))
+        self.assertEqual(
+            sorted(invoice.items.values_list('category', flat=True)), ['PTA', 'TUITION']
+        )
+
+        discounted = Invoice.objects.get(student=self.classmate)
+        self.assertEqual(discounted.discount, Decimal('400.00'))
+        self.assertEqual(discounted.total_amount, Decimal('500.00'))
+
+    def test_invoice_numbers_are_consecutive(self):
+        self._generate([self.student, self.classmate])
+
+        numbers = sorted(
+            int(number.split('-')[-1])
+            for number in Invoice.objects.values_list('invoice_number', flat=True)
+        )
+        self.assertEqual(numbers[1], numbers[0] + 1)
+        following = int(next_number('invoice').split('-')[-1])
+        self.assertEqual(following, numbers[1] + 1)
+
+    def test_skips_students_already_billed(self):
+        self._generate([self.student])
+        invoices = self._generate([self.student, self.classmate])
+
+        self.assertEqual([invoice.student_id for invoice in invoices], [self.classmate.pk])
+        self.assertEqual(Invoice.objects.filter(student=self.student).count(), 1)
+
+    def test_reports_progress_per_batch(self):
+        calls = []
+        generate_invoices(
+            [self.student, self.classmate], self.ay, self.term, date(2024, 10, 1),
+            progress=lambda current, total: calls.append((current, total)), batch_size=1,
+        )
+        self.assertEqual(calls, [(1, 2), (2, 2)])
+
+
+class DocumentNumberingTests(FinanceTestBase):
+    """Tests for sequence-backed invoice and receipt numbers (finance.numbering)."""
+
+    YEAR = 2099  # Kept clear of the numbers other tests issue
+
+    def test_block_is_ascending_and_keeps_format(self):
+        numbers = allocate_numbers('invoice', 3, year=self.YEAR)
+        values = [int(number.split('-')[-1]) for number in numbers]
+
+        self.assertTrue(all(number.startswith(f'INV-{self.YEAR}-') for number in numbers))
+        self.assertEqual(len(numbers[0]), len('INV-2099-00001'))
+        self.assertEqual(values, [values[0], values[0] + 1, values[0] + 2])
+
+    def test_sequence_starts_after_numbers_already_issued(self):
+        Invoice.objects.create(
+            invoice_number=f'INV-{self.YEAR - 1}-00041',
+            student=self.student,
+            academic_year=self.ay,
+            term=self.term,
+            due_date=date(2024, 10, 1),
+        )
+        self.assertEqual(next_number('invoice', year=self.YEAR - 1), f'INV-{self.YEAR - 1}-00042')
+
+    def test_concurrent_allocation_has_no_duplicates_or_lock_waits(self):
+        schema = connection.schema_name
+        holding = threading.Event()
+        release = threading.Event()
+        numbers = []
+        errors = []
+
+        def in_tenant(func):
+            def run():
+                try:
+                    with schema_context(schema):
+                        func()
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    connection.close()
+            thread = threading.Thread(target=run)
+            thread.start()
+            return thread
+
+        def drop_sequence():
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP SEQUENCE IF EXISTS finance_receipt_number_{self.YEAR}')
+
+        self.addCleanup(lambda: in_tenant(drop_sequence).join())
+
+        # Create the sequence (once per year) before measuring steady state
+        in_tenant(lambda: numbers.extend(allocate_numbers('receipt', 1, year=self.YEAR))).join()
+
+        def holder():
+            # A slow request that took a number and has not committed yet
+            with transaction.atomic():
+                numbers.extend(allocate_numbers('receipt', 1, year=self.YEAR))
+                holding.set()
+                release.wait(10)
+
+        def allocator():
+            holding.wait(10)
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL lock_timeout = '500ms'")
+                for _ in range(20):
+                    numbers.extend(allocate_numbers('receipt', 5, year=self.YEAR))
+
+        holder_thread = in_tenant(holder)
+        allocators = [in_tenant(allocator) for _ in range(8)]
+        for thread in allocators:
+            thread.join(30)
+        release.set()
+        holder_thread.join(30)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(numbers), 2 + 8 * 20 * 5)
+        self.assertEqual(len(set(numbers)), len(numbers))
+
+
+class StatementParserTests(FinanceTestBase):
+    """Tests for column-wise statement parsing."""
+
+    def test_parse_frame_converts_columns(self):
+        csv = (
+            'Date,Description,Reference,Credit,Debit\n'
+            '05/03/2025,Fees,REF1,"1,250.50",\n'
+            '2025-03-06 10:15,Charges,, ,-\n'
+            'not a date,Odd row,REF3,abc,20\n'
+        )
+        frame = GenericParser().parse_frame(io.BytesIO(csv.encode()), 'csv')
+
+        self.assertEqual(list(frame['row_number']), [2, 3, 4])
+        self.assertEqual(list(frame['transaction_date']), [date(2025, 3, 5), date(2025, 3, 6), None])
+        self.assertEqual(list(frame['credit_amount']), [1250.5, 0.0, 0.0])
+        self.assertEqual(list(frame['debit_amount']), [0.0, 0.0, 20.0])
+        self.assertEqual(list(frame['reference']), ['REF1', '', 'REF3'])
+
+    def test_parse_returns_parsed_rows(self):
+        csv = 'Transaction Date,Description,Reference,Credit,Debit\n31/01/2025,Fees,R1,100,\n'
+        rows = GCBParser().parse(io.BytesIO(csv.encode()), 'csv')
+
+        self.assertEqual(rows[0].transaction_date, date(2025, 1, 31))
+        self.assertEqual(rows[0].credit_amount, Decimal('100.00'))
+        self.assertEqual(rows[0].debit_amount, Decimal('0.00'))
+
+    def test_missing_columns_raise(self):
+        csv = 'Date,Narration,Credit\n05/03/2025,Fees,100\n'
+        with self.assertRaises(ValueError):
+            GenericParser().parse_frame(io.BytesIO(csv.encode()), 'csv')
+
+
+class ReconciliationMatchingTests(FinanceTestBase):
+    """Tests for finance.reconciliation.match_rows_to_invoices."""
+
+    def setUp(self):
+        super().setUp()
+        self.student.admission_number = 'ADM/0042'
+        self.student.save()
+        self.classmate = Student.objects.create(
+            first_name='Ama',
+            last_name='Owusu',
+            date_of_birth=date(2010, 3, 2),
+            gender='F',
+            admission_number='STU-2024-002',
+            admission_date=date(2024, 9, 1),
+        )
+        self.invoice = self._invoice(self.student, Decimal('900.00'))
+        self.other_invoice = self._invoice(self.classmate, Decimal('1234.00'))
+        Payment.objects.create(
+            invoice=self.other_invoice, amount=Decimal('1.00'),
+            method='BANK_TRANSFER', status='COMPLETED', reference='PAID-REF',
+        )
+        self.recon = BankReconciliation.objects.create(bank='GENERIC', file_name='statement.csv')
+
+    def _invoice(self, student, total):
+        return Invoice.objects.create(
+            student=student,
+            academic_year=self.ay,
+            term=self.term,
+            issue_date=date(2024, 9, 10),
+            due_date=date(2024, 10, 1),
+            subtotal=total,
+            total_amount=total,
+            status='ISSUED',
+        )
+
+    def _match(self, lines):
+        csv = 'Date,Description,Reference,Credit,Debit\n' + '\n'.join(lines) + '\n'
+        statement = GenericParser().parse_frame(io.BytesIO(csv.encode()), 'csv')
+        return {
+            row.row_number: row for row in match_rows_to_invoices(statement, self.recon)
+        }
+
+    def test_match_methods(self):
+        rows = self._match([
+            f'20/09/2024,Fees {self.invoice.invoice_number},T1,900,',
+            '20/09/2024,Fees for adm/0042 via momo,T2,450,',
+            '25/09/2024,Cash deposit,T3,1233,',
+            '20/09/2024,Bank charges,T4,,15',
+            '20/09/2024,Repeat,PAID-REF,500,',
+            '20/09/2024,Unknown sender,T6,77,',
+        ])
+
+        self.assertEqual(rows[2].match_method, 'invoice_number')
+        self.assertEqual(rows[2].matched_invoice_id, self.invoice.pk)
+        self.assertEqual(rows[2].match_confidence, 'high')
+        self.assertEqual(rows[3].match_method, 'admission_number')
+        self.assertEqual(rows[3].matched_invoice_id, self.invoice.pk)
+        self.assertEqual(rows[3].match_confidence, 'medium')
+        self.assertEqual(rows[4].match_method, 'amount_date')
+        self.assertEqual(rows[4].matched_invoice_id, self.other_invoice.pk)
+        self.assertEqual(rows[4].match_confidence, 'low')
+        self.assertGreater(rows[4].match_score, Decimal('0.5'))
+        self.assertEqual(rows[5].match_status, 'SKIPPED')
+        self.assertEqual(rows[6].match_status, 'DUPLICATE')
+        self.assertEqual(rows[7].match_status, 'UNMATCHED')
+        self.assertIsNone(rows[7].match_score)
+
+    def test_tolerance_needs_a_clear_winner(self):
+        # Same open balance as other_invoice after its 1.00 payment
+        self._invoice(self.student, Decimal('1233.00'))
+
+        rows = self._match(['25/09/2024,Cash deposit,T1,1233,'])
+
+        self.assertEqual(rows[2].match_status, 'UNMATCHED')
+
+    def test_tolerance_rejects_distant_dates(self):
+        rows = self._match(['25/06/2025,Cash deposit,T1,1233,'])
+
+        self.assertEqual(rows[2].match_status, 'UNMATCHED')
+
+
+class PaymentPostingTests(FinanceTestBase):
+    """Tests for bulk posting of reconciled payments (finance.posting)."""
+
+    def setUp(self):
+        super().setUp()
+        self.invoice = Invoice.objects.create(
+            student=self.student,
+            academic_year=self.ay,
+            term=self.term,
+            due_date=date(2024, 10, 15),
+            status='ISSUED',
+        )
+        InvoiceItem.objects.create(
+            invoice=self.invoice,
+            category='TUITION',
+            description='Tuition Fee',
+            amount=Decimal('1000.00'),
+        )
+        self.invoice.update_totals()
+        self.recon = BankReconciliation.objects.create(bank='GENERIC', file_name='statement.csv')
+
+    def _row(self, row_number, amount, reference=''):
+        return BankStatementRow.objects.create(
+            reconciliation=self.recon,
+            row_number=row_number,
+            transaction_date=date(2024, 9, 20),
+            description='School fees',
+            reference=reference,
+            credit_amount=Decimal(amount),
+            match_status='MATCHED',
+            matched_invoice=self.invoice,
+        )
+
+    def test_posts_payments_and_updates_invoice_once(self):
+        rows = [self._row(2, '300.00', 'TRF1'), self._row(3, '200.00')]
+
+        payments = post_reconciliation_payments(rows, self.recon, self.admin)
+
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.amount_paid, Decimal('500.00'))
+        self.assertEqual(self.invoice.balance, Decimal('500.00'))
+        self.assertEqual(self.invoice.status, 'PARTIALLY_PAID')
+
+        numbers = [payment.receipt_number for payment in payments]
+        self.assertEqual(len(set(numbers)), 2)
+        self.assertTrue(all(number.startswith('RCP-') for number in numbers))
+        self.assertEqual(
+            list(Payment.objects.filter(invoice=self.invoice).order_by('receipt_number')
+                 .values_list('reference', flat=True)),
+            ['TRF1', f'RECON-{self.recon.pk}-R3'],
+        )
+        for row, payment in zip(rows, payments):
+            row.refresh_from_db()
+            self.assertEqual(row.match_status, 'CONFIRMED')
+            self.assertEqual(row.payment_id, payment.pk)
+
+    def test_full_payment_marks_invoice_paid(self):
+        post_reconciliation_payments([self._row(2, '1000.00')], self.recon, self.admin)
+
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.status, 'PAID')
+        self.assertEqual(self.invoice.balance, Decimal('0.00'))
+
+
+class FeeLedgerTests(FinanceTestBase):
+    """Tests for the per-student fee ledger (finance.ledger)."""
+
+    def setUp(self):
+        super().setUp()
+        self.invoice = Invoice.objects.create(
+            student=self.student,
+            academic_year=self.ay,
+            term=self.term,
+            due_date=date(2030, 10, 15),
+        )
+        InvoiceItem.objects.create(
+            invoice=self.invoice,
+            category='TUITION',
+            description='Tuition Fee',
+            amount=Decimal('1000.00'),
+        )
+        self.invoice.update_totals()
+
+    def _issue(self):
+        self.invoice.status = 'ISSUED'
+        self.invoice.save()
+
+    def _entries(self):
+        return list(FeeLedgerEntry.objects.filter(student=self.student).values_list(
+            'entry_type', 'debit', 'credit', 'balance'
+        ))
+
+    def _totals(self):
+        balance = StudentFeeBalance.objects.get(student=self.student, academic_year=self.ay)
+        rollup = FeeBalanceRollup.objects.get(term=self.term, class_assigned__isnull=True)
+        return (
+            (balance.total_invoiced, balance.total_paid, balance.balance),
+            (rollup.total_invoiced, rollup.total_paid, rollup.balance),
+        )
+
+    def test_drafts_are_not_charged(self):
+        self.assertEqual(self._entries(), [])
+        self.assertEqual(student_balance(self.student), Decimal('0.00'))
+
+    def test_issue_payment_and_discount_keep_running_balance(self):
+        self._issue()
+        Payment.objects.create(
+            invoice=self.invoice, amount=Decimal('400.00'), method='CASH', status='COMPLETED',
+        )
+        self.invoice.refresh_from_db()
+        self.invoice.discount = Decimal('100.00')
+        self.invoice.update_totals()
+
+        self.assertEqual(self._entries(), [
+            ('INVOICE', Decimal('1000.00'), Decimal('0.00'), Decimal('1000.00')),
+            ('PAYMENT', Decimal('0.00'), Decimal('400.00'), Decimal('600.00')),
+            ('ADJUSTMENT', Decimal('0.00'), Decimal('100.00'), Decimal('500.00')),
+        ])
+        totals = (Decimal('900.00'), Decimal('400.00'), Decimal('500.00'))
+        self.assertEqual(self._totals(), (totals, totals))
+        self.assertEqual(student_balance(self.student), Decimal('500.00'))
+
+        # Saving again posts nothing
+        self.invoice.save()
+        self.assertEqual(len(self._entries()), 3)
+
+    def test_cancellation_and_refund_are_reversed(self):
+        self._issue()
+        payment = Payment.objects.create(
+            invoice=self.invoice, amount=Decimal('400.00'), method='CASH', status='COMPLETED',
+        )
+        payment.status = 'REFUNDED'
+        payment.save()
+        self.invoice.refresh_from_db()
+        self.invoice.status = 'CANCELLED'
+        self.invoice.save()
+
+        self.assertEqual(
+            [entry[0] for entry in self._entries()],
+            ['INVOICE', 'PAYMENT', 'REVERSAL', 'CANCELLATION'],
+        )
+        self.assertEqual(student_balance(self.student), Decimal('0.00'))
+        zero = (Decimal('0.00'), Decimal('0.00'), Decimal('0.00'))
+        self.assertEqual(self._totals(), (zero, zero))
+
+    def test_rebuild_matches_posted_totals(self):
+        self._issue()
+        Payment.objects.create(
+            invoice=self.invoice, amount=Decimal('250.00'), method='CASH', status='COMPLETED',
+        )
+        posted = self._totals()
+
+        self.assertEqual(rebuild_ledger(), 2)
+        self.assertEqual(self._totals(), posted)
+        self.assertEqual(student_balance(self.student), Decimal('750.00'))
+
+    def test_rebuild_credits_payments_on_cancelled_invoices_like_sync(self):
+        self._issue()
+        Payment.objects.create(
+            invoice=self.invoice, amount=Decimal('250.00'), method='CASH', status='COMPLETED',
+        )
+        self.invoice.refresh_from_db()
+        self.invoice.status = 'CANCELLED'
+        self.invoice.save()
+        posted = self._totals()
+        self.assertEqual(student_balance(self.student), Decimal('-250.00'))
+
+        rebuild_ledger()
+        self.assertEqual(self._totals(), posted)
+        self.assertEqual(student_balance(self.student), Decimal('-250.00'))
+
+    def test_migration_backfill_matches_posted_ledger(self):
+        from importlib import import_module
+        from django.apps import apps
+
+        backfill = import_module('finance.migrations.0011_backfill_fee_ledger').backfill_fee_ledger
+        self._issue()
+        Payment.objects.create(
+            invoice=self.invoice, amount=Decimal('250.00'), method='CASH', status='COMPLETED',
+        )
+        entries, totals = self._entries(), self._totals()
+        for model in (FeeLedgerEntry, StudentFeeBalance, FeeBalanceRollup):
+            model.objects.all().delete()
+
+        with connection.schema_editor() as schema_editor:
+            backfill(apps, schema_editor)
+
+        self.assertEqual(self._entries(), entries)
+        self.assertEqual(self._totals(), totals)
+
+
+class FinanceMetricsTests(FinanceTestBase):
+    """Tests for the finance dashboard metrics (finance.metrics)."""
+
+    def setUp(self):
+        super().setUp()
+        self.invoice = Invoice.objects.create(
+            student=self.student,
+            academic_year=self.ay,
+            term=self.term,
+            due_date=date(2030, 10, 15),
+        )
+        InvoiceItem.objects.create(
+            invoice=self.invoice,
+            category='TUITION',
+            description='Tuition Fee',
+            amount=Decimal('1000.00'),
+        )
+        self.invoice.update_totals()
+
+    def _pay(self, amount, method):
+        return Payment.objects.create(
+            invoice=self.invoice, amount=Decimal(amount), method=method, status='COMPLETED',
+        )
+
+    def test_metrics_follow_issue_and_payments(self):
+        self.assertEqual(year_metrics(self.ay).total_invoiced, Decimal('0.00'))
+
+        self.invoice.status = 'ISSUED'
+        self.invoice.save()
+        metrics = year_metrics(self.ay)
+        self.assertEqual(metrics.total_invoiced, Decimal('1000.00'))
+        self.assertEqual(metrics.students_with_balance, 1)
+
+        self._pay('300.00', 'CASH')
+        self._pay('200.00', 'MOBILE_MONEY')
+        self._pay('100.00', 'CASH')
+
+        metrics = year_metrics(self.ay)
+        self.assertEqual(metrics.total_collected, Decimal('600.00'))
+        self.assertEqual(metrics.total_outstanding, Decimal('400.00'))
+        self.assertEqual(metrics.payment_count, 3)
+        self.assertEqual(metrics.collection_rate, Decimal('60'))
+        self.assertEqual(metrics.method_totals(), [
+            {'method': 'CASH', 'total': Decimal('400.00'), 'count': 2},
+            {'method': 'MOBILE_MONEY', 'total': Decimal('200.00'), 'count': 1},
+        ])
+
+        self.assertEqual(term_metrics(self.term).total_collected, Decimal('600.00'))
+
+        self._pay('400.00', 'BANK_TRANSFER')
+        self.assertEqual(year_metrics(self.ay).students_with_balance, 0)
+
+    def test_cancellation_and_rebuild(self):
+        self.invoice.status = 'ISSUED'
+        self.invoice.save()
+        self.invoice.status = 'CANCELLED'
+        self.invoice.save()
+
+        metrics = year_metrics(self.ay)
+        self.assertEqual(metrics.total_invoiced, Decimal('0.00'))
+        self.assertEqual(metrics.students_with_balance, 0)
+
+        rebuild_ledger()
+        rebuild_metrics()
+        metrics = year_metrics(self.ay)
+        self.assertEqual(metrics.total_invoiced, Decimal('0.00'))
+        self.assertEqual(metrics.students_with_balance, 0)
+
+    def test_rebuild_matches_posted_metrics(self):
+        self.invoice.status = 'ISSUED'
+        self.invoice.save()
+        self._pay('300.00', 'CASH')
+        self._pay('200.00', 'MOBILE_MONEY')
+        posted = year_metrics(self.ay)
+
+        FinanceMetrics.objects.all().delete()
+        self.assertEqual(rebuild_metrics(), 3)
+        metrics = year_metrics(self.ay)
+        for field in ('total_invoiced', 'total_collected', 'total_outstanding', 'payment_count',
+                      'students_with_balance'):
+            self.assertEqual(getattr(metrics, field), getattr(posted, field), field)
+        self.assertEqual(metrics.method_totals(), posted.method_totals())
+        self.assertEqual(term_metrics(self.term).total_collected, Decimal('500.00'))
+
+    def test_migration_backfill_matches_posted_metrics(self):
+        from importlib import import_module
+        from django.apps import apps
+
+        backfill = import_module(
+            'finance.migrations.0012_backfill_finance_metrics'
+        ).backfill_finance_metrics
+        self.invoice.status = 'ISSUED'
+        self.invoice.save()
+        self._pay('300.00', 'CASH')
+        self._pay('200.00', 'MOBILE_MONEY')
+        posted = year_metrics(self.ay), term_metrics(self.term)
+
+        FinanceMetrics.objects.all().delete()
+        with connection.schema_editor() as schema_editor:
+            backfill(apps, schema_editor)
+
+        for before, after in zip(posted, (year_metrics(self.ay), term_metrics(self.term))):
+            for field in ('total_invoiced', 'total_collected', 'total_outstanding', 'payment_count',
+                          'students_with_balance'):
+                self.assertEqual(getattr(after, field), getattr(before, field), field)
+            self.assertEqual(after.method_totals(), before.method_totals())
+
+    def test_readers_sum_the_shards(self):
+        FinanceMetrics.objects.bulk_create([
+            FinanceMetrics(
+                academic_year=self.ay, shard=0, total_invoiced=Decimal('1000.00'),
+                total_collected=Decimal('300.00'), payment_count=1, students_with_balance=2,
+                collected_by_method={'CASH': {'total': '300.00', 'count': 1}},
+            ),
+            FinanceMetrics(
+                academic_year=self.ay, shard=3, total_collected=Decimal('200.00'),
+                payment_count=2, students_with_balance=-1,
+                collected_by_method={
+                    'CASH': {'total': '50.00', 'count': 1},
+                    'MOBILE_MONEY': {'total': '150.00', 'count': 1},
+                },
+            ),
+        ])
+
+        metrics = year_metrics(self.ay)
+        self.assertEqual(
+            (metrics.total_invoiced, metrics.total_collected, metrics.payment_count,
+             metrics.students_with_balance),
+            (Decimal('1000.00'), Decimal('500.00'), 3, 1),
+        )
+        self.assertEqual(metrics.method_totals(), [
+            {'method': 'CASH', 'total': Decimal('350.00'), 'count': 2},
+            {'method': 'MOBILE_MONEY', 'total': Decimal('150.00'), 'count': 1},
+        ])
@@ -24,6 +24,7 @@ urlpatterns = [
     path('invoices/', views.invoices, name='invoices'),
     path('invoices/export/', views.invoices_export, name='invoices_export'),
     path('invoices/generate/', views.invoice_generate, name='invoice_generate'),
+    path('invoices/generate/status/<str:task_id>/', views.invoice_generate_status, name='invoice_generate_status'),
     path('invoices/<uuid:pk>/', views.invoice_detail, name='invoice_detail'),
     path('invoices/<uuid:pk>/edit/', views.invoice_edit, name='invoice_edit'),
     path('invoices/<uuid:pk>/cancel/', views.invoice_cancel, name='invoice_cancel'),
@@ -7,7 +7,7 @@ from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse, JsonResponse
 from django.utils import timezone
 from django.db import connection, transaction
-from django.db.models import Sum, Count, Q
+from django.db.models import Sum, Count, F, Q
 from django.db.models.functions import TruncDate
 from django.contrib import messages
 from django.core.paginator import Paginator
@@ -15,13 +15,14 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.utils.html import escape
 from core.email_backend import get_from_email
-from core.utils import cache_page_per_tenant, admin_required, htmx_render
+from core.utils import admin_required, htmx_render
 
 from .models import (
     PaymentGateway, PaymentGatewayConfig, PaymentGatewayTransaction,
     FeeStructure, CATEGORY_CHOICES,
-    Scholarship, StudentScholarship, Invoice, InvoiceItem, Payment,
+    Scholarship, StudentScholarship, Invoice, Payment,
     BankReconciliation, BankStatementRow,
+    FeeLedgerEntry, StudentFeeBalance,
 )
 from .forms import (
     FeeStructureForm, ScholarshipForm, StudentScholarshipForm,
@@ -40,26 +41,15 @@ logger = logging.getLogger(__name__)
 # =============================================================================
 
 @admin_required
-@cache_page_per_tenant(timeout=300)  # Cache for 5 minutes
 def index(request):
-    """Finance dashboard with summary statistics. Cached for 5 minutes."""
+    """Finance dashboard with summary statistics, read from FinanceMetrics."""
+    from .metrics import year_metrics
+
     current_year = AcademicYear.get_current()
     current_term = Term.get_current() if hasattr(Term, 'get_current') else None
 
-    # Calculate statistics
-    total_invoiced = Invoice.objects.filter(
-        academic_year=current_year
-    ).aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
-
-    total_collected = Payment.objects.filter(
-        invoice__academic_year=current_year,
-        status='COMPLETED'
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-    total_outstanding = Invoice.objects.filter(
-        academic_year=current_year,
-        status__in=['ISSUED', 'PARTIALLY_PAID', 'OVERDUE']
-    ).aggregate(total=Sum('balance'))['total'] or Decimal('0.00')
+    # Kept current by the fee ledger, so no aggregation (or page cache) needed
+    metrics = year_metrics(current_year)
 
     # Recent payments
     recent_payments = Payment.objects.filter(
@@ -71,34 +61,17 @@ def index(request):
         status='OVERDUE'
     ).select_related('student').order_by('due_date')[:10]
 
-    # Collection by method
-    collection_by_method = Payment.objects.filter(
-        invoice__academic_year=current_year,
-        status='COMPLETED'
-    ).values('method').annotate(
-        total=Sum('amount'),
-        count=Count('id')
-    ).order_by('-total')
-
-    # Students with outstanding balance
-    students_with_balance = Invoice.objects.filter(
-        academic_year=current_year,
-        balance__gt=0
-    ).values('student').annotate(
-        total_balance=Sum('balance')
-    ).count()
-
     context = {
         'current_year': current_year,
         'current_term': current_term,
-        'total_invoiced': total_invoiced,
-        'total_collected': total_collected,
-        'total_outstanding': total_outstanding,
-        'collection_rate': (total_collected / total_invoiced * 100) if total_invoiced > 0 else 0,
+        'total_invoiced': metrics.total_invoiced,
+        'total_collected': metrics.total_collected,
+        'total_outstanding': metrics.total_outstanding,
+        'collection_rate': metrics.collection_rate,
         'recent_payments': recent_payments,
         'overdue_invoices': overdue_invoices,
-        'collection_by_method': collection_by_method,
-        'students_with_balance': students_with_balance,
+        'collection_by_method': metrics.method_totals(),
+        'students_with_balance': metrics.students_with_balance,
         # Navigation
         'breadcrumbs': [
             {'label': 'Home', 'url': '/', 'icon': 'fa-solid fa-home'},
@@ -512,17 +485,17 @@ def invoice_generate(request):
         if form.is_valid():
             class_obj = form.cleaned_data.get('class_assigned')
             student = form.cleaned_data.get('student')
+            all_students = form.cleaned_data.get('all_students')
             term = form.cleaned_data['term']
             due_date = form.cleaned_data['due_date']
 
             # Get students to invoice
             if student:
                 students = [student]
-            elif class_obj:
-                students = Student.objects.filter(
-                    current_class=class_obj,
-                    status='active'
-                )
+            elif class_obj or all_students:
+                students = Student.objects.filter(status='active')
+                if class_obj:
+                    students = students.filter(current_class=class_obj)
             else:
                 if request.htmx:
                     response = HttpResponse(status=204)
@@ -552,9 +525,8 @@ def invoice_generate(request):
                 messages.error(request, err)
                 return redirect('finance:invoice_generate')
 
-            invoices_created = 0
-            notified_students = []
-            for student in students:
+            if student:
+                # One student bills in a few queries, no need for a background run
                 invoice = create_student_invoice(
                     student=student,
                     academic_year=current_year,
@@ -562,23 +534,46 @@ def invoice_generate(request):
                     due_date=due_date,
                     created_by=request.user
                 )
+                invoices_created = 1 if invoice else 0
                 if invoice:
-                    invoices_created += 1
-                    notified_students.append(student)
-
-            # Bell notifications for guardians
-            if notified_students:
-                from core.notifications import notify_guardian
-                for s in notified_students:
+                    from core.notifications import notify_guardian
                     notify_guardian(
-                        s,
+                        student,
                         title='New Invoice Generated',
-                        message=f'A new fee invoice has been generated for {s.full_name}.',
+                        message=f'A new fee invoice has been generated for {student.full_name}.',
                         category='finance',
                         notification_type='info',
                         icon='fa-solid fa-file-invoice-dollar',
                         link=reverse('finance:fee_payments'),
                     )
+            else:
+                from .tasks import generate_invoices_task
+
+                result = generate_invoices_task.delay(
+                    tenant_schema=connection.schema_name,
+                    term_id=term.pk,
+                    due_date=due_date.isoformat(),
+                    class_id=class_obj.pk if class_obj else None,
+                    created_by_id=request.user.pk,
+                )
+                context = {
+                    'task_id': result.id,
+                    'class_obj': class_obj,
+                    'student_count': students.count(),
+                    'term': term,
+                }
+                if request.htmx:
+                    # 202 keeps the modal open while the progress partial polls
+                    response = render(
+                        request,
+                        'finance/partials/invoice_generate_progress.html',
+                        context,
+                        status=202,
+                    )
+                    response['HX-Retarget'] = '#invoice-modal-content'
+                    response['HX-Reswap'] = 'innerHTML'
+                    return response
+                return render(request, 'finance/invoice_generate.html', context)
 
             if invoices_created == 0:
                 msg = 'No new invoices generated. Students may already have invoices for this term, or no fee structures match their class.'
@@ -616,108 +611,54 @@ def invoice_generate(request):
 
 def create_student_invoice(student, academic_year, term, due_date, created_by):
     """Create an invoice for a student based on applicable fee structures."""
-    # Get applicable fee structures (read-only, safe outside transaction)
-    fee_structures = FeeStructure.objects.filter(
-        academic_year=academic_year,
-        is_active=True
-    ).filter(
-        Q(term=term) | Q(term__isnull=True)
-    )
+    from .billing import generate_invoices
 
-    # Filter by class or level
-    applicable_structures = []
-    for structure in fee_structures:
-        if structure.class_assigned:
-            if structure.class_assigned == student.current_class:
-                applicable_structures.append(structure)
-        elif structure.level_type:
-            if student.current_class and student.current_class.level_type == structure.level_type:
-                applicable_structures.append(structure)
-        else:
-            applicable_structures.append(structure)
+    invoices = generate_invoices([student], academic_year, term, due_date, created_by)
+    return invoices[0] if invoices else None
 
-    if not applicable_structures:
-        return None
 
-    with transaction.atomic():
-        # Atomic duplicate check — prevents race condition
-        existing = Invoice.objects.select_for_update().filter(
-            student=student,
-            academic_year=academic_year,
-            term=term
-        ).exists()
-
-        if existing:
-            return None
-
-        # Create invoice
-        invoice = Invoice.objects.create(
-            student=student,
-            academic_year=academic_year,
-            term=term,
-            due_date=due_date,
-            created_by=created_by,
-            status='DRAFT'
-        )
+@admin_required
+def invoice_generate_status(request, task_id):
+    """Poll Celery task status for a background invoice generation run."""
+    from celery.result import AsyncResult
+
+    result = AsyncResult(task_id)
+    state = result.state
+
+    if state == 'PROGRESS':
+        meta = result.info or {}
+        return JsonResponse({
+            'state': 'PROGRESS',
+            'current': meta.get('current', 0),
+            'total': meta.get('total', 0),
+        })
 
-        # Add line items
-        subtotal = Decimal('0.00')
-        for structure in applicable_structures:
-            # Check if fee applies to student type (boarding/day)
-            if hasattr(student, 'is_boarding'):
-                if student.is_boarding and not structure.applies_to_boarding:
-                    continue
-                if not student.is_boarding and not structure.applies_to_day:
-                    continue
-
-            InvoiceItem.objects.create(
-                invoice=invoice,
-                category=structure.category,
-                description=structure.get_description(),
-                amount=structure.amount
-            )
-            subtotal += structure.amount
-
-        # Apply scholarships
-        discount = Decimal('0.00')
-        student_scholarships = StudentScholarship.objects.filter(
-            student=student,
-            academic_year=academic_year,
-            is_active=True
-        ).select_related('scholarship')
-
-        # Build per-category subtotals for category-specific scholarships
-        category_subtotals = {}
-        for structure in applicable_structures:
-            cat = structure.category
-            category_subtotals[cat] = category_subtotals.get(cat, Decimal('0.00')) + structure.amount
-
-        for ss in student_scholarships:
-            scholarship = ss.scholarship
-            # Determine the base amount this scholarship applies to
-            if scholarship.applies_to_categories:
-                applicable_amount = sum(
-                    category_subtotals.get(cat, Decimal('0.00'))
-                    for cat in scholarship.applies_to_categories
-                )
-            else:
-                applicable_amount = subtotal
-
-            if scholarship.discount_type == 'FULL':
-                discount += applicable_amount
-            elif scholarship.discount_type == 'PERCENTAGE':
-                discount += applicable_amount * (scholarship.discount_value / Decimal('100'))
-            elif scholarship.discount_type == 'FIXED':
-                discount += scholarship.discount_value
-
-        # Update invoice totals
-        invoice.subtotal = subtotal
-        invoice.discount = min(discount, subtotal)  # Can't discount more than subtotal
-        invoice.total_amount = subtotal - invoice.discount
-        invoice.balance = invoice.total_amount
-        invoice.save()
+    if state == 'SUCCESS':
+        info = result.result or {}
+        if not info.get('success'):
+            return JsonResponse({
+                'state': 'FAILURE',
+                'error': info.get('error') or 'Invoice generation failed.',
+            })
+        created = info.get('created', 0)
+        if created:
+            message = f'{created} invoice(s) generated successfully.'
+        else:
+            message = 'No new invoices generated. Students may already have invoices for this term, or no fee structures match their class.'
+        return JsonResponse({
+            'state': 'SUCCESS',
+            'created': created,
+            'message': message,
+        })
+
+    if state == 'FAILURE':
+        return JsonResponse({
+            'state': 'FAILURE',
+            'error': 'Invoice generation failed. Please try again.',
+        })
 
-    return invoice
+    # PENDING / STARTED / other
+    return JsonResponse({'state': state})
 
 
 @admin_required
@@ -797,10 +738,14 @@ def invoice_bulk_issue(request):
             if student_id:
                 drafts = drafts.filter(student_id=student_id)
 
-        updated = drafts.update(
-            status='ISSUED',
-            issue_date=timezone.now().date(),
-        )
+        from .ledger import sync_ledger
+        with transaction.atomic():
+            draft_ids = list(drafts.select_for_update(of=('self',)).values_list('pk', flat=True))
+            updated = Invoice.objects.filter(pk__in=draft_ids).update(
+                status='ISSUED',
+                issue_date=timezone.now().date(),
+            )
+            sync_ledger(invoice_ids=draft_ids)
         messages.success(request, f'{updated} invoice{"s" if updated != 1 else ""} issued successfully.')
         return redirect('finance:invoices')
 
@@ -1172,12 +1117,12 @@ def student_fees(request, student_id):
         status='COMPLETED'
     ).select_related('invoice').order_by('-created_at')
 
-    # Calculate totals
-    total_invoiced = invoices.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
-    total_paid = payments.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    total_balance = invoices.filter(
-        status__in=['ISSUED', 'PARTIALLY_PAID', 'OVERDUE']
-    ).aggregate(total=Sum('balance'))['total'] or Decimal('0.00')
+    # Totals from the fee ledger (one row per academic year)
+    totals = StudentFeeBalance.objects.filter(student=student).aggregate(
+        total_invoiced=Sum('total_invoiced'),
+        total_paid=Sum('total_paid'),
+        total_balance=Sum('balance'),
+    )
 
     # Get scholarships
     scholarships = StudentScholarship.objects.filter(
@@ -1189,9 +1134,9 @@ def student_fees(request, student_id):
         'student': student,
         'invoices': invoices,
         'payments': payments,
-        'total_invoiced': total_invoiced,
-        'total_paid': total_paid,
-        'total_balance': total_balance,
+        'total_invoiced': totals['total_invoiced'] or Decimal('0.00'),
+        'total_paid': totals['total_paid'] or Decimal('0.00'),
+        'total_balance': totals['total_balance'] or Decimal('0.00'),
         'scholarships': scholarships,
     }
 
@@ -1208,43 +1153,19 @@ def student_statement(request, student_id):
     """Generate a fee statement for a student."""
     student = get_object_or_404(Student, pk=student_id)
 
-    invoices = Invoice.objects.filter(
-        student=student
-    ).select_related('academic_year', 'term').order_by('created_at')
-
-    payments = Payment.objects.filter(
-        invoice__student=student,
-        status='COMPLETED'
-    ).select_related('invoice').order_by('transaction_date')
-
-    # Build statement entries
-    entries = []
-    balance = Decimal('0.00')
-
-    for invoice in invoices:
-        balance += invoice.total_amount
-        entries.append({
-            'date': invoice.issue_date,
-            'description': f'Invoice {invoice.invoice_number}',
-            'type': 'invoice',
-            'debit': invoice.total_amount,
-            'credit': None,
-            'balance': balance,
-        })
-
-    for payment in payments:
-        balance -= payment.amount
-        entries.append({
-            'date': payment.transaction_date.date(),
-            'description': f'Payment {payment.receipt_number}',
-            'type': 'payment',
-            'debit': None,
-            'credit': payment.amount,
-            'balance': balance,
-        })
-
-    # Sort by date
-    entries.sort(key=lambda x: x['date'])
+    # Ledger entries carry the running balance, in posting order
+    entries = [
+        {
+            'date': entry.entry_date,
+            'description': entry.description,
+            'type': 'payment' if entry.payment_id else 'invoice',
+            'debit': entry.debit or None,
+            'credit': entry.credit or None,
+            'balance': entry.balance,
+        }
+        for entry in FeeLedgerEntry.objects.filter(student=student).order_by('id')
+    ]
+    balance = entries[-1]['balance'] if entries else Decimal('0.00')
 
     context = {
         'student': student,
@@ -1331,35 +1252,30 @@ def outstanding_report(request):
     """Outstanding fees report."""
     current_year = AcademicYear.get_current()
 
-    # Get students with outstanding balance
-    students_with_balance = Invoice.objects.filter(
+    # Students owing for the year, from the fee ledger
+    balances = StudentFeeBalance.objects.filter(
         academic_year=current_year,
         balance__gt=0
-    ).values(
+    )
+
+    students_with_balance = balances.values(
         'student__id',
         'student__first_name',
         'student__last_name',
         'student__admission_number',
-        'student__current_class__name'
-    ).annotate(
-        total_invoiced=Sum('total_amount'),
-        total_paid=Sum('amount_paid'),
-        total_balance=Sum('balance')
-    ).order_by('-total_balance')
+        'student__current_class__name',
+        'total_invoiced',
+        'total_paid',
+        total_balance=F('balance'),
+    ).order_by('-balance')
 
     # Summary by class
-    by_class = Invoice.objects.filter(
-        academic_year=current_year,
-        balance__gt=0
-    ).values('student__current_class__name').annotate(
-        student_count=Count('student', distinct=True),
+    by_class = balances.values('student__current_class__name').annotate(
+        student_count=Count('student'),
         total_balance=Sum('balance')
     ).order_by('-total_balance')
 
-    total_outstanding = Invoice.objects.filter(
-        academic_year=current_year,
-        balance__gt=0
-    ).aggregate(total=Sum('balance'))['total'] or Decimal('0.00')
+    total_outstanding = balances.aggregate(total=Sum('balance'))['total'] or Decimal('0.00')
 
     context = {
         'students_with_balance': students_with_balance,
@@ -1874,10 +1790,8 @@ def api_student_balance(request, student_id):
     """Get student's current balance."""
     student = get_object_or_404(Student, pk=student_id)
 
-    balance = Invoice.objects.filter(
-        student=student,
-        status__in=['ISSUED', 'PARTIALLY_PAID', 'OVERDUE']
-    ).aggregate(total=Sum('balance'))['total'] or Decimal('0.00')
+    from .ledger import student_balance
+    balance = student_balance(student)
 
     return JsonResponse({
         'student_id': str(student_id),
@@ -2594,15 +2508,15 @@ def fee_payments(request):
 
         ward_ids = [s.id for s in ward_students]
 
-        # Batch-fetch invoice aggregates for all wards
+        # Batch-fetch ledger totals for all wards
         year_filter = {'academic_year': current_year} if current_year else {}
         invoice_aggregates = {}
         if ward_ids:
-            for row in Invoice.objects.filter(
+            for row in StudentFeeBalance.objects.filter(
                 student_id__in=ward_ids, **year_filter
-            ).exclude(status='CANCELLED').values('student_id').annotate(
-                total_fees=Sum('total_amount'),
-                total_paid=Sum('amount_paid'),
+            ).values('student_id').annotate(
+                total_fees=Sum('total_invoiced'),
+                total_paid=Sum('total_paid'),
                 total_balance=Sum('balance')
             ):
                 invoice_aggregates[row['student_id']] = row
@@ -3066,7 +2980,7 @@ def reconciliation_upload(request):
             parser = get_statement_parser(bank)
 
             try:
-                parsed_rows = parser.parse(uploaded_file, ext)
+                statement = parser.parse_frame(uploaded_file, ext)
             except ValueError as e:
                 form.add_error('file', str(e))
             else:
@@ -3077,7 +2991,7 @@ def reconciliation_upload(request):
                     file_name=uploaded_file.name,
                     uploaded_by=request.user,
                 )
-                match_rows_to_invoices(parsed_rows, recon)
+                match_rows_to_invoices(statement, recon)
                 recon.update_stats()
                 return redirect('finance:reconciliation_review', pk=recon.pk)
     else:
@@ -3178,53 +3092,26 @@ def reconciliation_confirm(request, pk):
         messages.error(request, 'No rows selected for confirmation.')
         return redirect('finance:reconciliation_review', pk=pk)
 
-    rows = recon.rows.filter(
-        pk__in=selected_ids, match_status='MATCHED', matched_invoice__isnull=False
-    ).select_related('matched_invoice__student')
-
-    if not rows.exists():
-        messages.error(request, 'No valid matched rows found.')
-        return redirect('finance:reconciliation_review', pk=pk)
-
-    confirmed_count = 0
-
     with transaction.atomic():
-        for row in rows:
-            payment = Payment(
-                invoice=row.matched_invoice,
-                amount=row.credit_amount,
-                method='BANK_TRANSFER',
-                status='COMPLETED',
-                reference=row.reference or f"RECON-{recon.pk}-R{row.row_number}",
-                transaction_date=row.transaction_date or timezone.now(),
-                received_by=request.user,
-                notes=f"Bank reconciliation: {recon.file_name} (row {row.row_number})",
-            )
-            payment.save()
-
-            row.match_status = 'CONFIRMED'
-            row.payment = payment
-            row.save()
-            confirmed_count += 1
-
-            # Queue SMS
-            from .tasks import send_payment_confirmation_sms
-            send_payment_confirmation_sms.delay(
-                str(payment.pk), connection.schema_name
-            )
-
-            # Bell notification
-            if payment.invoice and payment.invoice.student:
-                from core.notifications import notify_guardian
-                student = payment.invoice.student
-                notify_guardian(
-                    student,
-                    title='Payment Confirmed',
-                    message=f'Payment of GHS {payment.amount} received for {student.full_name}.',
-                    category='finance',
-                    notification_type='success',
-                    icon='fa-solid fa-circle-check',
-                )
+        rows = list(recon.rows.select_for_update().filter(
+            pk__in=selected_ids, match_status='MATCHED', matched_invoice__isnull=False
+        ).order_by('row_number'))
+
+        if not rows:
+            messages.error(request, 'No valid matched rows found.')
+            return redirect('finance:reconciliation_review', pk=pk)
+
+        from .posting import post_reconciliation_payments
+        payments = post_reconciliation_payments(rows, recon, request.user)
+        confirmed_count = len(payments)
+
+        # One job sends the SMS and bell notifications for every payment
+        from .tasks import send_payment_confirmations
+        payment_ids = [str(payment.pk) for payment in payments]
+        schema_name = connection.schema_name
+        transaction.on_commit(
+            lambda: send_payment_confirmations.delay(payment_ids, schema_name)
+        )
 
     recon.update_stats()
 
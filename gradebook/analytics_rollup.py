@@ -0,0 +1,118 @@
+"""
+Per-term analytics rollups.
+
+GradeAnalyticsRollup holds, for each class and term, one row per subject
+(graded SubjectTermGrades: count, score sum, high/low, pass count and a
+grade histogram) and one class row with no subject (TermReports: count,
+sum of averages, high/low, reports with no failed subject).
+
+refresh_class_rollup rebuilds one class from a few grouped queries and is
+called when calculate_class finishes; refresh_student_rollups rebuilds the
+classes of students whose grades or reports changed outside it (score
+recalculation flushes, recalc_and_rerank_term_reports). The analytics
+views read these rows instead of aggregating every grade of the term.
+Rollups for terms
+calculated before this table existed can be built with
+``manage.py refresh_analytics_rollups``.
+"""
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+
+from academics.models import Class
+from students.models import Student
+
+from . import config
+from .models import GradeAnalyticsRollup, GradingSystem, SubjectTermGrade, TermReport
+
+
+def class_pass_mark(class_obj):
+    """Pass mark of the active grading system for the class level."""
+    level = 'SHS' if class_obj.level_type == 'shs' else 'BASIC'
+    grading_system = GradingSystem.objects.filter(level=level, is_active=True).first()
+    return grading_system.pass_mark if grading_system else config.DEFAULT_PASS_MARK
+
+
+def refresh_class_rollup(class_obj, term):
+    """
+    Rebuild the analytics rollup rows for one class and term.
+
+    Returns:
+        Number of rollup rows written.
+    """
+    pass_mark = class_pass_mark(class_obj)
+
+    # Reports without an average would count towards the class average
+    report_stats = TermReport.objects.filter(
+        student__current_class=class_obj,
+        term=term,
+        average__isnull=False
+    ).aggregate(
+        count=Count('id'),
+        total=Sum('average'),
+        highest=Max('average'),
+        lowest=Min('average'),
+        passed=Count('id', filter=Q(subjects_failed=0)),
+        subjects_passed=Sum('subjects_passed'),
+    )
+
+    grades = SubjectTermGrade.objects.filter(
+        student__current_class=class_obj,
+        term=term,
+        total_score__isnull=False
+    )
+    grade_counts = {}
+    for row in grades.exclude(grade='').values('subject_id', 'grade').annotate(count=Count('id')):
+        grade_counts.setdefault(row['subject_id'], {})[row['grade']] = row['count']
+
+    rows = []
+    if report_stats['count']:
+        rows.append(GradeAnalyticsRollup(
+            term=term,
+            class_assigned=class_obj,
+            subject=None,
+            student_count=report_stats['count'],
+            score_total=report_stats['total'] or 0,
+            highest_score=report_stats['highest'],
+            lowest_score=report_stats['lowest'],
+            passed_count=report_stats['passed'],
+            subjects_passed_total=report_stats['subjects_passed'] or 0,
+        ))
+
+    for row in grades.values('subject_id').annotate(
+        count=Count('id'),
+        total=Sum('total_score'),
+        highest=Max('total_score'),
+        lowest=Min('total_score'),
+        passed=Count('id', filter=Q(total_score__gte=pass_mark)),
+    ):
+        rows.append(GradeAnalyticsRollup(
+            term=term,
+            class_assigned=class_obj,
+            subject_id=row['subject_id'],
+            student_count=row['count'],
+            score_total=row['total'],
+            highest_score=row['highest'],
+            lowest_score=row['lowest'],
+            passed_count=row['passed'],
+            pass_mark=pass_mark,
+            grade_counts=grade_counts.get(row['subject_id'], {}),
+        ))
+
+    with transaction.atomic():
+        GradeAnalyticsRollup.objects.filter(term=term, class_assigned=class_obj).delete()
+        GradeAnalyticsRollup.objects.bulk_create(rows)
+
+    return len(rows)
+
+
+def refresh_student_rollups(student_ids, term):
+    """
+    Rebuild the rollups of the classes the given students are in.
+
+    Returns:
+        Number of rollup rows written.
+    """
+    classes = Class.objects.filter(
+        pk__in=Student.objects.filter(pk__in=student_ids).values('current_class_id')
+    )
+    return sum(refresh_class_rollup(class_obj, term) for class_obj in classes)
@@ -0,0 +1,405 @@
+"""
+Buffered, month-partitioned score audit log.
+
+Score writes no longer insert their ScoreAuditLog rows on the request's
+transaction. record() serialises the entries and, once the score write
+commits, appends them to a per-tenant Redis list; a debounced Celery task
+(flush_audit_log) drains the list and bulk-inserts the rows in batches.
+If Redis is unavailable the entries are inserted inline, as before.
+
+A batch being inserted sits in a processing list until its rows commit,
+so a worker that dies mid-flush loses nothing; a batch that fails twice is
+parked in a dead-letter list so the rest of the buffer keeps draining.
+
+score_audit_log is range-partitioned by month on created_at (see
+migration 0019). Partitions are created on demand before each insert and
+ahead of time by the maintenance task, and purging old history drops whole
+partitions instead of deleting rows.
+
+The audit views page through history with keyset pagination on
+(created_at, id), see paginate().
+"""
+import json
+import logging
+from datetime import datetime, timezone as dt_timezone
+from uuid import UUID
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from . import config
+from .models import Assignment, Score, ScoreAuditLog
+from .recalc_queue import _get_redis_client
+from students.models import Student
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'score_audit_log'
+
+_AUDIT_FIELDS = (
+    'id', 'score_id', 'student_id', 'assignment_id', 'user_id', 'action',
+    'old_value', 'new_value', 'ip_address', 'user_agent', 'created_at',
+)
+
+# Partitions known to exist, per (schema, partition name), so the common
+# case skips the CREATE TABLE IF NOT EXISTS round trip
+_known_partitions = set()
+
+
+def _buffer_key(schema):
+    return cache.make_key(f'gradebook_audit_buffer_{schema}')
+
+
+def _processing_key(schema):
+    return cache.make_key(f'gradebook_audit_processing_{schema}')
+
+
+def _dead_letter_key(schema):
+    return cache.make_key(f'gradebook_audit_dead_letter_{schema}')
+
+
+def _failed_batch_key(schema):
+    return cache.make_key(f'gradebook_audit_failed_batch_{schema}')
+
+
+def _flush_scheduled_key(schema):
+    return f'gradebook_audit_flush_scheduled_{schema}'
+
+
+def _flush_lock_key(schema):
+    return f'gradebook_audit_flush_lock_{schema}'
+
+
+# Moves up to ARGV[1] entries from the head of the buffer (KEYS[1]) to the
+# processing list (KEYS[2]) and returns them
+_CLAIM_BATCH = """
+local members = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #members > 0 then
+    redis.call('LTRIM', KEYS[1], #members, -1)
+    redis.call('RPUSH', KEYS[2], unpack(members))
+end
+return members
+"""
+
+
+def _encode(log):
+    return json.dumps(
+        {field: getattr(log, field) for field in _AUDIT_FIELDS},
+        cls=DjangoJSONEncoder,
+    )
+
+
+def _decode(member):
+    data = json.loads(member)
+    for field in ScoreAuditLog._meta.concrete_fields:
+        data[field.attname] = field.to_python(data[field.attname])
+    return ScoreAuditLog(**data)
+
+
+# ============ Writing ============
+
+def record(logs):
+    """
+    Record unsaved ScoreAuditLog entries.
+
+    The entries are buffered once the surrounding transaction commits, so
+    a rolled-back score write leaves no audit trail. Without Redis they
+    are inserted immediately on the caller's transaction.
+    """
+    logs = list(logs)
+    if not logs:
+        return
+
+    schema = connection.schema_name
+    try:
+        client = _get_redis_client()
+    except Exception as e:
+        logger.warning(f"Audit buffer unavailable, writing inline: {e}")
+        client = None
+    if client is None:
+        write(logs)
+        return
+
+    members = [_encode(log) for log in logs]
+    transaction.on_commit(lambda: _push(schema, members, logs))
+
+
+def _push(schema, members, logs):
+    try:
+        client = _get_redis_client()
+        client.rpush(_buffer_key(schema), *members)
+        schedule_flush(schema)
+    except Exception as e:
+        logger.warning(f"Audit buffer unavailable, writing inline: {e}")
+        write(logs)
+
+
+def write(logs):
+    """
+    Insert audit entries, creating the month partitions they fall in.
+
+    Entries already inserted (same id and created_at) are skipped, so a
+    batch can safely be written again.
+    """
+    ensure_partitions({_month_start(log.created_at) for log in logs})
+    ScoreAuditLog.objects.bulk_create(
+        logs, batch_size=config.BULK_UPDATE_BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def schedule_flush(schema):
+    """Schedule flush_audit_log for a tenant unless one is already pending."""
+    delay = config.AUDIT_FLUSH_DELAY
+    if cache.add(_flush_scheduled_key(schema), 1, delay * 6):
+        from .tasks import flush_audit_log
+        flush_audit_log.apply_async(args=[schema], countdown=delay)
+
+
+def _drop_orphans(logs):
+    """
+    Drop entries whose student or assignment was deleted while buffered,
+    and clear references to deleted scores and users.
+    """
+    def existing(model, ids):
+        ids = {pk for pk in ids if pk is not None}
+        if not ids:
+            return set()
+        return set(model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+
+    students = existing(Student, (log.student_id for log in logs))
+    assignments = existing(Assignment, (log.assignment_id for log in logs))
+    scores = existing(Score, (log.score_id for log in logs))
+    users = existing(get_user_model(), (log.user_id for log in logs))
+
+    kept = []
+    for log in logs:
+        if log.student_id not in students or log.assignment_id not in assignments:
+            continue
+        if log.score_id not in scores:
+            log.score_id = None
+        if log.user_id not in users:
+            log.user_id = None
+        kept.append(log)
+    return kept
+
+
+def flush(schema=None):
+    """
+    Drain a tenant's audit buffer into the database in batches.
+
+    Must run in the tenant's schema, and runs once per tenant at a time.
+    Each batch is moved to a processing list and only removed from it
+    after its rows commit; entries left there by a flush that died go back
+    to the head of the buffer. A batch that fails to insert is put back at
+    the head of the buffer and the error raised; if it fails again it is
+    moved to the dead-letter list and the flush carries on.
+
+    Returns:
+        Number of audit rows written.
+    """
+    schema = schema or connection.schema_name
+    cache.delete(_flush_scheduled_key(schema))
+
+    client = _get_redis_client()
+    if client is None:
+        return 0
+
+    # The lock outlives a killed worker only until its hard time limit.
+    # Entries pushed while another flush runs get a flush of their own.
+    lock_key = _flush_lock_key(schema)
+    if not cache.add(lock_key, 1, config.TASK_TIME_LIMIT):
+        schedule_flush(schema)
+        return 0
+    try:
+        return _drain(client, schema)
+    finally:
+        cache.delete(lock_key)
+
+
+def _drain(client, schema):
+    key = _buffer_key(schema)
+    processing = _processing_key(schema)
+    failed_batch = _failed_batch_key(schema)
+
+    # Return a dead flush's batch to the head of the buffer, in order
+    while client.lmove(processing, key, 'RIGHT', 'LEFT'):
+        pass
+
+    claim = client.register_script(_CLAIM_BATCH)
+    written = 0
+    while True:
+        members = claim(keys=[key, processing], args=[config.AUDIT_FLUSH_BATCH_SIZE])
+        if not members:
+            break
+
+        try:
+            logs = _drop_orphans([_decode(member) for member in members])
+            with transaction.atomic():
+                write(logs)
+        except Exception:
+            retried = client.get(failed_batch) == members[0]
+            pipe = client.pipeline()
+            if retried:
+                pipe.rpush(_dead_letter_key(schema), *members)
+            else:
+                pipe.lpush(key, *reversed(members))
+                pipe.set(failed_batch, members[0])
+            pipe.delete(processing)
+            pipe.execute()
+            if not retried:
+                raise
+            logger.exception(
+                f"Moved {len(members)} audit entries that failed to insert twice "
+                f"to {_dead_letter_key(schema)}"
+            )
+            continue
+
+        client.delete(processing, failed_batch)
+        written += len(logs)
+
+    return written
+
+
+def pending_count(schema=None):
+    """Number of audit entries waiting in a tenant's buffer."""
+    client = _get_redis_client()
+    if client is None:
+        return 0
+    return client.llen(_buffer_key(schema or connection.schema_name))
+
+
+# ============ Partitions ============
+
+def _month_start(value):
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _next_month(month):
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_y{month.year}m{month.month:02d}'
+
+
+def ensure_partitions(months):
+    """Create the monthly partitions for the given month starts if missing."""
+    schema = connection.schema_name
+    with connection.cursor() as cursor:
+        for month in sorted(months):
+            name = partition_name(month)
+            if (schema, name) in _known_partitions:
+                continue
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {connection.ops.quote_name(name)} '
+                f'PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)',
+                [month.isoformat(), _next_month(month).isoformat()],
+            )
+            # Only remember partitions that survive the transaction
+            transaction.on_commit(lambda key=(schema, name): _known_partitions.add(key))
+
+
+def ensure_upcoming_partitions(now=None):
+    """Create partitions for this month and AUDIT_PARTITIONS_AHEAD more."""
+    month = _month_start(now or datetime.now(dt_timezone.utc))
+    months = [month]
+    for _ in range(config.AUDIT_PARTITIONS_AHEAD):
+        month = _next_month(month)
+        months.append(month)
+    ensure_partitions(months)
+    return months
+
+
+def list_partitions():
+    """Existing monthly partitions of the current schema as [(month, name)]."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            JOIN pg_namespace ns ON ns.oid = parent.relnamespace
+            WHERE parent.relname = %s AND ns.nspname = current_schema()
+            """,
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    prefix = f'{TABLE}_y'
+    for name in names:
+        try:
+            year, month = name[len(prefix):].split('m')
+            partitions.append((datetime(int(year), int(month), 1, tzinfo=dt_timezone.utc), name))
+        except ValueError:
+            continue
+    return sorted(partitions)
+
+
+def drop_partitions_before(cutoff, dry_run=False):
+    """
+    Drop every monthly partition that ends on or before cutoff.
+
+    Rows in the month containing cutoff are kept until that whole month
+    falls out of retention.
+
+    Returns:
+        List of (month, name, row_count) dropped (or that would be).
+    """
+    schema = connection.schema_name
+    dropped = []
+    with connection.cursor() as cursor:
+        for month, name in list_partitions():
+            if _next_month(month) > cutoff:
+                continue
+            quoted = connection.ops.quote_name(name)
+            cursor.execute(f'SELECT COUNT(*) FROM {quoted}')
+            dropped.append((month, name, cursor.fetchone()[0]))
+            if not dry_run:
+                cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {quoted}')
+                cursor.execute(f'DROP TABLE {quoted}')
+                _known_partitions.discard((schema, name))
+    return dropped
+
+
+# ============ Reading ============
+
+def encode_cursor(log):
+    return f'{log.created_at.isoformat()}_{log.pk}'
+
+
+def paginate(queryset, cursor=None, limit=None):
+    """
+    One page of audit entries, newest first, using keyset pagination.
+
+    Args:
+        cursor: Value of a previous page's next_cursor, or None for the
+            first page
+        limit: Page size (defaults to AUDIT_LOG_DISPLAY_LIMIT)
+
+    Returns:
+        tuple: (logs, next_cursor), next_cursor is None on the last page
+    """
+    limit = limit or config.AUDIT_LOG_DISPLAY_LIMIT
+    if cursor:
+        created_at, _, pk = cursor.rpartition('_')
+        try:
+            created_at, pk = parse_datetime(created_at), UUID(pk)
+        except ValueError:
+            created_at = None  # malformed cursor: start from the newest
+        if created_at is not None:
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            )
+
+    logs = list(queryset.order_by('-created_at', '-id')[:limit + 1])
+    next_cursor = encode_cursor(logs[limit - 1]) if len(logs) > limit else None
+    return logs[:limit], next_cursor
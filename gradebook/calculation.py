@@ -0,0 +1,550 @@
+"""
+Class grade calculation pipeline.
+
+Runs the five calculation phases (prefetch, subject grades, subject
+positions, term reports, overall positions) for one class and term, then
+refreshes the class's analytics rollup.
+Shared by the calculate-grades views and the background Celery tasks.
+"""
+from collections import defaultdict
+from decimal import Decimal
+import logging
+
+from django.db import transaction
+
+from .models import (
+    GradingSystem, AssessmentCategory, Assignment,
+    Score, SubjectTermGrade, TermReport,
+)
+from .signals import signals_disabled
+from .grade_engine import calculate_subject_category_scores
+from .ranking import rank_subject_positions, rank_term_reports
+from .analytics_rollup import refresh_class_rollup
+from .transcripts import rebuild_snapshots
+from .utils import determine_grade_from_scales
+from . import config
+
+from academics.models import ClassSubject, StudentSubjectEnrollment, AttendanceSession, AttendanceRecord
+from students.models import Student
+
+logger = logging.getLogger(__name__)
+
+
+# ============ Grade Calculation Helpers ============
+
+def _prefetch_grade_data(class_obj, current_term):
+    """
+    Phase 1: Bulk prefetch all data needed for grade calculation.
+
+    Returns a dict with students, subjects, enrollments, assignments,
+    scores, and categories — all fetched in minimal queries.
+    """
+    students = list(Student.objects.filter(
+        current_class=class_obj, status='active'
+    ).order_by('last_name', 'first_name'))
+
+    if not students:
+        return None
+
+    student_ids = [s.id for s in students]
+
+    class_subjects = ClassSubject.objects.filter(
+        class_assigned=class_obj
+    ).select_related('subject')
+    subjects = [cs.subject for cs in class_subjects]
+
+    if not subjects:
+        return None
+
+    subject_ids = [s.id for s in subjects]
+
+    # Build student -> enrolled subjects map (respects SHS electives)
+    student_subject_map = {}
+    enrollments = StudentSubjectEnrollment.objects.filter(
+        student_id__in=student_ids,
+        class_subject__class_assigned=class_obj,
+        is_active=True
+    ).select_related('class_subject__subject')
+
+    for enrollment in enrollments:
+        sid = enrollment.student_id
+        subj_id = enrollment.class_subject.subject_id
+        if sid not in student_subject_map:
+            student_subject_map[sid] = set()
+        student_subject_map[sid].add(subj_id)
+
+    logger.info(
+        f'Subject enrollments for {class_obj.name}: '
+        f'{len(student_subject_map)} students with enrolled subjects'
+    )
+
+    categories = list(AssessmentCategory.objects.filter(is_active=True))
+
+    assignments = list(Assignment.objects.filter(
+        subject_id__in=subject_ids,
+        term=current_term
+    ).select_related('assessment_category'))
+
+    assignments_by_subject_category = defaultdict(list)
+    for assign in assignments:
+        key = (assign.subject_id, assign.assessment_category_id)
+        assignments_by_subject_category[key].append(assign)
+
+    assignment_ids = [a.id for a in assignments]
+    scores = Score.objects.filter(
+        student_id__in=student_ids,
+        assignment_id__in=assignment_ids
+    ).select_related('assignment')
+
+    scores_lookup = {
+        (s.student_id, s.assignment_id): s for s in scores
+    }
+
+    return {
+        'students': students,
+        'student_ids': student_ids,
+        'subjects': subjects,
+        'subject_ids': subject_ids,
+        'student_subject_map': student_subject_map,
+        'categories': categories,
+        'assignments': assignments,
+        'assignments_by_subject_category': dict(assignments_by_subject_category),
+        'scores_lookup': scores_lookup,
+    }
+
+
+def _calculate_subject_grades(data, current_term, grading_system, grade_scales):
+    """
+    Phase 2: Calculate SubjectTermGrade for each student-subject pair.
+
+    Creates missing grade objects and computes category scores, totals,
+    and grade labels using prefetched data (no per-student queries). Category
+    scores come from the vectorized grade engine, one call per subject.
+    """
+    students = data['students']
+    subjects = data['subjects']
+    student_subject_map = data['student_subject_map']
+
+    existing_grades = {
+        (g.student_id, g.subject_id): g
+        for g in SubjectTermGrade.objects.filter(
+            student_id__in=data['student_ids'],
+            subject_id__in=data['subject_ids'],
+            term=current_term
+        )
+    }
+
+    grades_to_create = []
+    grades_to_update = []
+
+    for student in students:
+        enrolled_subject_ids = student_subject_map.get(student.id, set())
+
+        for subject in subjects:
+            if subject.id not in enrolled_subject_ids:
+                continue
+
+            key = (student.id, subject.id)
+            if key in existing_grades:
+                grade = existing_grades[key]
+            else:
+                grade = SubjectTermGrade(
+                    student=student, subject=subject, term=current_term
+                )
+                grades_to_create.append(grade)
+                existing_grades[key] = grade
+
+    if grades_to_create:
+        SubjectTermGrade.objects.bulk_create(grades_to_create)
+        for grade in grades_to_create:
+            existing_grades[(grade.student_id, grade.subject_id)] = grade
+
+    # One vectorized calculation per subject over all its enrolled students
+    for subject in subjects:
+        subject_student_ids = [
+            student.id for student in students
+            if subject.id in student_subject_map.get(student.id, set())
+        ]
+        subject_results = calculate_subject_category_scores(
+            student_ids=subject_student_ids,
+            subject_id=subject.id,
+            categories=data['categories'],
+            assignments_by_subject_category=data['assignments_by_subject_category'],
+            scores_lookup=data['scores_lookup'],
+        )
+
+        for student_id, calc_result in subject_results.items():
+            grade = existing_grades.get((student_id, subject.id))
+            if not grade:
+                continue
+
+            grade.category_scores = calc_result['category_scores_json']
+            grade.class_score = calc_result['class_score']
+            grade.exam_score = calc_result['exam_score']
+            grade.total_score = calc_result['total_score']
+
+            grade.is_passing = False
+            if grading_system and grade.total_score is not None:
+                grade_info = determine_grade_from_scales(grade.total_score, grade_scales)
+                grade.grade = grade_info['grade']
+                grade.grade_remark = grade_info['grade_remark']
+                grade.is_passing = grade_info['is_passing']
+
+            grades_to_update.append(grade)
+
+    SubjectTermGrade.objects.bulk_update(
+        grades_to_update,
+        ['class_score', 'exam_score', 'total_score', 'category_scores', 'grade', 'grade_remark', 'is_passing'],
+        batch_size=config.BULK_UPDATE_BATCH_SIZE
+    )
+
+
+def _calculate_subject_positions(data, current_term):
+    """
+    Phase 3: Calculate per-subject positions (ranked in the database).
+
+    Returns (all_grades, students_with_subjects) for use in later phases.
+    """
+    student_subject_map = data['student_subject_map']
+    students = data['students']
+
+    students_with_subjects = [
+        s for s in students if student_subject_map.get(s.id)
+    ]
+    student_ids_with_subjects = [s.id for s in students_with_subjects]
+
+    all_grades = list(SubjectTermGrade.objects.filter(
+        student_id__in=student_ids_with_subjects,
+        subject_id__in=data['subject_ids'],
+        term=current_term,
+        total_score__isnull=False
+    ).select_related('subject'))
+
+    # Drop grades for student↔subject pairs the student is no longer enrolled
+    # in. Without this, a SubjectTermGrade left over from before a student was
+    # unregistered from a subject would still be ranked and counted toward
+    # positions/averages, corrupting positions and out_of for the whole class.
+    all_grades = [
+        g for g in all_grades
+        if g.subject_id in student_subject_map.get(g.student_id, set())
+    ]
+
+    positions = rank_subject_positions([g.pk for g in all_grades])
+    for grade in all_grades:
+        grade.position = positions.get(str(grade.pk))
+
+    return all_grades, students_with_subjects
+
+
+def _calculate_term_reports(
+    data, all_grades, students_with_subjects, current_term,
+    class_obj, grading_system, grade_scales, is_final_term
+):
+    """
+    Phase 4: Calculate TermReport aggregates, attendance, and promotion.
+
+    Returns reports_to_update for position calculation in Phase 5.
+    """
+    subjects = data['subjects']
+    student_ids_with_subjects = [s.id for s in students_with_subjects]
+
+    existing_reports = {
+        r.student_id: r
+        for r in TermReport.objects.filter(
+            student_id__in=student_ids_with_subjects,
+            term=current_term
+        )
+    }
+
+    reports_to_create = []
+    for student in students_with_subjects:
+        if student.id not in existing_reports:
+            report = TermReport(student=student, term=current_term)
+            reports_to_create.append(report)
+            existing_reports[student.id] = report
+
+    if reports_to_create:
+        TermReport.objects.bulk_create(reports_to_create)
+
+    grades_by_student = defaultdict(list)
+    for grade in all_grades:
+        grades_by_student[grade.student_id].append(grade)
+
+    subjects_dict = {s.id: s for s in subjects}
+
+    # Bulk prefetch attendance data
+    attendance_sessions = AttendanceSession.objects.filter(
+        class_assigned=class_obj,
+        date__gte=current_term.start_date,
+        date__lte=current_term.end_date
+    )
+    session_ids = list(attendance_sessions.values_list('id', flat=True))
+    total_school_days = attendance_sessions.values('date').distinct().count()
+
+    attendance_by_student = {}
+    if session_ids:
+        from django.db.models import Count, Q as _Q
+        attendance_stats = AttendanceRecord.objects.filter(
+            session_id__in=session_ids,
+            student_id__in=student_ids_with_subjects
+        ).values('student_id').annotate(
+            days_present=Count(
+                'session__date',
+                filter=_Q(status__in=['P', 'L']),
+                distinct=True
+            ),
+            times_late=Count('id', filter=_Q(status='L')),
+        )
+        for row in attendance_stats:
+            row['days_absent'] = total_school_days - row['days_present']
+            attendance_by_student[row['student_id']] = row
+
+    reports_to_update = []
+
+    for student in students_with_subjects:
+        report = existing_reports[student.id]
+        student_grades = grades_by_student.get(student.id, [])
+
+        if student_grades:
+            total = sum(g.total_score for g in student_grades if g.total_score is not None)
+            count = len([g for g in student_grades if g.total_score is not None])
+
+            report.total_marks = total
+            report.average = round(total / count, 2) if count > 0 else Decimal('0.0')
+            report.subjects_taken = count
+
+            passed = [g for g in student_grades if g.is_passing]
+            report.subjects_passed = len(passed)
+            report.subjects_failed = count - len(passed)
+
+            credits = 0
+            if grading_system and grade_scales:
+                for g in student_grades:
+                    if g.total_score is not None:
+                        scale = grading_system.get_grade_for_score(g.total_score, grade_scales)
+                        if scale and scale.is_credit:
+                            credits += 1
+            report.credits_count = credits
+
+            core_grades = [
+                g for g in student_grades
+                if subjects_dict.get(g.subject_id) and subjects_dict[g.subject_id].is_core
+            ]
+            report.core_subjects_total = len(core_grades)
+            report.core_subjects_passed = len([g for g in core_grades if g.is_passing])
+
+            if grading_system:
+                grade_points = []
+                for g in student_grades:
+                    if g.total_score is not None:
+                        scale = grading_system.get_grade_for_score(g.total_score, grade_scales)
+                        if scale and scale.aggregate_points:
+                            grade_points.append(scale.aggregate_points)
+
+                if grade_points:
+                    grade_points.sort()
+                    best_n = grade_points[:grading_system.aggregate_subjects_count]
+                    report.aggregate = sum(best_n)
+
+        else:
+            core_grades = []
+
+        att = attendance_by_student.get(student.id)
+        if att and total_school_days > 0:
+            report.total_school_days = total_school_days
+            report.days_present = att['days_present']
+            report.days_absent = att['days_absent']
+            report.times_late = att['times_late']
+            report.attendance_percentage = round(
+                (Decimal(str(att['days_present'])) / Decimal(str(total_school_days))) * 100, 2
+            )
+            report.attendance_rating = TermReport.derive_attendance_rating(
+                report.attendance_percentage
+            )
+        else:
+            # No attendance recorded — auto-generation has nothing to derive
+            # from, so leave the rating blank rather than keep a stale value.
+            report.attendance_rating = ''
+            report.attendance_percentage = None
+            report.days_present = None
+            report.days_absent = None
+            report.times_late = None
+            report.total_school_days = None
+
+        if is_final_term and grading_system:
+            is_eligible, reasons = grading_system.check_promotion_eligibility(
+                report, core_grades=core_grades
+            )
+            report.promoted = is_eligible
+            report.promotion_remarks = '; '.join(reasons) if reasons else 'Meets all requirements'
+        # bulk_update skips TermReport.save(), which clears stale promotions
+        if report.promoted is not True:
+            report.promoted_to = None
+
+        reports_to_update.append(report)
+
+    TermReport.objects.bulk_update(
+        reports_to_update,
+        ['total_marks', 'average', 'subjects_taken', 'subjects_passed',
+         'subjects_failed', 'credits_count', 'core_subjects_total',
+         'core_subjects_passed', 'aggregate', 'promoted', 'promoted_to',
+         'promotion_remarks', 'days_present', 'days_absent',
+         'total_school_days', 'times_late', 'attendance_percentage',
+         'attendance_rating'],
+        batch_size=config.BULK_UPDATE_BATCH_SIZE
+    )
+
+    return reports_to_update
+
+
+def _calculate_overall_positions(reports_to_update, class_obj):
+    """
+    Phase 5: Calculate overall class positions by average (ranked in the database).
+    """
+    ranks = rank_term_reports([r.pk for r in reports_to_update])
+    for report in reports_to_update:
+        report.position, report.out_of = ranks.get(str(report.pk), (None, None))
+
+    ranked_reports = sorted(
+        (r for r in reports_to_update if r.position is not None),
+        key=lambda r: r.position,
+    )
+    unranked_reports = [r for r in reports_to_update if r.position is None]
+    ranked_count = len(ranked_reports)
+
+    if ranked_reports:
+        logger.info(
+            f'Position assignments for {class_obj.name}: ' +
+            ', '.join(
+                f'{r.student_id}:avg={r.average}/pos={r.position}'
+                for r in ranked_reports
+            )
+        )
+
+    return ranked_count, unranked_reports
+
+
+def _detect_missing_scores(data, students_with_subjects):
+    """Detect students with enrolled subjects but no scores at all."""
+    student_subject_map = data['student_subject_map']
+    scores_lookup = data['scores_lookup']
+    assignments = data['assignments']
+    subjects_dict = {s.id: s for s in data['subjects']}
+
+    missing_scores = []
+    for student in students_with_subjects:
+        enrolled_subj_ids = student_subject_map.get(student.id, set())
+        for subj_id in enrolled_subj_ids:
+            has_score = any(
+                (student.id, a.id) in scores_lookup
+                for a in assignments
+                if a.subject_id == subj_id
+            )
+            if not has_score:
+                subj = subjects_dict.get(subj_id)
+                if subj:
+                    missing_scores.append({
+                        'student': student.full_name,
+                        'subject': subj.short_name or subj.name,
+                    })
+
+    return missing_scores
+
+
+# ============ Pipeline ============
+
+CALCULATION_PHASES = [
+    'Loading class data',
+    'Calculating subject grades',
+    'Ranking subjects',
+    'Building term reports',
+    'Ranking class',
+]
+
+
+def resolve_grading_system(class_obj, grading_system_id=None):
+    """
+    Return the grading system to calculate a class with.
+
+    Uses the explicitly chosen system when given, otherwise auto-detects
+    the active system for the class level (SHS or BASIC).
+    """
+    if grading_system_id:
+        return GradingSystem.objects.filter(pk=grading_system_id).first()
+    level = 'SHS' if class_obj.level_type == 'shs' else 'BASIC'
+    return GradingSystem.objects.filter(level=level, is_active=True).first()
+
+
+def calculate_class(class_obj, current_term, grading_system, on_phase=None):
+    """
+    Run all calculation phases for a class in a single transaction.
+
+    Args:
+        class_obj: Class instance
+        current_term: Term instance
+        grading_system: GradingSystem instance (or None)
+        on_phase: Optional callable(phase_number, label) invoked before
+            each phase, used by background tasks to report progress.
+
+    Returns:
+        dict with student_count, ranked_count, unranked_count and
+        missing_scores, or None if the class has no students or subjects.
+    """
+    def report(phase):
+        if on_phase:
+            on_phase(phase, CALCULATION_PHASES[phase - 1])
+
+    # Check if this is the final term (Term 3) for promotion decisions
+    is_final_term = current_term.term_number == 3 if hasattr(current_term, 'term_number') else False
+
+    with signals_disabled(), transaction.atomic():
+        # Phase 1: Bulk prefetch
+        report(1)
+        data = _prefetch_grade_data(class_obj, current_term)
+        if data is None:
+            return None
+
+        grade_scales = []
+        if grading_system:
+            grade_scales = list(grading_system.scales.all().order_by('-min_percentage'))
+
+        # Phase 2: Calculate subject grades
+        report(2)
+        _calculate_subject_grades(data, current_term, grading_system, grade_scales)
+
+        # Phase 3: Subject positions
+        report(3)
+        all_grades, students_with_subjects = _calculate_subject_positions(data, current_term)
+
+        # Phase 4: Term reports (attendance, aggregates, promotion)
+        report(4)
+        reports_to_update = _calculate_term_reports(
+            data, all_grades, students_with_subjects, current_term,
+            class_obj, grading_system, grade_scales, is_final_term
+        )
+
+        # Phase 5: Overall positions
+        report(5)
+        ranked_count, unranked_reports = _calculate_overall_positions(reports_to_update, class_obj)
+
+        # Detect missing scores
+        missing_scores = _detect_missing_scores(data, students_with_subjects)
+
+        # Rebuild the class's analytics rollup from the new grades
+        refresh_class_rollup(class_obj, current_term)
+
+        # Rebuild the students' transcript snapshots from the new grades
+        rebuild_snapshots(s.pk for s in data['students'])
+
+    logger.info(
+        f'Calculated grades for {class_obj.name}: '
+        f'{ranked_count} ranked, {len(unranked_reports)} unranked '
+        f'using {grading_system.name if grading_system else "default"} grading system'
+    )
+
+    return {
+        'student_count': len(students_with_subjects),
+        'ranked_count': ranked_count,
+        'unranked_count': len(unranked_reports),
+        'missing_scores': missing_scores,
+    }
@@ -28,6 +28,23 @@ _DEFAULTS = {
 
     # Bulk operation settings
     'BULK_UPDATE_BATCH_SIZE': 500,
+    'SCORE_BATCH_MAX_ENTRIES': 500,  # cells accepted per score_save_batch request
+    'REMARK_BATCH_MAX_ENTRIES': 500,  # remark fields accepted per bulk_remark_save_batch request
+
+    # Streaming score import (see score_import.py)
+    'SCORE_IMPORT_MAX_FILE_SIZE': 20 * 1024 * 1024,  # 20 MB, multi-class workbooks
+    'SCORE_IMPORT_CHUNK_ROWS': 500,  # worksheet rows parsed per chunk
+    'SCORE_IMPORT_BATCH_SIZE': 1000,  # scores per INSERT ... ON CONFLICT statement
+    'SCORE_IMPORT_MAX_ERRORS': 100,  # row errors kept in the job result
+
+    # Coalesced grade recalculation (see recalc_queue.py)
+    'RECALC_FLUSH_DELAY': 5,  # seconds to wait for more score writes before flushing
+    'RECALC_FLUSH_BATCH_SIZE': 500,  # stale grades popped per batch
+
+    # Buffered score audit log (see audit_log.py)
+    'AUDIT_FLUSH_DELAY': 5,  # seconds to collect audit entries before flushing
+    'AUDIT_FLUSH_BATCH_SIZE': 1000,  # buffered entries inserted per batch
+    'AUDIT_PARTITIONS_AHEAD': 2,  # monthly partitions created ahead of time
 
     # Analytics and display limits
     'AUDIT_LOG_DISPLAY_LIMIT': 50,
@@ -43,6 +60,12 @@ _DEFAULTS = {
 
     # Export ZIP settings
     'EXPORT_ZIP_MAX_AGE_HOURS': 24,
+    'EXPORT_CHUNK_SIZE': 10,  # report cards rendered per parallel export task
+
+    # Report card PDF cache (see report_cache.py)
+    'REPORT_PDF_CACHE_ENABLED': True,
+    'REPORT_PDF_CACHE_DIR': None,  # defaults to MEDIA_ROOT/report_cache
+    'REPORT_PDF_CACHE_MAX_BYTES': 500 * 1024 * 1024,  # per tenant, LRU evicted
 
     # Celery task settings
     'TASK_MAX_RETRIES': 3,
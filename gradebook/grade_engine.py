@@ -0,0 +1,196 @@
+"""
+Vectorized grade engine.
+
+calculate_subject_category_scores() computes the same results as
+utils.calculate_category_scores for every student in a subject at once:
+scores are laid out as a students x assignments matrix, normalised by
+points_possible, weighted per category and summed with NumPy instead of a
+Decimal loop per student.
+
+Results are identical to the Decimal implementation, including rounding.
+Float error (~1e-11 at these magnitudes) can only change a 2 dp rounding
+when the exact value sits on a half-cent boundary. Such ties are resolved
+half-even, like Decimal, when the category weights and points_possible divide
+exactly in decimal (so the Decimal implementation computes the exact value
+too). Otherwise the student is recalculated with calculate_category_scores.
+"""
+from decimal import Decimal
+from fractions import Fraction
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from .utils import calculate_category_scores
+
+# Distance (in cents) from a .5 boundary below which a value is handed to
+# the Decimal implementation. Far above float error, far below 1 cent.
+ROUNDING_TOLERANCE = 1e-6
+
+
+def _is_terminating(fraction):
+    """True if a Fraction has a finite decimal expansion."""
+    d = fraction.denominator
+    for p in (2, 5):
+        while d % p == 0:
+            d //= p
+    return d == 1
+
+
+@lru_cache(maxsize=1024)
+def _divides_exactly(points_possible, percentage, count):
+    """True if Decimal computes points/points_possible * percentage/count exactly."""
+    possible = Fraction(points_possible)
+    return (
+        possible > 0
+        and _is_terminating(1 / possible)
+        and _is_terminating(Fraction(percentage, count))
+    )
+
+
+def _round_cents(values, exact):
+    """
+    Round an array of percentages to whole cents, half-even.
+
+    Returns (cents, ambiguous). Values within ROUNDING_TOLERANCE of a
+    half-cent are ties: they are rounded half-even where exact (a bool, or
+    a per-column array) is true, otherwise marked ambiguous for the
+    Decimal implementation.
+    """
+    finite = np.isfinite(values)
+    scaled = np.where(finite, values, 0) * 100
+    lower = np.floor(scaled)
+    tie = np.abs(scaled - lower - 0.5) < ROUNDING_TOLERANCE
+    cents = np.floor(scaled + 0.5)
+    cents = np.where(tie, lower + (lower % 2), cents).astype(np.int64)
+    ambiguous = ~finite | (tie & ~np.asarray(exact, dtype=bool))
+    return cents, ambiguous
+
+
+@lru_cache(maxsize=16384)
+def _to_decimal(cents):
+    """Convert whole cents to a 2 dp Decimal, matching round(Decimal, 2)."""
+    return Decimal(cents).scaleb(-2)
+
+
+def calculate_subject_category_scores(
+    student_ids: Iterable[int],
+    subject_id: int,
+    categories: List[Any],
+    assignments_by_subject_category: Dict[Tuple[int, int], List[Any]],
+    scores_lookup: Dict[Tuple[int, int], Any]
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Calculate category scores for many students in one subject.
+
+    Takes the same inputs as utils.calculate_category_scores, but with a
+    list of student IDs.
+
+    Returns:
+        Dict mapping student_id to the calculate_category_scores result
+        (category_scores_json, class_score, exam_score, total_score).
+    """
+    student_ids = list(student_ids)
+    if not student_ids:
+        return {}
+
+    # Columns: every assignment of the subject, grouped by category
+    active = []
+    columns = []
+    for category in categories:
+        cat_assignments = assignments_by_subject_category.get((subject_id, category.id), [])
+        if cat_assignments:
+            active.append(category)
+            columns.extend((len(active) - 1, category, a) for a in cat_assignments)
+
+    n_students = len(student_ids)
+    n_categories = len(active)
+
+    if columns:
+        get_score = scores_lookup.get
+        points = np.zeros((n_students, len(columns)))
+        for j, (_, _, assignment) in enumerate(columns):
+            column = [get_score((student_id, assignment.id)) for student_id in student_ids]
+            points[:, j] = [
+                float(score.points) if score and score.points is not None else 0.0
+                for score in column
+            ]
+
+        possible = np.array([float(a.points_possible) for _, _, a in columns])
+        counts = np.bincount([c for c, _, _ in columns], minlength=n_categories)
+        weights = np.array([float(category.percentage) / counts[c] for c, category, _ in columns])
+
+        # A category is computed exactly by Decimal (so its ties are real
+        # ties) when both percentage/count and every 1/points_possible
+        # terminate.
+        exact = np.ones(n_categories, dtype=bool)
+        for c, category, a in columns:
+            exact[c] &= _divides_exactly(str(a.points_possible), category.percentage, int(counts[c]))
+
+        membership = np.zeros((len(columns), n_categories))
+        membership[np.arange(len(columns)), [c for c, _, _ in columns]] = 1.0
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            category_totals = (points / possible * weights) @ membership
+    else:
+        category_totals = np.zeros((n_students, 0))
+        exact = np.ones(0, dtype=bool)
+
+    types = [category.category_type for category in active]
+    class_mask = np.array([t == 'CLASS_SCORE' for t in types], dtype=bool)
+    exam_mask = np.array([t == 'EXAM' for t in types], dtype=bool)
+
+    totals = category_totals.sum(axis=1)
+    class_totals = category_totals[:, class_mask].sum(axis=1)
+    exam_totals = category_totals[:, exam_mask].sum(axis=1)
+
+    category_cents, category_ambiguous = _round_cents(category_totals, exact)
+    total_cents, total_ambiguous = _round_cents(totals, exact.all())
+    class_cents, class_ambiguous = _round_cents(class_totals, exact[class_mask].all())
+    exam_cents, exam_ambiguous = _round_cents(exam_totals, exact[exam_mask].all())
+    ambiguous = (
+        category_ambiguous.any(axis=1) | total_ambiguous | class_ambiguous | exam_ambiguous
+    )
+
+    # Per-category JSON fields that don't depend on the student
+    category_fields = [
+        (str(category.pk), {
+            'short_name': category.short_name,
+            'name': category.name,
+            'percentage': category.percentage,
+            'category_type': category.category_type,
+            'order': category.order,
+        })
+        for category in active
+    ]
+    category_cents = category_cents.tolist()
+    class_cents = class_cents.tolist()
+    exam_cents = exam_cents.tolist()
+    total_cents = total_cents.tolist()
+
+    results = {}
+    for i, student_id in enumerate(student_ids):
+        if ambiguous[i]:
+            results[student_id] = calculate_category_scores(
+                student_id=student_id,
+                subject_id=subject_id,
+                categories=categories,
+                assignments_by_subject_category=assignments_by_subject_category,
+                scores_lookup=scores_lookup,
+            )
+            continue
+
+        # cents / 100 is the correctly rounded float of the 2 dp Decimal,
+        # i.e. the same value as float(round(category_total, 2)).
+        student_cents = category_cents[i]
+        results[student_id] = {
+            'category_scores_json': {
+                key: {'score': student_cents[c] / 100, **fields}
+                for c, (key, fields) in enumerate(category_fields)
+            },
+            'class_score': _to_decimal(class_cents[i]),
+            'exam_score': _to_decimal(exam_cents[i]),
+            'total_score': _to_decimal(total_cents[i]),
+        }
+
+    return results
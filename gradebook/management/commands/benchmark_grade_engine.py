@@ -0,0 +1,111 @@
+"""
+Benchmark the vectorized grade engine against calculate_category_scores.
+
+Builds a synthetic class in memory (no database access), runs both
+implementations over every student x subject pair, checks the results are
+identical and prints the timings.
+
+Usage:
+    # Default: 60 students, 12 subjects, 10 assignments per subject
+    python manage.py benchmark_grade_engine
+
+    # Larger class, more repeats
+    python manage.py benchmark_grade_engine --students 120 --repeat 10
+"""
+import random
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Compare the vectorized grade engine with calculate_category_scores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=60)
+        parser.add_argument('--subjects', type=int, default=12)
+        parser.add_argument('--assignments', type=int, default=10,
+                            help='Assignments per subject, split across categories')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        from gradebook.grade_engine import calculate_subject_category_scores
+        from gradebook.utils import calculate_category_scores
+
+        rng = random.Random(options['seed'])
+        categories = [
+            SimpleNamespace(id=1, pk=1, name='Class Work', short_name='CW',
+                            percentage=15, category_type='CLASS_SCORE', order=1),
+            SimpleNamespace(id=2, pk=2, name='Homework', short_name='HW',
+                            percentage=15, category_type='CLASS_SCORE', order=2),
+            SimpleNamespace(id=3, pk=3, name='Examination', short_name='EXAM',
+                            percentage=70, category_type='EXAM', order=3),
+        ]
+        student_ids = list(range(1, options['students'] + 1))
+        subject_ids = list(range(1, options['subjects'] + 1))
+
+        assignments = {}
+        scores = {}
+        next_id = 1
+        for subject_id in subject_ids:
+            for n in range(options['assignments']):
+                category = categories[n % len(categories)]
+                possible = Decimal(rng.choice([10, 20, 50, 100]))
+                assignment = SimpleNamespace(id=next_id, points_possible=possible)
+                next_id += 1
+                assignments.setdefault((subject_id, category.id), []).append(assignment)
+                for student_id in student_ids:
+                    if rng.random() < 0.9:
+                        points = Decimal(rng.randint(0, int(possible) * 2)) / 2
+                        scores[(student_id, assignment.id)] = SimpleNamespace(points=points)
+
+        def run_scalar():
+            return {
+                (student_id, subject_id): calculate_category_scores(
+                    student_id, subject_id, categories, assignments, scores
+                )
+                for subject_id in subject_ids
+                for student_id in student_ids
+            }
+
+        def run_vectorized():
+            results = {}
+            for subject_id in subject_ids:
+                subject_results = calculate_subject_category_scores(
+                    student_ids, subject_id, categories, assignments, scores
+                )
+                for student_id, result in subject_results.items():
+                    results[(student_id, subject_id)] = result
+            return results
+
+        scalar_time, expected = self._time(run_scalar, options['repeat'])
+        vector_time, actual = self._time(run_vectorized, options['repeat'])
+
+        mismatches = [key for key in expected if repr(expected[key]) != repr(actual[key])]
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} results differ, e.g. {mismatches[0]}')
+
+        pairs = len(expected)
+        self.stdout.write(
+            f'{len(student_ids)} students x {len(subject_ids)} subjects '
+            f'x {options["assignments"]} assignments ({pairs} grades), '
+            f'best of {options["repeat"]}'
+        )
+        self.stdout.write(f'  calculate_category_scores:         {scalar_time * 1000:8.1f} ms')
+        self.stdout.write(f'  calculate_subject_category_scores: {vector_time * 1000:8.1f} ms')
+        self.stdout.write(self.style.SUCCESS(
+            f'Results identical; {scalar_time / vector_time:.1f}x faster'
+        ))
+
+    def _time(self, func, repeat):
+        best = None
+        result = None
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
@@ -0,0 +1,85 @@
+"""
+Benchmark report card rendering for a class.
+
+Renders every report card in a class twice: once with cold render state
+per document (stylesheet parsed, fonts configured and branding encoded for
+each report, as before core.pdf) and once with the per-worker state reused.
+The report PDF cache is bypassed and all writes (verification records) are
+rolled back.
+
+Usage:
+    python manage.py benchmark_report_rendering --schema demo --class-id 12
+
+    # First 10 students, best of 3
+    python manage.py benchmark_report_rendering --schema demo --class-id 12 --limit 10 --repeat 3
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from django_tenants.utils import schema_context
+
+
+class Command(BaseCommand):
+    help = 'Compare cold and reused PDF render state for a class of report cards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', required=True, help='Tenant schema name')
+        parser.add_argument('--class-id', required=True, help='Class to render')
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Only render the first N students')
+        parser.add_argument('--repeat', type=int, default=1)
+
+    def handle(self, *args, **options):
+        schema = options['schema']
+        with schema_context(schema):
+            from gradebook.models import TermReport
+            from core.models import Term
+
+            current_term = Term.objects.filter(is_current=True).first()
+            if not current_term:
+                raise CommandError('No current term')
+
+            term_reports = list(TermReport.objects.filter(
+                student__current_class_id=options['class_id'],
+                term=current_term,
+            ).select_related(
+                'student', 'student__current_class', 'term', 'term__academic_year'
+            ).order_by('student__last_name', 'student__first_name'))
+            if options['limit']:
+                term_reports = term_reports[:options['limit']]
+            if not term_reports:
+                raise CommandError('No report cards for this class in the current term')
+
+            with override_settings(GRADEBOOK_REPORT_PDF_CACHE_ENABLED=False):
+                cold = self._best(schema, term_reports, options['repeat'], reuse=False)
+                warm = self._best(schema, term_reports, options['repeat'], reuse=True)
+
+        count = len(term_reports)
+        self.stdout.write(f'{count} report cards, best of {options["repeat"]}')
+        self.stdout.write(f'  cold render state: {cold * 1000 / count:8.1f} ms/report')
+        self.stdout.write(f'  reused state:      {warm * 1000 / count:8.1f} ms/report')
+        self.stdout.write(self.style.SUCCESS(f'{cold / warm:.2f}x faster per report'))
+
+    def _best(self, schema, term_reports, repeat, reuse):
+        from core import pdf
+        from gradebook.tasks import generate_report_pdf, _build_report_shared_context
+
+        best = None
+        for _ in range(max(repeat, 1)):
+            pdf.clear_render_state()
+            pdf._font_config = None
+            with transaction.atomic():
+                start = time.perf_counter()
+                shared_context = _build_report_shared_context(schema, term_reports[0].term)
+                for term_report in term_reports:
+                    if not reuse:
+                        pdf.clear_render_state()
+                        pdf._font_config = None
+                        shared_context = _build_report_shared_context(schema, term_report.term)
+                    generate_report_pdf(term_report, schema, shared_context=shared_context)
+                elapsed = time.perf_counter() - start
+                transaction.set_rollback(True)
+            best = elapsed if best is None else min(best, elapsed)
+        return best
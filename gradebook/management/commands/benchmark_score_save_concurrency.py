@@ -0,0 +1,165 @@
+"""
+Benchmark score-save throughput with concurrent teachers.
+
+Simulates N teachers saving scores at once, each in its own thread and
+database connection, and prints saves per second for each concurrency
+level. Every save runs the same transaction as score_save (grade-lock
+guard, score upsert, audit entry) and is then rolled back, so the tenant's
+data is not modified.
+
+audit_log.record() only buffers its entries once the transaction commits,
+so each save pushes its entry to a scratch Redis list instead (deleted
+after each level) to keep the buffer write in the measurement. Without
+Redis, record() inserts the row inline and that insert is measured.
+
+--guard exclusive uses the old Term select_for_update() guard, which
+serialises every score write in the school on one row; --guard shared
+(default) uses Term.locked_for_score_writes().
+
+Usage:
+    python manage.py benchmark_score_save_concurrency --schema demo
+
+    # Compare with the old row lock
+    python manage.py benchmark_score_save_concurrency --schema demo --guard exclusive
+
+    python manage.py benchmark_score_save_concurrency --schema demo --teachers 1,4,16 --seconds 10
+"""
+import random
+import threading
+import time
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django_tenants.utils import schema_context
+
+
+def _scratch_key(schema):
+    return cache.make_key(f'gradebook_audit_benchmark_{schema}')
+
+
+class Command(BaseCommand):
+    help = 'Measure score-save throughput as the number of concurrent teachers grows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', required=True, help='Tenant schema name')
+        parser.add_argument('--teachers', default='1,2,4,8,16',
+                            help='Comma-separated concurrency levels')
+        parser.add_argument('--seconds', type=float, default=5.0,
+                            help='Duration of each level')
+        parser.add_argument('--guard', choices=['shared', 'exclusive'], default='shared')
+        parser.add_argument('--think-ms', type=float, default=2.0,
+                            help='Time spent inside each transaction after the guard '
+                                 '(application work and round trips)')
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(n) for n in options['teachers'].split(',')]
+        except ValueError:
+            raise CommandError('--teachers must be a comma-separated list of integers')
+
+        schema = options['schema']
+        with schema_context(schema):
+            from core.models import Term
+            from gradebook.models import Assignment
+            from students.models import Student
+
+            term = Term.objects.filter(is_current=True).first()
+            if not term:
+                raise CommandError('No current term')
+            assignment_ids = list(Assignment.objects.filter(term=term).values_list('pk', flat=True))
+            student_ids = list(Student.objects.filter(status='active').values_list('pk', flat=True)[:500])
+            if not assignment_ids or not student_ids:
+                raise CommandError('The current term needs assignments and active students')
+
+        self.stdout.write(
+            f'guard={options["guard"]}, {options["seconds"]:g}s per level, '
+            f'{options["think_ms"]:g} ms in transaction'
+        )
+        self.stdout.write(f'{"teachers":>8}  {"saves/s":>9}  {"scaling":>7}')
+
+        baseline = None
+        for teachers in levels:
+            rate = self._run_level(
+                schema, term.pk, student_ids, assignment_ids, teachers, options
+            )
+            baseline = baseline or rate
+            self.stdout.write(f'{teachers:>8}  {rate:>9.1f}  {rate / baseline:>6.2f}x')
+
+    def _run_level(self, schema, term_id, student_ids, assignment_ids, teachers, options):
+        deadline = time.perf_counter() + options['seconds']
+        counts = [0] * teachers
+        errors = []
+        start_barrier = threading.Barrier(teachers)
+
+        def teacher(index):
+            rng = random.Random(index)
+            try:
+                with schema_context(schema):
+                    start_barrier.wait()
+                    while time.perf_counter() < deadline:
+                        self._save_score(
+                            term_id, rng.choice(student_ids), rng.choice(assignment_ids),
+                            options['guard'], options['think_ms'] / 1000
+                        )
+                        counts[index] += 1
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=teacher, args=(i,)) for i in range(teachers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        from gradebook.recalc_queue import _get_redis_client
+        client = _get_redis_client()
+        if client is not None:
+            client.delete(_scratch_key(schema))
+
+        if errors:
+            raise CommandError(f'{len(errors)} teacher threads failed: {errors[0]}')
+        return sum(counts) / elapsed
+
+    def _save_score(self, term_id, student_id, assignment_id, guard, think):
+        from core.models import Term
+        from gradebook import audit_log
+        from gradebook.models import Score, ScoreAuditLog
+        from gradebook.recalc_queue import _get_redis_client
+        from gradebook.signals import signals_disabled
+
+        with signals_disabled(), transaction.atomic():
+            if guard == 'exclusive':
+                locked = Term.objects.select_for_update().get(pk=term_id).grades_locked
+            else:
+                locked = term_id in Term.locked_for_score_writes([term_id])
+            if locked:
+                raise CommandError('Grades are locked for the current term')
+
+            score, created = Score.objects.update_or_create(
+                student_id=student_id,
+                assignment_id=assignment_id,
+                defaults={'points': Decimal('0')}
+            )
+            logs = [ScoreAuditLog(
+                score=score,
+                student_id=student_id,
+                assignment_id=assignment_id,
+                action='CREATE' if created else 'UPDATE',
+                new_value=Decimal('0'),
+                user_agent='benchmark_score_save_concurrency',
+            )]
+            client = _get_redis_client()
+            if client is None:
+                audit_log.record(logs)
+            else:
+                # What record() pushes on commit, to a list nothing flushes
+                client.rpush(_scratch_key(connection.schema_name), *[audit_log._encode(log) for log in logs])
+            if think:
+                time.sleep(think)
+            transaction.set_rollback(True)
@@ -1,6 +1,10 @@
 """
 Management command to purge old ScoreAuditLog entries.
 
+score_audit_log is partitioned by month, so purging drops every monthly
+partition that lies entirely before the cutoff instead of deleting rows.
+The month containing the cutoff is kept until it fully expires.
+
 Usage:
     # Purge logs older than 6 months (default) for a specific tenant
     python manage.py tenant_command purge_audit_logs --schema=demo
@@ -8,7 +12,7 @@ Usage:
     # Purge logs older than 1 year
     python manage.py tenant_command purge_audit_logs --schema=demo --months=12
 
-    # Dry run to see how many would be deleted
+    # Dry run to see which partitions would be dropped
     python manage.py tenant_command purge_audit_logs --schema=demo --dry-run
 """
 from datetime import timedelta
@@ -31,22 +35,27 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
-        from gradebook.models import ScoreAuditLog
+        from gradebook.audit_log import drop_partitions_before
 
         months = options['months']
         cutoff = timezone.now() - timedelta(days=months * 30)
-        qs = ScoreAuditLog.objects.filter(created_at__lt=cutoff)
-        count = qs.count()
+        partitions = drop_partitions_before(cutoff, dry_run=options['dry_run'])
+        count = sum(rows for _, _, rows in partitions)
 
         if options['dry_run']:
-            self.stdout.write(f'Would delete {count} audit log(s) older than {months} months.')
+            for month, name, rows in partitions:
+                self.stdout.write(f'  {name} ({month:%Y-%m}): {rows} log(s)')
+            self.stdout.write(
+                f'Would delete {count} audit log(s) in {len(partitions)} partition(s) '
+                f'older than {months} months.'
+            )
             return
 
-        if count == 0:
+        if not partitions:
             self.stdout.write(self.style.SUCCESS('No old audit logs to purge.'))
             return
 
-        deleted, _ = qs.delete()
         self.stdout.write(self.style.SUCCESS(
-            f'Purged {deleted} audit log(s) older than {months} months (before {cutoff:%Y-%m-%d}).'
+            f'Purged {count} audit log(s) in {len(partitions)} partition(s) '
+            f'older than {months} months (before {cutoff:%Y-%m-%d}).'
         ))
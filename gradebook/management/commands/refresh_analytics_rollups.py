@@ -0,0 +1,70 @@
+"""
+Rebuild the analytics dashboard rollups (GradeAnalyticsRollup).
+
+Rollups are refreshed automatically whenever a class's grades are
+calculated. Run this once to build them for terms calculated before the
+rollup table existed, or after editing grades outside the calculation
+pipeline.
+
+Scope: the current term by default; --all-terms covers every term that
+has term reports.
+
+Usage:
+    python manage.py tenant_command refresh_analytics_rollups --schema=<tenant>
+    python manage.py tenant_command refresh_analytics_rollups --schema=<tenant> --all-terms
+"""
+from django.core.management.base import BaseCommand
+from django_tenants.utils import schema_context
+
+
+class Command(BaseCommand):
+    help = 'Rebuild gradebook analytics rollups from term reports and subject grades'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', type=str, help='Tenant schema name')
+        parser.add_argument('--term-id', help='Term UUID (defaults to current term)')
+        parser.add_argument(
+            '--all-terms', action='store_true',
+            help='Rebuild every term that has term reports'
+        )
+
+    def handle(self, *args, **options):
+        schema = options.get('schema')
+        if schema:
+            with schema_context(schema):
+                self._run(options)
+        else:
+            self._run(options)
+
+    def _run(self, options):
+        from academics.models import Class
+        from core.models import Term
+        from gradebook.analytics_rollup import refresh_class_rollup
+        from gradebook.models import TermReport
+
+        if options['all_terms']:
+            terms = list(Term.objects.filter(
+                pk__in=TermReport.objects.values('term_id')
+            ).order_by('start_date'))
+        elif options.get('term_id'):
+            terms = list(Term.objects.filter(pk=options['term_id']))
+            if not terms:
+                self.stderr.write(f"Term {options['term_id']} not found.")
+                return
+        else:
+            current_term = Term.get_current()
+            if not current_term:
+                self.stderr.write('No current term set.')
+                return
+            terms = [current_term]
+
+        for term in terms:
+            classes = Class.objects.filter(
+                pk__in=TermReport.objects.filter(term=term).values('student__current_class')
+            ).order_by('level_number', 'name')
+            rows = 0
+            for class_obj in classes:
+                rows += refresh_class_rollup(class_obj, term)
+            self.stdout.write(f'{term}: {len(classes)} classes, {rows} rollup rows')
+
+        self.stdout.write(self.style.SUCCESS('Analytics rollups refreshed.'))
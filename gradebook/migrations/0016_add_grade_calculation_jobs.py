@@ -0,0 +1,69 @@
+# Generated by Django 5.2.9 on 2026-10-16 19:34
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0024_add_absence_excuse'),
+        ('core', '0023_add_school_days'),
+        ('gradebook', '0015_clear_attendance_ratings'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeCalculationJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Completed with errors')], default='RUNNING', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('started_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='grade_calculation_jobs', to=settings.AUTH_USER_MODEL)),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_calculation_jobs', to='core.term')),
+            ],
+            options={
+                'verbose_name': 'Grade Calculation Job',
+                'verbose_name_plural': 'Grade Calculation Jobs',
+                'db_table': 'grade_calculation_job',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='GradeCalculationJobClass',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('student_count', models.PositiveIntegerField(blank=True, null=True)),
+                ('duration_ms', models.PositiveIntegerField(blank=True, help_text='Wall-clock time the calculation took', null=True)),
+                ('error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('class_assigned', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_calculation_runs', to='academics.class')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='class_runs', to='gradebook.gradecalculationjob')),
+            ],
+            options={
+                'verbose_name': 'Grade Calculation Job Class',
+                'verbose_name_plural': 'Grade Calculation Job Classes',
+                'db_table': 'grade_calculation_job_class',
+                'ordering': ['class_assigned__level_number', 'class_assigned__name'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='gradecalculationjob',
+            index=models.Index(fields=['term', 'status'], name='grade_calcu_term_id_854486_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gradecalculationjobclass',
+            index=models.Index(fields=['job', 'status'], name='grade_calcu_job_id_2d360f_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='gradecalculationjobclass',
+            unique_together={('job', 'class_assigned')},
+        ),
+    ]
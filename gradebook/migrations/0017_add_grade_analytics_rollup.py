@@ -0,0 +1,52 @@
+# Generated by Django 5.2.9 on 2026-10-16 21:40
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0024_add_absence_excuse'),
+        ('core', '0023_add_school_days'),
+        ('gradebook', '0016_add_grade_calculation_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeAnalyticsRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('student_count', models.PositiveIntegerField(default=0, help_text='Graded subject grades, or term reports for the class row')),
+                ('score_total', models.DecimalField(decimal_places=2, default=0, help_text='Sum of total scores, or of report averages for the class row', max_digits=12)),
+                ('highest_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('lowest_score', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('passed_count', models.PositiveIntegerField(default=0, help_text='Scores at or above pass_mark, or reports with no failed subject')),
+                ('pass_mark', models.DecimalField(blank=True, decimal_places=2, help_text="Pass mark of the class's grading system when the row was built", max_digits=5, null=True)),
+                ('subjects_passed_total', models.PositiveIntegerField(default=0, help_text='Sum of subjects passed across reports (class row only)')),
+                ('grade_counts', models.JSONField(blank=True, default=dict, help_text='Number of grades per grade label, e.g. {"A1": 3, "B2": 5}')),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('class_assigned', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analytics_rollups', to='academics.class')),
+                ('subject', models.ForeignKey(blank=True, help_text='Empty for the whole-class TermReport summary', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='analytics_rollups', to='academics.subject')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analytics_rollups', to='core.term')),
+            ],
+            options={
+                'verbose_name': 'Grade Analytics Rollup',
+                'verbose_name_plural': 'Grade Analytics Rollups',
+                'db_table': 'grade_analytics_rollup',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='gradeanalyticsrollup',
+            index=models.Index(fields=['term', 'subject'], name='grade_analy_term_id_397b66_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='gradeanalyticsrollup',
+            constraint=models.UniqueConstraint(fields=('term', 'class_assigned', 'subject'), name='unique_analytics_rollup_subject'),
+        ),
+        migrations.AddConstraint(
+            model_name='gradeanalyticsrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('subject__isnull', True)), fields=('term', 'class_assigned'), name='unique_analytics_rollup_class'),
+        ),
+    ]
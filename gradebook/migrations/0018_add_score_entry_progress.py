@@ -0,0 +1,37 @@
+# Generated by Django 5.2.9 on 2026-10-16 23:10
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0024_add_absence_excuse'),
+        ('core', '0023_add_school_days'),
+        ('gradebook', '0017_add_grade_analytics_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreEntryProgress',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('assignment_count', models.IntegerField(default=0)),
+                ('enrolled_count', models.IntegerField(default=0)),
+                ('expected_scores', models.IntegerField(default=0)),
+                ('entered_scores', models.IntegerField(default=0)),
+                ('last_activity', models.DateTimeField(blank=True, help_text='Most recent score change by an enrolled student', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('class_subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_progress', to='academics.classsubject')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_progress', to='core.term')),
+            ],
+            options={
+                'verbose_name': 'Score Entry Progress',
+                'verbose_name_plural': 'Score Entry Progress',
+                'db_table': 'score_entry_progress',
+                'unique_together': {('class_subject', 'term')},
+            },
+        ),
+    ]
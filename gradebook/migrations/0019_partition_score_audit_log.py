@@ -0,0 +1,126 @@
+# Generated by Django 5.2.9 on 2026-10-17 09:30
+#
+# Rebuilds score_audit_log as a table range-partitioned by month on
+# created_at. Postgres requires the partition key in the primary key, so
+# the database key becomes (id, created_at); Django keeps treating id as
+# the primary key. Existing rows are copied into monthly partitions and
+# the remaining indexes and foreign keys are recreated on the new table.
+# New partitions are created by gradebook.audit_log.
+
+from datetime import datetime, timezone
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+TABLE = 'score_audit_log'
+PARTITIONS_AHEAD = 2
+
+
+def _month_start(value):
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def _next_month(month):
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def _rebuild(schema_editor, partitioned):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    old = f'{TABLE}_unpartitioned' if partitioned else f'{TABLE}_partitioned'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype IN ('p', 'f')",
+            [TABLE],
+        )
+        constraints = cursor.fetchall()
+        pkey = next(name for name, kind, _ in constraints if kind == 'p')
+        foreign_keys = [(name, definition) for name, kind, definition in constraints if kind == 'f']
+
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s",
+            [TABLE, pkey],
+        )
+        indexes = [definition.replace(' ON ONLY ', ' ON ') for _, definition in cursor.fetchall()]
+
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {old}')
+        if partitioned:
+            cursor.execute(
+                f'CREATE TABLE {TABLE} (LIKE {old} INCLUDING DEFAULTS) '
+                f'PARTITION BY RANGE (created_at)'
+            )
+            cursor.execute(f'SELECT MIN(created_at) FROM {old}')
+            now = datetime.now(timezone.utc)
+            month = _month_start(cursor.fetchone()[0] or now)
+            last = _month_start(now)
+            for _ in range(PARTITIONS_AHEAD):
+                last = _next_month(last)
+            while month <= last:
+                cursor.execute(
+                    f'CREATE TABLE {TABLE}_y{month.year}m{month.month:02d} '
+                    f'PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)',
+                    [month.isoformat(), _next_month(month).isoformat()],
+                )
+                month = _next_month(month)
+            primary_key = 'id, created_at'
+        else:
+            cursor.execute(f'CREATE TABLE {TABLE} (LIKE {old} INCLUDING DEFAULTS)')
+            primary_key = 'id'
+
+        cursor.execute(f'INSERT INTO {TABLE} SELECT * FROM {old}')
+        cursor.execute(f'DROP TABLE {old} CASCADE')
+
+        cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {pkey} PRIMARY KEY ({primary_key})')
+        for definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}')
+
+
+def partition_audit_log(apps, schema_editor):
+    _rebuild(schema_editor, partitioned=True)
+
+
+def unpartition_audit_log(apps, schema_editor):
+    _rebuild(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gradebook', '0018_add_score_entry_progress'),
+        ('students', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='scoreauditlog',
+            options={'ordering': ['-created_at', '-id'], 'verbose_name': 'Score Audit Log', 'verbose_name_plural': 'Score Audit Logs'},
+        ),
+        migrations.AlterField(
+            model_name='scoreauditlog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='scoreauditlog',
+            name='student',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='score_audit_logs', to='students.student'),
+        ),
+        migrations.AlterField(
+            model_name='scoreauditlog',
+            name='user',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='score_audit_logs', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(partition_audit_log, unpartition_audit_log),
+    ]
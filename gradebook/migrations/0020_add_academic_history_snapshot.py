@@ -0,0 +1,30 @@
+# Generated by Django 5.2.9 on 2026-10-17 11:05
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gradebook', '0019_partition_score_audit_log'),
+        ('students', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AcademicHistorySnapshot',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('history', models.JSONField(default=dict)),
+                ('built_at', models.DateTimeField(auto_now=True)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='academic_history', to='students.student')),
+            ],
+            options={
+                'verbose_name': 'Academic History Snapshot',
+                'verbose_name_plural': 'Academic History Snapshots',
+                'db_table': 'academic_history_snapshot',
+            },
+        ),
+    ]
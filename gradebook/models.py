@@ -2,6 +2,7 @@ import uuid
 from html import escape as html_escape
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from decimal import Decimal
@@ -637,6 +638,11 @@ class Score(models.Model):
 class ScoreAuditLog(models.Model):
     """
     Audit log for score changes. Tracks who changed what and when.
+
+    Written through audit_log.record(), which buffers entries and inserts
+    them in batches. The table is range-partitioned by month on created_at
+    (primary key (id, created_at) in the database), so purging old history
+    drops whole partitions.
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     ACTION_CHOICES = [
@@ -655,9 +661,11 @@ class ScoreAuditLog(models.Model):
     )
 
     # Store identifiers separately in case score is deleted
+    # student and user are covered by the composite indexes below
     student = models.ForeignKey(
         Student,
         on_delete=models.CASCADE,
+        db_index=False,
         related_name='score_audit_logs'
     )
     assignment = models.ForeignKey(
@@ -671,6 +679,7 @@ class ScoreAuditLog(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
         null=True,
+        db_index=False,
         related_name='score_audit_logs'
     )
 
@@ -691,8 +700,8 @@ class ScoreAuditLog(models.Model):
         help_text='New score value'
     )
 
-    # When
-    created_at = models.DateTimeField(auto_now_add=True)
+    # When (set when the change is recorded, not when the buffer is flushed)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     # Optional: extra context
     ip_address = models.GenericIPAddressField(null=True, blank=True)
@@ -703,7 +712,7 @@ class ScoreAuditLog(models.Model):
 
     class Meta:
         db_table = 'score_audit_log'
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
         verbose_name = 'Score Audit Log'
         verbose_name_plural = 'Score Audit Logs'
         indexes = [
@@ -1112,16 +1121,22 @@ class TermReport(models.Model):
             self.promoted_to = None
         super().save(*args, **kwargs)
 
-    def calculate_aggregates(self, grading_system=None):
+    def calculate_aggregates(self, grading_system=None, grades=None):
         """
         Recalculate all aggregates from SubjectTermGrades.
         Uses grading_system for pass/credit thresholds if provided.
+
+        grades: Optional prefetched graded SubjectTermGrades (with subject)
+        for this student and term; queried when not given.
         """
-        grades_list = list(SubjectTermGrade.objects.filter(
-            student=self.student,
-            term=self.term,
-            total_score__isnull=False
-        ).select_related('subject'))
+        if grades is not None:
+            grades_list = list(grades)
+        else:
+            grades_list = list(SubjectTermGrade.objects.filter(
+                student=self.student,
+                term=self.term,
+                total_score__isnull=False
+            ).select_related('subject'))
 
         if not grades_list:
             return
@@ -1422,3 +1437,286 @@ class ReportDistributionLog(models.Model):
             models.Index(fields=['email_status']),
             models.Index(fields=['sms_status']),
         ]
+
+
+class GradeCalculationJob(models.Model):
+    """
+    A school-wide grade calculation run covering every active class for a term.
+
+    Each class is tracked by a GradeCalculationJobClass row so the run can be
+    resumed after a worker crash and per-class timings can be reported.
+    """
+
+    STATUS_CHOICES = [
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Completed with errors'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    term = models.ForeignKey(
+        Term,
+        on_delete=models.CASCADE,
+        related_name='grade_calculation_jobs'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='RUNNING'
+    )
+    started_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='grade_calculation_jobs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Grade calculation for {self.term} ({self.get_status_display()})"
+
+    def refresh_status(self):
+        """Mark the job finished once no class is pending or running."""
+        from django.utils import timezone
+
+        runs = self.class_runs.all()
+        if runs.filter(status__in=['PENDING', 'RUNNING']).exists():
+            return self.status
+        status = 'FAILED' if runs.filter(status='FAILED').exists() else 'COMPLETED'
+        # Conditional update so concurrent class tasks finish the job once
+        GradeCalculationJob.objects.filter(pk=self.pk, status='RUNNING').update(
+            status=status, finished_at=timezone.now()
+        )
+        self.refresh_from_db(fields=['status', 'finished_at'])
+        return self.status
+
+    class Meta:
+        db_table = 'grade_calculation_job'
+        ordering = ['-created_at']
+        verbose_name = 'Grade Calculation Job'
+        verbose_name_plural = 'Grade Calculation Jobs'
+        indexes = [
+            models.Index(fields=['term', 'status']),
+        ]
+
+
+class GradeCalculationJobClass(models.Model):
+    """Progress and timing of one class within a GradeCalculationJob."""
+
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    job = models.ForeignKey(
+        GradeCalculationJob,
+        on_delete=models.CASCADE,
+        related_name='class_runs'
+    )
+    class_assigned = models.ForeignKey(
+        'academics.Class',
+        on_delete=models.CASCADE,
+        related_name='grade_calculation_runs'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='PENDING'
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    student_count = models.PositiveIntegerField(null=True, blank=True)
+    duration_ms = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text='Wall-clock time the calculation took'
+    )
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.class_assigned} - {self.get_status_display()}"
+
+    class Meta:
+        db_table = 'grade_calculation_job_class'
+        ordering = ['class_assigned__level_number', 'class_assigned__name']
+        verbose_name = 'Grade Calculation Job Class'
+        verbose_name_plural = 'Grade Calculation Job Classes'
+        unique_together = ['job', 'class_assigned']
+        indexes = [
+            models.Index(fields=['job', 'status']),
+        ]
+
+
+class GradeAnalyticsRollup(models.Model):
+    """
+    Pre-aggregated analytics for one class and term.
+
+    Rows with a subject summarise that subject's graded SubjectTermGrades;
+    the row with no subject summarises the class's TermReports. Rebuilt
+    for a class whenever its grades are calculated (see
+    analytics_rollup.refresh_class_rollup), so the analytics dashboard
+    reads a handful of indexed rows instead of aggregating every grade.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    term = models.ForeignKey(
+        Term,
+        on_delete=models.CASCADE,
+        related_name='analytics_rollups'
+    )
+    class_assigned = models.ForeignKey(
+        'academics.Class',
+        on_delete=models.CASCADE,
+        related_name='analytics_rollups'
+    )
+    subject = models.ForeignKey(
+        Subject,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='analytics_rollups',
+        help_text='Empty for the whole-class TermReport summary'
+    )
+
+    student_count = models.PositiveIntegerField(
+        default=0,
+        help_text='Graded subject grades, or term reports for the class row'
+    )
+    score_total = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text='Sum of total scores, or of report averages for the class row'
+    )
+    highest_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    lowest_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    passed_count = models.PositiveIntegerField(
+        default=0,
+        help_text='Scores at or above pass_mark, or reports with no failed subject'
+    )
+    pass_mark = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Pass mark of the class's grading system when the row was built"
+    )
+    subjects_passed_total = models.PositiveIntegerField(
+        default=0,
+        help_text='Sum of subjects passed across reports (class row only)'
+    )
+    grade_counts = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Number of grades per grade label, e.g. {"A1": 3, "B2": 5}'
+    )
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        scope = self.subject.name if self.subject_id else 'All subjects'
+        return f"{self.class_assigned} - {scope} ({self.term})"
+
+    @property
+    def average(self):
+        if not self.student_count:
+            return Decimal('0')
+        return self.score_total / self.student_count
+
+    class Meta:
+        db_table = 'grade_analytics_rollup'
+        verbose_name = 'Grade Analytics Rollup'
+        verbose_name_plural = 'Grade Analytics Rollups'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'class_assigned', 'subject'],
+                name='unique_analytics_rollup_subject',
+            ),
+            # One class summary row; NULL subjects bypass the constraint above
+            models.UniqueConstraint(
+                fields=['term', 'class_assigned'],
+                condition=models.Q(subject__isnull=True),
+                name='unique_analytics_rollup_class',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['term', 'subject']),
+        ]
+
+
+class ScoreEntryProgress(models.Model):
+    """
+    Score-entry counters for one class subject and term.
+
+    expected_scores is assignment_count x enrolled_count (active enrollments
+    of students still in the class); entered_scores counts their scores for
+    the subject's assignments this term. Kept current incrementally by the
+    score, assignment and enrollment signals (see score_progress), so the
+    gradebook progress views read one row per class subject instead of
+    counting scores.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    class_subject = models.ForeignKey(
+        'academics.ClassSubject',
+        on_delete=models.CASCADE,
+        related_name='score_progress'
+    )
+    term = models.ForeignKey(
+        Term,
+        on_delete=models.CASCADE,
+        related_name='score_progress'
+    )
+    assignment_count = models.IntegerField(default=0)
+    enrolled_count = models.IntegerField(default=0)
+    expected_scores = models.IntegerField(default=0)
+    entered_scores = models.IntegerField(default=0)
+    last_activity = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='Most recent score change by an enrolled student'
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.class_subject} ({self.term}): {self.entered_scores}/{self.expected_scores}"
+
+    class Meta:
+        db_table = 'score_entry_progress'
+        verbose_name = 'Score Entry Progress'
+        verbose_name_plural = 'Score Entry Progress'
+        unique_together = ['class_subject', 'term']
+
+
+class AcademicHistorySnapshot(models.Model):
+    """
+    Pre-built transcript data for one student.
+
+    history holds every term report with its subject grades and the
+    cumulative statistics, as built by transcripts.build_histories.
+    Rebuilt for a class when its grades are calculated and for a term's
+    students when the term is locked; dropped when a student's grades or
+    reports change otherwise, and rebuilt on the next transcript view.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    student = models.OneToOneField(
+        Student,
+        on_delete=models.CASCADE,
+        related_name='academic_history'
+    )
+    history = models.JSONField(default=dict)
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Academic history for {self.student}"
+
+    class Meta:
+        db_table = 'academic_history_snapshot'
+        verbose_name = 'Academic History Snapshot'
+        verbose_name_plural = 'Academic History Snapshots'
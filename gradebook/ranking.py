@@ -0,0 +1,84 @@
+"""
+Database-side class ranking.
+
+Subject and overall positions are computed by Postgres window functions
+and written back with a single UPDATE ... FROM per call, instead of
+loading the rows, sorting them in Python and bulk-updating positions.
+
+Positions use standard competition ranking (1, 1, 3), as report cards
+always have: RANK(), not DENSE_RANK(). Overall positions compare averages
+rounded to 2 dp, so averages that only differ beyond that share a place.
+"""
+from django.db import connection
+
+from .models import SubjectTermGrade, TermReport
+
+
+def _table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def rank_subject_positions(grade_ids):
+    """
+    Rank SubjectTermGrades within each subject by total_score.
+
+    Args:
+        grade_ids: PKs of the grades ranked against each other, normally
+            every graded, enrolled subject grade of one class and term
+
+    Returns:
+        dict: {str(grade_id): position}
+    """
+    if not grade_ids:
+        return {}
+
+    table = _table(SubjectTermGrade)
+    sql = (
+        f'UPDATE {table} AS g SET position = ranked.position '
+        f'FROM ('
+        f'  SELECT id, RANK() OVER (PARTITION BY subject_id ORDER BY total_score DESC) AS position'
+        f'  FROM {table} WHERE id = ANY(%s::uuid[])'
+        f') AS ranked '
+        f'WHERE g.id = ranked.id '
+        f'RETURNING g.id, g.position'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [[str(pk) for pk in grade_ids]])
+        return {str(pk): position for pk, position in cursor.fetchall()}
+
+
+def rank_term_reports(report_ids):
+    """
+    Rank TermReports by average and set out_of.
+
+    Reports with no graded subjects (subjects_taken = 0) are left unranked
+    (position NULL). out_of is the number of ranked reports and is set on
+    every report, ranked or not.
+
+    Args:
+        report_ids: PKs of the reports ranked against each other (one
+            class and term)
+
+    Returns:
+        dict: {str(report_id): (position, out_of)}
+    """
+    if not report_ids:
+        return {}
+
+    table = _table(TermReport)
+    sql = (
+        f'UPDATE {table} AS r SET position = ranked.position, out_of = ranked.out_of '
+        f'FROM ('
+        f'  SELECT id,'
+        f'    CASE WHEN subjects_taken > 0 THEN RANK() OVER ('
+        f'      PARTITION BY subjects_taken > 0 ORDER BY ROUND(average, 2) DESC'
+        f'    ) END AS position,'
+        f'    COUNT(*) FILTER (WHERE subjects_taken > 0) OVER () AS out_of'
+        f'  FROM {table} WHERE id = ANY(%s::uuid[])'
+        f') AS ranked '
+        f'WHERE r.id = ranked.id '
+        f'RETURNING r.id, r.position, r.out_of'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [[str(pk) for pk in report_ids]])
+        return {str(pk): (position, out_of) for pk, position, out_of in cursor.fetchall()}
@@ -0,0 +1,324 @@
+"""
+Coalesced recalculation queue for SubjectTermGrade.
+
+Score writes no longer recalculate the subject grade inline. Instead the
+(student, subject, term) triple is added to a per-tenant Redis set and a
+debounced Celery task (flush_stale_grades) drains the set in batches, so a
+teacher typing a whole column of scores costs one bulk recalculation rather
+than one per keystroke.
+
+Callers that need read-your-writes (e.g. the score entry UI showing a fresh
+total) use recalculate_now(), which recalculates synchronously and drops the
+pending entry once the surrounding transaction commits.
+
+If the cache backend is not Redis, or Redis is unreachable, mark_stale()
+falls back to recalculating inline so grades never go stale silently.
+"""
+import logging
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from core.models import Term
+
+from . import config
+from .analytics_rollup import refresh_student_rollups
+from .models import (
+    AssessmentCategory, Assignment, Score, SubjectTermGrade
+)
+from .grade_engine import calculate_subject_category_scores
+from .transcripts import invalidate
+from .utils import (
+    build_assignments_lookup,
+    build_scores_lookup,
+    determine_grade_from_scales,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _stale_set_key(schema):
+    return cache.make_key(f'gradebook_stale_grades_{schema}')
+
+
+def _flush_scheduled_key(schema):
+    return f'gradebook_stale_flush_scheduled_{schema}'
+
+
+def _get_redis_client():
+    """Return the raw redis-py client behind the default cache, or None."""
+    backend = getattr(cache, '_cache', None)
+    get_client = getattr(backend, 'get_client', None)
+    if get_client is None:
+        return None
+    return get_client(write=True)
+
+
+def _encode(student_id, subject_id, term_id):
+    return f'{student_id}:{subject_id}:{term_id}'
+
+
+def _decode(member):
+    if isinstance(member, bytes):
+        member = member.decode()
+    return tuple(member.split(':', 2))
+
+
+def mark_stale(student_id, subject_id, term_id):
+    """
+    Queue a subject grade for recalculation and schedule a debounced flush.
+
+    Must be called after the score change has committed (see the Score
+    signals), otherwise the flush may read the old score.
+    """
+    schema = connection.schema_name
+    try:
+        client = _get_redis_client()
+        if client is not None:
+            client.sadd(_stale_set_key(schema), _encode(student_id, subject_id, term_id))
+            schedule_flush(schema)
+            return
+    except Exception as e:
+        logger.warning(f"Recalc queue unavailable, recalculating inline: {e}")
+
+    recalculate_stale_grades([(student_id, subject_id, term_id)])
+
+
+def mark_stale_many(keys):
+    """
+    Queue many (student_id, subject_id, term_id) subject grades at once.
+
+    One SADD and at most one scheduled flush, for bulk writers that bypass
+    the Score signals (e.g. the batched score-save endpoint).
+    """
+    members = {_encode(*key) for key in keys}
+    if not members:
+        return
+
+    schema = connection.schema_name
+    try:
+        client = _get_redis_client()
+        if client is not None:
+            client.sadd(_stale_set_key(schema), *members)
+            schedule_flush(schema)
+            return
+    except Exception as e:
+        logger.warning(f"Recalc queue unavailable, recalculating inline: {e}")
+
+    recalculate_stale_grades([_decode(m) for m in members])
+
+
+def schedule_flush(schema):
+    """
+    Schedule flush_stale_grades for a tenant unless one is already pending.
+
+    The scheduled-flag is cleared by the task when it starts, so writes
+    that land while a flush is running schedule the next one.
+    """
+    delay = config.RECALC_FLUSH_DELAY
+    # The flag outlives the countdown so a lost task only delays the
+    # next flush instead of blocking it forever.
+    if cache.add(_flush_scheduled_key(schema), 1, delay * 6):
+        from .tasks import flush_stale_grades
+        flush_stale_grades.apply_async(args=[schema], countdown=delay)
+
+
+def pending_count(schema=None):
+    """Number of subject grades waiting to be recalculated for a tenant."""
+    client = _get_redis_client()
+    if client is None:
+        return 0
+    return client.scard(_stale_set_key(schema or connection.schema_name))
+
+
+def flush(schema=None):
+    """
+    Drain the tenant's stale set, recalculating in batches.
+
+    A batch that fails to recalculate is put back in the set before the
+    error is re-raised, so nothing is lost when the task retries.
+
+    Returns:
+        Number of subject grades recalculated.
+    """
+    schema = schema or connection.schema_name
+    cache.delete(_flush_scheduled_key(schema))
+
+    client = _get_redis_client()
+    if client is None:
+        return 0
+
+    key = _stale_set_key(schema)
+    batch_size = config.RECALC_FLUSH_BATCH_SIZE
+    recalculated = 0
+    while True:
+        members = client.spop(key, batch_size)
+        if not members:
+            break
+        try:
+            recalculated += recalculate_stale_grades([_decode(m) for m in members])
+        except Exception:
+            client.sadd(key, *members)
+            raise
+    return recalculated
+
+
+def recalculate_now(student_id, subject_id, term_id):
+    """
+    Recalculate one subject grade synchronously (read-your-writes).
+
+    The entry queued by the Score signal is discarded on commit; on_commit
+    callbacks run in registration order, so this runs after the signal's
+    mark_stale() when both happen in the same transaction.
+
+    Returns:
+        The recalculated SubjectTermGrade, or None if the student or
+        subject no longer exists.
+    """
+    recalculate_stale_grades([(student_id, subject_id, term_id)])
+
+    schema = connection.schema_name
+    member = _encode(student_id, subject_id, term_id)
+
+    def _discard():
+        try:
+            client = _get_redis_client()
+            if client is not None:
+                client.srem(_stale_set_key(schema), member)
+        except Exception as e:
+            logger.warning(f"Could not discard recalculated grade from queue: {e}")
+
+    transaction.on_commit(_discard)
+
+    return SubjectTermGrade.objects.filter(
+        student_id=student_id, subject_id=subject_id, term_id=term_id
+    ).first()
+
+
+def recalculate_stale_grades(keys):
+    """
+    Recalculate SubjectTermGrade for many (student_id, subject_id, term_id) keys.
+
+    Mirrors the bulk path in calculation._calculate_subject_grades: one query
+    each for assignments, scores, students and existing grades per term, one
+    grade engine call per subject, then bulk_create/bulk_update. Keys for
+    deleted students or subjects are skipped.
+
+    Returns:
+        Number of SubjectTermGrade rows written.
+    """
+    from students.models import Student
+    from .signals import get_grading_system_cached, get_grade_scales_cached
+
+    by_term = defaultdict(set)
+    for student_id, subject_id, term_id in keys:
+        by_term[str(term_id)].add((str(student_id), str(subject_id)))
+    if not by_term:
+        return 0
+
+    categories = list(AssessmentCategory.objects.filter(is_active=True).order_by('order'))
+    written = 0
+
+    with transaction.atomic():
+        for term_id, pairs in by_term.items():
+            student_ids = {s for s, _ in pairs}
+            subject_ids = {s for _, s in pairs}
+
+            assignments = list(Assignment.objects.filter(
+                subject_id__in=subject_ids, term_id=term_id
+            ).select_related('assessment_category'))
+            assignments_lookup = build_assignments_lookup(assignments)
+            subject_pks = {str(a.subject_id): a.subject_id for a in assignments}
+
+            scores_lookup = build_scores_lookup(Score.objects.filter(
+                student_id__in=student_ids,
+                assignment_id__in=[a.pk for a in assignments],
+            ).only('student_id', 'assignment_id', 'points')) if assignments else {}
+
+            students = {
+                str(s.pk): s for s in Student.objects.filter(
+                    pk__in=student_ids
+                ).select_related('current_class').only('id', 'current_class__level_type')
+            }
+
+            existing = {
+                (str(g.student_id), str(g.subject_id)): g
+                for g in SubjectTermGrade.objects.filter(
+                    student_id__in=student_ids,
+                    subject_id__in=subject_ids,
+                    term_id=term_id,
+                )
+            }
+
+            to_create = []
+            to_update = []
+            grades_by_subject = defaultdict(list)
+            for student_key, subject_key in pairs:
+                student = students.get(student_key)
+                grade = existing.get((student_key, subject_key))
+                if student is None:
+                    continue
+                if grade is None:
+                    # A subject with no assignments this term has nothing to
+                    # recalculate; don't create an empty grade row for it.
+                    if subject_key not in subject_pks:
+                        continue
+                    grade = SubjectTermGrade(
+                        student_id=student.pk,
+                        subject_id=subject_pks[subject_key],
+                        term_id=term_id,
+                    )
+                    to_create.append(grade)
+                else:
+                    to_update.append(grade)
+                grades_by_subject[grade.subject_id].append((student, grade))
+
+            for subject_id, student_grades in grades_by_subject.items():
+                subject_results = calculate_subject_category_scores(
+                    student_ids=[student.pk for student, _ in student_grades],
+                    subject_id=subject_id,
+                    categories=categories,
+                    assignments_by_subject_category=assignments_lookup,
+                    scores_lookup=scores_lookup,
+                )
+
+                for student, grade in student_grades:
+                    calc_result = subject_results[student.pk]
+                    grade.category_scores = calc_result['category_scores_json']
+                    grade.class_score = calc_result['class_score']
+                    grade.exam_score = calc_result['exam_score']
+                    grade.total_score = calc_result['total_score']
+
+                    current_class = student.current_class
+                    level = 'SHS' if current_class and current_class.level_type == 'shs' else 'BASIC'
+                    grading_system = get_grading_system_cached(level)
+
+                    grade.is_passing = False
+                    if grading_system and grade.total_score is not None:
+                        grade_info = determine_grade_from_scales(
+                            grade.total_score, get_grade_scales_cached(grading_system)
+                        )
+                        grade.grade = grade_info['grade']
+                        grade.grade_remark = grade_info['grade_remark']
+                        grade.is_passing = grade_info['is_passing']
+
+            if to_create:
+                SubjectTermGrade.objects.bulk_create(
+                    to_create, batch_size=config.BULK_UPDATE_BATCH_SIZE
+                )
+            if to_update:
+                SubjectTermGrade.objects.bulk_update(
+                    to_update,
+                    ['class_score', 'exam_score', 'total_score', 'category_scores',
+                     'grade', 'grade_remark', 'is_passing'],
+                    batch_size=config.BULK_UPDATE_BATCH_SIZE
+                )
+            written += len(to_create) + len(to_update)
+
+            # Transcript snapshots are rebuilt on the next transcript request
+            invalidate(students)
+            refresh_student_rollups(students.keys(), Term.objects.get(pk=term_id))
+
+    return written
+
@@ -0,0 +1,213 @@
+"""
+Set-based class teacher remark generation and saving.
+
+Remark templates are compiled once per run (split into literal text and
+placeholders) instead of being re-scanned per student, generated remarks
+are written with one bulk_update, and edited remarks from the bulk
+remarks page are saved in batches (save_remarks).
+
+generate_remarks() works on any number of classes, so the same code runs
+for one class from the bulk remarks page and for the whole school from
+the generate_school_remarks task at the end of term.
+"""
+import random
+import re
+from html import escape as html_escape
+
+from django.db import transaction
+
+from . import config
+from .models import RemarkTemplate, TermReport
+from .transcripts import invalidate
+
+_PLACEHOLDER = re.compile(r'\{(\w+)\}')
+
+# Editable remark fields and the longest value accepted for each
+REMARK_FIELDS = {
+    'class_teacher_remark': 2000,   # TextField, apply reasonable limit
+    'conduct_rating': 100,          # CharField(max_length=100)
+    'attitude_rating': 100,         # CharField(max_length=100)
+    'interest_rating': 100,         # CharField(max_length=100)
+}
+
+
+def compile_template(content):
+    """
+    Split remark template content into literal text and placeholder names.
+
+    Returns:
+        list of (is_placeholder, text) parts
+    """
+    parts = []
+    position = 0
+    for match in _PLACEHOLDER.finditer(content):
+        if match.start() > position:
+            parts.append((False, content[position:match.start()]))
+        parts.append((True, match.group(1)))
+        position = match.end()
+    if position < len(content):
+        parts.append((False, content[position:]))
+    return parts
+
+
+def render_compiled(parts, context):
+    """Render compiled template parts, escaping values as RemarkTemplate.render does.
+
+    Unknown placeholders are left in place.
+    """
+    rendered = []
+    for is_placeholder, text in parts:
+        if not is_placeholder:
+            rendered.append(text)
+        elif text in context:
+            rendered.append(html_escape(str(context[text])))
+        else:
+            rendered.append(f'{{{text}}}')
+    return ''.join(rendered)
+
+
+def compile_active_templates():
+    """Active remark templates compiled and grouped by performance category."""
+    compiled = {}
+    for template in RemarkTemplate.objects.filter(is_active=True).only('category', 'content'):
+        compiled.setdefault(template.category, []).append(compile_template(template.content))
+    return compiled
+
+
+def performance_category(average):
+    """Remark template category for a term average, or None without scores."""
+    if average >= 80:
+        return 'EXCELLENT'
+    if average >= 60:
+        return 'GOOD'
+    if average >= 50:
+        return 'AVERAGE'
+    if average > 0:
+        return 'NEEDS_IMPROVEMENT'
+    return None
+
+
+def generate_remarks(term, class_ids, overwrite=False, templates=None, rng=random):
+    """
+    Generate class teacher remarks for the active students of the classes.
+
+    Each report gets a random template from its performance category,
+    falling back to GENERAL. Reports that already have a remark are
+    skipped unless overwrite is set.
+
+    Args:
+        term: Term whose reports get remarks
+        class_ids: Classes to generate for
+        overwrite: Replace existing remarks
+        templates: Compiled templates (compile_active_templates() by default)
+
+    Returns:
+        dict: {'generated': int, 'skipped': int}
+    """
+    if templates is None:
+        templates = compile_active_templates()
+
+    reports = TermReport.objects.filter(
+        student__current_class_id__in=class_ids,
+        student__status='active',
+        term=term,
+    ).select_related('student')
+
+    to_update = []
+    skipped = 0
+    for report in reports:
+        if report.class_teacher_remark and not overwrite:
+            skipped += 1
+            continue
+
+        avg = float(report.average) if report.average else 0
+        category = performance_category(avg)
+        if category is None:
+            continue  # No scores, skip
+
+        # Pick a template — prefer matching category, fall back to GENERAL
+        candidates = templates.get(category) or templates.get('GENERAL')
+        if not candidates:
+            continue
+
+        report.class_teacher_remark = render_compiled(rng.choice(candidates), {
+            'student_name': report.student.first_name,
+            'full_name': report.student.full_name,
+            'average': f'{avg:.1f}',
+            'position': str(report.position or '-'),
+        })
+        to_update.append(report)
+
+    TermReport.objects.bulk_update(
+        to_update, ['class_teacher_remark'], batch_size=config.BULK_UPDATE_BATCH_SIZE
+    )
+    _invalidate_report_pdfs(to_update)
+
+    return {'generated': len(to_update), 'skipped': skipped}
+
+
+def save_remarks(term, edits):
+    """
+    Save many edited remark fields at once.
+
+    Reports missing for a student are created. Values must already be
+    validated against REMARK_FIELDS.
+
+    Args:
+        term: Term the remarks belong to
+        edits: dict mapping student_id to {field: value}
+
+    Returns:
+        List of TermReports that were saved
+    """
+    if not edits:
+        return []
+
+    with transaction.atomic():
+        reports = {
+            report.student_id: report
+            for report in TermReport.objects.select_for_update().filter(
+                student_id__in=edits.keys(), term=term
+            )
+        }
+        missing = [
+            TermReport(student_id=student_id, term=term, out_of=0)
+            for student_id in edits if student_id not in reports
+        ]
+        if missing:
+            TermReport.objects.bulk_create(missing, ignore_conflicts=True)
+            # A new report adds a term to the student's transcript
+            invalidate(r.student_id for r in missing)
+            reports.update(
+                (report.student_id, report)
+                for report in TermReport.objects.select_for_update().filter(
+                    student_id__in=[r.student_id for r in missing], term=term
+                )
+            )
+
+        fields = set()
+        saved = []
+        for student_id, values in edits.items():
+            report = reports.get(student_id)
+            if report is None:
+                continue
+            for field, value in values.items():
+                setattr(report, field, value)
+                fields.add(field)
+            saved.append(report)
+
+        if fields:
+            TermReport.objects.bulk_update(
+                saved, sorted(fields), batch_size=config.BULK_UPDATE_BATCH_SIZE
+            )
+    _invalidate_report_pdfs(saved)
+
+    return saved
+
+
+def _invalidate_report_pdfs(reports):
+    # bulk_update skips the TermReport post_save signal
+    from .signals import _invalidate_report_pdfs as invalidate
+
+    for report in reports:
+        invalidate(report.student_id, report.term_id)
@@ -0,0 +1,206 @@
+"""
+Content-addressed cache for report card PDFs.
+
+generate_report_pdf fingerprints everything that goes into a report card
+(the TermReport, its SubjectTermGrade rows, the category column scores,
+the student, term, school branding, report settings and grading scales)
+and looks the PDF up by that hash before rendering. An unchanged report is
+served from disk, including its original verification QR code, without
+re-querying grades or running WeasyPrint.
+
+Files live under REPORT_PDF_CACHE_DIR/<schema>/<student_id>/ as
+<term_id>-<sha256>.pdf. A changed input produces a new hash, so stale PDFs
+are never served. invalidate() removes a student's PDFs early when their
+scores or remarks change, and each tenant directory is kept under
+REPORT_PDF_CACHE_MAX_BYTES by evicting the least recently used files
+(hits refresh a file's mtime).
+"""
+import hashlib
+import logging
+import os
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# Bump when report_card_pdf.html or the PDF pipeline changes in a way that
+# should invalidate every cached report card.
+REPORT_PDF_CACHE_VERSION = 1
+
+
+def _cache_root(tenant_schema):
+    root = config.REPORT_PDF_CACHE_DIR or os.path.join(settings.MEDIA_ROOT, 'report_cache')
+    return os.path.join(str(root), tenant_schema)
+
+
+def _student_dir(tenant_schema, student_id):
+    return os.path.join(_cache_root(tenant_schema), str(student_id))
+
+
+def _path(tenant_schema, term_report, digest):
+    return os.path.join(
+        _student_dir(tenant_schema, term_report.student_id),
+        f'{term_report.term_id}-{digest}.pdf',
+    )
+
+
+def _field_values(obj):
+    """Concrete field values of a model instance, in field order."""
+    if obj is None:
+        return None
+    return [
+        (field.attname, getattr(obj, field.attname))
+        for field in obj._meta.concrete_fields
+    ]
+
+
+def fingerprint(term_report, shared_context, category_scores_map=None):
+    """
+    Hash every input of a report card PDF.
+
+    shared_context is the dict from _build_report_shared_context (school,
+    rc_config, grading_system, categories, next_term_date, branding).
+    category_scores_map is the student's compute_report_category_scores()
+    result, the only way scores reach the PDF; it is computed when not
+    given. Costs one small query for the student's subject grades, plus
+    one for scores when the map is not passed in.
+    """
+    from .models import SubjectTermGrade
+    from .utils import compute_report_category_scores
+
+    student = term_report.student
+    term = term_report.term
+    grading_system = shared_context.get('grading_system')
+
+    grades = list(SubjectTermGrade.objects.filter(
+        student_id=term_report.student_id, term_id=term_report.term_id
+    ).order_by('pk').values_list(
+        'pk', 'subject_id', 'subject__name', 'subject__short_name', 'subject__is_core',
+        'class_score', 'exam_score', 'total_score', 'grade', 'grade_remark',
+        'is_passing', 'position', 'teacher_remark', 'category_scores',
+    ))
+    if category_scores_map is None:
+        category_scores_map = compute_report_category_scores(
+            student, term, shared_context.get('categories', [])
+        )
+    category_scores = sorted(
+        (subject_id, sorted(by_category.items()))
+        for subject_id, by_category in category_scores_map.items()
+    )
+
+    current_class = student.current_class
+    payload = [
+        REPORT_PDF_CACHE_VERSION,
+        _field_values(term_report),
+        _field_values(student),
+        _field_values(current_class) if current_class else None,
+        _field_values(term),
+        term.academic_year.name if term.academic_year_id else '',
+        grades,
+        category_scores,
+        [_field_values(c) for c in shared_context.get('categories', [])],
+        _field_values(shared_context.get('school')),
+        _field_values(shared_context.get('rc_config')),
+        _field_values(grading_system),
+        [_field_values(s) for s in grading_system.scales.all()] if grading_system else None,
+        shared_context.get('next_term_date'),
+        # Branding is embedded as base64; hash it so a replaced file with the
+        # same name still invalidates.
+        hashlib.sha256((shared_context.get('logo_base64') or '').encode()).hexdigest(),
+        hashlib.sha256((shared_context.get('signature_base64') or '').encode()).hexdigest(),
+    ]
+    return hashlib.sha256(repr(payload).encode()).hexdigest()
+
+
+def get(tenant_schema, term_report, digest):
+    """Return the cached PDF as a BytesIO, or None on a miss."""
+    path = _path(tenant_schema, term_report, digest)
+    try:
+        with open(path, 'rb') as fh:
+            data = fh.read()
+        # Mark as recently used for LRU eviction
+        os.utime(path)
+    except OSError:
+        return None
+    return BytesIO(data)
+
+
+def store(tenant_schema, term_report, digest, pdf_buffer):
+    """
+    Write a rendered PDF to the cache, replacing older versions of the
+    same report, then evict least recently used files if over budget.
+    """
+    directory = _student_dir(tenant_schema, term_report.student_id)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        _remove_matching(directory, f'{term_report.term_id}-')
+
+        # Write to a temp file and rename so readers never see a partial PDF
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(pdf_buffer.getbuffer())
+        os.replace(tmp_path, _path(tenant_schema, term_report, digest))
+    except OSError as e:
+        logger.warning(f"Could not cache report PDF for {term_report.pk}: {e}")
+        return
+
+    evict(tenant_schema)
+
+
+def invalidate(tenant_schema, student_id, term_id=None):
+    """Delete a student's cached report PDFs (for one term, or all terms)."""
+    directory = _student_dir(tenant_schema, student_id)
+    _remove_matching(directory, f'{term_id}-' if term_id else '')
+
+
+def _remove_matching(directory, prefix):
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+    for entry in entries:
+        if entry.name.startswith(prefix) and entry.name.endswith('.pdf'):
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+def evict(tenant_schema, max_bytes=None):
+    """
+    Remove least recently used PDFs until the tenant's cache fits max_bytes.
+
+    Returns:
+        Number of files removed.
+    """
+    max_bytes = config.REPORT_PDF_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    files = []
+    total = 0
+    for dirpath, _dirnames, filenames in os.walk(_cache_root(tenant_schema)):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    removed = 0
+    if total <= max_bytes:
+        return removed
+
+    for _mtime, size, path in sorted(files):
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        removed += 1
+        total -= size
+        if total <= max_bytes:
+            break
+    return removed
@@ -0,0 +1,489 @@
+"""
+Streaming score import from Excel templates.
+
+Workbooks are read with openpyxl in read-only mode and processed in row
+chunks (SCORE_IMPORT_CHUNK_ROWS), so memory stays flat however many classes
+an upload covers. Each chunk's accepted cells are written with one
+INSERT ... ON CONFLICT (student_id, assignment_id) DO UPDATE per
+SCORE_IMPORT_BATCH_SIZE scores, and audited through the buffered audit
+log (audit_log.record). Unchanged cells are skipped.
+
+Each score sheet (one class and subject) is imported in its own
+transaction behind the shared grade-lock guard. Score signals are disabled
+while writing, and on commit the sheet's students are queued on the
+coalesced recalculation queue in one call, so a sheet costs one flush
+rather than one recalculation per cell.
+
+Two template layouts are understood:
+
+- the single-class template (score_import_template): one "Scores" sheet,
+  columns matched to the subject's current assignments;
+- the multi-class template (score_import_bulk_template): one sheet per
+  class and subject. The hidden _metadata sheet holds a row per score
+  sheet: ``sheet, <title>, <class_id>, <subject_id>, <term_id>,
+  <assignment_id>...`` giving the assignment of each score column.
+"""
+import logging
+import os
+import uuid
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import audit_log, config
+from .models import Assignment, Score, ScoreAuditLog
+from .signals import signals_disabled
+
+logger = logging.getLogger(__name__)
+
+METADATA_SHEET = '_metadata'
+SHEET_MARKER = 'sheet'
+
+# Score columns start after "Student ID" and "Student Name"
+FIRST_SCORE_COLUMN = 2
+
+
+class ScoreImportError(Exception):
+    """Raised when a sheet cannot be imported at all (e.g. grades locked)."""
+
+
+class ImportTarget:
+    """
+    One class/subject score sheet and the lookups needed to validate it.
+
+    Args:
+        class_obj: Class the sheet belongs to
+        subject: Subject the sheet belongs to
+        term: Term the scores are for
+        assignments: Assignments in score-column order
+        sheet_name: Worksheet title (None for the active sheet)
+    """
+
+    def __init__(self, class_obj, subject, term, assignments, sheet_name=None):
+        from academics.models import ClassSubject, StudentSubjectEnrollment
+        from students.models import Student
+
+        self.class_obj = class_obj
+        self.subject = subject
+        self.term = term
+        self.assignments = list(assignments)
+        self.sheet_name = sheet_name
+
+        class_subject = ClassSubject.objects.filter(
+            class_assigned=class_obj, subject=subject
+        ).first()
+        enrolled_ids = StudentSubjectEnrollment.objects.filter(
+            class_subject=class_subject, is_active=True
+        ).values_list('student_id', flat=True) if class_subject else []
+
+        self.students_by_admission = {
+            s.admission_number: s for s in Student.objects.filter(
+                id__in=list(enrolled_ids), current_class=class_obj, status='active'
+            )
+        }
+
+    @property
+    def label(self):
+        return f'{self.class_obj.name} - {self.subject.name}'
+
+
+def upload_dir(tenant_schema):
+    return os.path.join(settings.MEDIA_ROOT, 'imports', tenant_schema)
+
+
+def save_upload(uploaded_file, tenant_schema, user_id):
+    """
+    Write an uploaded workbook to disk so it can be streamed later.
+
+    Returns:
+        Path of the saved file.
+    """
+    directory = upload_dir(tenant_schema)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{user_id}-{uuid.uuid4().hex[:12]}.xlsx')
+    uploaded_file.seek(0)
+    with open(path, 'wb') as fh:
+        for chunk in uploaded_file.chunks():
+            fh.write(chunk)
+    return path
+
+
+def remove_upload(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def iter_row_chunks(ws, chunk_size=None):
+    """
+    Yield lists of (row_number, values) for a score sheet's data rows.
+
+    Rows without a Student ID are skipped.
+    """
+    chunk_size = chunk_size or config.SCORE_IMPORT_CHUNK_ROWS
+    chunk = []
+    for row_num, row in enumerate(ws.iter_rows(min_row=2, values_only=True), 2):
+        if not row or not row[0]:
+            continue
+        chunk.append((row_num, row))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_row(target, row_num, row):
+    """
+    Validate one template row against a target.
+
+    Returns:
+        tuple: (row_data, errors). row_data has row_num, student_id,
+        student_name, student, scores ([{'assignment', 'value', 'error'}])
+        and has_error; errors is a list of messages.
+    """
+    errors = []
+    student_id = str(row[0]).strip()
+    student = target.students_by_admission.get(student_id)
+
+    row_data = {
+        'row_num': row_num,
+        'student_id': student_id,
+        'student_name': row[1] if len(row) > 1 else '',
+        'student': student,
+        'scores': [],
+        'has_error': False,
+    }
+
+    if not student:
+        row_data['has_error'] = True
+        errors.append(f"Row {row_num}: Student ID '{student_id}' not found in this class.")
+
+    for col, assign in enumerate(target.assignments, FIRST_SCORE_COLUMN):
+        value = row[col] if len(row) > col else None
+        score_data = {
+            'assignment': assign,
+            'value': value,
+            'error': None,
+        }
+
+        if value is not None and value != '':
+            try:
+                points = Decimal(str(value))
+                if points < 0:
+                    score_data['error'] = 'Negative value'
+                    row_data['has_error'] = True
+                    errors.append(f"Row {row_num}, {assign.name}: Negative value not allowed.")
+                elif points > assign.points_possible:
+                    score_data['error'] = f'Exceeds max ({assign.points_possible})'
+                    row_data['has_error'] = True
+                    errors.append(f"Row {row_num}, {assign.name}: Value {points} exceeds maximum {assign.points_possible}.")
+                else:
+                    score_data['value'] = points
+            except (InvalidOperation, ValueError):
+                score_data['error'] = 'Invalid number'
+                row_data['has_error'] = True
+                errors.append(f"Row {row_num}, {assign.name}: Invalid number '{value}'.")
+
+        row_data['scores'].append(score_data)
+
+    return row_data, errors
+
+
+def accepted_scores(row_data):
+    """(student_id, assignment_id, points) for each importable cell of a parsed row."""
+    if row_data['has_error'] or not row_data['student']:
+        return []
+    return [
+        (row_data['student'].pk, score['assignment'].pk, score['value'])
+        for score in row_data['scores']
+        if score['value'] is not None and score['value'] != '' and not score['error']
+    ]
+
+
+def upsert_scores(entries, user=None, ip_address=None, user_agent=''):
+    """
+    Insert or update many scores and audit the changes.
+
+    Must run inside a transaction. Writes bypass Score.save(), so callers
+    are responsible for queueing recalculation (see queue_recalculation).
+
+    Args:
+        entries: Iterable of (student_id, assignment_id, points). A repeated
+            key keeps its last value.
+
+    Returns:
+        dict: created, updated and unchanged counts, plus student_ids whose
+        scores changed.
+    """
+    latest = {}
+    for student_id, assignment_id, points in entries:
+        latest[(student_id, assignment_id)] = Decimal(points)
+    items = list(latest.items())
+
+    result = {'created': 0, 'updated': 0, 'unchanged': 0, 'student_ids': set()}
+    batch_size = config.SCORE_IMPORT_BATCH_SIZE
+    for start in range(0, len(items), batch_size):
+        _upsert_batch(items[start:start + batch_size], result, user, ip_address, user_agent)
+    return result
+
+
+def _upsert_batch(items, result, user, ip_address, user_agent):
+    student_ids = {student_id for (student_id, _), _ in items}
+    assignment_ids = {assignment_id for (_, assignment_id), _ in items}
+
+    # Lock existing rows so the audited old values are the ones replaced
+    existing = {
+        (str(student_id), str(assignment_id)): points
+        for student_id, assignment_id, points in Score.objects.select_for_update().filter(
+            student_id__in=student_ids, assignment_id__in=assignment_ids
+        ).order_by('pk').values_list('student_id', 'assignment_id', 'points')
+    }
+
+    changed = []
+    for (student_id, assignment_id), points in items:
+        old_value = existing.get((str(student_id), str(assignment_id)))
+        if old_value is not None and old_value == points:
+            result['unchanged'] += 1
+            continue
+        changed.append((student_id, assignment_id, points, old_value))
+    if not changed:
+        return
+
+    now = timezone.now()
+    params = []
+    for student_id, assignment_id, points, _old in changed:
+        params.extend([str(uuid.uuid4()), student_id, str(assignment_id), points, now, now])
+
+    table = connection.ops.quote_name(Score._meta.db_table)
+    values = ', '.join(['(%s::uuid, %s, %s::uuid, %s, \'\', %s, %s)'] * len(changed))
+    sql = (
+        f'INSERT INTO {table} (id, student_id, assignment_id, points, feedback, created_at, updated_at) '
+        f'VALUES {values} '
+        f'ON CONFLICT (student_id, assignment_id) DO UPDATE '
+        f'SET points = EXCLUDED.points, updated_at = EXCLUDED.updated_at '
+        f'RETURNING id, student_id, assignment_id, (xmax = 0) AS inserted'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        written = {
+            (str(student_id), str(assignment_id)): (score_id, inserted)
+            for score_id, student_id, assignment_id, inserted in cursor.fetchall()
+        }
+
+    audit_logs = []
+    for student_id, assignment_id, points, old_value in changed:
+        score_id, inserted = written[(str(student_id), str(assignment_id))]
+        result['created' if inserted else 'updated'] += 1
+        result['student_ids'].add(student_id)
+        audit_logs.append(ScoreAuditLog(
+            score_id=score_id,
+            student_id=student_id,
+            assignment_id=assignment_id,
+            user=user,
+            action='CREATE' if inserted else 'UPDATE',
+            old_value=old_value,
+            new_value=points,
+            ip_address=ip_address,
+            user_agent=user_agent,
+        ))
+    audit_log.record(audit_logs)
+
+
+def queue_recalculation(student_ids, subject_id, term_id):
+    """
+    After commit, queue the students' subject grades for one coalesced
+    recalculation and drop their cached report card PDFs. Score-entry
+    progress counters are recounted straight away.
+    """
+    from . import recalc_queue
+    from .score_progress import recount_for_scores
+    from .signals import _invalidate_report_pdfs
+
+    keys = [(student_id, subject_id, term_id) for student_id in student_ids]
+    if not keys:
+        return
+    recount_for_scores(keys)
+    transaction.on_commit(lambda: recalc_queue.mark_stale_many(keys))
+    for student_id in student_ids:
+        _invalidate_report_pdfs(student_id, term_id)
+
+
+def import_sheet(ws, target, user=None, ip_address=None, user_agent='', on_chunk=None):
+    """
+    Stream one score sheet into the database.
+
+    The whole sheet commits or rolls back together. Rows with errors are
+    skipped and reported; valid rows are imported.
+
+    Args:
+        on_chunk: Optional callback(rows_done) after each chunk
+
+    Returns:
+        dict: created, updated, unchanged, skipped_rows, errors
+
+    Raises:
+        ScoreImportError: grades are locked for the target's term
+    """
+    from core.models import Term
+
+    summary = {'created': 0, 'updated': 0, 'unchanged': 0, 'skipped_rows': 0, 'errors': []}
+    student_ids = set()
+
+    with signals_disabled(), transaction.atomic():
+        if Term.locked_for_score_writes([target.term.pk]):
+            raise ScoreImportError('Grades are locked for this term.')
+
+        for chunk in iter_row_chunks(ws):
+            entries = []
+            for row_num, row in chunk:
+                row_data, errors = parse_row(target, row_num, row)
+                if errors:
+                    summary['skipped_rows'] += 1
+                    summary['errors'].extend(errors)
+                entries.extend(accepted_scores(row_data))
+
+            written = upsert_scores(entries, user, ip_address, user_agent)
+            for key in ('created', 'updated', 'unchanged'):
+                summary[key] += written[key]
+            student_ids |= written['student_ids']
+
+            if on_chunk:
+                on_chunk(len(chunk))
+
+        queue_recalculation(student_ids, target.subject.pk, target.term.pk)
+
+    return summary
+
+
+def _metadata_rows(wb):
+    if METADATA_SHEET not in wb.sheetnames:
+        return []
+    return [
+        [value for value in row if value is not None]
+        for row in wb[METADATA_SHEET].iter_rows(values_only=True)
+    ]
+
+
+def resolve_targets(wb, term, user):
+    """
+    Work out which class/subject each score sheet in a workbook is for.
+
+    Sheets the user may not edit, or whose assignments no longer match the
+    term, are reported rather than imported.
+
+    Returns:
+        tuple: (targets, errors)
+    """
+    from academics.models import Class, Subject
+    from .views.base import can_edit_scores
+
+    rows = _metadata_rows(wb)
+    sheets = []
+    if rows and rows[0] and rows[0][0] == 'class_id':
+        # Single-class template: class_id, subject_id, term_id, assignment ids
+        by_key = {row[0]: row[1] for row in rows[:3] if len(row) > 1}
+        assignment_ids = rows[3] if len(rows) > 3 else []
+        sheets.append((wb.worksheets[0].title, by_key.get('class_id'),
+                       by_key.get('subject_id'), assignment_ids))
+    else:
+        for row in rows:
+            if len(row) >= 5 and row[0] == SHEET_MARKER:
+                sheets.append((row[1], row[2], row[3], row[5:]))
+
+    if not sheets:
+        return [], ['This file is not a score import template. Please download the template and try again.']
+
+    targets = []
+    errors = []
+    for sheet_name, class_id, subject_id, assignment_ids in sheets:
+        try:
+            class_obj = Class.objects.filter(pk=class_id).first()
+            subject = Subject.objects.filter(pk=subject_id).first()
+            assignment_pks = [uuid.UUID(str(pk)) for pk in assignment_ids]
+        except (ValueError, TypeError):
+            class_obj = subject = None
+        if sheet_name not in wb.sheetnames or class_obj is None or subject is None:
+            errors.append(f"Sheet '{sheet_name}': class or subject not found.")
+            continue
+        if not can_edit_scores(user, class_obj, subject):
+            errors.append(f"Sheet '{sheet_name}': you are not authorized to import scores for "
+                          f"{class_obj.name} - {subject.name}.")
+            continue
+
+        assignments = Assignment.objects.in_bulk(assignment_pks)
+        ordered = [assignments.get(pk) for pk in assignment_pks]
+        if not ordered or any(
+            a is None or a.subject_id != subject.pk or a.term_id != term.pk for a in ordered
+        ):
+            errors.append(f"Sheet '{sheet_name}': the template is out of date for "
+                          f"{term.name}. Please download a new template.")
+            continue
+
+        targets.append(ImportTarget(class_obj, subject, term, ordered, sheet_name=sheet_name))
+    return targets, errors
+
+
+def import_workbook(path, user, term, ip_address=None, user_agent='', on_progress=None):
+    """
+    Import every score sheet in a template workbook.
+
+    Args:
+        path: Workbook on disk
+        user: User performing the import (authorization and audit)
+        term: Term being imported into
+        on_progress: Optional callback(rows_done, rows_total, label)
+
+    Returns:
+        dict: success, per-sheet results, totals and errors (capped at
+        SCORE_IMPORT_MAX_ERRORS)
+    """
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        targets, errors = resolve_targets(wb, term, user)
+
+        # max_row comes from the sheet's stored dimensions; it only sizes
+        # the progress bar.
+        total = sum(max((wb[t.sheet_name].max_row or 1) - 1, 0) for t in targets)
+        done = 0
+        if on_progress:
+            on_progress(done, total, '')
+
+        sheets = []
+        totals = {'created': 0, 'updated': 0, 'unchanged': 0, 'skipped_rows': 0}
+        for target in targets:
+            def on_chunk(rows, label=target.label):
+                nonlocal done
+                done += rows
+                if on_progress:
+                    on_progress(min(done, total), total, label)
+
+            try:
+                summary = import_sheet(
+                    wb[target.sheet_name], target, user=user, ip_address=ip_address,
+                    user_agent=user_agent, on_chunk=on_chunk,
+                )
+            except ScoreImportError as e:
+                errors.append(f"Sheet '{target.sheet_name}': {e}")
+                continue
+
+            errors.extend(f"Sheet '{target.sheet_name}', {error}" for error in summary.pop('errors'))
+            for key in totals:
+                totals[key] += summary[key]
+            sheets.append({'sheet': target.sheet_name, 'label': target.label, **summary})
+    finally:
+        wb.close()
+
+    max_errors = config.SCORE_IMPORT_MAX_ERRORS
+    return {
+        'success': bool(sheets),
+        'sheets': sheets,
+        **totals,
+        'error_count': len(errors),
+        'errors': errors[:max_errors],
+    }
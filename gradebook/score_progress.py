@@ -0,0 +1,195 @@
+"""
+Incremental score-entry progress counters.
+
+ScoreEntryProgress keeps, per (class_subject, term), the number of score
+cells expected (assignments x enrolled students) and entered, so the
+gradebook home page and progress views read one row per class subject
+instead of counting the Score table.
+
+A student counts towards a class subject while they have an active
+StudentSubjectEnrollment in it and still belong to its class, the same
+rule as the score entry form.
+
+Counters are kept current by the gradebook signals:
+
+- Score created / deleted: entered_scores +/- 1 (apply_score_delta)
+- Assignment added / removed: expected_scores +/- enrolled_count
+  (apply_assignment_delta); an edited assignment recounts its subject
+- Enrollment changed: that class subject is recounted
+
+Bulk score writers run with signals disabled and call recount_for_scores
+instead. Rows are created lazily on first read, and the
+reconcile_score_entry_progress task recounts every class subject of the
+current term to correct drift from writes that bypass signals (bulk
+enrollment, class transfers, queryset updates).
+"""
+from collections import defaultdict
+
+from django.db.models import Count, F, Max, Q
+from django.utils import timezone
+
+from .models import Assignment, ScoreEntryProgress
+from academics.models import ClassSubject, StudentSubjectEnrollment
+
+
+def recount(term, class_subject_ids):
+    """
+    Recompute the counters of some class subjects for a term from scratch.
+
+    Returns:
+        Number of class subjects recounted.
+    """
+    class_subjects = list(ClassSubject.objects.filter(
+        pk__in=list(class_subject_ids)
+    ).values_list('id', 'subject_id'))
+    if not class_subjects:
+        return 0
+
+    assignment_counts = dict(
+        Assignment.objects.filter(
+            term=term,
+            subject_id__in={subject_id for _, subject_id in class_subjects}
+        ).values('subject_id').annotate(
+            count=Count('id')
+        ).values_list('subject_id', 'count')
+    )
+
+    # One row per class subject: enrolled students and their scores for
+    # the subject this term
+    term_scores = Q(
+        student__scores__assignment__term=term,
+        student__scores__assignment__subject_id=F('class_subject__subject_id'),
+    )
+    stats = {
+        row['class_subject_id']: row
+        for row in StudentSubjectEnrollment.objects.filter(
+            class_subject_id__in=[cs_id for cs_id, _ in class_subjects],
+            is_active=True,
+            student__current_class_id=F('class_subject__class_assigned_id'),
+        ).values('class_subject_id').annotate(
+            enrolled=Count('id', distinct=True),
+            entered=Count('student__scores', filter=term_scores),
+            last_activity=Max('student__scores__updated_at', filter=term_scores),
+        )
+    }
+
+    now = timezone.now()
+    rows = []
+    for cs_id, subject_id in class_subjects:
+        row = stats.get(cs_id, {})
+        assignments = assignment_counts.get(subject_id, 0)
+        enrolled = row.get('enrolled', 0)
+        rows.append(ScoreEntryProgress(
+            class_subject_id=cs_id,
+            term=term,
+            assignment_count=assignments,
+            enrolled_count=enrolled,
+            expected_scores=assignments * enrolled,
+            entered_scores=row.get('entered', 0),
+            last_activity=row.get('last_activity'),
+            updated_at=now,
+        ))
+
+    ScoreEntryProgress.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['class_subject', 'term'],
+        update_fields=[
+            'assignment_count', 'enrolled_count', 'expected_scores',
+            'entered_scores', 'last_activity', 'updated_at',
+        ],
+    )
+    return len(rows)
+
+
+def get_progress(term, class_subject_ids):
+    """
+    Progress rows for some class subjects, counting any that have none yet.
+
+    Returns:
+        dict: {class_subject_id: ScoreEntryProgress}
+    """
+    class_subject_ids = set(class_subject_ids)
+    rows = {
+        row.class_subject_id: row
+        for row in ScoreEntryProgress.objects.filter(
+            term=term, class_subject_id__in=class_subject_ids
+        )
+    }
+    missing = class_subject_ids - rows.keys()
+    if missing:
+        recount(term, missing)
+        rows.update({
+            row.class_subject_id: row
+            for row in ScoreEntryProgress.objects.filter(
+                term=term, class_subject_id__in=missing
+            )
+        })
+    return rows
+
+
+def apply_score_delta(score, delta):
+    """
+    Count a created (delta=1), deleted (delta=-1) or edited (delta=0) score.
+
+    Only the class subject the student is actively enrolled in, in their
+    current class, is touched. One UPDATE; a missing row is left for the
+    lazy recount.
+    """
+    updates = {'entered_scores': F('entered_scores') + delta}
+    if delta >= 0:
+        updates['last_activity'] = timezone.now()
+
+    assignment = score.assignment
+    ScoreEntryProgress.objects.filter(
+        term_id=assignment.term_id,
+        class_subject__subject_id=assignment.subject_id,
+        class_subject__class_assigned__students__id=score.student_id,
+        class_subject__student_enrollments__student_id=score.student_id,
+        class_subject__student_enrollments__is_active=True,
+    ).update(**updates)
+
+
+def apply_assignment_delta(assignment, delta):
+    """Add (delta=1) or remove (delta=-1) one assignment's expected cells."""
+    ScoreEntryProgress.objects.filter(
+        term_id=assignment.term_id,
+        class_subject__subject_id=assignment.subject_id,
+    ).update(
+        assignment_count=F('assignment_count') + delta,
+        expected_scores=F('expected_scores') + delta * F('enrolled_count'),
+    )
+
+
+def recount_subject(subject_id, term):
+    """Recount every class subject of a subject for a term."""
+    return recount(term, ClassSubject.objects.filter(
+        subject_id=subject_id
+    ).values_list('id', flat=True))
+
+
+def recount_for_scores(keys):
+    """
+    Recount the class subjects touched by a bulk score write.
+
+    Args:
+        keys: Iterable of (student_id, subject_id, term_id), as queued for
+            grade recalculation
+    """
+    from core.models import Term
+    from students.models import Student
+
+    by_term = defaultdict(lambda: (set(), set()))
+    for student_id, subject_id, term_id in keys:
+        student_ids, subject_ids = by_term[term_id]
+        student_ids.add(student_id)
+        subject_ids.add(subject_id)
+
+    for term in Term.objects.filter(pk__in=list(by_term)):
+        student_ids, subject_ids = by_term[term.pk]
+        class_ids = Student.objects.filter(
+            pk__in=student_ids
+        ).values('current_class_id')
+        recount(term, ClassSubject.objects.filter(
+            class_assigned_id__in=class_ids, subject_id__in=subject_ids
+        ).values_list('id', flat=True))
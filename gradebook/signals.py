@@ -2,7 +2,7 @@
 Signals for automatic grade recalculation when scores change.
 
 When a Score is saved or deleted, the corresponding SubjectTermGrade
-is recalculated automatically.
+is queued for recalculation (see recalc_queue.py).
 """
 import logging
 import threading
@@ -268,45 +268,37 @@ def recalculate_term_report(student, term):
         return None
 
 
+def _queue_recalculation(score):
+    """Mark the score's subject grade stale once the write commits."""
+    from .recalc_queue import mark_stale
+
+    assignment = score.assignment
+    key = (score.student_id, assignment.subject_id, assignment.term_id)
+    transaction.on_commit(lambda: mark_stale(*key))
+
+
 @receiver(post_save, sender=Score)
 def score_saved(sender, instance, created, **kwargs):
-    """Recalculate subject grade when a score is saved.
+    """Queue a subject grade recalculation when a score is saved.
 
-    Only recalculates the SubjectTermGrade (lightweight, ~5 queries).
-    TermReport recalculation is deferred to the bulk calculate_class_grades
-    view to avoid ~120 redundant queries during rapid score entry.
+    The (student, subject, term) is added to the coalesced recalc queue
+    after commit and flushed in batches by flush_stale_grades, so rapid
+    score entry doesn't pay ~5 queries per keystroke. TermReport
+    recalculation is deferred to the bulk calculate_class_grades job.
     """
     if _is_signals_disabled():
         return
 
-    assignment = instance.assignment
-    student = instance.student
-
-    recalculate_subject_grade(
-        student=student,
-        subject=assignment.subject,
-        term=assignment.term
-    )
+    _queue_recalculation(instance)
 
 
 @receiver(post_delete, sender=Score)
 def score_deleted(sender, instance, **kwargs):
-    """Recalculate subject grade when a score is deleted.
-
-    Only recalculates the SubjectTermGrade (lightweight).
-    TermReport recalculation is deferred to the bulk calculate_class_grades view.
-    """
+    """Queue a subject grade recalculation when a score is deleted."""
     if _is_signals_disabled():
         return
 
-    assignment = instance.assignment
-    student = instance.student
-
-    recalculate_subject_grade(
-        student=student,
-        subject=assignment.subject,
-        term=assignment.term
-    )
+    _queue_recalculation(instance)
 
 
 # ============ Cache Invalidation Signals ============
@@ -318,3 +310,105 @@ def invalidate_categories_cache(sender, instance, **kwargs):
     from .utils import invalidate_categories_cache as clear_cache
     clear_cache()
     logger.debug(f"Categories cache invalidated due to {sender.__name__} change")
+
+
+def _invalidate_report_pdfs(student_id, term_id):
+    from django.db import connection
+    from . import report_cache
+
+    schema = connection.schema_name
+    transaction.on_commit(lambda: report_cache.invalidate(schema, student_id, term_id))
+
+
+@receiver(post_save, sender=Score)
+@receiver(post_delete, sender=Score)
+def invalidate_report_pdf_on_score_change(sender, instance, **kwargs):
+    """Drop cached report card PDFs when a student's score changes.
+
+    The cache is keyed by a hash of the report inputs, so this only frees
+    disk space early; a stale PDF would never be served anyway.
+    """
+    if _is_signals_disabled():
+        return
+
+    _invalidate_report_pdfs(instance.student_id, instance.assignment.term_id)
+
+
+@receiver(post_save, sender=TermReport)
+def invalidate_report_pdf_on_report_change(sender, instance, **kwargs):
+    """Drop cached report card PDFs when remarks or totals change."""
+    if _is_signals_disabled():
+        return
+
+    _invalidate_report_pdfs(instance.student_id, instance.term_id)
+
+
+# ============ Transcript Snapshot Signals ============
+# Bulk calculation rebuilds snapshots itself (see transcripts.py); any other
+# report or grade write drops the student's snapshot.
+
+@receiver(post_save, sender=TermReport)
+@receiver(post_delete, sender=TermReport)
+@receiver(post_save, sender=SubjectTermGrade)
+@receiver(post_delete, sender=SubjectTermGrade)
+def invalidate_academic_history(sender, instance, **kwargs):
+    """Drop a student's transcript snapshot when their reports or grades change."""
+    if _is_signals_disabled():
+        return
+
+    from .transcripts import invalidate
+    invalidate([instance.student_id])
+
+
+# ============ Score Entry Progress Signals ============
+# Keep ScoreEntryProgress counters current (see score_progress.py). Bulk
+# score writers run with signals disabled and recount explicitly.
+
+@receiver(post_save, sender=Score)
+def update_progress_on_score_save(sender, instance, created, **kwargs):
+    """Count a new score, or refresh last activity for an edited one."""
+    if _is_signals_disabled():
+        return
+
+    from .score_progress import apply_score_delta
+    apply_score_delta(instance, 1 if created else 0)
+
+
+@receiver(post_delete, sender=Score)
+def update_progress_on_score_delete(sender, instance, **kwargs):
+    """Uncount a deleted score."""
+    if _is_signals_disabled():
+        return
+
+    from .score_progress import apply_score_delta
+    apply_score_delta(instance, -1)
+
+
+@receiver(post_save, sender=Assignment)
+def update_progress_on_assignment_save(sender, instance, created, **kwargs):
+    """Add a new assignment's expected scores; recount an edited one's subject."""
+    from .score_progress import apply_assignment_delta, recount_subject
+
+    if created:
+        apply_assignment_delta(instance, 1)
+    else:
+        recount_subject(instance.subject_id, instance.term)
+
+
+@receiver(post_delete, sender=Assignment)
+def update_progress_on_assignment_delete(sender, instance, **kwargs):
+    """Remove a deleted assignment's expected scores."""
+    from .score_progress import apply_assignment_delta
+    apply_assignment_delta(instance, -1)
+
+
+@receiver(post_save, sender='academics.StudentSubjectEnrollment')
+@receiver(post_delete, sender='academics.StudentSubjectEnrollment')
+def update_progress_on_enrollment_change(sender, instance, **kwargs):
+    """Recount a class subject for the current term when its enrollment changes."""
+    from core.models import Term
+    from .score_progress import recount
+
+    current_term = Term.get_current()
+    if current_term:
+        recount(current_term, [instance.class_subject_id])
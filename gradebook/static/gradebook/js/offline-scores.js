@@ -2,8 +2,9 @@
  * Offline Score Queue — IndexedDB-backed queue for saving scores while offline.
  *
  * When offline, scores are stored locally in IndexedDB. When back online,
- * they are synced to the server in order. Duplicate entries (same student +
- * assignment) are deduplicated, keeping only the latest value.
+ * they are synced to the server in batches through the batch save endpoint.
+ * Duplicate entries (same student + assignment) are deduplicated, keeping
+ * only the latest value.
  *
  * API:
  *   OfflineScores.enqueue(studentId, assignmentId, points, csrfToken)
@@ -17,7 +18,8 @@ window.OfflineScores = (function() {
     var DB_NAME = 'sms_offline_scores';
     var DB_VERSION = 1;
     var STORE_NAME = 'queue';
-    var SAVE_URL = '/gradebook/scores/save/';
+    var SAVE_URL = '/gradebook/scores/save/batch/';
+    var BATCH_SIZE = 200;  // must not exceed GRADEBOOK_SCORE_BATCH_MAX_ENTRIES
     var db = null;
     var syncing = false;
     var onCountChange = null;
@@ -147,31 +149,37 @@ window.OfflineScores = (function() {
             return Promise.resolve();
         }
 
-        var rec = records[idx];
-        updateSyncProgress(idx + 1, records.length);
-
-        var formData = new FormData();
-        formData.append('student_id', rec.studentId);
-        formData.append('assignment_id', rec.assignmentId);
-        formData.append('points', rec.points);
+        var batch = records.slice(idx, idx + BATCH_SIZE);
+        var scores = batch.map(function(rec) {
+            return {
+                student_id: rec.studentId,
+                assignment_id: rec.assignmentId,
+                points: rec.points
+            };
+        });
 
         return fetch(SAVE_URL, {
             method: 'POST',
             headers: {
-                'X-CSRFToken': rec.csrfToken,
+                'Content-Type': 'application/json',
+                'X-CSRFToken': batch[batch.length - 1].csrfToken,
                 'X-Requested-With': 'XMLHttpRequest'
             },
-            body: formData,
+            body: JSON.stringify({ scores: scores }),
             credentials: 'same-origin'
         }).then(function(response) {
             if (response.ok || response.status === 400 || response.status === 403) {
                 // Remove from queue on success OR on validation/auth errors
-                // (retrying won't fix auth/validation issues)
-                return remove(rec.key).then(function() {
-                    return syncNext(records, idx + 1);
+                // (retrying won't fix auth/validation issues). Rejected
+                // cells are reported per cell in the response body.
+                return Promise.all(batch.map(function(rec) {
+                    return remove(rec.key);
+                })).then(function() {
+                    updateSyncProgress(idx + batch.length, records.length);
+                    return syncNext(records, idx + batch.length);
                 });
             }
-            // Server error (500) — stop syncing, retry later
+            // Server error (500) or rate limited — stop syncing, retry later
             throw new Error('Server error ' + response.status);
         }).catch(function(err) {
             console.warn('[OfflineScores] Sync failed at item', idx, err);
@@ -3,13 +3,13 @@ Celery tasks for gradebook app.
 Handles async report distribution via email and SMS.
 """
 import logging
-from io import BytesIO
 
 from celery import shared_task
 from django.template.loader import render_to_string
 from django.core.mail import EmailMessage
 from django.utils import timezone
 from django.conf import settings
+from django.core.cache import cache
 
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
@@ -26,169 +26,198 @@ def generate_report_pdf(term_report, tenant_schema, shared_context=None):
     """
     Generate PDF report card for a student.
 
+    PDFs are cached on disk keyed by a hash of every input (see
+    report_cache.py), so an unchanged report card is returned without
+    rendering. A cached PDF keeps the verification QR code it was rendered
+    with; a new DocumentVerification is only created on a cache miss.
+
     Args:
         term_report: TermReport instance
         tenant_schema: Schema name for tenant context
         shared_context: Optional dict with pre-fetched data shared across
             students (school, rc_config, grading_system, categories,
-            next_term_date). Avoids redundant DB queries in bulk exports.
+            next_term_date, and optionally category_scores from
+            compute_class_report_category_scores). Avoids redundant DB
+            queries in bulk exports.
 
     Returns:
         BytesIO: PDF content as bytes buffer
     """
     try:
-        from weasyprint import HTML
+        import weasyprint  # noqa: F401
     except ImportError:
         logger.error("WeasyPrint not installed. Install with: pip install weasyprint")
         raise
 
     with schema_context(tenant_schema):
-        from .models import SubjectTermGrade, AssessmentCategory
+        if shared_context is None:
+            shared_context = _build_report_shared_context(tenant_schema, term_report.term)
 
-        student = term_report.student
-        current_term = term_report.term
+        category_scores_map, digest, cached = _lookup_report_pdf(
+            term_report, tenant_schema, shared_context
+        )
+        if cached is not None:
+            return cached
 
-        # Get subject grades
-        subject_grades = list(SubjectTermGrade.objects.filter(
-            student=student,
-            term=current_term
-        ).select_related('subject').order_by('-subject__is_core', 'subject__name'))
+        # Create verification record for the QR code
+        try:
+            verification = _build_report_verification(term_report)
+            verification.save(force_insert=True)
+        except (ValueError, ValidationError, IntegrityError) as e:
+            verification = None
+            logger.warning(f"Could not create verification record: {e}")
 
-        # Get assessment categories (use shared if available)
-        if shared_context and 'categories' in shared_context:
-            categories = shared_context['categories']
-        else:
-            categories = list(AssessmentCategory.objects.filter(
-                is_active=True
-            ).order_by('order'))
-
-        # Compute and attach category-wise scores for report card display
-        from .utils import compute_report_category_scores, attach_category_scores
-        category_scores_map = compute_report_category_scores(student, current_term, categories)
-        attach_category_scores(subject_grades, categories, category_scores_map)
-
-        # Get school info (use shared if available)
-        if shared_context and 'school' in shared_context:
-            school = shared_context['school']
-            logo_base64 = shared_context.get('logo_base64')
-            signature_base64 = shared_context.get('signature_base64')
-        else:
-            school = None
-            logo_base64 = None
-            signature_base64 = None
-            try:
-                from schools.models import School
-                from .utils import encode_image_base64
-
-                school = School.objects.get(schema_name=tenant_schema)
-                if school and school.logo:
-                    logo_base64 = encode_image_base64(school.logo)
-                if school and school.headmaster_signature:
-                    signature_base64 = encode_image_base64(school.headmaster_signature)
-            except (IOError, OSError):
-                pass
+        return _render_report_pdf(
+            term_report, tenant_schema, shared_context, category_scores_map, digest, verification
+        )
 
-        student_photo_base64 = None
-        core_grades = []
-        elective_grades = []
-        try:
-            from .utils import encode_image_base64
 
-            # Separate core and elective grades for SHS
-            is_shs_class = (
-                student.current_class
-                and student.current_class.level_type == 'shs'
-            )
-            show_core_elective = (
-                school and (
-                    school.education_system == 'shs'
-                    or (school.has_shs_levels and is_shs_class)
-                )
-            )
-            if show_core_elective:
-                core_grades = [
-                    sg for sg in subject_grades if sg.subject.is_core
-                ]
-                elective_grades = [
-                    sg for sg in subject_grades if not sg.subject.is_core
-                ]
-
-            # Encode student photo as base64 for PDF
-            if student.photo:
-                student_photo_base64 = encode_image_base64(student.photo)
+def _lookup_report_pdf(term_report, tenant_schema, shared_context):
+    """
+    Probe the report PDF cache for a report card.
+
+    Returns:
+        tuple: (category_scores_map, digest, cached BytesIO or None);
+        digest is None when the cache is disabled
+    """
+    from . import report_cache
+
+    # Category-wise scores for report card display; bulk exports
+    # precompute them for the whole class
+    if 'category_scores' in shared_context:
+        category_scores_map = shared_context['category_scores'].get(term_report.student_id, {})
+    else:
+        from .utils import compute_report_category_scores
+        category_scores_map = compute_report_category_scores(
+            term_report.student, term_report.term, shared_context['categories']
+        )
+
+    if not config.REPORT_PDF_CACHE_ENABLED:
+        return category_scores_map, None, None
+    digest = report_cache.fingerprint(term_report, shared_context, category_scores_map)
+    return category_scores_map, digest, report_cache.get(tenant_schema, term_report, digest)
+
+
+def _build_report_verification(term_report):
+    """Unsaved DocumentVerification for a report card."""
+    from core.models import DocumentVerification
+
+    term = term_report.term
+    return DocumentVerification.build_for_document(
+        document_type=DocumentVerification.DocumentType.REPORT_CARD,
+        student=term_report.student,
+        title=f"Report Card - {term.name}",
+        term=term,
+        academic_year=term.academic_year.name if term.academic_year else '',
+    )
 
-        except (IOError, OSError):
-            pass
 
-        # Create verification record and generate QR code
-        verification = None
-        qr_code_base64 = None
+def _render_report_pdf(term_report, tenant_schema, shared_context, category_scores_map, digest, verification):
+    """
+    Render a report card PDF after a cache miss and store it in the cache.
+
+    verification is the saved DocumentVerification embedded as a QR code,
+    or None if it could not be created (the PDF is then not cached).
+    """
+    from core.pdf import render_pdf
+    from .models import SubjectTermGrade
+    from . import report_cache
+
+    student = term_report.student
+    current_term = term_report.term
+    categories = shared_context['categories']
+    school = shared_context.get('school')
+    logo_base64 = shared_context.get('logo_base64')
+    signature_base64 = shared_context.get('signature_base64')
+    rc_config = shared_context['rc_config']
+    grading_system = shared_context.get('grading_system')
+    next_term_date = shared_context.get('next_term_date')
+
+    # Get subject grades
+    subject_grades = list(SubjectTermGrade.objects.filter(
+        student=student,
+        term=current_term
+    ).select_related('subject').order_by('-subject__is_core', 'subject__name'))
+
+    from .utils import attach_category_scores
+    attach_category_scores(subject_grades, categories, category_scores_map)
+
+    student_photo_base64 = None
+    core_grades = []
+    elective_grades = []
+    try:
+        from .utils import encode_image_base64
+
+        # Separate core and elective grades for SHS
+        is_shs_class = (
+            student.current_class
+            and student.current_class.level_type == 'shs'
+        )
+        show_core_elective = (
+            school and (
+                school.education_system == 'shs'
+                or (school.has_shs_levels and is_shs_class)
+            )
+        )
+        if show_core_elective:
+            core_grades = [
+                sg for sg in subject_grades if sg.subject.is_core
+            ]
+            elective_grades = [
+                sg for sg in subject_grades if not sg.subject.is_core
+            ]
+
+        # Encode student photo as base64 for PDF (bulk exports preload them)
+        if 'student_photos' in shared_context:
+            student_photo_base64 = shared_context['student_photos'].get(student.pk)
+        elif student.photo:
+            student_photo_base64 = encode_image_base64(student.photo)
+
+    except (IOError, OSError):
+        pass
+
+    # Generate the verification QR code
+    qr_code_base64 = None
+    if verification is not None:
         try:
-            from core.models import DocumentVerification
             from core.utils import generate_verification_qr
 
-            verification = DocumentVerification.create_for_document(
-                document_type=DocumentVerification.DocumentType.REPORT_CARD,
-                student=student,
-                title=f"Report Card - {current_term.name}",
-                term=current_term,
-                academic_year=current_term.academic_year.name if current_term.academic_year else '',
-            )
             # Get domain from school for QR code URL
             domain = school.domain_url if school and hasattr(school, 'domain_url') else None
             qr_code_base64 = generate_verification_qr(verification.verification_code, domain=domain)
-        except (ValueError, ValidationError, IntegrityError) as e:
-            logger.warning(f"Could not create verification record: {e}")
-
-        if shared_context and 'rc_config' in shared_context:
-            rc_config = shared_context['rc_config']
-            grading_system = shared_context.get('grading_system')
-            next_term_date = shared_context.get('next_term_date')
-        else:
-            from core.models import SchoolSettings, Term
-            from .models import GradingSystem
-            rc_config = SchoolSettings.load()
-            grading_system = GradingSystem.objects.filter(
-                is_active=True
-            ).prefetch_related('scales').first()
-
-            # Get next term start date if available
-            next_term_date = None
-            if current_term:
-                next_term = Term.objects.filter(
-                    start_date__gt=current_term.end_date
-                ).order_by('start_date').first()
-                next_term_date = next_term.start_date if next_term else None
-
-        context = {
-            'student': student,
-            'term_report': term_report,
-            'current_term': current_term,
-            'subject_grades': subject_grades,
-            'core_grades': core_grades,
-            'elective_grades': elective_grades,
-            'categories': categories,
-            'school': school,
-            'logo_base64': logo_base64,
-            'signature_base64': signature_base64,
-            'student_photo_base64': student_photo_base64,
-            'verification': verification,
-            'qr_code_base64': qr_code_base64,
-            'rc_config': rc_config,
-            'grading_system': grading_system,
-            'next_term_date': next_term_date,
-        }
-
-        html_string = render_to_string('gradebook/report_card_pdf.html', context)
+        except ValueError as e:
+            logger.warning(f"Could not generate verification QR code: {e}")
+
+    context = {
+        'student': student,
+        'term_report': term_report,
+        'current_term': current_term,
+        'subject_grades': subject_grades,
+        'core_grades': core_grades,
+        'elective_grades': elective_grades,
+        'categories': categories,
+        'school': school,
+        'logo_base64': logo_base64,
+        'signature_base64': signature_base64,
+        'student_photo_base64': student_photo_base64,
+        'verification': verification,
+        'qr_code_base64': qr_code_base64,
+        'rc_config': rc_config,
+        'grading_system': grading_system,
+        'next_term_date': next_term_date,
+    }
 
-        # Generate PDF
-        html = HTML(string=html_string, base_url=settings.BASE_DIR)
-        pdf_buffer = BytesIO()
-        html.write_pdf(pdf_buffer)
-        pdf_buffer.seek(0)
+    pdf_buffer = render_pdf(
+        'gradebook/report_card_pdf.html', context,
+        stylesheet='gradebook/report_card_pdf.css',
+        school=school, tenant_schema=tenant_schema,
+    )
 
-        return pdf_buffer
+    # Only cache PDFs that carry a verification code
+    if digest and verification is not None:
+        report_cache.store(tenant_schema, term_report, digest, pdf_buffer)
 
+    return pdf_buffer
 
 def build_feedback_context(term_report):
     """
@@ -358,8 +387,10 @@ def distribute_single_report(self, term_report_id, distribution_type, tenant_sch
                 pass
 
         # Get guardian contact info
-        guardian_email = getattr(student, 'guardian_email', None) or getattr(student, 'parent_email', None)
-        guardian_phone = getattr(student, 'guardian_phone', None) or getattr(student, 'parent_phone', None)
+        from students.contacts import get_guardian_contact
+        contact = get_guardian_contact(student) or {}
+        guardian_email = contact.get('email')
+        guardian_phone = contact.get('phone')
 
         # Track results — log is only created once at the end (no partial saves)
         email_status = email_error = email_sent_to = email_sent_at = None
@@ -433,7 +464,7 @@ def distribute_single_report(self, term_report_id, distribution_type, tenant_sch
 
                 sms_record = SMSMessage.objects.create(
                     recipient_phone=guardian_phone,
-                    recipient_name=getattr(student, 'guardian_name', ''),
+                    recipient_name=contact.get('name') or '',
                     student=student,
                     message=sms_text,
                     message_type=SMSMessage.MessageType.REPORT_FEEDBACK,
@@ -501,6 +532,43 @@ def distribute_single_report(self, term_report_id, distribution_type, tenant_sch
         }
 
 
+def _build_report_shared_context(tenant_schema, current_term):
+    """
+    Pre-fetch the data every report card in a bulk export shares.
+
+    Passed to generate_report_pdf as shared_context so each student only
+    queries their own grades.
+    """
+    from .models import AssessmentCategory, GradingSystem
+    from core.models import SchoolSettings, Term
+
+    shared_context = {
+        'categories': list(AssessmentCategory.objects.filter(is_active=True).order_by('order')),
+        'rc_config': SchoolSettings.load(),
+        'grading_system': GradingSystem.objects.filter(is_active=True).prefetch_related('scales').first(),
+    }
+    try:
+        from schools.models import School
+        from core.pdf import branding_assets
+        school = School.objects.get(schema_name=tenant_schema)
+        shared_context['school'] = school
+        shared_context.update(branding_assets(school, tenant_schema))
+    except Exception:
+        shared_context['school'] = None
+        shared_context['logo_base64'] = None
+        shared_context['signature_base64'] = None
+
+    next_term = Term.objects.filter(
+        start_date__gt=current_term.end_date
+    ).order_by('start_date').first()
+    shared_context['next_term_date'] = next_term.start_date if next_term else None
+    return shared_context
+
+
+def _export_progress_key(export_task_id):
+    return f'report_export_progress_{export_task_id}'
+
+
 @shared_task(
     bind=True,
     max_retries=0,
@@ -511,7 +579,13 @@ def export_class_reports_zip(self, class_id, tenant_schema):
     """
     Generate a ZIP file containing PDF report cards for all students in a class.
 
-    Updates task state with progress so the frontend can poll for status.
+    Rendering is fanned out as a chord of render_report_chunk tasks
+    (EXPORT_CHUNK_SIZE students each), so a class is spread over every
+    available worker. Each chunk writes its PDFs to disk one at a time and
+    assemble_reports_zip streams them into the ZIP. This task replaces
+    itself with the chord, so its task ID resolves to the final result and
+    the frontend keeps polling the same ID; chunks report throttled
+    progress against it.
 
     Args:
         class_id: ID of the Class
@@ -522,7 +596,7 @@ def export_class_reports_zip(self, class_id, tenant_schema):
     """
     import os
     import uuid
-    import zipfile
+    from celery import chord
 
     with schema_context(tenant_schema):
         from .models import TermReport
@@ -539,12 +613,14 @@ def export_class_reports_zip(self, class_id, tenant_schema):
         if not current_term:
             return {'success': False, 'error': 'No current term'}
 
-        term_reports = list(TermReport.objects.filter(
-            student__current_class=class_obj,
-            term=current_term,
-        ).select_related('student', 'term'))
+        term_report_ids = [
+            str(pk) for pk in TermReport.objects.filter(
+                student__current_class=class_obj,
+                term=current_term,
+            ).order_by('student__last_name', 'student__first_name').values_list('pk', flat=True)
+        ]
 
-        total = len(term_reports)
+        total = len(term_report_ids)
         if total == 0:
             return {'success': False, 'error': 'No reports found for this class'}
 
@@ -559,69 +635,431 @@ def export_class_reports_zip(self, class_id, tenant_schema):
         term_name = current_term.name.replace(' ', '_')
         short_uuid = uuid.uuid4().hex[:8]
         zip_filename = f"{class_name}_{term_name}_{short_uuid}.zip"
-        zip_path = os.path.join(export_dir, zip_filename)
 
-        errors = []
+    # Rendered PDFs are staged here until the ZIP is assembled
+    parts_dir = os.path.join(export_dir, f'.parts_{short_uuid}')
+    os.makedirs(parts_dir, exist_ok=True)
+
+    export_task_id = self.request.id
+    cache.set(_export_progress_key(export_task_id), 0, config.BULK_TASK_TIME_LIMIT)
+    _report_progress(self, {'current': 0, 'total': total})
+
+    chunk_size = config.EXPORT_CHUNK_SIZE
+    chunks = [
+        term_report_ids[i:i + chunk_size]
+        for i in range(0, total, chunk_size)
+    ]
+    return self.replace(chord(
+        (
+            render_report_chunk.s(chunk, tenant_schema, parts_dir, export_task_id, total)
+            for chunk in chunks
+        ),
+        assemble_reports_zip.s(
+            tenant_schema, parts_dir, os.path.join(export_dir, zip_filename),
+            f"{tenant_schema}/{zip_filename}", total,
+        ),
+    ))
 
-        # Pre-fetch shared data to avoid redundant queries per student
-        from .models import AssessmentCategory, GradingSystem
-        from core.models import SchoolSettings
-        shared_context = {
-            'categories': list(AssessmentCategory.objects.filter(is_active=True).order_by('order')),
-            'rc_config': SchoolSettings.load(),
-            'grading_system': GradingSystem.objects.filter(is_active=True).prefetch_related('scales').first(),
-        }
+
+@shared_task(
+    bind=True,
+    max_retries=0,
+    soft_time_limit=config.TASK_SOFT_TIME_LIMIT,
+    time_limit=config.TASK_TIME_LIMIT,
+)
+def render_report_chunk(self, term_report_ids, tenant_schema, parts_dir, export_task_id, total):
+    """
+    Render one chunk of a class report export to PDF files in parts_dir.
+
+    Only one PDF is held in memory at a time. Progress is counted in the
+    cache and published on the export's task ID at most ~20 times per
+    export rather than once per student.
+
+    Returns:
+        dict with files (list of [path, archive name]) and errors
+    """
+    import os
+
+    files = []
+    errors = []
+    progress_key = _export_progress_key(export_task_id)
+    step = max(1, total // 20)
+
+    with schema_context(tenant_schema):
+        from .models import TermReport
+
+        term_reports = list(TermReport.objects.filter(
+            pk__in=term_report_ids
+        ).select_related('student', 'student__current_class', 'term', 'term__academic_year'))
+        order = {pk: i for i, pk in enumerate(term_report_ids)}
+        term_reports.sort(key=lambda r: order[str(r.pk)])
+        if not term_reports:
+            return {'files': files, 'errors': errors}
+
+        term = term_reports[0].term
+        shared_context = _build_report_shared_context(tenant_schema, term)
+        from .utils import compute_class_report_category_scores
+        shared_context['category_scores'] = compute_class_report_category_scores(
+            term_reports[0].student.current_class, term, shared_context['categories'],
+            student_ids=[r.student_id for r in term_reports],
+        )
+        from core.pdf import load_images_base64
+        shared_context['student_photos'] = dict(zip(
+            [r.student_id for r in term_reports],
+            load_images_base64([r.student.photo for r in term_reports]),
+        ))
+
+        for term_report in term_reports:
+            try:
+                pdf_buffer = generate_report_pdf(term_report, tenant_schema, shared_context=shared_context)
+                path = os.path.join(parts_dir, f"{term_report.pk}.pdf")
+                with open(path, 'wb') as fh:
+                    fh.write(pdf_buffer.getbuffer())
+                pdf_buffer.close()
+                files.append([path, f"report_card_{term_report.student.admission_number}.pdf"])
+            except Exception as e:
+                student_name = str(term_report.student)
+                logger.error(f"PDF generation failed for {student_name}: {e}")
+                errors.append(f"{student_name}: {str(e)[:100]}")
+
+            try:
+                done = cache.incr(progress_key)
+            except ValueError:
+                continue
+            if done % step == 0 or done == total:
+                self.app.backend.store_result(
+                    export_task_id, {'current': done, 'total': total}, 'PROGRESS'
+                )
+
+    return {'files': files, 'errors': errors}
+
+
+@shared_task(
+    bind=True,
+    max_retries=0,
+    soft_time_limit=config.BULK_TASK_SOFT_TIME_LIMIT,
+    time_limit=config.BULK_TASK_TIME_LIMIT,
+)
+def assemble_reports_zip(self, chunk_results, tenant_schema, parts_dir, zip_path, relative_filename, total):
+    """
+    Chord callback: stream the rendered PDFs into the export ZIP.
+
+    Files are copied from disk in blocks (ZipFile.write), so memory stays
+    flat however large the class is. The staging directory is removed
+    afterwards, and the partial ZIP too if assembly fails.
+    """
+    import os
+    import shutil
+    import zipfile
+
+    errors = []
+    try:
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for result in chunk_results:
+                errors.extend(result['errors'])
+                for path, arcname in result['files']:
+                    zf.write(path, arcname)
+    except Exception:
+        # Clean up partial ZIP on failure
+        if os.path.exists(zip_path):
+            try:
+                os.remove(zip_path)
+            except OSError:
+                logger.warning(f"Could not delete failed ZIP: {zip_path}")
+        raise
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+        cache.delete(_export_progress_key(self.request.id))
+
+    return {
+        'success': True,
+        'filename': relative_filename,
+        'total': total,
+        'errors': errors,
+    }
+
+
+@shared_task(
+    bind=True,
+    max_retries=0,
+    soft_time_limit=config.BULK_TASK_SOFT_TIME_LIMIT,
+    time_limit=config.BULK_TASK_TIME_LIMIT,
+)
+def export_transcripts_zip(self, tenant_schema, class_id=None, academic_year_id=None, status='active', user_id=None):
+    """
+    Generate a ZIP file of PDF transcripts for a class or a graduating cohort.
+
+    Pass class_id for a class's students with the given status (active
+    students by current class, others by enrollment history, as on the
+    report cards page), or academic_year_id alone for every student who
+    graduated in that academic year. Rendering is
+    fanned out as a chord of render_transcript_chunk tasks and assembled by
+    assemble_reports_zip, exactly like export_class_reports_zip, so the
+    frontend polls this task's ID for progress and the result.
+
+    Returns:
+        dict with success, filename, total, and errors list
+    """
+    import os
+    import uuid
+    from celery import chord
+
+    with schema_context(tenant_schema):
+        from students.models import Enrollment, Student
+
+        if class_id is not None:
+            from academics.models import Class
+
+            try:
+                class_obj = Class.objects.get(pk=class_id)
+            except Class.DoesNotExist:
+                logger.error(f"Class {class_id} not found for transcript export")
+                return {'success': False, 'error': 'Class not found'}
+            if status == Student.Status.ACTIVE:
+                students = Student.objects.filter(current_class=class_obj, status=status)
+            else:
+                students = Student.objects.filter(
+                    pk__in=Enrollment.objects.filter(
+                        class_assigned=class_obj
+                    ).values('student_id'),
+                    status=status,
+                )
+            label = class_obj.name
+        else:
+            from core.models import AcademicYear
+
+            try:
+                academic_year = AcademicYear.objects.get(pk=academic_year_id)
+            except AcademicYear.DoesNotExist:
+                logger.error(f"Academic year {academic_year_id} not found for transcript export")
+                return {'success': False, 'error': 'Academic year not found'}
+            students = Student.objects.filter(
+                pk__in=Enrollment.objects.filter(
+                    academic_year=academic_year,
+                    status=Enrollment.Status.GRADUATED,
+                ).values('student_id')
+            )
+            label = f"Graduates_{academic_year.name}"
+
+        student_ids = [
+            str(pk) for pk in students.filter(
+                term_reports__isnull=False
+            ).distinct().order_by('last_name', 'first_name').values_list('pk', flat=True)
+        ]
+
+        total = len(student_ids)
+        if total == 0:
+            return {'success': False, 'error': 'No academic records found'}
+
+        export_dir = os.path.join(
+            settings.MEDIA_ROOT, 'exports', tenant_schema
+        )
+        os.makedirs(export_dir, exist_ok=True)
+
+        short_uuid = uuid.uuid4().hex[:8]
+        label = label.replace(' ', '_').replace('/', '-')
+        zip_filename = f"Transcripts_{label}_{short_uuid}.zip"
+
+    parts_dir = os.path.join(export_dir, f'.parts_{short_uuid}')
+    os.makedirs(parts_dir, exist_ok=True)
+
+    export_task_id = self.request.id
+    cache.set(_export_progress_key(export_task_id), 0, config.BULK_TASK_TIME_LIMIT)
+    _report_progress(self, {'current': 0, 'total': total})
+
+    chunk_size = config.EXPORT_CHUNK_SIZE
+    chunks = [
+        student_ids[i:i + chunk_size]
+        for i in range(0, total, chunk_size)
+    ]
+    return self.replace(chord(
+        (
+            render_transcript_chunk.s(chunk, tenant_schema, parts_dir, export_task_id, total, user_id)
+            for chunk in chunks
+        ),
+        assemble_reports_zip.s(
+            tenant_schema, parts_dir, os.path.join(export_dir, zip_filename),
+            f"{tenant_schema}/{zip_filename}", total,
+        ),
+    ))
+
+
+@shared_task(
+    bind=True,
+    max_retries=0,
+    soft_time_limit=config.TASK_SOFT_TIME_LIMIT,
+    time_limit=config.TASK_TIME_LIMIT,
+)
+def render_transcript_chunk(self, student_ids, tenant_schema, parts_dir, export_task_id, total, user_id=None):
+    """
+    Render one chunk of a transcript export to PDF files in parts_dir.
+
+    Histories come from the students' academic history snapshots in one
+    query; school branding is loaded once per chunk.
+
+    Returns:
+        dict with files (list of [path, archive name]) and errors
+    """
+    import os
+
+    files = []
+    errors = []
+    progress_key = _export_progress_key(export_task_id)
+    step = max(1, total // 20)
+
+    with schema_context(tenant_schema):
+        from django.contrib.auth import get_user_model
+        from core.models import DocumentVerification
+        from core.pdf import branding_assets, render_pdf
+        from core.utils import generate_verification_qr
+        from students.models import Student
+        from .transcripts import get_academic_histories
+
+        students = list(Student.objects.filter(
+            pk__in=student_ids
+        ).select_related('current_class'))
+        order = {pk: i for i, pk in enumerate(student_ids)}
+        students.sort(key=lambda s: order[str(s.pk)])
+        if not students:
+            return {'files': files, 'errors': errors}
+
+        histories = get_academic_histories([s.pk for s in students])
+        user = get_user_model().objects.filter(pk=user_id).first() if user_id else None
         try:
             from schools.models import School
-            from .utils import encode_image_base64
             school = School.objects.get(schema_name=tenant_schema)
-            shared_context['school'] = school
-            shared_context['logo_base64'] = encode_image_base64(school.logo) if school.logo else None
-            shared_context['signature_base64'] = encode_image_base64(school.headmaster_signature) if school.headmaster_signature else None
+            logo_base64 = branding_assets(school, tenant_schema)['logo_base64']
         except Exception:
-            shared_context['school'] = None
-            shared_context['logo_base64'] = None
-            shared_context['signature_base64'] = None
+            school = None
+            logo_base64 = None
+        domain = school.domain_url if school and hasattr(school, 'domain_url') else None
+        generated_date = timezone.now()
 
-        next_term = Term.objects.filter(
-            start_date__gt=current_term.end_date
-        ).order_by('start_date').first()
-        shared_context['next_term_date'] = next_term.start_date if next_term else None
+        for student in students:
+            try:
+                history_data = histories[student.pk]
 
-        try:
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-                for i, term_report in enumerate(term_reports):
-                    self.update_state(
-                        state='PROGRESS',
-                        meta={'current': i + 1, 'total': total},
-                    )
-                    try:
-                        pdf_buffer = generate_report_pdf(term_report, tenant_schema, shared_context=shared_context)
-                        admission = term_report.student.admission_number
-                        zf.writestr(
-                            f"report_card_{admission}.pdf",
-                            pdf_buffer.getvalue(),
-                        )
-                    except Exception as e:
-                        student_name = str(term_report.student)
-                        logger.error(f"PDF generation failed for {student_name}: {e}")
-                        errors.append(f"{student_name}: {str(e)[:100]}")
-        except Exception:
-            # Clean up partial ZIP on failure
-            if os.path.exists(zip_path):
+                verification = None
+                qr_code_base64 = None
                 try:
-                    os.remove(zip_path)
-                except OSError:
-                    logger.warning(f"Could not delete failed ZIP: {zip_path}")
-            raise
+                    verification = DocumentVerification.create_for_document(
+                        document_type=DocumentVerification.DocumentType.TRANSCRIPT,
+                        student=student,
+                        title=f"Academic Transcript - {student.full_name}",
+                        user=user,
+                    )
+                    qr_code_base64 = generate_verification_qr(verification.verification_code, domain=domain)
+                except (ValueError, ValidationError, IntegrityError) as e:
+                    logger.warning(f"Could not create verification record: {e}")
 
-        relative_filename = f"{tenant_schema}/{zip_filename}"
-        return {
-            'success': True,
-            'filename': relative_filename,
-            'total': total,
-            'errors': errors,
-        }
+                context = {
+                    'student': student,
+                    'academic_history': history_data['academic_history'],
+                    'cumulative_average': history_data['cumulative_average'],
+                    'total_terms': history_data['term_count'],
+                    'total_credits': history_data['total_credits'],
+                    'generated_date': generated_date,
+                    'school': school,
+                    'logo_base64': logo_base64,
+                    'verification': verification,
+                    'qr_code_base64': qr_code_base64,
+                }
+                pdf_buffer = render_pdf(
+                    'gradebook/transcript_pdf.html', context,
+                    stylesheet='gradebook/transcript_pdf.css',
+                    school=school, tenant_schema=tenant_schema,
+                )
+                path = os.path.join(parts_dir, f"{student.pk}.pdf")
+                with open(path, 'wb') as fh:
+                    fh.write(pdf_buffer.getbuffer())
+                pdf_buffer.close()
+                files.append([path, f"transcript_{student.admission_number}.pdf"])
+            except Exception as e:
+                logger.error(f"Transcript generation failed for {student}: {e}")
+                errors.append(f"{student}: {str(e)[:100]}")
+
+            try:
+                done = cache.incr(progress_key)
+            except ValueError:
+                continue
+            if done % step == 0 or done == total:
+                self.app.backend.store_result(
+                    export_task_id, {'current': done, 'total': total}, 'PROGRESS'
+                )
+
+    return {'files': files, 'errors': errors}
+
+
+@shared_task(bind=True, max_retries=2)
+def rebuild_academic_histories(self, tenant_schema, term_id):
+    """
+    Rebuild the transcript snapshots of every student in a term.
+
+    Queued when a term's grades are locked.
+    """
+    with schema_context(tenant_schema):
+        from core.models import Term
+        from .transcripts import rebuild_term_snapshots
+
+        try:
+            term = Term.objects.get(pk=term_id)
+        except Term.DoesNotExist:
+            return {'rebuilt': 0}
+
+        try:
+            rebuilt = rebuild_term_snapshots(term)
+        except Exception as e:
+            logger.error(f"Error rebuilding academic histories for term {term_id}: {e}")
+            raise self.retry(exc=e, countdown=60)
+
+    return {'rebuilt': rebuilt}
+
+
+@shared_task(
+    bind=True,
+    max_retries=0,
+    soft_time_limit=config.BULK_TASK_SOFT_TIME_LIMIT,
+    time_limit=config.BULK_TASK_TIME_LIMIT,
+)
+def generate_school_remarks(self, tenant_schema, term_id, overwrite=False):
+    """
+    Generate class teacher remarks for every active class in a term.
+
+    Templates are compiled once for the whole school; each class's remarks
+    are written with one bulk_update.
+
+    Returns:
+        dict with generated, skipped and classes counts
+    """
+    with schema_context(tenant_schema):
+        from academics.models import Class
+        from core.models import Term
+        from .remarks import compile_active_templates, generate_remarks
+
+        try:
+            term = Term.objects.get(pk=term_id)
+        except Term.DoesNotExist:
+            return {'success': False, 'error': 'Term not found'}
+
+        templates = compile_active_templates()
+        if not templates:
+            return {'success': False, 'error': 'No remark templates found'}
+
+        class_ids = list(Class.objects.filter(is_active=True).values_list('pk', flat=True))
+        totals = {'generated': 0, 'skipped': 0}
+        for class_id in class_ids:
+            try:
+                result = generate_remarks(term, [class_id], overwrite=overwrite, templates=templates)
+            except Exception as e:
+                logger.error(f"Remark generation failed for class {class_id}: {e}")
+                continue
+            totals['generated'] += result['generated']
+            totals['skipped'] += result['skipped']
+
+    logger.info(
+        f"Generated {totals['generated']} remark(s) for {len(class_ids)} classes in {tenant_schema}"
+    )
+    return {'success': True, 'classes': len(class_ids), **totals}
 
 
 @shared_task
@@ -629,23 +1067,38 @@ def cleanup_export_zips():
     """
     Remove ZIP export files older than EXPORT_ZIP_MAX_AGE_HOURS.
 
-    Intended to be registered as a periodic task in django_celery_beat admin.
+    Also removes score import uploads that were previewed but never
+    confirmed. Intended to be registered as a periodic task in
+    django_celery_beat admin.
     """
     import os
     import time
 
     max_age_hours = config.EXPORT_ZIP_MAX_AGE_HOURS
-    exports_root = os.path.join(settings.MEDIA_ROOT, 'exports')
-
-    if not os.path.exists(exports_root):
-        return {'deleted': 0}
-
     cutoff = time.time() - (max_age_hours * 3600)
     deleted = 0
 
-    for dirpath, dirnames, filenames in os.walk(exports_root):
+    for root, extensions in (
+        # .pdf: staging files left behind by an export whose chord failed
+        (os.path.join(settings.MEDIA_ROOT, 'exports'), ('.zip', '.pdf')),
+        (os.path.join(settings.MEDIA_ROOT, 'imports'), ('.xlsx',)),
+    ):
+        deleted += _remove_old_files(root, extensions, cutoff)
+
+    return {'deleted': deleted}
+
+
+def _remove_old_files(root, extensions, cutoff):
+    """Delete files under root older than cutoff, then empty subdirectories."""
+    import os
+
+    if not os.path.exists(root):
+        return 0
+
+    deleted = 0
+    for dirpath, dirnames, filenames in os.walk(root):
         for filename in filenames:
-            if not filename.endswith('.zip'):
+            if not filename.endswith(extensions):
                 continue
             filepath = os.path.join(dirpath, filename)
             if os.path.getmtime(filepath) < cutoff:
@@ -658,7 +1111,7 @@ def cleanup_export_zips():
             if not os.listdir(subdir):
                 os.rmdir(subdir)
 
-    return {'deleted': deleted}
+    return deleted
 
 
 @shared_task(
@@ -670,7 +1123,11 @@ def cleanup_export_zips():
 def distribute_bulk_reports(self, class_id, distribution_type, tenant_schema, sent_by_id=None, sms_template=None):
     """
     Distribute reports for all students in a class.
-    Queues individual distribution tasks for each student.
+
+    The class is split into chunks of EXPORT_CHUNK_SIZE reports, each
+    handled by one distribute_report_chunk task, so shared report card
+    data, the SMTP connection and the SMS session are set up once per
+    chunk instead of once per student.
 
     Args:
         class_id: ID of the Class
@@ -679,7 +1136,7 @@ def distribute_bulk_reports(self, class_id, distribution_type, tenant_schema, se
         sent_by_id: ID of the user who initiated the distribution
         sms_template: Optional custom SMS template string
     """
-    from django_tenants.utils import schema_context
+    from celery import group
 
     with schema_context(tenant_schema):
         from .models import TermReport
@@ -697,39 +1154,621 @@ def distribute_bulk_reports(self, class_id, distribution_type, tenant_schema, se
             return {'success': False, 'error': 'No current term'}
 
         # Get all term reports for students in this class
-        term_reports = TermReport.objects.filter(
-            student__current_class=class_obj,
-            term=current_term,
-        ).values_list('pk', flat=True)
+        term_report_ids = [
+            str(pk) for pk in TermReport.objects.filter(
+                student__current_class=class_obj,
+                term=current_term,
+            ).order_by('student__last_name', 'student__first_name').values_list('pk', flat=True)
+        ]
+
+    chunk_size = config.EXPORT_CHUNK_SIZE
+    chunks = [
+        term_report_ids[i:i + chunk_size]
+        for i in range(0, len(term_report_ids), chunk_size)
+    ]
+    if chunks:
+        try:
+            group(
+                distribute_report_chunk.s(chunk, distribution_type, tenant_schema, sent_by_id, sms_template)
+                for chunk in chunks
+            ).apply_async()
+        except Exception as e:
+            logger.error(f"Failed to queue report distribution for class {class_id}: {e}")
+            return {
+                'success': False,
+                'error': f'Failed to queue all {len(term_report_ids)} reports',
+            }
+
+    return {
+        'success': True,
+        'class': class_obj.name,
+        'queued': len(term_report_ids),
+        'chunks': len(chunks),
+    }
+
+
+@shared_task(
+    bind=True,
+    max_retries=config.TASK_MAX_RETRIES,
+    soft_time_limit=config.TASK_SOFT_TIME_LIMIT,
+    time_limit=config.TASK_TIME_LIMIT,
+)
+def distribute_report_chunk(self, term_report_ids, distribution_type, tenant_schema, sent_by_id=None, sms_template=None):
+    """
+    Distribute one chunk of a class's reports via email and/or SMS.
+
+    Report card data shared by the class is loaded once and PDFs come from
+    the report cache where possible, so a class ZIP export that just ran
+    means nothing is rendered again. The verification records of the PDFs
+    that are rendered are created with one bulk_create. Emails go out over
+    one SMTP connection, SMS through send_sms_batch, and the
+    ReportDistributionLog rows are written with one bulk_create.
+
+    A transient mail server error stops the emailing: the reports handled
+    so far get their SMS and logs, and the task retries with the rest, so
+    no guardian receives the same email twice.
+
+    Returns:
+        dict with email and SMS counts and the number of reports retried
+    """
+    from smtplib import SMTPException
+    from socket import error as SocketError
+    import ssl
+    from django.core.mail import get_connection
+
+    # Transient errors that should trigger retry
+    RETRYABLE_EXCEPTIONS = (SMTPException, SocketError, ssl.SSLError, ConnectionError, TimeoutError)
+
+    send_email = distribution_type in ('EMAIL', 'BOTH')
+    send_sms = distribution_type in ('SMS', 'BOTH')
+
+    with schema_context(tenant_schema):
+        from .models import TermReport, ReportDistributionLog
+        from students.contacts import get_guardian_contacts
+        from django.contrib.auth import get_user_model
+
+        term_reports = list(TermReport.objects.filter(
+            pk__in=term_report_ids
+        ).select_related('student', 'student__current_class', 'term', 'term__academic_year'))
+        order = {pk: i for i, pk in enumerate(term_report_ids)}
+        term_reports.sort(key=lambda r: order[str(r.pk)])
+        if not term_reports:
+            return {'emails_sent': 0, 'sms_sent': 0, 'retried': 0}
+
+        sent_by = None
+        if sent_by_id:
+            sent_by = get_user_model().objects.filter(pk=sent_by_id).first()
+
+        outcomes = {report.pk: {} for report in term_reports}
+        contacts = {
+            student_id: contact or {}
+            for student_id, contact in get_guardian_contacts(r.student_id for r in term_reports).items()
+        }
+        emailed = [r for r in term_reports if send_email and contacts[r.student_id].get('email')]
+        pdfs = _distribution_pdfs(emailed, tenant_schema, outcomes) if emailed else {'files': {}}
+
+        # Send Email
+        processed = list(term_reports)
+        retry_exc = None
+        if pdfs['files']:
+            mail_connection = get_connection()
+            try:
+                mail_connection.open()
+            except RETRYABLE_EXCEPTIONS as e:
+                # Nothing sent yet, retry the whole chunk
+                logger.warning(f"Retryable error opening mail connection: {e}")
+                raise self.retry(exc=e, countdown=config.TASK_RETRY_DELAY * (2 ** self.request.retries))
+
+            from_email = get_from_email()
+            school = pdfs['context'].get('school')
+            logo_base64 = pdfs['context'].get('logo_base64')
+            try:
+                for position, term_report in enumerate(term_reports):
+                    pdf_buffer = pdfs['files'].get(term_report.pk)
+                    if pdf_buffer is None:
+                        continue
+                    student = term_report.student
+                    guardian_email = contacts[student.pk]['email']
+                    outcome = outcomes[term_report.pk]
+                    try:
+                        email = EmailMessage(
+                            subject=f"Report Card - {student.first_name} {student.last_name} - {term_report.term.name}",
+                            body=render_to_string('gradebook/emails/report_email.html', {
+                                'student': student,
+                                'term_report': term_report,
+                                'term': term_report.term,
+                                'school': school,
+                                'logo_base64': logo_base64,
+                            }),
+                            from_email=from_email,
+                            to=[guardian_email],
+                            connection=mail_connection,
+                        )
+                        email.content_subtype = 'html'
+                        email.attach(
+                            f"report_card_{student.admission_number}.pdf",
+                            pdf_buffer.getvalue(),
+                            'application/pdf'
+                        )
+                        email.send()
+                        outcome.update(
+                            email_status='SENT', email_sent_to=guardian_email,
+                            email_sent_at=timezone.now(),
+                        )
+                    except RETRYABLE_EXCEPTIONS as e:
+                        if self.request.retries >= self.max_retries:
+                            logger.error(f"Failed to send email for report {term_report.pk}: {str(e)}")
+                            outcome.update(email_status='FAILED', email_error=str(e)[:500])
+                            continue
+                        logger.warning(f"Retryable error sending email for report {term_report.pk}: {str(e)}")
+                        processed = term_reports[:position]
+                        retry_exc = e
+                        break
+                    except Exception as e:
+                        logger.error(f"Failed to send email for report {term_report.pk}: {str(e)}")
+                        outcome.update(email_status='FAILED', email_error=str(e)[:500])
+            finally:
+                try:
+                    mail_connection.close()
+                except RETRYABLE_EXCEPTIONS:
+                    pass
+                for pdf_buffer in pdfs['files'].values():
+                    pdf_buffer.close()
+
+        # Send SMS
+        sms_sent = _distribute_report_sms(
+            [r for r in processed if send_sms and contacts[r.student_id].get('phone')],
+            contacts, outcomes, sent_by, sms_template,
+        )
+
+        # Create distribution logs once with final state (no partial saves)
+        ReportDistributionLog.objects.bulk_create([
+            ReportDistributionLog(
+                term_report=term_report,
+                distribution_type=distribution_type,
+                sent_by=sent_by,
+                email_status=outcomes[term_report.pk].get('email_status', ''),
+                email_sent_to=outcomes[term_report.pk].get('email_sent_to', ''),
+                email_sent_at=outcomes[term_report.pk].get('email_sent_at'),
+                email_error=outcomes[term_report.pk].get('email_error', ''),
+                sms_status=outcomes[term_report.pk].get('sms_status', ''),
+                sms_sent_to=outcomes[term_report.pk].get('sms_sent_to', ''),
+                sms_sent_at=outcomes[term_report.pk].get('sms_sent_at'),
+                sms_error=outcomes[term_report.pk].get('sms_error', ''),
+                sms_message=outcomes[term_report.pk].get('sms_message'),
+            )
+            for term_report in processed
+        ])
+
+    remaining = [str(r.pk) for r in term_reports[len(processed):]]
+    if retry_exc is not None and remaining:
+        raise self.retry(
+            args=[remaining, distribution_type, tenant_schema, sent_by_id, sms_template],
+            exc=retry_exc,
+            countdown=config.TASK_RETRY_DELAY * (2 ** self.request.retries),
+        )
+
+    return {
+        'emails_sent': sum(1 for o in outcomes.values() if o.get('email_status') == 'SENT'),
+        'sms_sent': sms_sent,
+        'retried': len(remaining),
+    }
+
 
-        queued_count = 0
-        failed_count = 0
-        for report_id in term_reports:
+def _distribution_pdfs(term_reports, tenant_schema, outcomes):
+    """
+    Report card PDFs for a distribution chunk.
+
+    Cached PDFs are reused; the verification records of the rest are
+    created in one query before rendering. Reports whose PDF fails get an
+    email error in outcomes.
+
+    Returns:
+        dict: {'context': shared_context, 'files': {term_report pk: BytesIO}}
+    """
+    from core.models import DocumentVerification
+    from core.pdf import load_images_base64
+    from .utils import compute_class_report_category_scores
+
+    term = term_reports[0].term
+    shared_context = _build_report_shared_context(tenant_schema, term)
+    shared_context['category_scores'] = compute_class_report_category_scores(
+        term_reports[0].student.current_class, term, shared_context['categories'],
+        student_ids=[r.student_id for r in term_reports],
+    )
+
+    files = {}
+    misses = []
+    for term_report in term_reports:
+        try:
+            category_scores_map, digest, cached = _lookup_report_pdf(
+                term_report, tenant_schema, shared_context
+            )
+        except Exception as e:
+            logger.error(f"PDF generation failed for report {term_report.pk}: {e}")
+            outcomes[term_report.pk].update(email_status='FAILED', email_error=str(e)[:500])
+            continue
+        if cached is not None:
+            files[term_report.pk] = cached
+        else:
+            misses.append((term_report, category_scores_map, digest))
+
+    if misses:
+        verifications = [_build_report_verification(term_report) for term_report, _, _ in misses]
+        try:
+            DocumentVerification.objects.bulk_create(verifications)
+        except IntegrityError as e:
+            # A generated verification code collided; render without QR codes
+            logger.warning(f"Could not create verification records: {e}")
+            verifications = [None] * len(misses)
+
+        shared_context['student_photos'] = dict(zip(
+            [term_report.student_id for term_report, _, _ in misses],
+            load_images_base64([term_report.student.photo for term_report, _, _ in misses]),
+        ))
+        for (term_report, category_scores_map, digest), verification in zip(misses, verifications):
             try:
-                distribute_single_report.delay(
-                    str(report_id),
-                    distribution_type,
-                    tenant_schema,
-                    sent_by_id,
-                    sms_template
+                files[term_report.pk] = _render_report_pdf(
+                    term_report, tenant_schema, shared_context, category_scores_map, digest, verification
                 )
-                queued_count += 1
             except Exception as e:
-                failed_count += 1
-                logger.error(f"Failed to queue report {report_id}: {e}")
+                logger.error(f"PDF generation failed for report {term_report.pk}: {e}")
+                outcomes[term_report.pk].update(email_status='FAILED', email_error=str(e)[:500])
 
-        if failed_count and queued_count == 0:
-            return {
-                'success': False,
-                'error': f'Failed to queue all {failed_count} reports',
-            }
+    return {'context': shared_context, 'files': files}
 
-        return {
+
+def _distribute_report_sms(term_reports, contacts, outcomes, sent_by, sms_template):
+    """
+    Send the report SMS of a distribution chunk through send_sms_batch.
+
+    SMSMessage rows are created and updated in bulk; each report's outcome
+    gets its SMS status.
+
+    Returns:
+        Number of SMS sent
+    """
+    if not term_reports:
+        return 0
+
+    from communications.models import SMSMessage
+    from communications.utils import send_sms_batch
+
+    records = SMSMessage.objects.bulk_create([
+        SMSMessage(
+            recipient_phone=contacts[term_report.student_id]['phone'],
+            recipient_name=contacts[term_report.student_id]['name'] or '',
+            student=term_report.student,
+            message=generate_sms_summary(term_report, custom_template=sms_template),
+            message_type=SMSMessage.MessageType.REPORT_FEEDBACK,
+            status=SMSMessage.Status.PENDING,
+            created_by=sent_by,
+        )
+        for term_report in term_reports
+    ])
+
+    results = send_sms_batch([(record.recipient_phone, record.message) for record in records])
+
+    sent = 0
+    now = timezone.now()
+    for term_report, record, sms_result in zip(term_reports, records, results):
+        outcome = outcomes[term_report.pk]
+        if sms_result.get('success'):
+            record.status = SMSMessage.Status.SENT
+            record.sent_at = now
+            record.provider_response = str(sms_result.get('response', ''))
+            outcome.update(
+                sms_status='SENT', sms_sent_to=record.recipient_phone,
+                sms_sent_at=now, sms_message=record,
+            )
+            sent += 1
+        else:
+            record.status = SMSMessage.Status.FAILED
+            record.error_message = str(sms_result.get('error', ''))
+            outcome.update(
+                sms_status='FAILED', sms_error=sms_result.get('error', 'Unknown error')[:500],
+            )
+
+    SMSMessage.objects.bulk_update(
+        records, ['status', 'sent_at', 'provider_response', 'error_message'],
+        batch_size=config.BULK_UPDATE_BATCH_SIZE,
+    )
+    return sent
+
+
+def _report_progress(task, meta):
+    """Publish PROGRESS state for pollers; no-op when called outside a worker."""
+    if task.request.id:
+        task.update_state(state='PROGRESS', meta=meta)
+
+
+@shared_task(
+    bind=True,
+    max_retries=0,
+    acks_late=True,
+    reject_on_worker_lost=True,
+    soft_time_limit=config.BULK_TASK_SOFT_TIME_LIMIT,
+    time_limit=config.BULK_TASK_TIME_LIMIT,
+)
+def run_class_grade_calculation(self, class_id, tenant_schema, grading_system_id=None, job_class_id=None):
+    """
+    Calculate grades for one class in the current term.
+
+    Reports the running phase via task state so the frontend can poll.
+    When started as part of a school-wide GradeCalculationJob, the
+    matching GradeCalculationJobClass row records status and duration.
+    The calculation is idempotent, so ``acks_late`` lets the broker
+    redeliver it if the worker dies mid-way.
+
+    Args:
+        class_id: ID of the Class
+        tenant_schema: Schema name for tenant context
+        grading_system_id: Optional GradingSystem pk (auto-detected if omitted)
+        job_class_id: Optional GradeCalculationJobClass pk
+
+    Returns:
+        dict with success, class_id, class_name, grading_system, summary
+        counts and missing_scores (or error)
+    """
+    import time
+    from django.db.models import F
+
+    with schema_context(tenant_schema):
+        from .calculation import CALCULATION_PHASES, calculate_class, resolve_grading_system
+        from .models import GradeCalculationJobClass
+        from academics.models import Class
+        from core.models import Term
+
+        run = None
+        if job_class_id:
+            run = GradeCalculationJobClass.objects.select_related('job').filter(pk=job_class_id).first()
+            if run is None or run.status == 'DONE':
+                return {'success': True, 'skipped': True}
+            GradeCalculationJobClass.objects.filter(pk=run.pk).update(
+                status='RUNNING', started_at=timezone.now(), attempts=F('attempts') + 1,
+            )
+
+        def finish(result, status, **fields):
+            if run is not None:
+                GradeCalculationJobClass.objects.filter(pk=run.pk).update(
+                    status=status, finished_at=timezone.now(), **fields
+                )
+                run.job.refresh_status()
+            return result
+
+        try:
+            class_obj = Class.objects.get(pk=class_id)
+        except Class.DoesNotExist:
+            logger.error(f"Class {class_id} not found for grade calculation")
+            return finish({'success': False, 'error': 'Class not found'}, 'FAILED', error='Class not found')
+
+        current_term = run.job.term if run else Term.get_current()
+        if not current_term:
+            return finish({'success': False, 'error': 'No current term'}, 'FAILED', error='No current term')
+
+        grading_system = resolve_grading_system(class_obj, grading_system_id)
+        if not grading_system:
+            level = 'SHS' if class_obj.level_type == 'shs' else 'BASIC'
+            error = f'No active {level} grading system found'
+            return finish({'success': False, 'error': error}, 'FAILED', error=error)
+
+        total_phases = len(CALCULATION_PHASES)
+
+        def on_phase(phase, label):
+            _report_progress(self, {'phase': phase, 'total': total_phases, 'label': label})
+
+        started = time.monotonic()
+        try:
+            summary = calculate_class(class_obj, current_term, grading_system, on_phase=on_phase)
+        except (ValueError, ValidationError, IntegrityError) as e:
+            logger.error(f'Error calculating grades for class {class_id}: {str(e)}')
+            error = 'An error occurred while calculating grades. Please try again.'
+            return finish({'success': False, 'error': error}, 'FAILED', error=str(e)[:500])
+        except Exception as e:
+            # Statement timeouts, soft time limits and the like: record the
+            # failure so the job doesn't wait on this class, then fail the task
+            logger.exception(f'Grade calculation failed for class {class_id}')
+            finish(None, 'FAILED', error=f'{type(e).__name__}: {e}'[:500])
+            raise
+        duration_ms = int((time.monotonic() - started) * 1000)
+
+        if summary is None:
+            error = 'No students or subjects in this class'
+            return finish({'success': False, 'error': error}, 'FAILED', error=error, duration_ms=duration_ms)
+
+        # Trigger grade drop alerts asynchronously
+        try:
+            send_grade_alerts.delay(class_id, tenant_schema)
+        except Exception:
+            pass  # Non-critical — don't fail the calculation
+
+        result = {
             'success': True,
-            'class': class_obj.name,
-            'queued': queued_count,
-            'failed': failed_count,
+            'class_id': class_id,
+            'class_name': class_obj.name,
+            'grading_system': grading_system.name,
+            'duration_ms': duration_ms,
+            **summary,
         }
+        return finish(
+            result, 'DONE', error='',
+            duration_ms=duration_ms, student_count=summary['student_count'],
+        )
+
+
+@shared_task(bind=True, max_retries=0)
+def run_school_grade_calculation(self, job_id, tenant_schema):
+    """
+    Fan out a GradeCalculationJob across workers, one subtask per class.
+
+    Only classes that have not finished are dispatched, so calling this
+    again for the same job resumes it: pending and failed classes are
+    re-queued, as are classes stuck RUNNING for longer than the task time
+    limit (their worker died).
+
+    Args:
+        job_id: ID of the GradeCalculationJob
+        tenant_schema: Schema name for tenant context
+    """
+    from datetime import timedelta
+    from celery import group
+    from django.db.models import Q
+
+    with schema_context(tenant_schema):
+        from .models import GradeCalculationJob
+
+        try:
+            job = GradeCalculationJob.objects.get(pk=job_id)
+        except GradeCalculationJob.DoesNotExist:
+            logger.error(f"GradeCalculationJob {job_id} not found")
+            return {'success': False, 'error': 'Job not found'}
+
+        stale_before = timezone.now() - timedelta(seconds=config.BULK_TASK_TIME_LIMIT)
+        runs = list(job.class_runs.filter(
+            Q(status__in=['PENDING', 'FAILED'])
+            | Q(status='RUNNING', started_at__lt=stale_before)
+            | Q(status='RUNNING', started_at__isnull=True)
+        ).values_list('pk', 'class_assigned_id'))
+
+        if not runs:
+            job.refresh_status()
+            return {'success': True, 'queued': 0}
+
+        if job.status != 'RUNNING':
+            GradeCalculationJob.objects.filter(pk=job.pk).update(status='RUNNING', finished_at=None)
+        job.class_runs.filter(pk__in=[pk for pk, _ in runs]).update(status='PENDING')
+
+        group(
+            run_class_grade_calculation.s(class_id, tenant_schema, job_class_id=str(run_pk))
+            for run_pk, class_id in runs
+        ).apply_async()
+
+        logger.info(f"Queued grade calculation for {len(runs)} classes (job {job_id})")
+        return {'success': True, 'queued': len(runs)}
+
+
+@shared_task(
+    bind=True,
+    max_retries=config.TASK_MAX_RETRIES,
+    default_retry_delay=config.TASK_RETRY_DELAY,
+    soft_time_limit=config.TASK_SOFT_TIME_LIMIT,
+    time_limit=config.TASK_TIME_LIMIT,
+)
+def flush_stale_grades(self, tenant_schema):
+    """
+    Recalculate every SubjectTermGrade queued by score changes for a tenant.
+
+    Scheduled (debounced) by recalc_queue.mark_stale; see that module.
+    Failed batches are returned to the queue before retrying.
+
+    Args:
+        tenant_schema: Schema name for tenant context
+    """
+    from . import recalc_queue
+
+    with schema_context(tenant_schema):
+        try:
+            recalculated = recalc_queue.flush(tenant_schema)
+        except Exception as exc:
+            logger.error(f"Error flushing stale grades for {tenant_schema}: {exc}")
+            raise self.retry(exc=exc)
+
+    if recalculated:
+        logger.info(f"Recalculated {recalculated} stale subject grades for {tenant_schema}")
+    return {'success': True, 'recalculated': recalculated}
+
+
+@shared_task(
+    bind=True,
+    max_retries=config.TASK_MAX_RETRIES,
+    default_retry_delay=config.TASK_RETRY_DELAY,
+    soft_time_limit=config.TASK_SOFT_TIME_LIMIT,
+    time_limit=config.TASK_TIME_LIMIT,
+)
+def flush_audit_log(self, tenant_schema):
+    """
+    Insert the score audit entries buffered for a tenant.
+
+    Scheduled (debounced) by audit_log.record; see that module. A failed
+    batch is returned to the buffer before retrying, and moved to the
+    dead-letter list if it fails again.
+
+    Args:
+        tenant_schema: Schema name for tenant context
+    """
+    from . import audit_log
+
+    with schema_context(tenant_schema):
+        try:
+            written = audit_log.flush(tenant_schema)
+        except Exception as exc:
+            logger.error(f"Error flushing score audit log for {tenant_schema}: {exc}")
+            raise self.retry(exc=exc)
+
+    return {'success': True, 'written': written}
+
+
+@shared_task(
+    bind=True,
+    max_retries=0,
+    soft_time_limit=config.BULK_TASK_SOFT_TIME_LIMIT,
+    time_limit=config.BULK_TASK_TIME_LIMIT,
+)
+def import_score_workbook(self, path, tenant_schema, user_id, ip_address=None, user_agent=''):
+    """
+    Import a multi-class score template saved by score_import_bulk_upload.
+
+    Each class/subject sheet is streamed and committed on its own (see
+    score_import.py), reporting rows processed via task state. The
+    uploaded file is deleted when the import finishes.
+
+    Args:
+        path: Saved workbook path
+        tenant_schema: Schema name for tenant context
+        user_id: Importing user (authorization and audit log)
+
+    Returns:
+        dict with success, per-sheet counts, totals and errors
+    """
+    import os
+    import zipfile
+    from django.contrib.auth import get_user_model
+
+    try:
+        with schema_context(tenant_schema):
+            from . import score_import
+            from core.models import Term
+
+            user = get_user_model().objects.filter(pk=user_id).first()
+            if user is None:
+                return {'success': False, 'error': 'User not found'}
+
+            current_term = Term.get_current()
+            if not current_term:
+                return {'success': False, 'error': 'No current term'}
+
+            def on_progress(current, total, label):
+                _report_progress(self, {'current': current, 'total': total, 'label': label})
+
+            try:
+                result = score_import.import_workbook(
+                    path, user, current_term,
+                    ip_address=ip_address, user_agent=user_agent, on_progress=on_progress,
+                )
+            except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+                logger.warning(f"Could not read score import {path}: {e}")
+                return {'success': False, 'error': 'Could not read the Excel file. Please ensure it is a valid .xlsx file.'}
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    logger.info(
+        f"Score import for {tenant_schema}: {result['created']} created, "
+        f"{result['updated']} updated across {len(result['sheets'])} sheets"
+    )
+    return result
 
 
 DEFAULT_GRADE_ALERT_TEMPLATE = (
@@ -780,18 +1819,22 @@ def send_grade_alerts(self, class_id, tenant_schema):
             average__gt=0,
         ).select_related('student')
 
+        from students.contacts import get_guardian_contacts
+        reports = list(reports)
+        contacts = get_guardian_contacts(r.student_id for r in reports)
+
         sent = 0
         for report in reports:
             student = report.student
-            guardian = student.get_primary_guardian() if hasattr(student, 'get_primary_guardian') else None
-            phone = guardian.phone_number if guardian else student.guardian_phone
-            if not phone:
+            contact = contacts.get(student.pk)
+            if not contact or not contact['phone']:
                 continue
 
             # Respect notification preference
-            pref = getattr(guardian, 'notification_preference', 'sms') if guardian else 'sms'
+            pref = contact['notification_preference'] or 'sms'
             if pref == 'none':
                 continue
+            phone = contact['phone']
 
             try:
                 message = sms_template.format(
@@ -812,13 +1855,13 @@ def send_grade_alerts(self, class_id, tenant_schema):
             try:
                 if pref in ('sms', 'both'):
                     send_sms(phone, message)
-                if pref in ('email', 'both') and guardian and guardian.email:
+                if pref in ('email', 'both') and contact['email']:
                     from django.core.mail import send_mail
                     send_mail(
                         subject=f"Grade Alert - {student.first_name}",
                         message=message,
                         from_email=None,
-                        recipient_list=[guardian.email],
+                        recipient_list=[contact['email']],
                         fail_silently=True,
                     )
                 sent += 1
@@ -840,51 +1883,94 @@ def check_scheduled_reports(self):
     Periodic task: check all tenants for scheduled report distribution.
     Run every 15 minutes via django-celery-beat.
     """
-    from schools.models import School
+    from core.tasks import fan_out_to_tenants
 
-    tenants = School.objects.exclude(schema_name='public')
-    distributed = 0
+    return fan_out_to_tenants(self, 'gradebook.tasks._check_scheduled_reports_for_tenant')
 
-    for tenant in tenants:
-        try:
-            with schema_context(tenant.schema_name):
-                from core.models import SchoolSettings, Term
-                from academics.models import Class
-
-                settings_obj = SchoolSettings.load()
-                if not settings_obj.scheduled_report_date:
-                    continue
-
-                now = timezone.now()
-                if settings_obj.scheduled_report_date > now:
-                    continue  # Not yet time
-
-                current_term = Term.get_current()
-                if not current_term:
-                    continue
-
-                # Distribute reports for all classes
-                classes = Class.objects.filter(
-                    students__status='active'
-                ).distinct()
-
-                for cls in classes:
-                    distribute_bulk_reports.delay(
-                        cls.pk, 'EMAIL', tenant.schema_name
-                    )
-                    distributed += 1
 
-                # Clear the schedule so it doesn't re-trigger
-                settings_obj.scheduled_report_date = None
-                settings_obj.save(update_fields=['scheduled_report_date'])
+def _check_scheduled_reports_for_tenant(tenant):
+    """Queue report distribution for a tenant whose scheduled date has passed."""
+    from core.models import SchoolSettings, Term
+    from academics.models import Class
 
-                logger.info(
-                    f"Scheduled report distribution triggered for "
-                    f"{tenant.schema_name}: {classes.count()} classes"
-                )
-        except Exception as e:
-            logger.error(
-                f"Error checking scheduled reports for {tenant.schema_name}: {e}"
-            )
+    settings_obj = SchoolSettings.load()
+    if not settings_obj.scheduled_report_date:
+        return {'distributed': 0}
+
+    now = timezone.now()
+    if settings_obj.scheduled_report_date > now:
+        return {'distributed': 0}  # Not yet time
+
+    current_term = Term.get_current()
+    if not current_term:
+        return {'distributed': 0}
+
+    # Distribute reports for all classes
+    class_ids = list(Class.objects.filter(
+        students__status='active'
+    ).distinct().values_list('pk', flat=True))
+
+    for class_id in class_ids:
+        distribute_bulk_reports.delay(
+            class_id, 'EMAIL', tenant.schema_name
+        )
+
+    # Clear the schedule so it doesn't re-trigger
+    settings_obj.scheduled_report_date = None
+    settings_obj.save(update_fields=['scheduled_report_date'])
+
+    logger.info(
+        f"Scheduled report distribution triggered for "
+        f"{tenant.schema_name}: {len(class_ids)} classes"
+    )
+    return {'distributed': len(class_ids)}
+
+
+@shared_task(bind=True)
+def reconcile_score_entry_progress(self):
+    """
+    Periodic task: recount score-entry progress for every tenant's current term.
+
+    The counters are maintained incrementally by signals; this corrects
+    drift from writes that bypass them (bulk enrollment, class transfers).
+    Run nightly via django-celery-beat.
+    """
+    from core.tasks import fan_out_to_tenants
+
+    return fan_out_to_tenants(self, 'gradebook.tasks._reconcile_score_entry_progress_for_tenant')
+
+
+def _reconcile_score_entry_progress_for_tenant(tenant):
+    """Recount score-entry progress for a tenant's current term."""
+    from core.models import Term
+    from academics.models import ClassSubject
+    from .score_progress import recount
+
+    current_term = Term.get_current()
+    if not current_term:
+        return {'recounted': 0}
+
+    return {'recounted': recount(
+        current_term, ClassSubject.objects.values_list('id', flat=True)
+    )}
+
+
+@shared_task(bind=True)
+def maintain_audit_log_partitions(self):
+    """
+    Periodic task: create upcoming score audit log partitions for every tenant.
+
+    Partitions are also created on demand before inserts; creating them
+    ahead keeps that off the write path. Run daily via django-celery-beat.
+    """
+    from core.tasks import fan_out_to_tenants
+
+    return fan_out_to_tenants(self, 'gradebook.tasks._maintain_audit_log_partitions_for_tenant')
+
+
+def _maintain_audit_log_partitions_for_tenant(tenant):
+    """Create a tenant's upcoming score audit log partitions."""
+    from .audit_log import ensure_upcoming_partitions
 
-    return {'distributed': distributed}
+    ensure_upcoming_partitions()
+    return {'maintained': 1}
@@ -1,14 +1,17 @@
 from decimal import Decimal
 from datetime import date
+from types import SimpleNamespace
 
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.db import models
+from django.test import SimpleTestCase
 from django_tenants.test.cases import TenantTestCase
 from django_tenants.test.client import TenantClient
 
 from io import StringIO
 
+from django.core.cache import cache
 from django.core.management import call_command
 
 from .models import (
@@ -40,6 +43,23 @@ class GradebookTenantTestCase(TenantTestCase):
         super().setUp()
         self.client = TenantClient(self.tenant)
 
+    def hold_audit_flushes(self):
+        """Keep buffered audit entries in Redis until the test calls
+        audit_log.flush(), and empty the buffer afterwards."""
+        from unittest.mock import patch
+        from . import audit_log
+
+        patcher = patch('gradebook.tasks.flush_audit_log.apply_async')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        schema = self.tenant.schema_name
+        self.addCleanup(
+            audit_log._get_redis_client().delete,
+            audit_log._buffer_key(schema), audit_log._processing_key(schema),
+            audit_log._dead_letter_key(schema), audit_log._failed_batch_key(schema),
+        )
+        self.addCleanup(cache.delete, audit_log._flush_scheduled_key(schema))
+
 
 class GradingSystemModelTest(GradebookTenantTestCase):
     """Tests for GradingSystem model."""
@@ -964,3 +984,1786 @@ class CleanupUnenrolledGradesCommandTests(GradebookTenantTestCase):
         call_command('cleanup_unenrolled_grades', apply=True, stdout=StringIO())
         self.assertTrue(SubjectTermGrade.objects.filter(pk=kept.pk).exists())
         self.assertFalse(SubjectTermGrade.objects.filter(pk=orphan.pk).exists())
+
+
+# ============ Background grade calculation ============
+
+
+class GradeCalculationTaskTests(GradebookTenantTestCase):
+    """Class grade calculation runs as a Celery task, and the school-wide
+    job fans out one subtask per class, recording per-class timings and
+    skipping classes that already finished when resumed."""
+
+    def setUp(self):
+        super().setUp()
+        from config import celery_app
+
+        # Run subtasks in-process instead of publishing them to the broker
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', False)
+
+        self.academic_year = AcademicYear.objects.create(
+            name='2024/2025', start_date=date(2024, 9, 1),
+            end_date=date(2025, 7, 31), is_current=True,
+        )
+        self.term = Term.objects.create(
+            academic_year=self.academic_year, name='First Term', term_number=1,
+            start_date=date(2024, 9, 1), end_date=date(2024, 12, 20), is_current=True,
+        )
+        self.grading_system = GradingSystem.objects.create(name='BECE', level='BASIC')
+        GradeScale.objects.create(
+            grading_system=self.grading_system, grade_label='1',
+            min_percentage=Decimal('50'), max_percentage=Decimal('100'),
+            aggregate_points=1, is_pass=True, order=1,
+        )
+        GradeScale.objects.create(
+            grading_system=self.grading_system, grade_label='9',
+            min_percentage=Decimal('0'), max_percentage=Decimal('49.99'),
+            aggregate_points=9, is_pass=False, order=2,
+        )
+        self.exam = AssessmentCategory.objects.create(
+            name='Examination', short_name='EXAM', category_type='EXAM', percentage=100,
+        )
+        self.math = Subject.objects.create(name='Mathematics', short_name='MTH')
+        self.assignment = Assignment.objects.create(
+            assessment_category=self.exam, subject=self.math, term=self.term,
+            name='Exam', points_possible=100, date=date(2024, 12, 1),
+        )
+        self.class_a = self._make_class('B4A', [90, 60])
+        self.class_b = self._make_class('B4B', [40])
+
+    def _make_class(self, name, points):
+        klass = Class.objects.create(
+            level_type='basic', level_number=4, section=name[-1], name=name, is_active=True,
+        )
+        cs = ClassSubject.objects.create(class_assigned=klass, subject=self.math)
+        for i, pts in enumerate(points):
+            student = Student.objects.create(
+                first_name=f'S{i}', last_name=name, admission_number=f'{name}-{i}',
+                date_of_birth=date(2012, 1, 1), admission_date=date(2024, 9, 1),
+                current_class=klass, status='active',
+            )
+            StudentSubjectEnrollment.objects.create(student=student, class_subject=cs, is_active=True)
+            Score.objects.create(student=student, assignment=self.assignment, points=pts)
+        return klass
+
+    def test_class_task_calculates_and_ranks(self):
+        from .tasks import run_class_grade_calculation
+
+        result = run_class_grade_calculation.apply(
+            args=(self.class_a.pk, self.tenant.schema_name)
+        ).get()
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['student_count'], 2)
+        self.assertEqual(result['grading_system'], 'BECE')
+        reports = TermReport.objects.filter(
+            student__current_class=self.class_a, term=self.term
+        ).order_by('position')
+        self.assertEqual([r.average for r in reports], [Decimal('90.00'), Decimal('60.00')])
+        self.assertEqual([r.position for r in reports], [1, 2])
+        self.assertTrue(all(r.out_of == 2 for r in reports))
+
+    def test_class_task_reports_empty_class(self):
+        from .tasks import run_class_grade_calculation
+
+        empty = Class.objects.create(
+            level_type='basic', level_number=5, section='A', name='B5A', is_active=True,
+        )
+        result = run_class_grade_calculation.apply(
+            args=(empty.pk, self.tenant.schema_name)
+        ).get()
+        self.assertFalse(result['success'])
+        self.assertIn('No students', result['error'])
+
+    def test_calculation_refreshes_analytics_rollup(self):
+        from .models import GradeAnalyticsRollup
+        from .tasks import run_class_grade_calculation
+
+        for klass in (self.class_a, self.class_b):
+            run_class_grade_calculation.apply(args=(klass.pk, self.tenant.schema_name)).get()
+
+        class_row = GradeAnalyticsRollup.objects.get(
+            term=self.term, class_assigned=self.class_a, subject__isnull=True
+        )
+        self.assertEqual(
+            (class_row.student_count, class_row.score_total, class_row.highest_score, class_row.lowest_score),
+            (2, Decimal('150.00'), Decimal('90.00'), Decimal('60.00')),
+        )
+        math_row = GradeAnalyticsRollup.objects.get(
+            term=self.term, class_assigned=self.class_b, subject=self.math
+        )
+        self.assertEqual((math_row.student_count, math_row.passed_count), (1, 0))
+        self.assertEqual(math_row.grade_counts, {'9': 1})
+
+        User.objects.create_user(email='admin@school.com', password='testpass123', is_school_admin=True)
+        self.client.login(email='admin@school.com', password='testpass123')
+
+        overview = self.client.get(reverse('gradebook:analytics_overview')).context
+        self.assertEqual(overview['school_stats']['total_students'], 3)
+        self.assertEqual(overview['school_stats']['passed'], 2)
+        self.assertEqual([s['class'] for s in overview['class_stats']], [self.class_a, self.class_b])
+        self.assertEqual(overview['subject_stats'][0]['students'], 3)
+
+        class_data = self.client.get(reverse('gradebook:analytics_class', args=[self.class_a.pk])).context
+        self.assertEqual(class_data['stats']['average'], Decimal('75.0'))
+        self.assertEqual(class_data['grade_distribution'][0], {'grade': '1', 'count': 2})
+        self.assertEqual(class_data['top_performers'][0].average, Decimal('90.00'))
+
+    def test_score_recalculation_refreshes_analytics_rollup(self):
+        from .models import GradeAnalyticsRollup
+        from .recalc_queue import recalculate_stale_grades
+        from .tasks import run_class_grade_calculation
+
+        run_class_grade_calculation.apply(args=(self.class_b.pk, self.tenant.schema_name)).get()
+        student = Student.objects.get(current_class=self.class_b)
+        Score.objects.filter(student=student).update(points=Decimal('80'))
+
+        recalculate_stale_grades([(student.pk, self.math.pk, self.term.pk)])
+
+        math_row = GradeAnalyticsRollup.objects.get(
+            term=self.term, class_assigned=self.class_b, subject=self.math
+        )
+        self.assertEqual((math_row.score_total, math_row.passed_count), (Decimal('80.00'), 1))
+        self.assertEqual(math_row.grade_counts, {'1': 1})
+
+    def test_school_job_runs_every_class_and_records_timings(self):
+        from .models import GradeCalculationJob, GradeCalculationJobClass
+        from .tasks import run_school_grade_calculation
+
+        job = GradeCalculationJob.objects.create(term=self.term)
+        for klass in (self.class_a, self.class_b):
+            GradeCalculationJobClass.objects.create(job=job, class_assigned=klass)
+
+        run_school_grade_calculation.apply(args=(str(job.pk), self.tenant.schema_name))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'COMPLETED')
+        self.assertIsNotNone(job.finished_at)
+        for run in job.class_runs.all():
+            self.assertEqual(run.status, 'DONE')
+            self.assertEqual(run.attempts, 1)
+            self.assertIsNotNone(run.duration_ms)
+        self.assertEqual(
+            job.class_runs.get(class_assigned=self.class_a).student_count, 2
+        )
+
+    def test_school_job_resume_skips_finished_classes(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import GradeCalculationJob, GradeCalculationJobClass
+        from .tasks import run_school_grade_calculation
+
+        job = GradeCalculationJob.objects.create(term=self.term)
+        done = GradeCalculationJobClass.objects.create(
+            job=job, class_assigned=self.class_a, status='DONE', attempts=1, duration_ms=5,
+        )
+        # Left RUNNING by a worker that died long ago
+        crashed = GradeCalculationJobClass.objects.create(
+            job=job, class_assigned=self.class_b, status='RUNNING', attempts=1,
+            started_at=timezone.now() - timedelta(days=1),
+        )
+
+        run_school_grade_calculation.apply(args=(str(job.pk), self.tenant.schema_name))
+
+        done.refresh_from_db()
+        crashed.refresh_from_db()
+        self.assertEqual(done.attempts, 1)
+        self.assertEqual(crashed.status, 'DONE')
+        self.assertEqual(crashed.attempts, 2)
+        self.assertFalse(
+            TermReport.objects.filter(student__current_class=self.class_a).exists()
+        )
+
+    def test_unexpected_error_marks_class_run_failed(self):
+        from unittest.mock import patch
+        from django.db import OperationalError
+        from .models import GradeCalculationJob, GradeCalculationJobClass
+        from .tasks import run_class_grade_calculation
+
+        job = GradeCalculationJob.objects.create(term=self.term, status='RUNNING')
+        run = GradeCalculationJobClass.objects.create(job=job, class_assigned=self.class_a)
+
+        with patch('gradebook.calculation.calculate_class',
+                   side_effect=OperationalError('canceling statement due to statement timeout')):
+            result = run_class_grade_calculation.apply(
+                args=(self.class_a.pk, self.tenant.schema_name), kwargs={'job_class_id': run.pk}
+            )
+
+        self.assertIsInstance(result.result, OperationalError)
+        run.refresh_from_db()
+        self.assertEqual(run.status, 'FAILED')
+        self.assertIn('statement timeout', run.error)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'FAILED')
+
+    def test_starting_again_resumes_job_with_failed_classes(self):
+        from .models import GradeCalculationJob, GradeCalculationJobClass
+
+        job = GradeCalculationJob.objects.create(term=self.term, status='FAILED')
+        GradeCalculationJobClass.objects.create(job=job, class_assigned=self.class_a, status='FAILED')
+        User.objects.create_user(email='admin@school.com', password='testpass123', is_school_admin=True)
+        self.client.login(email='admin@school.com', password='testpass123')
+
+        response = self.client.post(reverse('gradebook:calculate_all'))
+
+        self.assertTrue(response.json()['resumed'])
+        self.assertEqual(response.json()['job_id'], str(job.pk))
+        self.assertEqual(GradeCalculationJob.objects.count(), 1)
+
+
+class GradeRecalcQueueTests(GradebookTenantTestCase):
+    """Score writes queue (student, subject, term) in the per-tenant stale
+    set instead of recalculating inline; one debounced flush recalculates
+    them in bulk."""
+
+    def setUp(self):
+        super().setUp()
+        from unittest.mock import patch
+        from . import recalc_queue
+
+        self.recalc_queue = recalc_queue
+        schema = self.tenant.schema_name
+        self.addCleanup(recalc_queue._get_redis_client().delete, recalc_queue._stale_set_key(schema))
+        self.addCleanup(cache.delete, recalc_queue._flush_scheduled_key(schema))
+
+        patcher = patch('gradebook.tasks.flush_stale_grades.apply_async')
+        self.apply_async = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        academic_year = AcademicYear.objects.create(
+            name='2024/2025', start_date=date(2024, 9, 1),
+            end_date=date(2025, 7, 31), is_current=True,
+        )
+        self.term = Term.objects.create(
+            academic_year=academic_year, name='First Term', term_number=1,
+            start_date=date(2024, 9, 1), end_date=date(2024, 12, 20), is_current=True,
+        )
+        grading_system = GradingSystem.objects.create(name='BECE', level='BASIC')
+        GradeScale.objects.create(
+            grading_system=grading_system, grade_label='1',
+            min_percentage=Decimal('50'), max_percentage=Decimal('100'),
+            aggregate_points=1, is_pass=True, order=1,
+        )
+        GradeScale.objects.create(
+            grading_system=grading_system, grade_label='9',
+            min_percentage=Decimal('0'), max_percentage=Decimal('49.99'),
+            aggregate_points=9, is_pass=False, order=2,
+        )
+        exam = AssessmentCategory.objects.create(
+            name='Examination', short_name='EXAM', category_type='EXAM', percentage=100,
+        )
+        self.math = Subject.objects.create(name='Mathematics', short_name='MTH')
+        self.exam1 = Assignment.objects.create(
+            assessment_category=exam, subject=self.math, term=self.term,
+            name='Exam 1', points_possible=100, date=date(2024, 12, 1),
+        )
+        self.exam2 = Assignment.objects.create(
+            assessment_category=exam, subject=self.math, term=self.term,
+            name='Exam 2', points_possible=100, date=date(2024, 12, 2),
+        )
+        klass = Class.objects.create(
+            level_type='basic', level_number=4, section='A', name='B4A', is_active=True,
+        )
+        self.students = [
+            Student.objects.create(
+                first_name=f'S{i}', last_name='Queue', admission_number=f'Q-{i}',
+                date_of_birth=date(2012, 1, 1), admission_date=date(2024, 9, 1),
+                current_class=klass, status='active',
+            )
+            for i in range(2)
+        ]
+
+    def test_score_writes_are_coalesced_until_flush(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Score.objects.create(student=self.students[0], assignment=self.exam1, points=80)
+            Score.objects.create(student=self.students[0], assignment=self.exam2, points=60)
+            Score.objects.create(student=self.students[1], assignment=self.exam1, points=30)
+
+        # Three writes, two stale grades, one scheduled flush, nothing recalculated yet
+        self.assertEqual(self.recalc_queue.pending_count(), 2)
+        self.assertEqual(self.apply_async.call_count, 1)
+        self.assertFalse(SubjectTermGrade.objects.exists())
+
+        self.assertEqual(self.recalc_queue.flush(), 2)
+
+        self.assertEqual(self.recalc_queue.pending_count(), 0)
+        first = SubjectTermGrade.objects.get(student=self.students[0], subject=self.math)
+        second = SubjectTermGrade.objects.get(student=self.students[1], subject=self.math)
+        self.assertEqual(first.grade, '1')
+        self.assertTrue(first.is_passing)
+        self.assertEqual(second.grade, '9')
+        self.assertFalse(second.is_passing)
+
+    def test_delete_requeues_grade(self):
+        score = Score.objects.create(student=self.students[0], assignment=self.exam1, points=80)
+        self.recalc_queue.recalculate_stale_grades([(self.students[0].pk, self.math.pk, self.term.pk)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            score.delete()
+        self.recalc_queue.flush()
+
+        grade = SubjectTermGrade.objects.get(student=self.students[0], subject=self.math)
+        self.assertFalse(grade.is_passing)
+
+    def test_recalculate_now_discards_queued_entry(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Score.objects.create(student=self.students[0], assignment=self.exam1, points=90)
+            Score.objects.create(student=self.students[0], assignment=self.exam2, points=80)
+            grade = self.recalc_queue.recalculate_now(self.students[0].pk, self.math.pk, self.term.pk)
+
+        self.assertEqual(grade.grade, '1')
+        self.assertEqual(self.recalc_queue.pending_count(), 0)
+
+    def test_falls_back_to_inline_without_redis(self):
+        from unittest.mock import patch
+
+        with patch('gradebook.recalc_queue._get_redis_client', return_value=None):
+            with self.captureOnCommitCallbacks(execute=True):
+                Score.objects.create(student=self.students[1], assignment=self.exam1, points=75)
+                Score.objects.create(student=self.students[1], assignment=self.exam2, points=75)
+
+        self.apply_async.assert_not_called()
+        grade = SubjectTermGrade.objects.get(student=self.students[1], subject=self.math)
+        self.assertEqual(grade.grade, '1')
+
+
+class GradeEngineEquivalenceTests(SimpleTestCase):
+    """The vectorized grade engine returns exactly what
+    calculate_category_scores returns, including 2 dp rounding of ties."""
+
+    def _category(self, pk, percentage, category_type):
+        return SimpleNamespace(
+            id=pk, pk=pk, name=f'Category {pk}', short_name=f'C{pk}',
+            percentage=percentage, category_type=category_type, order=pk,
+        )
+
+    def _assert_equivalent(self, student_ids, categories, assignments, scores):
+        from .grade_engine import calculate_subject_category_scores
+        from .utils import calculate_category_scores
+
+        results = calculate_subject_category_scores(
+            student_ids, 1, categories, assignments, scores
+        )
+        for student_id in student_ids:
+            expected = calculate_category_scores(student_id, 1, categories, assignments, scores)
+            # repr() also compares Decimal exponents, e.g. 85.00 vs 85.0
+            self.assertEqual(repr(results[student_id]), repr(expected))
+
+    def test_random_classes_match(self):
+        import random
+
+        rng = random.Random(42)
+        layouts = [
+            [(30, 'CLASS_SCORE'), (70, 'EXAM')],
+            [(15, 'CLASS_SCORE'), (15, 'CLASS_SCORE'), (70, 'EXAM')],
+            [(10, 'CLASS_SCORE'), (20, 'CLASS_SCORE'), (5, 'OTHER'), (65, 'EXAM')],
+        ]
+        for _ in range(100):
+            categories = [
+                self._category(pk, percentage, category_type)
+                for pk, (percentage, category_type) in enumerate(rng.choice(layouts), start=1)
+            ]
+            assignments, scores, next_id = {}, {}, 1
+            for category in categories:
+                for _ in range(rng.randint(0, 6)):
+                    possible = Decimal(rng.choice(['7', '10', '12.5', '15', '20', '30', '50', '100']))
+                    assignment = SimpleNamespace(id=next_id, points_possible=possible)
+                    next_id += 1
+                    assignments.setdefault((1, category.id), []).append(assignment)
+                    for student_id in range(20):
+                        if rng.random() < 0.85:
+                            points = Decimal(rng.randint(0, int(possible) * 4)) / 4
+                            scores[(student_id, assignment.id)] = SimpleNamespace(points=points)
+            self._assert_equivalent(list(range(20)), categories, assignments, scores)
+
+    def test_exact_half_cent_ties_round_half_even(self):
+        # 15% over 4 assignments: 1.5/4 * 3.75 = 1.40625 and 0.5/4 * 3.75 = 0.46875,
+        # so the category total 1.875 is an exact tie (rounds to 1.88 half-even)
+        category = self._category(1, 15, 'CLASS_SCORE')
+        assignments = {(1, 1): [
+            SimpleNamespace(id=i, points_possible=Decimal('4')) for i in range(1, 5)
+        ]}
+        scores = {
+            (1, 1): SimpleNamespace(points=Decimal('1.5')),
+            (1, 2): SimpleNamespace(points=Decimal('0.5')),
+            (2, 1): SimpleNamespace(points=Decimal('0.5')),
+        }
+        self._assert_equivalent([1, 2, 3], [category], assignments, scores)
+
+    def test_inexact_weights_fall_back_to_decimal(self):
+        # 70% over 3 assignments does not divide exactly in decimal
+        category = self._category(1, 70, 'EXAM')
+        assignments = {(1, 1): [
+            SimpleNamespace(id=i, points_possible=Decimal('30')) for i in range(1, 4)
+        ]}
+        scores = {
+            (student_id, assignment_id): SimpleNamespace(points=Decimal(student_id) / 2)
+            for student_id in range(60) for assignment_id in range(1, 4)
+        }
+        self._assert_equivalent(list(range(60)), [category], assignments, scores)
+
+
+class ClassReportExportTests(GradebookTenantTestCase):
+    """The class report ZIP export renders chunks of students in parallel
+    tasks and streams the PDFs into a single ZIP."""
+
+    def setUp(self):
+        super().setUp()
+        import shutil
+        import tempfile
+        from django.test import override_settings
+        from config import celery_app
+
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', False)
+
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=self.media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        academic_year = AcademicYear.objects.create(
+            name='2024/2025', start_date=date(2024, 9, 1),
+            end_date=date(2025, 7, 31), is_current=True,
+        )
+        self.term = Term.objects.create(
+            academic_year=academic_year, name='First Term', term_number=1,
+            start_date=date(2024, 9, 1), end_date=date(2024, 12, 20), is_current=True,
+        )
+        self.klass = Class.objects.create(
+            level_type='basic', level_number=4, section='A', name='B4A', is_active=True,
+        )
+        for i in range(5):
+            student = Student.objects.create(
+                first_name=f'S{i}', last_name='Export', admission_number=f'EX-{i}',
+                date_of_birth=date(2012, 1, 1), admission_date=date(2024, 9, 1),
+                current_class=self.klass, status='active',
+            )
+            TermReport.objects.create(student=student, term=self.term)
+
+    def _fake_pdf(self, term_report, tenant_schema, shared_context=None):
+        from io import BytesIO
+
+        if term_report.student.admission_number == 'EX-3':
+            raise ValueError('render failed')
+        return BytesIO(f'%PDF {term_report.student.admission_number}'.encode())
+
+    def test_export_fans_out_chunks_and_streams_zip(self):
+        import os
+        import zipfile
+        from unittest.mock import patch
+        from django.test import override_settings
+        from .tasks import export_class_reports_zip, render_report_chunk
+
+        with patch('gradebook.tasks.generate_report_pdf', side_effect=self._fake_pdf), \
+                override_settings(GRADEBOOK_EXPORT_CHUNK_SIZE=2), \
+                patch.object(render_report_chunk, 'run', wraps=render_report_chunk.run) as chunk_run:
+            result = export_class_reports_zip.apply(
+                args=(self.klass.pk, self.tenant.schema_name)
+            ).get()
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['total'], 5)
+        self.assertEqual(chunk_run.call_count, 3)
+        self.assertEqual(len(result['errors']), 1)
+        self.assertIn('render failed', result['errors'][0])
+
+        export_dir = os.path.join(self.media_root, 'exports', self.tenant.schema_name)
+        with zipfile.ZipFile(os.path.join(self.media_root, 'exports', result['filename'])) as zf:
+            self.assertEqual(
+                sorted(zf.namelist()),
+                [f'report_card_EX-{i}.pdf' for i in (0, 1, 2, 4)],
+            )
+            self.assertEqual(zf.read('report_card_EX-4.pdf'), b'%PDF EX-4')
+        # Staging directory is removed once the ZIP is assembled
+        self.assertEqual(os.listdir(export_dir), [os.path.basename(result['filename'])])
+
+
+class ReportPdfCacheTests(GradebookTenantTestCase):
+    """Report card PDFs are cached by a hash of their inputs: unchanged
+    reports are served from disk, changed scores or remarks re-render."""
+
+    def setUp(self):
+        super().setUp()
+        import shutil
+        import sys
+        import tempfile
+        from types import ModuleType
+        from django.test import override_settings
+
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=self.media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        # Count renders with a stand-in for WeasyPrint
+        self.renders = []
+        renders = self.renders
+
+        class FakeHTML:
+            def __init__(self, string, base_url=None):
+                self.string = string
+
+            def write_pdf(self, target, **options):
+                renders.append(self.string)
+                target.write(f'%PDF render {len(renders)}'.encode())
+
+        class FakeCSS:
+            def __init__(self, string, **kwargs):
+                self.string = string
+
+        weasyprint = ModuleType('weasyprint')
+        weasyprint.HTML = FakeHTML
+        weasyprint.CSS = FakeCSS
+        # Swap only this entry: patch.dict would also unload modules
+        # imported during the test.
+        original = sys.modules.get('weasyprint')
+        sys.modules['weasyprint'] = weasyprint
+        if original is None:
+            self.addCleanup(sys.modules.pop, 'weasyprint', None)
+        else:
+            self.addCleanup(sys.modules.__setitem__, 'weasyprint', original)
+
+        from unittest.mock import patch
+        from core import pdf
+        font_patch = patch.object(pdf, '_font_config', object())
+        font_patch.start()
+        self.addCleanup(font_patch.stop)
+        self.addCleanup(pdf.clear_render_state)
+
+        academic_year = AcademicYear.objects.create(
+            name='2024/2025', start_date=date(2024, 9, 1),
+            end_date=date(2025, 7, 31), is_current=True,
+        )
+        self.term = Term.objects.create(
+            academic_year=academic_year, name='First Term', term_number=1,
+            start_date=date(2024, 9, 1), end_date=date(2024, 12, 20), is_current=True,
+        )
+        exam = AssessmentCategory.objects.create(
+            name='Examination', short_name='EXAM', category_type='EXAM', percentage=100,
+        )
+        math = Subject.objects.create(name='Mathematics', short_name='MTH')
+        self.assignment = Assignment.objects.create(
+            assessment_category=exam, subject=math, term=self.term,
+            name='Exam 1', points_possible=100, date=date(2024, 12, 1),
+        )
+        klass = Class.objects.create(
+            level_type='basic', level_number=4, section='A', name='B4A', is_active=True,
+        )
+        self.student = Student.objects.create(
+            first_name='Ama', last_name='Cache', admission_number='PC-1',
+            date_of_birth=date(2012, 1, 1), admission_date=date(2024, 9, 1),
+            current_class=klass, status='active',
+        )
+        self.score = Score.objects.create(
+            student=self.student, assignment=self.assignment, points=Decimal('70'),
+        )
+        self.term_report = TermReport.objects.create(student=self.student, term=self.term)
+
+    def _generate(self):
+        from .tasks import generate_report_pdf
+
+        term_report = TermReport.objects.get(pk=self.term_report.pk)
+        return generate_report_pdf(term_report, self.tenant.schema_name).getvalue()
+
+    def _cached_files(self):
+        import os
+
+        found = []
+        for _dirpath, _dirnames, filenames in os.walk(os.path.join(self.media_root, 'report_cache')):
+            found.extend(filenames)
+        return found
+
+    def test_unchanged_report_is_served_from_cache(self):
+        from core.models import DocumentVerification
+
+        first = self._generate()
+        second = self._generate()
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.renders), 1)
+        # The cached PDF keeps its original verification code
+        self.assertEqual(DocumentVerification.objects.filter(student_id=self.student.pk).count(), 1)
+        self.assertEqual(len(self._cached_files()), 1)
+
+    def test_remark_change_rerenders(self):
+        self._generate()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.term_report.class_teacher_remark = 'Excellent work'
+            self.term_report.save()
+        # The save invalidated the stale PDF
+        self.assertEqual(self._cached_files(), [])
+
+        self._generate()
+        self.assertEqual(len(self.renders), 2)
+        self.assertIn('Excellent work', self.renders[-1])
+
+    def test_score_change_changes_fingerprint(self):
+        from . import report_cache
+        from .tasks import _build_report_shared_context
+
+        shared_context = _build_report_shared_context(self.tenant.schema_name, self.term)
+        before = report_cache.fingerprint(self.term_report, shared_context)
+
+        Score.objects.filter(pk=self.score.pk).update(points=Decimal('71'))
+        self.assertNotEqual(report_cache.fingerprint(self.term_report, shared_context), before)
+
+    def test_eviction_removes_least_recently_used(self):
+        import os
+        from io import BytesIO
+        from types import SimpleNamespace
+        from . import report_cache
+
+        schema = self.tenant.schema_name
+        for i in range(3):
+            report = SimpleNamespace(pk=i, student_id=i, term_id=1)
+            report_cache.store(schema, report, f'digest{i}', BytesIO(b'x' * 100))
+            path = report_cache._path(schema, report, f'digest{i}')
+            os.utime(path, (1000 + i, 1000 + i))
+
+        # A hit refreshes the oldest file, so the next oldest is evicted
+        self.assertIsNotNone(report_cache.get(schema, SimpleNamespace(pk=0, student_id=0, term_id=1), 'digest0'))
+        self.assertEqual(report_cache.evict(schema, max_bytes=250), 1)
+        self.assertEqual(sorted(self._cached_files()), ['1-digest0.pdf', '1-digest2.pdf'])
+
+
+class ScoreSaveBatchTests(GradebookTenantTestCase):
+    """score_save_batch validates a grid delta together, writes it with bulk
+    operations and returns per-cell errors in one response."""
+
+    def setUp(self):
+        super().setUp()
+        self.hold_audit_flushes()
+        User.objects.create_user(email='admin@school.com', password='testpass123', is_school_admin=True)
+        self.client.login(email='admin@school.com', password='testpass123')
+
+        academic_year = AcademicYear.objects.create(
+            name='2024/2025', start_date=date(2024, 9, 1),
+            end_date=date(2025, 7, 31), is_current=True,
+        )
+        self.term = Term.objects.create(
+            academic_year=academic_year, name='First Term', term_number=1,
+            start_date=date(2024, 9, 1), end_date=date(2024, 12, 20), is_current=True,
+        )
+        exam = AssessmentCategory.objects.create(
+            name='Examination', short_name='EXAM', category_type='EXAM', percentage=100,
+        )
+        math = Subject.objects.create(name='Mathematics', short_name='MTH')
+        klass = Class.objects.create(
+            level_type='basic', level_number=4, section='A', name='B4A', is_active=True,
+        )
+        class_subject = ClassSubject.objects.create(class_assigned=klass, subject=math)
+        self.exam1 = Assignment.objects.create(
+            assessment_category=exam, subject=math, term=self.term,
+            name='Exam 1', points_possible=100, date=date(2024, 12, 1),
+        )
+        self.exam2 = Assignment.objects.create(
+            assessment_category=exam, subject=math, term=self.term,
+            name='Exam 2', points_possible=50, date=date(2024, 12, 2),
+        )
+        self.students = [
+            Student.objects.create(
+                first_name=f'S{i}', last_name='Batch', admission_number=f'B-{i}',
+                date_of_birth=date(2012, 1, 1), admission_date=date(2024, 9, 1),
+                current_class=klass, status='active',
+            )
+            for i in range(3)
+        ]
+        # The third student is not enrolled in the subject
+        for student in self.students[:2]:
+            StudentSubjectEnrollment.objects.create(
+                student=student, class_subject=class_subject, is_active=True
+            )
+        Score.objects.create(student=self.students[0], assignment=self.exam1, points=Decimal('50'))
+        Score.objects.create(student=self.students[1], assignment=self.exam1, points=Decimal('40'))
+
+    def _post(self, scores):
+        import json
+
+        return self.client.post(
+            reverse('gradebook:score_save_batch'),
+            data=json.dumps({'scores': scores}),
+            content_type='application/json',
+        )
+
+    def _cell(self, student, assignment, points):
+        return {'student_id': student.pk, 'assignment_id': str(assignment.pk), 'points': points}
+
+    def test_batch_writes_valid_cells_and_reports_errors(self):
+        from unittest.mock import patch
+        from . import audit_log
+        from .models import ScoreAuditLog
+
+        s0, s1, s2 = self.students
+        with patch('gradebook.recalc_queue.mark_stale_many') as mark_stale_many, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self._post([
+                self._cell(s0, self.exam1, '60'),    # update
+                self._cell(s0, self.exam2, '45'),    # create
+                self._cell(s1, self.exam1, ''),      # delete
+                self._cell(s1, self.exam2, '51'),    # above points_possible
+                self._cell(s2, self.exam1, '10'),    # not enrolled
+                {'student_id': 'x', 'assignment_id': 'y', 'points': '1'},
+            ])
+
+        data = response.json()
+        self.assertEqual((data['saved'], data['deleted'], data['unchanged']), (2, 1, 0))
+        self.assertEqual(
+            sorted(error['code'] for error in data['errors']),
+            sorted(['exceeds_max', 'not_enrolled', 'missing_data']),
+        )
+
+        self.assertEqual(Score.objects.get(student=s0, assignment=self.exam1).points, Decimal('60'))
+        self.assertEqual(Score.objects.get(student=s0, assignment=self.exam2).points, Decimal('45'))
+        self.assertFalse(Score.objects.filter(student=s1, assignment=self.exam1).exists())
+        # Audit entries are buffered until the flush
+        self.assertFalse(ScoreAuditLog.objects.exists())
+        self.assertEqual(audit_log.flush(), 3)
+        self.assertEqual(
+            sorted(ScoreAuditLog.objects.values_list('action', flat=True)),
+            ['CREATE', 'DELETE', 'UPDATE'],
+        )
+        # One recalculation per affected subject grade
+        mark_stale_many.assert_called_once()
+        self.assertEqual(
+            set(mark_stale_many.call_args.args[0]),
+            {(s0.pk, self.exam1.subject_id, self.term.pk), (s1.pk, self.exam1.subject_id, self.term.pk)},
+        )
+
+    def test_unchanged_cells_are_not_audited(self):
+        from .models import ScoreAuditLog
+
+        response = self._post([self._cell(self.students[0], self.exam1, '50.00')])
+
+        self.assertEqual(response.json()['unchanged'], 1)
+        self.assertFalse(ScoreAuditLog.objects.exists())
+
+    def test_locked_term_rejects_cells(self):
+        self.term.grades_locked = True
+        self.term.save()
+
+        response = self._post([self._cell(self.students[0], self.exam1, '70')])
+
+        data = response.json()
+        self.assertEqual(data['saved'], 0)
+        self.assertEqual([error['code'] for error in data['errors']], ['grades_locked'])
+        self.assertEqual(Score.objects.get(student=self.students[0], assignment=self.exam1).points, Decimal('50'))
+
+    def test_write_failure_returns_server_error(self):
+        from unittest.mock import patch
+
+        # A 5xx keeps the batch in the offline queue for a retry
+        with patch('gradebook.views.scores.audit_log.record', side_effect=RuntimeError('down')):
+            response = self._post([self._cell(self.students[0], self.exam1, '70')])
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(Score.objects.get(student=self.students[0], assignment=self.exam1).points, Decimal('50'))
+
+    def test_rejects_malformed_and_oversized_requests(self):
+        from django.test import override_settings
+
+        response = self.client.post(
+            reverse('gradebook:score_save_batch'), data='nope', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+        with override_settings(GRADEBOOK_SCORE_BATCH_MAX_ENTRIES=1):
+            response = self._post([
+                self._cell(self.students[0], self.exam1, '1'),
+                self._cell(self.students[1], self.exam1, '1'),
+            ])
+        self.assertEqual(response.status_code, 400)
+
+
+class ScoreImportTests(GradebookTenantTestCase):
+    """Score imports stream the workbook in chunks, upsert scores in batches
+    and queue one recalculation per class and subject."""
+
+    def setUp(self):
+        super().setUp()
+        import shutil
+        import tempfile
+        from django.test import override_settings
+
+        self.hold_audit_flushes()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=self.media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        self.user = User.objects.create_user(
+            email='admin@school.com', password='testpass123', is_school_admin=True
+        )
+        self.client.login(email='admin@school.com', password='testpass123')
+
+        academic_year = AcademicYear.objects.create(
+            name='2024/2025', start_date=date(2024, 9, 1),
+            end_date=date(2025, 7, 31), is_current=True,
+        )
+        self.term = Term.objects.create(
+            academic_year=academic_year, name='First Term', term_number=1,
+            start_date=date(2024, 9, 1), end_date=date(2024, 12, 20), is_current=True,
+        )
+        exam = AssessmentCategory.objects.create(
+            name='Examination', short_name='EXAM', category_type='EXAM', percentage=100,
+        )
+        self.math = Subject.objects.create(name='Mathematics', short_name='MTH')
+        self.exam1 = Assignment.objects.create(
+            assessment_category=exam, subject=self.math, term=self.term,
+            name='Exam 1', points_possible=100, date=date(2024, 12, 1),
+        )
+        self.exam2 = Assignment.objects.create(
+            assessment_category=exam, subject=self.math, term=self.term,
+            name='Exam 2', points_possible=50, date=date(2024, 12, 2),
+        )
+
+        self.classes = []
+        self.students = {}
+        for section in 'AB':
+            klass = Class.objects.create(
+                level_type='basic', level_number=4, section=section,
+                name=f'B4{section}', is_active=True,
+            )
+            class_subject = ClassSubject.objects.create(class_assigned=klass, subject=self.math)
+            self.classes.append(klass)
+            for i in range(2):
+                student = Student.objects.create(
+                    first_name=f'S{i}', last_name=section, admission_number=f'{section}-{i}',
+                    date_of_birth=date(2012, 1, 1), admission_date=date(2024, 9, 1),
+                    current_class=klass, status='active',
+                )
+                StudentSubjectEnrollment.objects.create(
+                    student=student, class_subject=class_subject, is_active=True
+                )
+                self.students[student.admission_number] = student
+
+        Score.objects.create(student=self.students['A-0'], assignment=self.exam1, points=Decimal('50'))
+
+    def _fill(self, content, values):
+        """Fill score cells by admission number: {admission: [exam1, exam2]}."""
+        from io import BytesIO
+        import openpyxl
+
+        wb = openpyxl.load_workbook(BytesIO(content))
+        for ws in wb.worksheets:
+            if ws.title == '_metadata':
+                continue
+            for row in ws.iter_rows(min_row=2):
+                for cell, value in zip(row[2:], values.get(row[0].value, [])):
+                    cell.value = value
+        out = BytesIO()
+        wb.save(out)
+        return out.getvalue()
+
+    def _upload(self, content):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        return SimpleUploadedFile(
+            'scores.xlsx', content,
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+
+    def test_upsert_scores_creates_updates_and_skips_unchanged(self):
+        from django.db import transaction
+        from . import audit_log
+        from .models import ScoreAuditLog
+        from .score_import import upsert_scores
+        from .signals import signals_disabled
+
+        a0, a1 = self.students['A-0'], self.students['A-1']
+        with self.captureOnCommitCallbacks(execute=True), signals_disabled(), transaction.atomic():
+            result = upsert_scores([
+                (a0.pk, self.exam1.pk, '50'),   # unchanged
+                (a0.pk, self.exam2.pk, '30'),   # create
+                (a1.pk, self.exam1.pk, '10'),   # create, then overridden below
+                (a1.pk, self.exam1.pk, '20'),
+            ], user=self.user)
+            result_update = upsert_scores([(a0.pk, self.exam1.pk, '75.5')], user=self.user)
+
+        self.assertEqual((result['created'], result['updated'], result['unchanged']), (2, 0, 1))
+        self.assertEqual(result['student_ids'], {a0.pk, a1.pk})
+        self.assertEqual(result_update['updated'], 1)
+        self.assertEqual(Score.objects.get(student=a1, assignment=self.exam1).points, Decimal('20'))
+        self.assertEqual(Score.objects.get(student=a0, assignment=self.exam1).points, Decimal('75.5'))
+
+        audit_log.flush()
+        update_log = ScoreAuditLog.objects.get(action='UPDATE')
+        self.assertEqual((update_log.old_value, update_log.new_value), (Decimal('50'), Decimal('75.5')))
+        self.assertEqual(update_log.score, Score.objects.get(student=a0, assignment=self.exam1))
+        self.assertEqual(ScoreAuditLog.objects.filter(action='CREATE', user=self.user).count(), 2)
+
+    def test_single_class_upload_preview_then_confirm(self):
+        import os
+        from unittest.mock import patch
+
+        klass = self.classes[0]
+        template = self.client.get(reverse('gradebook:import_template', args=[klass.pk, self.math.pk]))
+        content = self._fill(template.content, {'A-0': [60, 45], 'A-1': [101, 20]})
+
+        response = self.client.post(
+            reverse('gradebook:import_upload', args=[klass.pk, self.math.pk]),
+            {'file': self._upload(content)},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_scores'], 2)
+        self.assertEqual(len(response.context['errors']), 1)
+        saved_path = self.client.session['score_import']['path']
+        self.assertTrue(os.path.exists(saved_path))
+
+        with patch('gradebook.recalc_queue.mark_stale_many') as mark_stale_many, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('gradebook:import_confirm', args=[klass.pk, self.math.pk]))
+
+        self.assertEqual((response.context['created_count'], response.context['updated_count']), (1, 1))
+        self.assertEqual(Score.objects.get(student=self.students['A-0'], assignment=self.exam1).points, Decimal('60'))
+        # The row with an error is skipped as a whole
+        self.assertFalse(Score.objects.filter(student=self.students['A-1']).exists())
+        mark_stale_many.assert_called_once_with([(self.students['A-0'].pk, self.math.pk, self.term.pk)])
+        self.assertFalse(os.path.exists(saved_path))
+        self.assertNotIn('score_import', self.client.session)
+
+    def test_multi_class_workbook_imports_every_sheet_in_background(self):
+        import os
+        from unittest.mock import patch
+        from config import celery_app
+
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', False)
+
+        template = self.client.get(reverse('gradebook:import_bulk_template'), {'subject': self.math.pk})
+        self.assertEqual(template.status_code, 200)
+        content = self._fill(template.content, {
+            'A-0': [50, 40], 'A-1': [70], 'B-0': [80, 10], 'B-1': [None, 25],
+        })
+
+        with patch('gradebook.recalc_queue.mark_stale_many') as mark_stale_many, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('gradebook:import_bulk_upload'), {'file': self._upload(content)}
+            )
+
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(Score.objects.filter(student__current_class=self.classes[1]).count(), 3)
+        self.assertEqual(Score.objects.get(student=self.students['A-1'], assignment=self.exam1).points, Decimal('70'))
+        # One coalesced recalculation per class and subject
+        self.assertEqual(mark_stale_many.call_count, 2)
+        self.assertEqual(
+            {key for call in mark_stale_many.call_args_list for key in call.args[0]},
+            {(s.pk, self.math.pk, self.term.pk) for s in self.students.values()},
+        )
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'imports', self.tenant.schema_name)), [])
+
+    def test_workbook_import_reports_bad_rows_and_locked_terms(self):
+        import os
+        from . import score_import
+
+        template = self.client.get(reverse('gradebook:import_bulk_template'), {'subject': self.math.pk})
+        content = self._fill(template.content, {'A-0': [60], 'B-1': ['abc']})
+        path = os.path.join(self.media_root, 'upload.xlsx')
+        with open(path, 'wb') as fh:
+            fh.write(content)
+
+        result = score_import.import_workbook(path, self.user, self.term)
+        self.assertTrue(result['success'])
+        self.assertEqual((result['updated'], result['skipped_rows']), (1, 1))
+        self.assertEqual(len(result['errors']), 1)
+        self.assertIn("Invalid number 'abc'", result['errors'][0])
+
+        self.term.grades_locked = True
+        self.term.save()
+        result = score_import.import_workbook(path, self.user, self.term)
+        self.assertFalse(result['success'])
+        self.assertIn('Grades are locked', result['errors'][0])
+
+
+class ClassReportCategoryScoresTests(GradebookTenantTestCase):
+    """compute_class_report_category_scores matches the per-student
+    function for every student of a class, from a single query."""
+
+    def setUp(self):
+        super().setUp()
+        academic_year = AcademicYear.objects.create(
+            name='2024/2025', start_date=date(2024, 9, 1),
+            end_date=date(2025, 7, 31), is_current=True,
+        )
+        self.term = Term.objects.create(
+            academic_year=academic_year, name='First Term', term_number=1,
+            start_date=date(2024, 9, 1), end_date=date(2024, 12, 20), is_current=True,
+        )
+        class_work = AssessmentCategory.objects.create(
+            name='Class Work', short_name='CW', category_type='CLASS_SCORE', percentage=30, order=1,
+        )
+        exam = AssessmentCategory.objects.create(
+            name='Examination', short_name='EXAM', category_type='EXAM', percentage=70, order=2,
+        )
+        self.categories = [class_work, exam]
+        self.klass = Class.objects.create(
+            level_type='basic', level_number=4, section='A', name='B4A', is_active=True,
+        )
+        self.students = [
+            Student.objects.create(
+                first_name=f'S{i}', last_name='Report', admission_number=f'RC-{i}',
+                date_of_birth=date(2012, 1, 1), admission_date=date(2024, 9, 1),
+                current_class=self.klass, status='active',
+            )
+            for i in range(3)
+        ]
+        for subject_name, points in (('Mathematics', ['7', '8.5', '61']), ('Science', ['3', '', '33'])):
+            subject = Subject.objects.create(name=subject_name, short_name=subject_name[:3].upper())
+            assignments = [
+                Assignment.objects.create(
+                    assessment_category=category, subject=subject, term=self.term,
+                    name=name, points_possible=possible, date=date(2024, 12, 1),
+                )
+                for category, name, possible in (
+                    (class_work, 'CW 1', 10), (class_work, 'CW 2', 10), (exam, 'Exam', 100),
+                )
+            ]
+            # The last student has no scores at all
+            for student in self.students[:2]:
+                for assignment, value in zip(assignments, points):
+                    if value:
+                        Score.objects.create(student=student, assignment=assignment, points=Decimal(value))
+
+    def test_matches_per_student_scores_in_one_query(self):
+        from .utils import compute_class_report_category_scores, compute_report_category_scores
+
+        with self.assertNumQueries(1):
+            by_student = compute_class_report_category_scores(self.klass, self.term, self.categories)
+
+        for student in self.students:
+            self.assertEqual(
+                by_student.get(student.pk, {}),
+                compute_report_category_scores(student, self.term, self.categories),
+            )
+        self.assertNotIn(self.students[2].pk, by_student)
+
+        subset = compute_class_report_category_scores(
+            self.klass, self.term, self.categories, student_ids=[self.students[1].pk]
+        )
+        self.assertEqual(list(subset), [self.students[1].pk])
+
+
+class DatabaseRankingTests(GradebookTenantTestCase):
+    """Positions ranked by Postgres window functions keep the report card
+    rule: ties share a place and the next place is skipped (1, 1, 3)."""
+
+    def setUp(self):
+        super().setUp()
+        academic_year = AcademicYear.objects.create(
+            name='2024/2025', start_date=date(2024, 9, 1),
+            end_date=date(2025, 7, 31), is_current=True,
+        )
+        self.term = Term.objects.create(
+            academic_year=academic_year, name='First Term', term_number=1,
+            start_date=date(2024, 9, 1), end_date=date(2024, 12, 20), is_current=True,
+        )
+        self.klass = Class.objects.create(
+            level_type='basic', level_number=4, section='A', name='B4A', is_active=True,
+        )
+        self.math = Subject.objects.create(name='Mathematics', short_name='MTH')
+        self.english = Subject.objects.create(name='English', short_name='ENG')
+        self.students = [
+            Student.objects.create(
+                first_name=f'S{i}', last_name='Rank', admission_number=f'RK-{i}',
+                date_of_birth=date(2012, 1, 1), admission_date=date(2024, 9, 1),
+                current_class=self.klass, status='active',
+            )
+            for i in range(4)
+        ]
+
+    def test_subject_positions_rank_within_each_subject(self):
+        from .ranking import rank_subject_positions
+
+        grades = [
+            SubjectTermGrade.objects.create(
+                student=student, subject=subject, term=self.term, total_score=Decimal(score),
+            )
+            for student, subject, score in (
+                (self.students[0], self.math, '80'),
+                (self.students[1], self.math, '80'),
+                (self.students[2], self.math, '70.5'),
+                (self.students[0], self.english, '40'),
+                (self.students[1], self.english, '65'),
+            )
+        ]
+
+        with self.assertNumQueries(1):
+            positions = rank_subject_positions([g.pk for g in grades])
+
+        self.assertEqual([positions[str(g.pk)] for g in grades], [1, 1, 3, 2, 1])
+        self.assertEqual(
+            list(SubjectTermGrade.objects.filter(pk__in=[g.pk for g in grades[:3]])
+                 .order_by('total_score').values_list('position', flat=True)),
+            [3, 1, 1],
+        )
+
+    def test_term_reports_rank_by_average_and_skip_empty_reports(self):
+        from .ranking import rank_term_reports
+
+        reports = [
+            TermReport.objects.create(
+                student=student, term=self.term, average=Decimal(average), subjects_taken=taken,
+            )
+            for student, average, taken in zip(
+                self.students, ('72.50', '90.00', '72.50', '0'), (3, 3, 2, 0)
+            )
+        ]
+
+        ranks = rank_term_reports([r.pk for r in reports])
+
+        self.assertEqual(
+            [ranks[str(r.pk)] for r in reports],
+            [(2, 3), (1, 3), (2, 3), (None, 3)],
+        )
+        reports[3].refresh_from_db()
+        self.assertEqual((reports[3].position, reports[3].out_of), (None, 3))
+
+    def test_recalc_and_rerank_uses_prefetched_grades(self):
+        from unittest.mock import patch
+        from .utils import recalc_and_rerank_term_reports
+
+        for student, scores in zip(self.students, (('60', '80'), ('90',), (), ('70', '70'))):
+            for subject, score in zip((self.math, self.english), scores):
+                SubjectTermGrade.objects.create(
+                    student=student, subject=subject, term=self.term,
+                    total_score=Decimal(score), is_passing=True,
+                )
+            TermReport.objects.create(student=student, term=self.term, average=Decimal('50'), subjects_taken=2)
+
+        # Reports, grades, bulk update, ranking; no per-report queries
+        # (the class rollup refresh is covered by the calculation tests)
+        with patch('gradebook.analytics_rollup.refresh_student_rollups'), self.assertNumQueries(4):
+            self.assertEqual(recalc_and_rerank_term_reports([s.pk for s in self.students], self.term), 4)
+
+        reports = {r.student_id: r for r in TermReport.objects.filter(term=self.term)}
+        self.assertEqual(
+            [(reports[s.pk].average, reports[s.pk].position, reports[s.pk].out_of) for s in self.students],
+            [(Decimal('70.00'), 2, 3), (Decimal('90.00'), 1, 3), (Decimal('0.00'), None, 3), (Decimal('70.00'), 2, 3)],
+        )
+
+    def test_recalc_and_rerank_clears_stale_promotion_class(self):
+        from .utils import recalc_and_rerank_term_reports
+
+        report = TermReport.objects.create(student=self.students[0], term=self.term, promoted=False)
+        # Written around save(), as a bulk update would
+        TermReport.objects.filter(pk=report.pk).update(promoted_to=self.klass)
+
+        recalc_and_rerank_term_reports([self.students[0].pk], self.term)
+
+        report.refresh_from_db()
+        self.assertIsNone(report.promoted_to)
+
+
+class ScoreEntryProgressTests(GradebookTenantTestCase):
+    """Score-entry progress is read from per-class-subject counters that
+    score, assignment and enrollment changes keep current."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        academic_year = AcademicYear.objects.create(
+            name='2024/2025', start_date=date(2024, 9, 1),
+            end_date=date(2025, 7, 31), is_current=True,
+        )
+        self.term = Term.objects.create(
+            academic_year=academic_year, name='First Term', term_number=1,
+            start_date=date(2024, 9, 1), end_date=date(2024, 12, 20), is_current=True,
+        )
+        self.exam = AssessmentCategory.objects.create(
+            name='Examination', short_name='EXAM', category_type='EXAM', percentage=100,
+        )
+        self.math = Subject.objects.create(name='Mathematics', short_name='MTH')
+        self.klass = Class.objects.create(
+            level_type='basic', level_number=4, section='A', name='B4A', is_active=True,
+        )
+        self.class_subject = ClassSubject.objects.create(class_assigned=self.klass, subject=self.math)
+        self.exam1 = Assignment.objects.create(
+            assessment_category=self.exam, subject=self.math, term=self.term,
+            name='Exam 1', points_possible=100, date=date(2024, 12, 1),
+        )
+        self.students = [
+            Student.objects.create(
+                first_name=f'S{i}', last_name='Progress', admission_number=f'P-{i}',
+                date_of_birth=date(2012, 1, 1), admission_date=date(2024, 9, 1),
+                current_class=self.klass, status='active',
+            )
+            for i in range(3)
+        ]
+        # The third student is not enrolled, so their scores never count
+        for student in self.students[:2]:
+            StudentSubjectEnrollment.objects.create(
+                student=student, class_subject=self.class_subject, is_active=True
+            )
+        Score.objects.create(student=self.students[0], assignment=self.exam1, points=Decimal('50'))
+        Score.objects.create(student=self.students[2], assignment=self.exam1, points=Decimal('40'))
+
+    def _progress(self):
+        from .utils import get_class_subject_progress
+
+        [row] = get_class_subject_progress(self.term, self.klass.pk)
+        return row['assignments'], row['expected_scores'], row['actual_scores']
+
+    def test_counters_follow_score_and_assignment_changes(self):
+        from .models import ScoreEntryProgress
+        from .utils import calculate_score_entry_progress
+
+        # First read builds the row from a recount
+        self.assertEqual(self._progress(), (1, 2, 1))
+        self.assertEqual(ScoreEntryProgress.objects.count(), 1)
+
+        exam2 = Assignment.objects.create(
+            assessment_category=self.exam, subject=self.math, term=self.term,
+            name='Exam 2', points_possible=50, date=date(2024, 12, 2),
+        )
+        score = Score.objects.create(student=self.students[1], assignment=exam2, points=Decimal('30'))
+        self.assertEqual(self._progress(), (2, 4, 2))
+
+        score.delete()
+        self.assertEqual(self._progress(), (2, 4, 1))
+
+        exam2.delete()
+        self.assertEqual(self._progress(), (1, 2, 1))
+        self.assertEqual(calculate_score_entry_progress(self.term), (1, 2, 50.0))
+
+    def test_enrollment_change_recounts_class_subject(self):
+        self.assertEqual(self._progress(), (1, 2, 1))
+
+        StudentSubjectEnrollment.objects.create(
+            student=self.students[2], class_subject=self.class_subject, is_active=True
+        )
+
+        self.assertEqual(self._progress(), (1, 3, 2))
+
+    def test_bulk_writer_recounts_affected_class_subjects(self):
+        from .score_progress import recount_for_scores
+        from .signals import signals_disabled
+
+        self.assertEqual(self._progress(), (1, 2, 1))
+
+        with signals_disabled():
+            Score.objects.create(student=self.students[1], assignment=self.exam1, points=Decimal('70'))
+        self.assertEqual(self._progress(), (1, 2, 1))
+
+        recount_for_scores([(self.students[1].pk, self.math.pk, self.term.pk)])
+        self.assertEqual(self._progress(), (1, 2, 2))
+
+
+class ScoreAuditLogTests(GradebookTenantTestCase):
+    """Audit entries are buffered and bulk-inserted into monthly partitions,
+    purged by dropping partitions and paged with keyset pagination."""
+
+    def setUp(self):
+        super().setUp()
+        self.hold_audit_flushes()
+        self.user = User.objects.create_user(
+            email='admin@school.com', password='testpass123', is_school_admin=True
+        )
+        self.client.login(email='admin@school.com', password='testpass123')
+
+        academic_year = AcademicYear.objects.create(
+            name='2024/2025', start_date=date(2024, 9, 1),
+            end_date=date(2025, 7, 31), is_current=True,
+        )
+        self.term = Term.objects.create(
+            academic_year=academic_year, name='First Term', term_number=1,
+            start_date=date(2024, 9, 1), end_date=date(2024, 12, 20), is_current=True,
+        )
+        exam = AssessmentCategory.objects.create(
+            name='Examination', short_name='EXAM', category_type='EXAM', percentage=100,
+        )
+        math = Subject.objects.create(name='Mathematics', short_name='MTH')
+        self.exam1 = Assignment.objects.create(
+            assessment_category=exam, subject=math, term=self.term,
+            name='Exam 1', points_possible=100, date=date(2024, 12, 1),
+        )
+        self.students = [
+            Student.objects.create(
+                first_name=f'S{i}', last_name='Audit', admission_number=f'AU-{i}',
+                date_of_birth=date(2012, 1, 1), admission_date=date(2024, 9, 1),
+                status='active',
+            )
+            for i in range(2)
+        ]
+
+    def _log(self, student, new_value, **kwargs):
+        from .models import ScoreAuditLog
+
+        return ScoreAuditLog(
+            student=student, assignment=self.exam1, user=self.user,
+            action='UPDATE', new_value=Decimal(new_value), **kwargs
+        )
+
+    def test_entries_are_buffered_until_commit_and_flush(self):
+        from . import audit_log
+        from .models import ScoreAuditLog
+
+        with self.captureOnCommitCallbacks(execute=True):
+            audit_log.record([self._log(self.students[0], '10'), self._log(self.students[1], '20')])
+            self.assertEqual(audit_log.pending_count(), 0)
+
+        self.assertEqual(audit_log.pending_count(), 2)
+        self.assertFalse(ScoreAuditLog.objects.exists())
+
+        # An entry whose student was deleted while buffered is dropped
+        self.students[1].delete()
+        self.assertEqual(audit_log.flush(), 1)
+
+        self.assertEqual(audit_log.pending_count(), 0)
+        log = ScoreAuditLog.objects.get()
+        self.assertEqual((log.student, log.user, log.new_value), (self.students[0], self.user, Decimal('10')))
+
+    def test_batch_that_fails_twice_is_dead_lettered(self):
+        from unittest.mock import patch
+        from . import audit_log
+        from .models import ScoreAuditLog
+
+        schema = self.tenant.schema_name
+        client = audit_log._get_redis_client()
+        with self.captureOnCommitCallbacks(execute=True):
+            audit_log.record([self._log(self.students[0], '10')])
+
+        with patch('gradebook.audit_log.write', side_effect=RuntimeError('bad row')):
+            with self.assertRaises(RuntimeError):
+                audit_log.flush()
+            self.assertEqual(audit_log.pending_count(), 1)
+            self.assertEqual(audit_log.flush(), 0)
+
+        self.assertEqual(audit_log.pending_count(), 0)
+        self.assertEqual(client.llen(audit_log._dead_letter_key(schema)), 1)
+        self.assertEqual(client.llen(audit_log._processing_key(schema)), 0)
+
+        # Later entries keep draining
+        with self.captureOnCommitCallbacks(execute=True):
+            audit_log.record([self._log(self.students[1], '20')])
+        self.assertEqual(audit_log.flush(), 1)
+        self.assertEqual(ScoreAuditLog.objects.get().student, self.students[1])
+
+    def test_batch_left_by_dead_flush_is_written_once(self):
+        from . import audit_log
+        from .models import ScoreAuditLog
+
+        schema = self.tenant.schema_name
+        client = audit_log._get_redis_client()
+        logs = [self._log(self.students[0], '10'), self._log(self.students[1], '20')]
+        # A flush inserted the first entry, then died before clearing its batch
+        audit_log.write(logs[:1])
+        client.rpush(audit_log._processing_key(schema), *[audit_log._encode(log) for log in logs])
+
+        self.assertEqual(audit_log.flush(), 2)
+
+        self.assertEqual(ScoreAuditLog.objects.count(), 2)
+        self.assertEqual(client.llen(audit_log._processing_key(schema)), 0)
+
+    def test_purge_drops_whole_partitions(self):
+        from datetime import datetime, timedelta, timezone as dt_timezone
+        from . import audit_log
+        from .models import ScoreAuditLog
+
+        old = datetime(2020, 1, 15, tzinfo=dt_timezone.utc)
+        audit_log.write([
+            self._log(self.students[0], '10', created_at=old),
+            self._log(self.students[0], '20', created_at=old + timedelta(days=40)),
+            self._log(self.students[0], '30'),
+        ])
+        self.assertIn(audit_log.partition_name(old), [name for _, name in audit_log.list_partitions()])
+
+        dropped = audit_log.drop_partitions_before(datetime(2020, 2, 20, tzinfo=dt_timezone.utc))
+
+        # January is dropped; February still overlaps the retention window
+        self.assertEqual([(name, rows) for _, name, rows in dropped], [('score_audit_log_y2020m01', 1)])
+        self.assertEqual(
+            sorted(ScoreAuditLog.objects.values_list('new_value', flat=True)),
+            [Decimal('20'), Decimal('30')],
+        )
+
+    def test_history_pages_with_keyset_cursor(self):
+        from datetime import timedelta
+        from django.test import override_settings
+        from django.utils import timezone
+        from . import audit_log
+
+        now = timezone.now()
+        audit_log.write([
+            self._log(self.students[0], str(value), created_at=now - timedelta(minutes=value))
+            for value in range(5)
+        ])
+        url = reverse('gradebook:score_audit', args=[self.students[0].pk, self.exam1.pk])
+
+        seen = []
+        cursor = None
+        with override_settings(GRADEBOOK_AUDIT_LOG_DISPLAY_LIMIT=2):
+            for _ in range(3):
+                response = self.client.get(url, {'before': cursor} if cursor else {})
+                seen.extend(int(log.new_value) for log in response.context['logs'])
+                cursor = response.context['next_cursor']
+
+        self.assertEqual(seen, [0, 1, 2, 3, 4])
+        self.assertIsNone(cursor)
+
+
+class TranscriptTests(GradebookTenantTestCase):
+    """Transcripts are served from per-student academic history snapshots,
+    and a class's transcripts can be exported as one ZIP."""
+
+    def setUp(self):
+        super().setUp()
+        import shutil
+        import tempfile
+        from django.test import override_settings
+
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=self.media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        academic_year = AcademicYear.objects.create(
+            name='2024/2025', start_date=date(2024, 9, 1),
+            end_date=date(2025, 7, 31), is_current=True,
+        )
+        self.terms = [
+            Term.objects.create(
+                academic_year=academic_year, name=name, term_number=number,
+                start_date=start, end_date=end, is_current=number == 2,
+            )
+            for name, number, start, end in (
+                ('First Term', 1, date(2024, 9, 1), date(2024, 12, 20)),
+                ('Second Term', 2, date(2025, 1, 6), date(2025, 4, 4)),
+            )
+        ]
+        self.math = Subject.objects.create(name='Mathematics', short_name='MTH', is_core=True)
+        self.art = Subject.objects.create(name='Art', short_name='ART', is_core=False)
+        self.klass = Class.objects.create(
+            level_type='basic', level_number=4, section='A', name='B4A', is_active=True,
+        )
+        self.students = []
+        for i in range(3):
+            student = Student.objects.create(
+                first_name=f'S{i}', last_name='Transcript', admission_number=f'TR-{i}',
+                date_of_birth=date(2012, 1, 1), admission_date=date(2024, 9, 1),
+                current_class=self.klass, status='active',
+            )
+            self.students.append(student)
+            for term, average in zip(self.terms, (Decimal('60.00'), Decimal('70.00'))):
+                TermReport.objects.create(
+                    student=student, term=term, average=average,
+                    subjects_taken=2, subjects_passed=2,
+                )
+                for subject in (self.math, self.art):
+                    SubjectTermGrade.objects.create(
+                        student=student, subject=subject, term=term,
+                        total_score=average, grade='B2', is_passing=True,
+                    )
+
+    def test_history_is_served_from_snapshot_until_grades_change(self):
+        from .models import AcademicHistorySnapshot
+        from .transcripts import get_academic_history
+
+        student = self.students[0]
+        history = get_academic_history(student, include_all_grades=True)
+        self.assertEqual(history['term_count'], 2)
+        self.assertEqual(history['cumulative_average'], 65.0)
+        self.assertEqual(history['unique_subjects'], {'Mathematics', 'Art'})
+        first_term = history['academic_history'][0]
+        self.assertEqual(first_term['report']['term']['name'], 'First Term')
+        self.assertEqual([g['subject']['name'] for g in first_term['core_grades']], ['Mathematics'])
+        self.assertEqual(first_term['elective_grades'][0]['total_score'], Decimal('60.00'))
+
+        # Later reads are one query against the snapshot
+        with self.assertNumQueries(1):
+            get_academic_history(student)
+
+        grade = SubjectTermGrade.objects.get(student=student, subject=self.art, term=self.terms[0])
+        grade.total_score = Decimal('45.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            grade.save()
+        self.assertFalse(AcademicHistorySnapshot.objects.filter(student=student).exists())
+
+        history = get_academic_history(student)
+        self.assertEqual(
+            history['academic_history'][0]['elective_grades'][0]['total_score'], Decimal('45.00')
+        )
+
+    def test_rebuild_snapshots_for_many_students_in_bulk(self):
+        from .models import AcademicHistorySnapshot
+        from .transcripts import rebuild_term_snapshots
+
+        with self.assertNumQueries(4):
+            self.assertEqual(rebuild_term_snapshots(self.terms[1]), 3)
+        self.assertEqual(AcademicHistorySnapshot.objects.count(), 3)
+
+    def test_rerank_drops_snapshots_of_recalculated_students(self):
+        from .models import AcademicHistorySnapshot
+        from .transcripts import rebuild_term_snapshots
+        from .utils import recalc_and_rerank_term_reports
+
+        rebuild_term_snapshots(self.terms[1])
+        with self.captureOnCommitCallbacks(execute=True):
+            recalc_and_rerank_term_reports([self.students[0].pk], self.terms[1])
+
+        self.assertEqual(
+            set(AcademicHistorySnapshot.objects.values_list('student_id', flat=True)),
+            {s.pk for s in self.students[1:]},
+        )
+
+    def test_class_transcript_export_streams_zip(self):
+        import os
+        import zipfile
+        from io import BytesIO
+        from unittest.mock import patch
+        from config import celery_app
+        from .tasks import export_transcripts_zip
+
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', False)
+
+        def fake_render(template_name, context, **kwargs):
+            return BytesIO(f"%PDF {context['student'].admission_number}".encode())
+
+        with patch('core.pdf.render_pdf', side_effect=fake_render):
+            result = export_transcripts_zip.apply(
+                args=(self.tenant.schema_name,), kwargs={'class_id': self.klass.pk}
+            ).get()
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['total'], 3)
+        self.assertEqual(result['errors'], [])
+        with zipfile.ZipFile(os.path.join(self.media_root, 'exports', result['filename'])) as zf:
+            self.assertEqual(
+                sorted(zf.namelist()), [f'transcript_TR-{i}.pdf' for i in range(3)]
+            )
+            self.assertEqual(zf.read('transcript_TR-0.pdf'), b'%PDF TR-0')
+
+
+class BulkRemarksTests(GradebookTenantTestCase):
+    """Remarks are generated for whole classes with compiled templates and
+    one bulk_update, and edited remarks are saved in batches."""
+
+    def setUp(self):
+        super().setUp()
+        from .models import RemarkTemplate
+
+        User.objects.create_user(email='admin@school.com', password='testpass123', is_school_admin=True)
+        self.client.login(email='admin@school.com', password='testpass123')
+
+        academic_year = AcademicYear.objects.create(
+            name='2024/2025', start_date=date(2024, 9, 1),
+            end_date=date(2025, 7, 31), is_current=True,
+        )
+        self.term = Term.objects.create(
+            academic_year=academic_year, name='First Term', term_number=1,
+            start_date=date(2024, 9, 1), end_date=date(2024, 12, 20), is_current=True,
+        )
+        self.klass = Class.objects.create(
+            level_type='basic', level_number=4, section='A', name='B4A', is_active=True,
+        )
+        RemarkTemplate.objects.create(category='EXCELLENT', content='{student_name} excels, {average}%.')
+        RemarkTemplate.objects.create(category='GENERAL', content='Keep working, {student_name}.')
+
+        self.students = []
+        for i, average in enumerate(('85.00', '55.00', '0', '90.00')):
+            student = Student.objects.create(
+                first_name=f'S{i}', last_name='Remark', admission_number=f'RM-{i}',
+                date_of_birth=date(2012, 1, 1), admission_date=date(2024, 9, 1),
+                current_class=self.klass, status='active',
+            )
+            self.students.append(student)
+            TermReport.objects.create(
+                student=student, term=self.term, average=Decimal(average),
+                class_teacher_remark='Already written' if i == 3 else '',
+            )
+
+    def test_generate_fills_empty_remarks_in_bulk(self):
+        from .remarks import compile_active_templates, generate_remarks
+
+        templates = compile_active_templates()
+        with self.assertNumQueries(2):
+            result = generate_remarks(self.term, [self.klass.pk], templates=templates)
+
+        self.assertEqual(result, {'generated': 2, 'skipped': 1})
+        remarks = dict(TermReport.objects.values_list('student__admission_number', 'class_teacher_remark'))
+        self.assertEqual(remarks['RM-0'], 'S0 excels, 85.0%.')
+        # No AVERAGE template, so the GENERAL one is used
+        self.assertEqual(remarks['RM-1'], 'Keep working, S1.')
+        self.assertEqual(remarks['RM-2'], '')
+        self.assertEqual(remarks['RM-3'], 'Already written')
+
+    def test_compiled_template_matches_render(self):
+        from .models import RemarkTemplate
+        from .remarks import compile_template, render_compiled
+
+        template = RemarkTemplate(content='{student_name} <b>{average}</b> {unknown}')
+        context = {'student_name': '<Ama>', 'average': '70.0'}
+        self.assertEqual(
+            render_compiled(compile_template(template.content), context),
+            template.render(context),
+        )
+
+    def test_batch_save_writes_many_remarks(self):
+        import json
+
+        new_student = Student.objects.create(
+            first_name='New', last_name='Remark', admission_number='RM-NEW',
+            date_of_birth=date(2012, 1, 1), admission_date=date(2024, 9, 1),
+            current_class=self.klass, status='active',
+        )
+        remarks = [
+            {'student_id': self.students[0].pk, 'field': 'class_teacher_remark', 'value': 'Draft'},
+            {'student_id': self.students[0].pk, 'field': 'class_teacher_remark', 'value': ' Final '},
+            {'student_id': self.students[1].pk, 'field': 'conduct_rating', 'value': 'Very Good'},
+            {'student_id': new_student.pk, 'field': 'attitude_rating', 'value': 'Good'},
+        ]
+        response = self.client.post(
+            reverse('gradebook:bulk_remark_save_batch'),
+            data=json.dumps({'remarks': remarks}),
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['saved']), 3)
+        self.assertEqual(
+            TermReport.objects.get(student=self.students[0]).class_teacher_remark, 'Final'
+        )
+        self.assertEqual(TermReport.objects.get(student=self.students[1]).conduct_rating, 'Very Good')
+        self.assertEqual(TermReport.objects.get(student=new_student).attitude_rating, 'Good')
+
+        # Invalid edits are reported without holding back the valid ones
+        response = self.client.post(
+            reverse('gradebook:bulk_remark_save_batch'),
+            data=json.dumps({'remarks': [
+                {'student_id': self.students[0].pk, 'field': 'average', 'value': '100'},
+                {'student_id': self.students[1].pk, 'field': 'conduct_rating', 'value': 'x' * 101},
+                {'student_id': self.students[1].pk, 'field': 'interest_rating', 'value': 'High'},
+            ]}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['saved'], [str(self.students[1].pk)])
+        self.assertEqual(
+            [(e['field'], e['error']) for e in data['errors']],
+            [('average', 'Invalid field'), ('conduct_rating', 'Value must be 100 characters or less')],
+        )
+        report = TermReport.objects.get(student=self.students[1])
+        self.assertEqual((report.conduct_rating, report.interest_rating), ('Very Good', 'High'))
+
+
+class ReportDistributionTests(GradebookTenantTestCase):
+    """Bulk report distribution sends a chunk of reports over one mail
+    connection and writes verification records and logs in bulk."""
+
+    def setUp(self):
+        super().setUp()
+        from django.test import override_settings
+
+        email_override = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+        )
+        email_override.enable()
+        self.addCleanup(email_override.disable)
+
+        academic_year = AcademicYear.objects.create(
+            name='2024/2025', start_date=date(2024, 9, 1),
+            end_date=date(2025, 7, 31), is_current=True,
+        )
+        self.term = Term.objects.create(
+            academic_year=academic_year, name='First Term', term_number=1,
+            start_date=date(2024, 9, 1), end_date=date(2024, 12, 20), is_current=True,
+        )
+        klass = Class.objects.create(
+            level_type='basic', level_number=4, section='A', name='B4A', is_active=True,
+        )
+        self.report_ids = []
+        for i in range(3):
+            student = Student.objects.create(
+                first_name=f'S{i}', last_name='Send', admission_number=f'RD-{i}',
+                date_of_birth=date(2012, 1, 1), admission_date=date(2024, 9, 1),
+                current_class=klass, status='active',
+            )
+            guardian = Guardian.objects.create(
+                full_name=f'Parent {i}', phone_number=f'23324123456{i}',
+                email=f'parent{i}@example.com',
+            )
+            student.add_guardian(guardian, Guardian.Relationship.GUARDIAN, is_primary=True)
+            report = TermReport.objects.create(student=student, term=self.term)
+            self.report_ids.append(str(report.pk))
+
+        # Guardian contacts cached by earlier runs may share student ids
+        from students.contacts import _cache_key
+        cache.delete_many([
+            _cache_key(self.tenant.schema_name, pk)
+            for pk in TermReport.objects.values_list('student_id', flat=True)
+        ])
+
+    def _lookup(self, term_report, tenant_schema, shared_context):
+        from io import BytesIO
+
+        # RD-0 was rendered by an earlier export and is still cached
+        if term_report.student.admission_number == 'RD-0':
+            return {}, 'digest', BytesIO(b'%PDF cached')
+        return {}, 'digest', None
+
+    def _render(self, term_report, tenant_schema, shared_context, category_scores_map, digest, verification):
+        from io import BytesIO
+
+        return BytesIO(f'%PDF {verification.verification_code}'.encode())
+
+    def _distribute(self, distribution_type, **patches):
+        from unittest.mock import patch
+        from .tasks import distribute_report_chunk
+
+        with patch('gradebook.tasks._lookup_report_pdf', side_effect=self._lookup), \
+                patch('gradebook.tasks._render_report_pdf', side_effect=self._render), \
+                patch('communications.utils.send_sms_batch',
+                      side_effect=lambda messages: [{'success': True, 'response': 'ok'}] * len(messages)) as sms:
+            result = distribute_report_chunk.apply(
+                args=(self.report_ids, distribution_type, self.tenant.schema_name)
+            ).get()
+        return result, sms
+
+    def test_chunk_reuses_cached_pdfs_and_batches_sends(self):
+        from django.core import mail
+        from communications.models import SMSMessage
+        from core.models import DocumentVerification
+        from .models import ReportDistributionLog
+
+        result, sms = self._distribute('BOTH')
+
+        self.assertEqual(result, {'emails_sent': 3, 'sms_sent': 3, 'retried': 0})
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].attachments[0][1], b'%PDF cached')
+        # Only the two rendered PDFs needed new verification records
+        self.assertEqual(DocumentVerification.objects.count(), 2)
+        sms.assert_called_once()
+        self.assertEqual(len(sms.call_args.args[0]), 3)
+        self.assertEqual(SMSMessage.objects.filter(status=SMSMessage.Status.SENT).count(), 3)
+
+        logs = ReportDistributionLog.objects.all()
+        self.assertEqual(logs.count(), 3)
+        for log in logs:
+            self.assertEqual((log.email_status, log.sms_status), ('SENT', 'SENT'))
+            self.assertIsNotNone(log.sms_message_id)
+
+    def test_transient_mail_error_retries_only_unsent_reports(self):
+        from smtplib import SMTPServerDisconnected
+        from unittest.mock import patch
+        from .models import ReportDistributionLog
+
+        with patch('django.core.mail.EmailMessage.send',
+                   side_effect=[1, SMTPServerDisconnected('gone'), 1, 1]) as send:
+            self._distribute('EMAIL')
+
+        # The first email is not sent again when the chunk retries
+        self.assertEqual(send.call_count, 4)
+        logs = ReportDistributionLog.objects.all()
+        self.assertEqual(logs.count(), 3)
+        self.assertEqual(
+            sorted(str(log.term_report_id) for log in logs), sorted(self.report_ids)
+        )
+        self.assertTrue(all(log.email_status == 'SENT' for log in logs))
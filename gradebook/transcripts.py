@@ -0,0 +1,262 @@
+"""
+Cached academic history for transcripts.
+
+A student's transcript covers every TermReport and SubjectTermGrade they
+have, so rebuilding it per view, print or PDF download re-reads their
+whole record. AcademicHistorySnapshot stores the built history instead:
+
+- calculate_class rebuilds the snapshots of the class it just calculated
+  and locking a term's grades rebuilds every snapshot in that term
+  (rebuild_snapshots, in bulk: two queries for any number of students)
+- other grade or report writes (signal-driven recalculation, remarks,
+  promotion) drop the affected snapshots (invalidate) and the next
+  transcript request rebuilds them
+
+get_academic_history() returns the history as nested dicts mirroring the
+TermReport / SubjectTermGrade attributes the transcript templates use.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+
+from .models import AcademicHistorySnapshot, SubjectTermGrade, TermReport
+
+# Bump when the stored history layout changes; older snapshots are rebuilt
+SNAPSHOT_VERSION = 1
+
+_REPORT_FIELDS = (
+    'average', 'position', 'out_of', 'aggregate', 'credits_count',
+    'subjects_taken', 'subjects_passed', 'subjects_failed',
+    'promoted', 'promotion_remarks',
+)
+_GRADE_FIELDS = ('total_score', 'grade', 'grade_remark', 'is_passing', 'position')
+_DECIMAL_FIELDS = ('average', 'total_score')
+
+
+def _dump(obj, fields):
+    data = {}
+    for field in fields:
+        value = getattr(obj, field)
+        data[field] = str(value) if isinstance(value, Decimal) else value
+    return data
+
+
+def _load(data):
+    for field in _DECIMAL_FIELDS:
+        if data.get(field) is not None:
+            data[field] = Decimal(data[field])
+    return data
+
+
+def build_histories(student_ids):
+    """
+    Build the stored history for many students.
+
+    Returns:
+        dict mapping student_id to the JSON history
+    """
+    student_ids = list(student_ids)
+    reports_by_student = defaultdict(list)
+    for report in TermReport.objects.filter(
+        student_id__in=student_ids
+    ).select_related(
+        'term__academic_year', 'promoted_to'
+    ).order_by('term__academic_year__start_date', 'term__term_number'):
+        reports_by_student[report.student_id].append(report)
+
+    grades_by_student_term = defaultdict(list)
+    for grade in SubjectTermGrade.objects.filter(
+        student_id__in=student_ids
+    ).select_related('subject').order_by('-subject__is_core', 'subject__name'):
+        grades_by_student_term[(grade.student_id, grade.term_id)].append(grade)
+
+    histories = {}
+    for student_id in student_ids:
+        terms = []
+        score_sum = 0
+        term_count = 0
+        totals = {'total_credits': 0, 'total_subjects_taken': 0, 'total_subjects_passed': 0}
+        unique_subjects = set()
+
+        for report in reports_by_student.get(student_id, []):
+            report_data = _dump(report, _REPORT_FIELDS)
+            report_data['term'] = {
+                'id': str(report.term_id),
+                'name': report.term.name,
+                'academic_year': {'name': report.term.academic_year.name},
+            }
+            report_data['promoted_to'] = (
+                {'name': report.promoted_to.name} if report.promoted_to_id else None
+            )
+
+            grades = []
+            for grade in grades_by_student_term.get((student_id, report.term_id), []):
+                grade_data = _dump(grade, _GRADE_FIELDS)
+                grade_data['subject'] = {
+                    'name': grade.subject.name,
+                    'is_core': grade.subject.is_core,
+                }
+                grades.append(grade_data)
+                unique_subjects.add(grade.subject.name)
+
+            terms.append({'report': report_data, 'grades': grades})
+
+            totals['total_subjects_taken'] += report.subjects_taken or 0
+            totals['total_subjects_passed'] += report.subjects_passed or 0
+            totals['total_credits'] += report.credits_count or 0
+            if report.average is not None:
+                score_sum += float(report.average)
+                term_count += 1
+
+        histories[student_id] = {
+            'version': SNAPSHOT_VERSION,
+            'terms': terms,
+            'cumulative_average': round(score_sum / term_count, 2) if term_count else 0,
+            'term_count': term_count,
+            'unique_subjects': sorted(unique_subjects),
+            **totals,
+        }
+
+    return histories
+
+
+def rebuild_snapshots(student_ids):
+    """
+    Rebuild the academic history snapshots of the given students.
+
+    Returns:
+        Number of snapshots written
+    """
+    histories = build_histories(student_ids)
+    if not histories:
+        return 0
+
+    AcademicHistorySnapshot.objects.bulk_create(
+        [
+            AcademicHistorySnapshot(student_id=student_id, history=history)
+            for student_id, history in histories.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['student'],
+        update_fields=['history', 'built_at'],
+    )
+    return len(histories)
+
+
+def rebuild_term_snapshots(term):
+    """Rebuild the snapshots of every student with a report in the term."""
+    student_ids = TermReport.objects.filter(term=term).values_list('student_id', flat=True)
+    return rebuild_snapshots(set(student_ids))
+
+
+def invalidate(student_ids):
+    """Drop the given students' snapshots once the current transaction commits."""
+    student_ids = list(set(student_ids))
+    if not student_ids:
+        return
+
+    schema = connection.schema_name
+
+    def _delete():
+        from django_tenants.utils import schema_context
+
+        with schema_context(schema):
+            AcademicHistorySnapshot.objects.filter(student_id__in=student_ids).delete()
+
+    transaction.on_commit(_delete)
+
+
+def _load_histories(student_ids):
+    """Stored histories for the students, building any that are missing or outdated."""
+    student_ids = list(student_ids)
+    histories = {
+        snapshot.student_id: snapshot.history
+        for snapshot in AcademicHistorySnapshot.objects.filter(student_id__in=student_ids)
+        if snapshot.history.get('version') == SNAPSHOT_VERSION
+    }
+
+    missing = [pk for pk in student_ids if pk not in histories]
+    if missing:
+        rebuild_snapshots(missing)
+        histories.update(
+            AcademicHistorySnapshot.objects.filter(
+                student_id__in=missing
+            ).values_list('student_id', 'history')
+        )
+    return histories
+
+
+def _expand(history, include_all_grades):
+    academic_history = []
+    promotion_history = []
+    for term in history['terms']:
+        report = _load(term['report'])
+        grades = [_load(grade) for grade in term['grades']]
+
+        entry = {
+            'report': report,
+            'core_grades': [g for g in grades if g['subject']['is_core']],
+            'elective_grades': [g for g in grades if not g['subject']['is_core']],
+        }
+        if include_all_grades:
+            entry['all_grades'] = grades
+        academic_history.append(entry)
+
+        if report['promoted'] is not None:
+            promotion_history.append({
+                'term__academic_year__name': report['term']['academic_year']['name'],
+                'term__name': report['term']['name'],
+                'promoted': report['promoted'],
+                'promoted_to__name': (report['promoted_to'] or {}).get('name'),
+                'promotion_remarks': report['promotion_remarks'],
+            })
+
+    return {
+        'academic_history': academic_history,
+        'promotion_history': promotion_history,
+        'cumulative_average': history['cumulative_average'],
+        'term_count': history['term_count'],
+        'total_credits': history['total_credits'],
+        'total_subjects_taken': history['total_subjects_taken'],
+        'total_subjects_passed': history['total_subjects_passed'],
+        'unique_subjects': set(history['unique_subjects']),
+    }
+
+
+def get_academic_histories(student_ids, include_all_grades=False):
+    """
+    Academic histories for many students (one query once snapshots exist).
+
+    Returns:
+        dict mapping student_id to the get_academic_history() result
+    """
+    return {
+        student_id: _expand(history, include_all_grades)
+        for student_id, history in _load_histories(student_ids).items()
+    }
+
+
+def get_academic_history(student, include_all_grades=False):
+    """
+    A student's academic history, served from their snapshot.
+
+    The snapshot is built on first use.
+
+    Args:
+        student: The Student instance
+        include_all_grades: If True, include 'all_grades' key in each entry
+
+    Returns:
+        dict: {
+            'academic_history': list of {'report', 'core_grades', 'elective_grades'},
+            'promotion_history': list of promotion decisions, oldest first,
+            'cumulative_average': float,
+            'term_count': int,
+            'total_credits': int,
+            'total_subjects_taken': int,
+            'total_subjects_passed': int,
+            'unique_subjects': set of subject names
+        }
+    """
+    return get_academic_histories([student.pk], include_all_grades)[student.pk]
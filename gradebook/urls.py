@@ -34,6 +34,7 @@ urlpatterns = [
     path('scores/<int:class_id>/<int:subject_id>/', views.score_entry_form, name='score_entry_form'),
     path('scores/<int:class_id>/<int:subject_id>/student/<int:student_id>/', views.score_entry_student, name='score_entry_student'),
     path('scores/save/', views.score_save, name='score_save'),
+    path('scores/save/batch/', views.score_save_batch, name='score_save_batch'),
     path('scores/feedback/', views.score_feedback_save, name='score_feedback_save'),
     path('scores/audit/<int:student_id>/<uuid:assignment_id>/', views.score_audit_history, name='score_audit'),
     path('scores/<int:class_id>/<int:subject_id>/changes/', views.score_changes_list, name='score_changes'),
@@ -42,6 +43,9 @@ urlpatterns = [
     path('scores/<int:class_id>/<int:subject_id>/import/template/', views.score_import_template, name='import_template'),
     path('scores/<int:class_id>/<int:subject_id>/import/upload/', views.score_import_upload, name='import_upload'),
     path('scores/<int:class_id>/<int:subject_id>/import/confirm/', views.score_import_confirm, name='import_confirm'),
+    path('scores/import/bulk/template/', views.score_import_bulk_template, name='import_bulk_template'),
+    path('scores/import/bulk/upload/', views.score_import_bulk_upload, name='import_bulk_upload'),
+    path('scores/import/bulk/status/<str:task_id>/', views.score_import_bulk_status, name='import_bulk_status'),
 
     # Assignments
     path('assignments/<int:subject_id>/', views.assignments, name='assignments'),
@@ -52,6 +56,9 @@ urlpatterns = [
     # Grade Calculation
     path('calculate/', views.calculate_grades, name='calculate'),
     path('calculate/<int:class_id>/', views.calculate_class_grades, name='calculate_class'),
+    path('calculate/status/<str:task_id>/', views.calculate_class_status, name='calculate_class_status'),
+    path('calculate/all/', views.calculate_all_classes, name='calculate_all'),
+    path('calculate/all/<uuid:job_id>/status/', views.calculate_all_status, name='calculate_all_status'),
 
     # Grade Locking
     path('lock/<uuid:term_id>/toggle/', views.toggle_grade_lock, name='toggle_lock'),
@@ -74,8 +81,10 @@ urlpatterns = [
     # Bulk Remarks Entry
     path('remarks/bulk/<int:class_id>/', views.bulk_remarks_entry, name='bulk_remarks'),
     path('remarks/save/', views.bulk_remark_save, name='bulk_remark_save'),
+    path('remarks/save/batch/', views.bulk_remark_save_batch, name='bulk_remark_save_batch'),
     path('remarks/sign/<int:class_id>/', views.bulk_remarks_sign, name='bulk_remarks_sign'),
     path('remarks/generate/<int:class_id>/', views.bulk_remarks_generate, name='bulk_remarks_generate'),
+    path('remarks/generate/all/', views.school_remarks_generate, name='school_remarks_generate'),
 
     # Remark Templates (Admin)
     path('remarks/templates/', views.remark_templates, name='remark_templates'),
@@ -96,6 +105,8 @@ urlpatterns = [
     path('reports/export/<int:class_id>/', views.export_class_reports, name='export_class_reports'),
     path('reports/export/status/<str:task_id>/', views.check_export_status, name='check_export_status'),
     path('reports/export/download/<path:filename>/', views.download_class_reports, name='download_class_reports'),
+    path('reports/export/transcripts/<int:class_id>/', views.export_class_transcripts, name='export_class_transcripts'),
+    path('reports/export/transcripts/graduates/<uuid:academic_year_id>/', views.export_graduate_transcripts, name='export_graduate_transcripts'),
 
     # Transcripts
     path('transcript/<int:student_id>/', views.transcript, name='transcript'),
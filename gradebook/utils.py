@@ -11,9 +11,13 @@ from typing import Optional, Dict, List, Tuple, Any
 
 from django.db import connection
 from django.conf import settings as django_settings
-from django.db.models import Count, F, Max
+from django.db.models import Count, F
 
-from .models import Assignment, Score, AssessmentCategory, SubjectTermGrade, TermReport
+from .models import (
+    Assignment, Score, AssessmentCategory, ScoreEntryProgress, SubjectTermGrade, TermReport
+)
+from . import config
+from .score_progress import get_progress
 from academics.models import ClassSubject, StudentSubjectEnrollment
 from students.models import Student
 
@@ -300,6 +304,52 @@ def build_scores_lookup(
 # ============ Report Card Category Scores ============
 
 
+def _weighted_report_category_scores(score_rows, categories):
+    """
+    Turn raw score rows into weighted category scores per student and subject.
+
+    Args:
+        score_rows: Iterable of (student_id, subject_id, category_id, points,
+            points_possible) tuples
+        categories: List of AssessmentCategory instances
+
+    Returns:
+        dict: {student_id: {subject_id: {category_pk: weighted_score}}}
+    """
+    raw_scores = {}
+    for student_id, subject_id, category_id, points, points_possible in score_rows:
+        entry = raw_scores.setdefault(student_id, {}).setdefault(subject_id, {}).setdefault(
+            category_id, {'earned': Decimal('0'), 'possible': Decimal('0')}
+        )
+        if points is not None:
+            entry['earned'] += points
+        entry['possible'] += points_possible
+
+    # Build per-subject, per-category weighted scores
+    empty = {'earned': Decimal('0'), 'possible': Decimal('0')}
+    result = {}
+    for student_id, subjects in raw_scores.items():
+        student_result = result[student_id] = {}
+        for subject_id, cat_data in subjects.items():
+            student_result[subject_id] = {}
+            for cat in categories:
+                entry = cat_data.get(cat.pk, empty)
+                if entry['possible'] > 0:
+                    percentage = (entry['earned'] / entry['possible']) * 100
+                    weighted = (percentage * Decimal(str(cat.percentage))) / 100
+                    student_result[subject_id][cat.pk] = float(round(weighted, 2))
+                else:
+                    student_result[subject_id][cat.pk] = None
+
+    return result
+
+
+_REPORT_SCORE_FIELDS = (
+    'student_id', 'assignment__subject_id', 'assignment__assessment_category_id',
+    'points', 'assignment__points_possible',
+)
+
+
 def compute_report_category_scores(student, term, categories):
     """
     Compute weighted category scores per subject for report card display.
@@ -308,7 +358,8 @@ def compute_report_category_scores(student, term, categories):
     each value is a dict keyed by category PK with the weighted score (float)
     or None if no data.
 
-    Used by both the print view and the PDF generation task.
+    Used by the print view and by single-report PDF generation; bulk
+    exports use compute_class_report_category_scores().
 
     Args:
         student: Student instance
@@ -318,41 +369,41 @@ def compute_report_category_scores(student, term, categories):
     Returns:
         dict[int, dict[int, float | None]]: {subject_id: {category_pk: weighted_score}}
     """
-    from .models import Score
-
-    raw_scores = {}
-    scores_qs = Score.objects.filter(
+    score_rows = Score.objects.filter(
         student=student,
         assignment__term=term
-    ).select_related('assignment__subject', 'assignment__assessment_category')
+    ).values_list(*_REPORT_SCORE_FIELDS)
 
-    for score in scores_qs:
-        subject_id = score.assignment.subject_id
-        category_id = score.assignment.assessment_category_id
+    return _weighted_report_category_scores(score_rows, categories).get(student.pk, {})
 
-        if subject_id not in raw_scores:
-            raw_scores[subject_id] = {}
-        if category_id not in raw_scores[subject_id]:
-            raw_scores[subject_id][category_id] = {'earned': Decimal('0'), 'possible': Decimal('0')}
 
-        if score.points is not None:
-            raw_scores[subject_id][category_id]['earned'] += score.points
-        raw_scores[subject_id][category_id]['possible'] += score.assignment.points_possible
+def compute_class_report_category_scores(class_obj, term, categories, student_ids=None):
+    """
+    Compute report card category scores for every student in a class at once.
 
-    # Build per-subject, per-category weighted scores
-    result = {}
-    for subject_id, cat_data in raw_scores.items():
-        result[subject_id] = {}
-        for cat in categories:
-            entry = cat_data.get(cat.pk, {'earned': Decimal('0'), 'possible': Decimal('0')})
-            if entry['possible'] > 0:
-                percentage = (entry['earned'] / entry['possible']) * 100
-                weighted = (percentage * Decimal(str(cat.percentage))) / 100
-                result[subject_id][cat.pk] = float(round(weighted, 2))
-            else:
-                result[subject_id][cat.pk] = None
+    Same values as compute_report_category_scores(), from a single query
+    over value rows instead of one query per student.
 
-    return result
+    Args:
+        class_obj: Class instance
+        term: Term instance
+        categories: List of AssessmentCategory instances
+        student_ids: Optional subset of the class to compute
+
+    Returns:
+        dict: {student_id: {subject_id: {category_pk: weighted_score}}}.
+        Students without scores are absent.
+    """
+    scores_qs = Score.objects.filter(
+        student__current_class=class_obj,
+        assignment__term=term
+    )
+    if student_ids is not None:
+        scores_qs = scores_qs.filter(student_id__in=student_ids)
+
+    return _weighted_report_category_scores(
+        scores_qs.values_list(*_REPORT_SCORE_FIELDS).iterator(), categories
+    )
 
 
 def attach_category_scores(subject_grades, categories, category_scores_map):
@@ -362,7 +413,8 @@ def attach_category_scores(subject_grades, categories, category_scores_map):
     Args:
         subject_grades: List of SubjectTermGrade instances
         categories: List of AssessmentCategory instances
-        category_scores_map: Output of compute_report_category_scores()
+        category_scores_map: Output of compute_report_category_scores(), or
+            one student's entry from compute_class_report_category_scores()
     """
     for sg in subject_grades:
         sg.category_scores = {}
@@ -471,27 +523,23 @@ def check_subject_assessment_completeness(subject, term):
         'statuses': statuses,
     }
 
-def _get_enrollment_counts(cs_ids):
+def _get_class_enrolled_counts(class_ids):
     """
-    Count students per ClassSubject, matching the score entry form logic exactly.
-
-    The score entry form shows students who:
-    1. Have an active StudentSubjectEnrollment for the ClassSubject, AND
-    2. Still belong to that class (current_class matches class_assigned)
+    Count distinct students per class with an active subject enrollment.
 
-    Using F() to join student.current_class against class_subject.class_assigned
-    ensures transferred students aren't counted against their old class.
+    Matches the score entry form: the student must still belong to the
+    class the enrollment's ClassSubject is assigned to.
     """
-    if not cs_ids:
+    if not class_ids:
         return {}
     return dict(
         StudentSubjectEnrollment.objects.filter(
-            class_subject_id__in=cs_ids,
+            class_subject__class_assigned_id__in=class_ids,
             is_active=True,
             student__current_class_id=F('class_subject__class_assigned_id'),
-        ).values('class_subject_id').annotate(
-            count=Count('id')
-        ).values_list('class_subject_id', 'count')
+        ).values('class_subject__class_assigned_id').annotate(
+            count=Count('student_id', distinct=True)
+        ).values_list('class_subject__class_assigned_id', 'count')
     )
 
 
@@ -518,80 +566,14 @@ def calculate_score_entry_progress(current_term):
     if not current_term:
         return 0, 0, 0
 
-    term_assignments = Assignment.objects.filter(term=current_term).values_list('subject_id', flat=True)
-    if not term_assignments:
-        return 0, 0, 0
+    cs_ids = ClassSubject.objects.filter(
+        subject_id__in=Assignment.objects.filter(term=current_term).values('subject_id')
+    ).values_list('id', flat=True)
 
-    class_subject_data = list(
-        ClassSubject.objects.filter(
-            subject_id__in=term_assignments
-        ).values('id', 'subject_id', 'class_assigned_id')
-    )
-    if not class_subject_data:
-        return 0, 0, 0
-
-    cs_ids = [cs['id'] for cs in class_subject_data]
-    class_ids = list({cs['class_assigned_id'] for cs in class_subject_data})
-
-    # Build a map of (class_id, subject_id) -> ClassSubject id
-    cs_id_map = {
-        (cs['class_assigned_id'], cs['subject_id']): cs['id']
-        for cs in class_subject_data
-    }
-
-    subject_classes = {}
-    for cs in class_subject_data:
-        subject_classes.setdefault(cs['subject_id'], set()).add(cs['class_assigned_id'])
-
-    enrollment_counts = _get_enrollment_counts(cs_ids)
-
-    subject_assignment_counts = dict(
-        Assignment.objects.filter(
-            term=current_term
-        ).values('subject_id').annotate(
-            count=Count('id')
-        ).values_list('subject_id', 'count')
-    )
-
-    # Build per-subject enrolled student IDs for per-subject score filtering.
-    assigned_subject_ids = list({cs['subject_id'] for cs in class_subject_data})
-    enrolled_ids_by_cs = {}
-    if cs_ids:
-        for row in StudentSubjectEnrollment.objects.filter(
-            class_subject_id__in=cs_ids,
-            is_active=True,
-            student__current_class_id=F('class_subject__class_assigned_id'),
-        ).values('class_subject_id', 'student_id'):
-            enrolled_ids_by_cs.setdefault(row['class_subject_id'], set()).add(row['student_id'])
-
-    # Count scores per (class, subject, student) for per-subject filtering
-    raw_score_counts = Score.objects.filter(
-        assignment__term=current_term,
-        assignment__subject_id__in=assigned_subject_ids,
-        student__current_class_id__in=class_ids,
-    ).values(
-        'student__current_class_id', 'assignment__subject_id', 'student_id'
-    ).annotate(count=Count('id'))
-
-    # Build lookup: {(class_id, subject_id): {student_id: count}}
-    score_by_class_subject_student = {}
-    for row in raw_score_counts:
-        key = (row['student__current_class_id'], row['assignment__subject_id'])
-        score_by_class_subject_student.setdefault(key, {})[row['student_id']] = row['count']
-
-    total_possible_scores = 0
-    scores_entered = 0
-    for subject_id, class_ids_for_subj in subject_classes.items():
-        assignment_count = subject_assignment_counts.get(subject_id, 0)
-        for class_id in class_ids_for_subj:
-            cs_id = cs_id_map.get((class_id, subject_id))
-            enrolled = enrollment_counts.get(cs_id, 0) if cs_id else 0
-            total_possible_scores += assignment_count * enrolled
-
-            # Only count scores from enrolled students
-            per_student = score_by_class_subject_student.get((class_id, subject_id), {})
-            enrolled_ids = enrolled_ids_by_cs.get(cs_id, set()) if cs_id else set()
-            scores_entered += sum(cnt for sid, cnt in per_student.items() if sid in enrolled_ids)
+    # Counters are kept per class subject (see score_progress)
+    progress_rows = get_progress(current_term, cs_ids).values()
+    total_possible_scores = sum(row.expected_scores for row in progress_rows)
+    scores_entered = sum(row.entered_scores for row in progress_rows)
 
     score_progress = round((scores_entered / total_possible_scores * 100) if total_possible_scores > 0 else 0, 1)
 
@@ -608,80 +590,34 @@ def get_classes_needing_scores(current_term, classes, limit=None):
     top_class_ids = [c.id for c in top_classes]
 
     class_student_counts = _get_class_student_counts(top_class_ids)
+    class_enrolled_counts = _get_class_enrolled_counts(top_class_ids)
 
-    # Map ClassSubject records per class: {class_id: {subject_id: cs_id}}
-    class_subjects_map = {}
-    all_cs_ids = []
-    for cs in ClassSubject.objects.filter(class_assigned_id__in=top_class_ids).values('id', 'class_assigned_id', 'subject_id'):
-        class_subjects_map.setdefault(cs['class_assigned_id'], {})[cs['subject_id']] = cs['id']
-        all_cs_ids.append(cs['id'])
+    # ClassSubject ids per class
+    class_cs_ids = {}
+    for cs_id, class_id in ClassSubject.objects.filter(
+        class_assigned_id__in=top_class_ids
+    ).values_list('id', 'class_assigned_id'):
+        class_cs_ids.setdefault(class_id, []).append(cs_id)
 
-    enrollment_counts = _get_enrollment_counts(all_cs_ids)
-
-    subject_assignment_counts = dict(
-        Assignment.objects.filter(term=current_term).values('subject_id').annotate(
-            count=Count('id')
-        ).values_list('subject_id', 'count')
+    progress_rows = get_progress(
+        current_term, [cs_id for ids in class_cs_ids.values() for cs_id in ids]
     )
 
-    all_subject_ids = set()
-    for subj_map in class_subjects_map.values():
-        all_subject_ids.update(subj_map.keys())
-
-    # Get enrolled student IDs per ClassSubject for per-subject score filtering.
-    enrolled_ids_by_cs = {}
-    if all_cs_ids:
-        for row in StudentSubjectEnrollment.objects.filter(
-            class_subject_id__in=all_cs_ids,
-            is_active=True,
-            student__current_class_id=F('class_subject__class_assigned_id'),
-        ).values('class_subject_id', 'student_id'):
-            enrolled_ids_by_cs.setdefault(row['class_subject_id'], set()).add(row['student_id'])
-
-    # Count scores per (class, subject, student) for per-subject filtering.
-    class_subject_student_scores = {}
-    if all_subject_ids:
-        for row in Score.objects.filter(
-            assignment__term=current_term,
-            assignment__subject_id__in=all_subject_ids,
-            student__current_class_id__in=top_class_ids,
-        ).values(
-            'student__current_class_id', 'assignment__subject_id', 'student_id'
-        ).annotate(count=Count('id')):
-            class_id = row['student__current_class_id']
-            subj_id = row['assignment__subject_id']
-            if subj_id in class_subjects_map.get(class_id, {}):
-                class_subject_student_scores.setdefault(
-                    (class_id, subj_id), {}
-                )[row['student_id']] = row['count']
-
     classes_needing_scores = []
     for cls in top_classes:
         all_class_students = class_student_counts.get(cls.id, 0)
-        subject_cs_map = class_subjects_map.get(cls.id, {})
         total_assignments = 0
         expected_scores = 0
         actual_scores = 0
 
-        # Collect unique enrolled students across all subjects in this class
-        class_enrolled_ids = set()
-        for subj_id, cs_id in subject_cs_map.items():
-            class_enrolled_ids.update(enrolled_ids_by_cs.get(cs_id, set()))
-
-            assign_count = subject_assignment_counts.get(subj_id, 0)
-            if assign_count > 0:
-                total_assignments += assign_count
-                enrolled = enrollment_counts.get(cs_id, 0)
-                expected_scores += assign_count * enrolled
-
-                # Only count scores from enrolled students
-                per_student = class_subject_student_scores.get((cls.id, subj_id), {})
-                enrolled_ids = enrolled_ids_by_cs.get(cs_id, set()) if cs_id else set()
-                actual_scores += sum(
-                    cnt for sid, cnt in per_student.items() if sid in enrolled_ids
-                )
-
-        enrolled_count = len(class_enrolled_ids)
+        for cs_id in class_cs_ids.get(cls.id, []):
+            row = progress_rows.get(cs_id)
+            if row and row.assignment_count > 0:
+                total_assignments += row.assignment_count
+                expected_scores += row.expected_scores
+                actual_scores += row.entered_scores
+
+        enrolled_count = class_enrolled_counts.get(cls.id, 0)
         unenrolled_count = all_class_students - enrolled_count if all_class_students > enrolled_count else 0
 
         if total_assignments > 0:
@@ -705,82 +641,31 @@ def get_class_subject_progress(current_term, class_id):
     if not current_term:
         return []
 
-    class_subjects = ClassSubject.objects.filter(
+    class_subjects = list(ClassSubject.objects.filter(
         class_assigned_id=class_id
-    ).select_related('subject', 'teacher')
+    ).select_related('subject', 'teacher'))
 
-    if not class_subjects.exists():
+    if not class_subjects:
         return []
 
-    cs_ids = [cs.id for cs in class_subjects]
-    subject_ids = [cs.subject_id for cs in class_subjects]
-
-    enrollment_counts = _get_enrollment_counts(cs_ids)
-
-    assignment_counts = dict(
-        Assignment.objects.filter(
-            term=current_term, subject_id__in=subject_ids
-        ).values('subject_id').annotate(
-            count=Count('id')
-        ).values_list('subject_id', 'count')
-    )
-
-    # Get enrolled student IDs per subject for per-subject score filtering.
-    enrolled_student_ids_by_subject = {}
-    if cs_ids:
-        for row in StudentSubjectEnrollment.objects.filter(
-            class_subject_id__in=cs_ids,
-            is_active=True,
-            student__current_class_id=F('class_subject__class_assigned_id'),
-        ).values('class_subject__subject_id', 'student_id'):
-            enrolled_student_ids_by_subject.setdefault(
-                row['class_subject__subject_id'], set()
-            ).add(row['student_id'])
-
-    # Count scores per (subject, student) for per-subject enrollment filtering.
-    raw_score_qs = Score.objects.filter(
-        assignment__term=current_term,
-        assignment__subject_id__in=subject_ids,
-        student__current_class_id=class_id,
-    ).values('assignment__subject_id', 'student_id').annotate(
-        count=Count('id'),
-        last_activity=Max('updated_at'),
-    )
-
-    # Build per-subject score data: {subject_id: {student_id: {count, last_activity}}}
-    subject_student_scores = {}
-    for row in raw_score_qs:
-        subj_id = row['assignment__subject_id']
-        subject_student_scores.setdefault(subj_id, {})[row['student_id']] = {
-            'count': row['count'],
-            'last_activity': row['last_activity'],
-        }
+    progress_rows = get_progress(current_term, [cs.id for cs in class_subjects])
 
     results = []
     for cs in class_subjects:
-        assignments = assignment_counts.get(cs.subject_id, 0)
-        enrolled = enrollment_counts.get(cs.id, 0)
-        expected = assignments * enrolled
-
-        # Only count scores from enrolled students
-        per_subject_scores = subject_student_scores.get(cs.subject_id, {})
-        enrolled_ids = enrolled_student_ids_by_subject.get(cs.subject_id, set())
-        actual = sum(s['count'] for sid, s in per_subject_scores.items() if sid in enrolled_ids)
-        last_activity = max(
-            (s['last_activity'] for sid, s in per_subject_scores.items() if sid in enrolled_ids and s['last_activity']),
-            default=None,
-        )
+        row = progress_rows.get(cs.id) or ScoreEntryProgress()
+        expected = row.expected_scores
+        actual = row.entered_scores
 
         progress = round((actual / expected * 100) if expected > 0 else 0)
         results.append({
             'subject': cs.subject,
             'teacher': cs.teacher,
-            'assignments': assignments,
+            'assignments': row.assignment_count,
             'expected_scores': expected,
             'actual_scores': actual,
             'progress': progress,
             'remaining_scores': expected - actual,
-            'last_activity': last_activity,
+            'last_activity': row.last_activity,
         })
     return results
 
@@ -809,119 +694,6 @@ def check_transcript_permission(user, student):
     return False, 'You do not have permission to view this transcript.'
 
 
-def get_transcript_data(student):
-    """
-    Fetch term reports and grades for a student's transcript.
-
-    Args:
-        student: The Student instance
-
-    Returns:
-        tuple: (term_reports queryset, all_grades queryset, grades_by_term dict)
-    """
-    from .models import TermReport, SubjectTermGrade
-
-    # Get all term reports for the student, ordered by academic year and term
-    term_reports = TermReport.objects.filter(
-        student=student
-    ).select_related(
-        'term__academic_year', 'promoted_to'
-    ).order_by('term__academic_year__start_date', 'term__term_number')
-
-    # Get all subject grades
-    all_grades = SubjectTermGrade.objects.filter(
-        student=student
-    ).select_related(
-        'subject', 'term__academic_year'
-    ).order_by(
-        'term__academic_year__start_date',
-        'term__term_number',
-        '-subject__is_core',
-        'subject__name'
-    )
-
-    # Group grades by term
-    grades_by_term = {}
-    for grade in all_grades:
-        term_id = grade.term_id
-        if term_id not in grades_by_term:
-            grades_by_term[term_id] = []
-        grades_by_term[term_id].append(grade)
-
-    return term_reports, all_grades, grades_by_term
-
-
-def build_academic_history(term_reports, grades_by_term, include_all_grades=False):
-    """
-    Build academic history and calculate cumulative statistics.
-
-    Args:
-        term_reports: Queryset of TermReport instances
-        grades_by_term: Dictionary mapping term_id to list of grades
-        include_all_grades: If True, include 'all_grades' key in each entry
-
-    Returns:
-        dict: {
-            'academic_history': list of term data dicts,
-            'cumulative_average': float,
-            'term_count': int,
-            'total_credits': int,
-            'total_subjects_taken': int,
-            'total_subjects_passed': int,
-            'unique_subjects': set of subject names
-        }
-    """
-    academic_history = []
-    cumulative_score_sum = 0
-    term_count = 0
-    total_credits = 0
-    total_subjects_taken = 0
-    total_subjects_passed = 0
-    unique_subjects = set()
-
-    for report in term_reports:
-        term_grades = grades_by_term.get(report.term_id, [])
-
-        # Separate core and elective
-        core_grades = [g for g in term_grades if g.subject.is_core]
-        elective_grades = [g for g in term_grades if not g.subject.is_core]
-
-        entry = {
-            'report': report,
-            'core_grades': core_grades,
-            'elective_grades': elective_grades,
-        }
-        if include_all_grades:
-            entry['all_grades'] = term_grades
-
-        academic_history.append(entry)
-
-        # Cumulative calculations
-        total_subjects_taken += report.subjects_taken or 0
-        total_subjects_passed += report.subjects_passed or 0
-        total_credits += report.credits_count or 0
-
-        if report.average is not None:
-            cumulative_score_sum += float(report.average)
-            term_count += 1
-
-        # Track unique subjects
-        for grade in term_grades:
-            unique_subjects.add(grade.subject.name)
-
-    cumulative_average = cumulative_score_sum / term_count if term_count > 0 else 0
-
-    return {
-        'academic_history': academic_history,
-        'cumulative_average': round(cumulative_average, 2),
-        'term_count': term_count,
-        'total_credits': total_credits,
-        'total_subjects_taken': total_subjects_taken,
-        'total_subjects_passed': total_subjects_passed,
-        'unique_subjects': unique_subjects,
-    }
-
-
 def get_school_context(include_logo_base64=False):
     """
     Get school context for templates and PDF generation.
@@ -1077,24 +849,35 @@ def recalc_and_rerank_term_reports(student_ids, term):
       - if they still have graded subjects, aggregates are recomputed;
       - otherwise the report's aggregates are zeroed so report cards don't
         show a phantom average/position.
-    Reports are then dense-ranked by average (descending); reports with no
-    graded subjects are left unranked (position=None). ``out_of`` is set to
-    the number of ranked reports.
+    Reports are then ranked by average (descending) in the database;
+    reports with no graded subjects are left unranked (position=None).
+    ``out_of`` is set to the number of ranked reports.
 
     Returns the number of reports updated.
     """
+    from django.utils import timezone
+    from .analytics_rollup import refresh_student_rollups
+    from .ranking import rank_term_reports
+    from .signals import _invalidate_report_pdfs
+    from .transcripts import invalidate
+
     reports = list(TermReport.objects.filter(
         student_id__in=student_ids, term=term
-    ).select_related('student'))
+    ))
     if not reports:
         return 0
 
+    grades_by_student = defaultdict(list)
+    for grade in SubjectTermGrade.objects.filter(
+        student_id__in=[r.student_id for r in reports], term=term, total_score__isnull=False
+    ).select_related('subject'):
+        grades_by_student[grade.student_id].append(grade)
+
+    now = timezone.now()
     for tr in reports:
-        has_grades = SubjectTermGrade.objects.filter(
-            student_id=tr.student_id, term=term, total_score__isnull=False
-        ).exists()
-        if has_grades:
-            tr.calculate_aggregates()
+        grades = grades_by_student.get(tr.student_id)
+        if grades:
+            tr.calculate_aggregates(grades=grades)
         else:
             tr.total_marks = 0
             tr.average = Decimal('0.0')
@@ -1105,24 +888,24 @@ def recalc_and_rerank_term_reports(student_ids, term):
             tr.core_subjects_total = 0
             tr.core_subjects_passed = 0
             tr.aggregate = None
+        # bulk_update skips TermReport.save(), which clears stale promotions
+        if tr.promoted is not True:
+            tr.promoted_to = None
+        tr.updated_at = now
+
+    TermReport.objects.bulk_update(
+        reports,
+        ['total_marks', 'average', 'subjects_taken', 'subjects_passed',
+         'subjects_failed', 'credits_count', 'core_subjects_total',
+         'core_subjects_passed', 'aggregate', 'promoted_to', 'updated_at'],
+        batch_size=config.BULK_UPDATE_BATCH_SIZE
+    )
+    rank_term_reports([r.pk for r in reports])
+    refresh_student_rollups([r.student_id for r in reports], term)
+    invalidate(r.student_id for r in reports)
+
+    # bulk_update skips post_save, which drops cached report card PDFs
+    for tr in reports:
+        _invalidate_report_pdfs(tr.student_id, tr.term_id)
 
-    ranked = [r for r in reports if r.subjects_taken and r.subjects_taken > 0]
-    ranked.sort(key=lambda r: -(r.average if r.average is not None else Decimal('0')))
-    out_of = len(ranked)
-    position = 0
-    last_value = None
-    for i, r in enumerate(ranked, 1):
-        value = round(r.average, 2) if r.average is not None else None
-        if value != last_value:
-            position = i
-        r.position = position
-        last_value = value
-
-    ranked_set = {id(r) for r in ranked}
-    for r in reports:
-        r.out_of = out_of
-        if id(r) not in ranked_set:
-            r.position = None
-        r.save()
-
-    return len(reports)
\ No newline at end of file
+    return len(reports)
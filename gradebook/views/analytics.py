@@ -1,12 +1,12 @@
-from collections import defaultdict, Counter
+from collections import Counter
 import json
 import logging
 
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.db.models import Avg, Count, Q
-from .base import admin_required, htmx_render, ratelimit
-from ..models import GradingSystem, SubjectTermGrade, TermReport
+from django.db.models import Q, Sum
+from .base import admin_required, htmx_render
+from ..models import GradeAnalyticsRollup, GradingSystem, TermReport
 from .. import config
 from academics.models import Class
 from core.models import Term
@@ -18,7 +18,6 @@ logger = logging.getLogger(__name__)
 
 @login_required
 @admin_required
-@ratelimit(key='user', rate='60/h', block=True)
 def analytics(request):
     """Analytics dashboard with grade trends and statistics (Admin only)."""
     current_term = Term.get_current()
@@ -63,7 +62,6 @@ def analytics(request):
 
 @login_required
 @admin_required
-@ratelimit(key='user', rate='60/h', block=True)
 def analytics_class_data(request, class_id):
     """Get analytics data for a specific class (HTMX partial)."""
     current_term = Term.get_current()
@@ -88,36 +86,38 @@ def analytics_class_data(request, class_id):
     else:
         min_avg_for_promotion = config.DEFAULT_MIN_AVERAGE_FOR_PROMOTION
 
-    # Get all term reports for this class
-    term_reports = list(TermReport.objects.filter(
-        student__current_class=class_obj,
-        term=current_term
-    ).select_related('student').order_by('-average'))
-
-    # Get subject grades for grade distribution
-    subject_grades = list(SubjectTermGrade.objects.filter(
-        student__current_class=class_obj,
+    # Pre-aggregated class and subject rows (see analytics_rollup.py)
+    rollups = list(GradeAnalyticsRollup.objects.filter(
         term=current_term,
-        total_score__isnull=False
-    ).select_related('subject', 'student'))
+        class_assigned=class_obj
+    ).select_related('subject'))
+    class_rollup = next((r for r in rollups if r.subject_id is None), None)
+    subject_rollups = [r for r in rollups if r.subject_id is not None]
 
     # Calculate statistics
-    stats = calculate_class_stats(term_reports, subject_grades)
+    stats = calculate_class_stats(class_rollup)
 
-    # Get subject performance comparison (using configurable pass mark)
-    subject_performance = calculate_subject_performance(subject_grades, pass_mark=pass_mark)
+    # Get subject performance comparison (pass counts use the class pass mark)
+    subject_performance = calculate_subject_performance(subject_rollups)
 
     # Get grade distribution
-    grade_distribution = calculate_grade_distribution(subject_grades, grading_system=grading_system)
+    grade_counts = Counter()
+    for rollup in subject_rollups:
+        grade_counts.update(rollup.grade_counts)
+    grade_distribution = calculate_grade_distribution(grade_counts, grading_system=grading_system)
+
+    class_reports = TermReport.objects.filter(
+        student__current_class=class_obj,
+        term=current_term
+    ).select_related('student')
 
     # Get top performers
-    top_performers = term_reports[:config.TOP_PERFORMERS_LIMIT] if term_reports else []
+    top_performers = list(class_reports.order_by('-average')[:config.TOP_PERFORMERS_LIMIT])
 
     # Get students needing attention (failed 2+ subjects or avg below promotion threshold)
-    at_risk = [
-        r for r in term_reports
-        if r.subjects_failed >= 2 or (r.average and r.average < min_avg_for_promotion)
-    ][:config.AT_RISK_STUDENTS_LIMIT]
+    at_risk = list(class_reports.filter(
+        Q(subjects_failed__gte=2) | Q(average__gt=0, average__lt=min_avg_for_promotion)
+    ).order_by('-average')[:config.AT_RISK_STUDENTS_LIMIT])
 
     context = {
         'class_obj': class_obj,
@@ -129,7 +129,7 @@ def analytics_class_data(request, class_id):
         'subject_performance_json': json.dumps(subject_performance),
         'top_performers': top_performers,
         'at_risk_students': at_risk,
-        'total_students': len(term_reports),
+        'total_students': class_rollup.student_count if class_rollup else 0,
         'grading_system': grading_system,
         'pass_mark': pass_mark,
     }
@@ -139,7 +139,6 @@ def analytics_class_data(request, class_id):
 
 @login_required
 @admin_required
-@ratelimit(key='user', rate='60/h', block=True)
 def analytics_overview(request):
     """School-wide analytics overview (HTMX partial, Admin only)."""
     current_term = Term.get_current()
@@ -153,50 +152,45 @@ def analytics_overview(request):
     default_grading_system = GradingSystem.objects.filter(is_active=True).first()
     default_pass_mark = default_grading_system.pass_mark if default_grading_system else config.DEFAULT_PASS_MARK
 
-    # Get all class stats in a single grouped query (avoids N+1 per class)
-    class_report_stats = TermReport.objects.filter(
+    # One pre-aggregated row per class (see analytics_rollup.py)
+    class_rollups = list(GradeAnalyticsRollup.objects.filter(
         term=current_term,
-        student__current_class__is_active=True
-    ).values(
-        'student__current_class', 'student__current_class__name',
-        'student__current_class__level_number'
-    ).annotate(
-        avg_score=Avg('average'),
-        total_students=Count('id'),
-        passed=Count('id', filter=Q(subjects_failed=0)),
-    ).filter(total_students__gt=0).order_by('-avg_score')
+        subject__isnull=True,
+    ).select_related('class_assigned'))
 
     class_stats = []
-    for row in class_report_stats:
-        total = row['total_students']
-        passed = row['passed']
-        # Use a simple namespace so template can access stat.class.name
-        class_obj = type('ClassInfo', (), {'name': row['student__current_class__name']})()
+    for rollup in class_rollups:
+        if not rollup.class_assigned.is_active or not rollup.student_count:
+            continue
+        total = rollup.student_count
+        passed = rollup.passed_count
         class_stats.append({
-            'class': class_obj,
-            'average': round(row['avg_score'] or 0, 1),
+            'class': rollup.class_assigned,
+            'average': round(rollup.average, 1),
             'total_students': total,
             'passed': passed,
             'pass_rate': round((passed / total) * 100, 1) if total > 0 else 0,
         })
+    class_stats.sort(key=lambda s: s['average'], reverse=True)
 
     # Overall school stats
-    all_reports = TermReport.objects.filter(term=current_term)
-    school_stats = all_reports.aggregate(
-        total_students=Count('id'),
-        avg_score=Avg('average'),
-        total_passed=Count('id', filter=Q(subjects_failed=0)),
-    )
+    total_students = sum(r.student_count for r in class_rollups)
+    total_passed = sum(r.passed_count for r in class_rollups)
+    score_total = sum(r.score_total for r in class_rollups)
 
-    # Subject-wise school performance (using configurable pass mark)
-    all_subject_stats = list(SubjectTermGrade.objects.filter(
+    # Subject-wise school performance (each class counts passes at its own pass mark)
+    all_subject_stats = []
+    for row in GradeAnalyticsRollup.objects.filter(
         term=current_term,
-        total_score__isnull=False
+        subject__isnull=False,
     ).values('subject__name', 'subject__short_name').annotate(
-        avg_score=Avg('total_score'),
-        students=Count('id'),
-        passed=Count('id', filter=Q(total_score__gte=default_pass_mark)),
-    ).order_by('-avg_score'))
+        score_total=Sum('score_total'),
+        students=Sum('student_count'),
+        passed=Sum('passed_count'),
+    ):
+        row['avg_score'] = row.pop('score_total') / row['students'] if row['students'] else 0
+        all_subject_stats.append(row)
+    all_subject_stats.sort(key=lambda s: s['avg_score'], reverse=True)
 
     subject_stats = all_subject_stats[:config.TOP_SUBJECTS_LIMIT]
 
@@ -214,14 +208,14 @@ def analytics_overview(request):
             for s in class_stats
         ]),
         'school_stats': {
-            'total_students': school_stats['total_students'] or 0,
-            'average': round(school_stats['avg_score'] or 0, 1),
-            'passed': school_stats['total_passed'] or 0,
+            'total_students': total_students,
+            'average': round(score_total / total_students, 1) if total_students else 0,
+            'passed': total_passed,
             'pass_rate': round(
-                (school_stats['total_passed'] / school_stats['total_students']) * 100, 1
-            ) if school_stats['total_students'] else 0,
+                (total_passed / total_students) * 100, 1
+            ) if total_students else 0,
         },
-        'subject_stats': list(subject_stats),
+        'subject_stats': subject_stats,
         'weak_subjects': weak_subjects,
         'pass_mark': default_pass_mark,
     }
@@ -231,7 +225,6 @@ def analytics_overview(request):
 
 @login_required
 @admin_required
-@ratelimit(key='user', rate='60/h', block=True)
 def analytics_term_comparison(request):
     """Compare performance across terms (HTMX partial, Admin only)."""
     # Get all terms from current academic year
@@ -245,25 +238,26 @@ def analytics_term_comparison(request):
         academic_year=current_term.academic_year
     ).order_by('term_number')
 
-    # Single grouped query instead of one per term
+    # Sum the class rollup rows of each term
     term_stats = {
         row['term_id']: row
-        for row in TermReport.objects.filter(
-            term__in=terms
+        for row in GradeAnalyticsRollup.objects.filter(
+            term__in=terms,
+            subject__isnull=True,
         ).values('term_id').annotate(
-            avg_score=Avg('average'),
-            total_students=Count('id'),
-            passed=Count('id', filter=Q(subjects_failed=0)),
+            score_total=Sum('score_total'),
+            total_students=Sum('student_count'),
+            passed=Sum('passed_count'),
         )
     }
 
     term_data = []
     for term in terms:
         stats = term_stats.get(term.pk)
-        if stats and stats['total_students'] > 0:
+        if stats and stats['total_students']:
             term_data.append({
                 'term': term,
-                'average': round(stats['avg_score'] or 0, 1),
+                'average': round(stats['score_total'] / stats['total_students'], 1),
                 'total_students': stats['total_students'],
                 'passed': stats['passed'],
                 'pass_rate': round((stats['passed'] / stats['total_students']) * 100, 1),
@@ -283,20 +277,9 @@ def analytics_term_comparison(request):
 
 # ============ Analytics Helper Functions ============
 
-def calculate_class_stats(term_reports, subject_grades):
-    """Calculate comprehensive class statistics."""
-    if not term_reports:
-        return {
-            'average': 0,
-            'highest': 0,
-            'lowest': 0,
-            'pass_rate': 0,
-            'subjects_avg_passed': 0,
-        }
-
-    averages = [r.average for r in term_reports if r.average is not None]
-
-    if not averages:
+def calculate_class_stats(class_rollup):
+    """Calculate class statistics from the class's rollup row (or None)."""
+    if not class_rollup or not class_rollup.student_count:
         return {
             'average': 0,
             'highest': 0,
@@ -305,46 +288,40 @@ def calculate_class_stats(term_reports, subject_grades):
             'subjects_avg_passed': 0,
         }
 
-    total_students = len(term_reports)
-    passed = sum(1 for r in term_reports if (r.subjects_failed or 0) == 0)
-    avg_subjects_passed = sum(r.subjects_passed or 0 for r in term_reports) / total_students if total_students else 0
+    total_students = class_rollup.student_count
 
     return {
-        'average': round(sum(averages) / len(averages), 1),
-        'highest': round(max(averages), 1),
-        'lowest': round(min(averages), 1),
-        'pass_rate': round((passed / total_students) * 100, 1) if total_students else 0,
-        'subjects_avg_passed': round(avg_subjects_passed, 1),
+        'average': round(class_rollup.average, 1),
+        'highest': round(class_rollup.highest_score or 0, 1),
+        'lowest': round(class_rollup.lowest_score or 0, 1),
+        'pass_rate': round((class_rollup.passed_count / total_students) * 100, 1),
+        'subjects_avg_passed': round(class_rollup.subjects_passed_total / total_students, 1),
     }
 
 
-def calculate_subject_performance(subject_grades, pass_mark=None):
+def calculate_subject_performance(subject_rollups):
     """
     Calculate per-subject performance metrics.
 
     Args:
-        subject_grades: List of SubjectTermGrade objects
-        pass_mark: The pass mark threshold (defaults to grading system standard)
+        subject_rollups: GradeAnalyticsRollup rows with a subject, for one
+            class and term. Pass counts use the pass mark stored on each row.
     """
-    if pass_mark is None:
-        pass_mark = config.DEFAULT_PASS_MARK
-
-    subject_data = defaultdict(lambda: {'scores': [], 'passed': 0, 'total': 0})
-
-    for grade in subject_grades:
-        subj = grade.subject.short_name or grade.subject.name[:10]
-        subject_data[subj]['scores'].append(float(grade.total_score))
-        subject_data[subj]['total'] += 1
-        if grade.total_score >= pass_mark:
-            subject_data[subj]['passed'] += 1
+    subject_data = {}
+    for rollup in subject_rollups:
+        subj = rollup.subject.short_name or rollup.subject.name[:10]
+        data = subject_data.setdefault(subj, {'score_total': 0, 'passed': 0, 'total': 0})
+        data['score_total'] += float(rollup.score_total)
+        data['passed'] += rollup.passed_count
+        data['total'] += rollup.student_count
 
     result = []
     for name, data in subject_data.items():
-        if data['scores']:
+        if data['total']:
             result.append({
                 'name': name,
-                'average': round(sum(data['scores']) / len(data['scores']), 1),
-                'pass_rate': round((data['passed'] / data['total']) * 100, 1) if data['total'] else 0,
+                'average': round(data['score_total'] / data['total'], 1),
+                'pass_rate': round((data['passed'] / data['total']) * 100, 1),
                 'students': data['total'],
             })
 
@@ -353,16 +330,14 @@ def calculate_subject_performance(subject_grades, pass_mark=None):
     return result
 
 
-def calculate_grade_distribution(subject_grades, grading_system=None):
+def calculate_grade_distribution(grade_counts, grading_system=None):
     """Calculate grade distribution across all subjects.
 
     Args:
-        subject_grades: List of SubjectTermGrade objects
+        grade_counts: Mapping of grade label to number of subject grades
         grading_system: Optional GradingSystem to get grade order from.
                        If not provided, fetches the active one.
     """
-    grade_counts = Counter(g.grade for g in subject_grades if g.grade)
-
     # Get grade order from grading system (ordered by min_percentage descending)
     if grading_system is None:
         grading_system = GradingSystem.objects.filter(
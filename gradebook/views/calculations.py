@@ -1,492 +1,21 @@
-from collections import defaultdict
-from decimal import Decimal
 import html
 import logging
 import json
 
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.core.exceptions import ValidationError
-from django.http import HttpResponse
-from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.db import connection, transaction
 
 from .base import admin_required, htmx_render, is_school_admin, teacher_or_admin_required
-from ..models import (
-    GradingSystem, AssessmentCategory, Assignment,
-    Score, SubjectTermGrade, TermReport,
-)
-from ..signals import signals_disabled
-from ..utils import calculate_category_scores, determine_grade_from_scales
-from .. import config
-from django.db import connection
-
-from academics.models import Class, ClassSubject, StudentSubjectEnrollment, AttendanceSession, AttendanceRecord
-from students.models import Student
+from ..models import GradingSystem, GradeCalculationJob, GradeCalculationJobClass
+
+from academics.models import Class
 from core.models import Term
 
 logger = logging.getLogger(__name__)
 
 
-# ============ Grade Calculation Helpers ============
-
-def _prefetch_grade_data(class_obj, current_term):
-    """
-    Phase 1: Bulk prefetch all data needed for grade calculation.
-
-    Returns a dict with students, subjects, enrollments, assignments,
-    scores, and categories — all fetched in minimal queries.
-    """
-    students = list(Student.objects.filter(
-        current_class=class_obj, status='active'
-    ).order_by('last_name', 'first_name'))
-
-    if not students:
-        return None
-
-    student_ids = [s.id for s in students]
-
-    class_subjects = ClassSubject.objects.filter(
-        class_assigned=class_obj
-    ).select_related('subject')
-    subjects = [cs.subject for cs in class_subjects]
-
-    if not subjects:
-        return None
-
-    subject_ids = [s.id for s in subjects]
-
-    # Build student -> enrolled subjects map (respects SHS electives)
-    student_subject_map = {}
-    enrollments = StudentSubjectEnrollment.objects.filter(
-        student_id__in=student_ids,
-        class_subject__class_assigned=class_obj,
-        is_active=True
-    ).select_related('class_subject__subject')
-
-    for enrollment in enrollments:
-        sid = enrollment.student_id
-        subj_id = enrollment.class_subject.subject_id
-        if sid not in student_subject_map:
-            student_subject_map[sid] = set()
-        student_subject_map[sid].add(subj_id)
-
-    logger.info(
-        f'Subject enrollments for {class_obj.name}: '
-        f'{len(student_subject_map)} students with enrolled subjects'
-    )
-
-    categories = list(AssessmentCategory.objects.filter(is_active=True))
-
-    assignments = list(Assignment.objects.filter(
-        subject_id__in=subject_ids,
-        term=current_term
-    ).select_related('assessment_category'))
-
-    assignments_by_subject_category = defaultdict(list)
-    for assign in assignments:
-        key = (assign.subject_id, assign.assessment_category_id)
-        assignments_by_subject_category[key].append(assign)
-
-    assignment_ids = [a.id for a in assignments]
-    scores = Score.objects.filter(
-        student_id__in=student_ids,
-        assignment_id__in=assignment_ids
-    ).select_related('assignment')
-
-    scores_lookup = {
-        (s.student_id, s.assignment_id): s for s in scores
-    }
-
-    return {
-        'students': students,
-        'student_ids': student_ids,
-        'subjects': subjects,
-        'subject_ids': subject_ids,
-        'student_subject_map': student_subject_map,
-        'categories': categories,
-        'assignments': assignments,
-        'assignments_by_subject_category': dict(assignments_by_subject_category),
-        'scores_lookup': scores_lookup,
-    }
-
-
-def _calculate_subject_grades(data, current_term, grading_system, grade_scales):
-    """
-    Phase 2: Calculate SubjectTermGrade for each student-subject pair.
-
-    Creates missing grade objects and computes category scores, totals,
-    and grade labels using prefetched data (no per-student queries).
-    """
-    students = data['students']
-    subjects = data['subjects']
-    student_subject_map = data['student_subject_map']
-
-    existing_grades = {
-        (g.student_id, g.subject_id): g
-        for g in SubjectTermGrade.objects.filter(
-            student_id__in=data['student_ids'],
-            subject_id__in=data['subject_ids'],
-            term=current_term
-        )
-    }
-
-    grades_to_create = []
-    grades_to_update = []
-
-    for student in students:
-        enrolled_subject_ids = student_subject_map.get(student.id, set())
-
-        for subject in subjects:
-            if subject.id not in enrolled_subject_ids:
-                continue
-
-            key = (student.id, subject.id)
-            if key in existing_grades:
-                grade = existing_grades[key]
-            else:
-                grade = SubjectTermGrade(
-                    student=student, subject=subject, term=current_term
-                )
-                grades_to_create.append(grade)
-                existing_grades[key] = grade
-
-    if grades_to_create:
-        SubjectTermGrade.objects.bulk_create(grades_to_create)
-        for grade in grades_to_create:
-            existing_grades[(grade.student_id, grade.subject_id)] = grade
-
-    for student in students:
-        enrolled_subject_ids = student_subject_map.get(student.id, set())
-
-        for subject in subjects:
-            if subject.id not in enrolled_subject_ids:
-                continue
-
-            grade = existing_grades.get((student.id, subject.id))
-            if not grade:
-                continue
-
-            calc_result = calculate_category_scores(
-                student_id=student.id,
-                subject_id=subject.id,
-                categories=data['categories'],
-                assignments_by_subject_category=data['assignments_by_subject_category'],
-                scores_lookup=data['scores_lookup'],
-            )
-
-            grade.category_scores = calc_result['category_scores_json']
-            grade.class_score = calc_result['class_score']
-            grade.exam_score = calc_result['exam_score']
-            grade.total_score = calc_result['total_score']
-
-            grade.is_passing = False
-            if grading_system and grade.total_score is not None:
-                grade_info = determine_grade_from_scales(grade.total_score, grade_scales)
-                grade.grade = grade_info['grade']
-                grade.grade_remark = grade_info['grade_remark']
-                grade.is_passing = grade_info['is_passing']
-
-            grades_to_update.append(grade)
-
-    SubjectTermGrade.objects.bulk_update(
-        grades_to_update,
-        ['class_score', 'exam_score', 'total_score', 'category_scores', 'grade', 'grade_remark', 'is_passing'],
-        batch_size=config.BULK_UPDATE_BATCH_SIZE
-    )
-
-
-def _calculate_subject_positions(data, current_term):
-    """
-    Phase 3: Calculate per-subject positions using dense ranking.
-
-    Returns (all_grades, students_with_subjects) for use in later phases.
-    """
-    student_subject_map = data['student_subject_map']
-    students = data['students']
-
-    students_with_subjects = [
-        s for s in students if student_subject_map.get(s.id)
-    ]
-    student_ids_with_subjects = [s.id for s in students_with_subjects]
-
-    all_grades = list(SubjectTermGrade.objects.filter(
-        student_id__in=student_ids_with_subjects,
-        subject_id__in=data['subject_ids'],
-        term=current_term,
-        total_score__isnull=False
-    ).select_related('subject'))
-
-    # Drop grades for student↔subject pairs the student is no longer enrolled
-    # in. Without this, a SubjectTermGrade left over from before a student was
-    # unregistered from a subject would still be ranked and counted toward
-    # positions/averages, corrupting positions and out_of for the whole class.
-    all_grades = [
-        g for g in all_grades
-        if g.subject_id in student_subject_map.get(g.student_id, set())
-    ]
-
-    grades_by_subject = defaultdict(list)
-    for grade in all_grades:
-        grades_by_subject[grade.subject_id].append(grade)
-
-    position_updates = []
-    for subject_id, subject_grades in grades_by_subject.items():
-        subject_grades.sort(key=lambda g: g.total_score or Decimal('0'), reverse=True)
-
-        position = 0
-        last_score = None
-        for i, grade in enumerate(subject_grades, 1):
-            if grade.total_score != last_score:
-                position = i
-            grade.position = position
-            position_updates.append(grade)
-            last_score = grade.total_score
-
-    SubjectTermGrade.objects.bulk_update(
-        position_updates,
-        ['position'],
-        batch_size=config.BULK_UPDATE_BATCH_SIZE
-    )
-
-    return all_grades, students_with_subjects
-
-
-def _calculate_term_reports(
-    data, all_grades, students_with_subjects, current_term,
-    class_obj, grading_system, grade_scales, is_final_term
-):
-    """
-    Phase 4: Calculate TermReport aggregates, attendance, and promotion.
-
-    Returns reports_to_update for position calculation in Phase 5.
-    """
-    subjects = data['subjects']
-    student_ids_with_subjects = [s.id for s in students_with_subjects]
-
-    existing_reports = {
-        r.student_id: r
-        for r in TermReport.objects.filter(
-            student_id__in=student_ids_with_subjects,
-            term=current_term
-        )
-    }
-
-    reports_to_create = []
-    for student in students_with_subjects:
-        if student.id not in existing_reports:
-            report = TermReport(student=student, term=current_term)
-            reports_to_create.append(report)
-            existing_reports[student.id] = report
-
-    if reports_to_create:
-        TermReport.objects.bulk_create(reports_to_create)
-
-    grades_by_student = defaultdict(list)
-    for grade in all_grades:
-        grades_by_student[grade.student_id].append(grade)
-
-    subjects_dict = {s.id: s for s in subjects}
-
-    # Bulk prefetch attendance data
-    attendance_sessions = AttendanceSession.objects.filter(
-        class_assigned=class_obj,
-        date__gte=current_term.start_date,
-        date__lte=current_term.end_date
-    )
-    session_ids = list(attendance_sessions.values_list('id', flat=True))
-    total_school_days = attendance_sessions.values('date').distinct().count()
-
-    attendance_by_student = {}
-    if session_ids:
-        from django.db.models import Count, Q as _Q
-        attendance_stats = AttendanceRecord.objects.filter(
-            session_id__in=session_ids,
-            student_id__in=student_ids_with_subjects
-        ).values('student_id').annotate(
-            days_present=Count(
-                'session__date',
-                filter=_Q(status__in=['P', 'L']),
-                distinct=True
-            ),
-            times_late=Count('id', filter=_Q(status='L')),
-        )
-        for row in attendance_stats:
-            row['days_absent'] = total_school_days - row['days_present']
-            attendance_by_student[row['student_id']] = row
-
-    reports_to_update = []
-
-    for student in students_with_subjects:
-        report = existing_reports[student.id]
-        student_grades = grades_by_student.get(student.id, [])
-
-        if student_grades:
-            total = sum(g.total_score for g in student_grades if g.total_score is not None)
-            count = len([g for g in student_grades if g.total_score is not None])
-
-            report.total_marks = total
-            report.average = round(total / count, 2) if count > 0 else Decimal('0.0')
-            report.subjects_taken = count
-
-            passed = [g for g in student_grades if g.is_passing]
-            report.subjects_passed = len(passed)
-            report.subjects_failed = count - len(passed)
-
-            credits = 0
-            if grading_system and grade_scales:
-                for g in student_grades:
-                    if g.total_score is not None:
-                        scale = grading_system.get_grade_for_score(g.total_score, grade_scales)
-                        if scale and scale.is_credit:
-                            credits += 1
-            report.credits_count = credits
-
-            core_grades = [
-                g for g in student_grades
-                if subjects_dict.get(g.subject_id) and subjects_dict[g.subject_id].is_core
-            ]
-            report.core_subjects_total = len(core_grades)
-            report.core_subjects_passed = len([g for g in core_grades if g.is_passing])
-
-            if grading_system:
-                grade_points = []
-                for g in student_grades:
-                    if g.total_score is not None:
-                        scale = grading_system.get_grade_for_score(g.total_score, grade_scales)
-                        if scale and scale.aggregate_points:
-                            grade_points.append(scale.aggregate_points)
-
-                if grade_points:
-                    grade_points.sort()
-                    best_n = grade_points[:grading_system.aggregate_subjects_count]
-                    report.aggregate = sum(best_n)
-
-        else:
-            core_grades = []
-
-        att = attendance_by_student.get(student.id)
-        if att and total_school_days > 0:
-            report.total_school_days = total_school_days
-            report.days_present = att['days_present']
-            report.days_absent = att['days_absent']
-            report.times_late = att['times_late']
-            report.attendance_percentage = round(
-                (Decimal(str(att['days_present'])) / Decimal(str(total_school_days))) * 100, 2
-            )
-            report.attendance_rating = TermReport.derive_attendance_rating(
-                report.attendance_percentage
-            )
-        else:
-            # No attendance recorded — auto-generation has nothing to derive
-            # from, so leave the rating blank rather than keep a stale value.
-            report.attendance_rating = ''
-            report.attendance_percentage = None
-            report.days_present = None
-            report.days_absent = None
-            report.times_late = None
-            report.total_school_days = None
-
-        if is_final_term and grading_system:
-            is_eligible, reasons = grading_system.check_promotion_eligibility(
-                report, core_grades=core_grades
-            )
-            report.promoted = is_eligible
-            report.promotion_remarks = '; '.join(reasons) if reasons else 'Meets all requirements'
-
-        reports_to_update.append(report)
-
-    TermReport.objects.bulk_update(
-        reports_to_update,
-        ['total_marks', 'average', 'subjects_taken', 'subjects_passed',
-         'subjects_failed', 'credits_count', 'core_subjects_total',
-         'core_subjects_passed', 'aggregate', 'promoted',
-         'promotion_remarks', 'days_present', 'days_absent',
-         'total_school_days', 'times_late', 'attendance_percentage',
-         'attendance_rating'],
-        batch_size=config.BULK_UPDATE_BATCH_SIZE
-    )
-
-    return reports_to_update
-
-
-def _calculate_overall_positions(reports_to_update, class_obj):
-    """
-    Phase 5: Calculate overall class positions by average (dense ranking).
-    """
-    ranked_reports = [
-        r for r in reports_to_update
-        if r.subjects_taken and r.subjects_taken > 0
-    ]
-    unranked_reports = [
-        r for r in reports_to_update
-        if r not in ranked_reports
-    ]
-
-    ranked_count = len(ranked_reports)
-    for report in reports_to_update:
-        report.out_of = ranked_count
-
-    ranked_reports.sort(
-        key=lambda r: -(r.average if r.average is not None else Decimal('0'))
-    )
-
-    position = 0
-    last_value = None
-    for i, report in enumerate(ranked_reports, 1):
-        current_value = round(report.average, 2) if report.average is not None else None
-        if current_value != last_value:
-            position = i
-        report.position = position
-        last_value = current_value
-
-    if ranked_reports:
-        logger.info(
-            f'Position assignments for {class_obj.name}: ' +
-            ', '.join(
-                f'{r.student_id}:avg={r.average}/pos={r.position}'
-                for r in ranked_reports
-            )
-        )
-
-    for report in unranked_reports:
-        report.position = None
-
-    TermReport.objects.bulk_update(
-        reports_to_update,
-        ['position', 'out_of'],
-        batch_size=config.BULK_UPDATE_BATCH_SIZE
-    )
-
-    return ranked_count, unranked_reports
-
-
-def _detect_missing_scores(data, students_with_subjects):
-    """Detect students with enrolled subjects but no scores at all."""
-    student_subject_map = data['student_subject_map']
-    scores_lookup = data['scores_lookup']
-    assignments = data['assignments']
-    subjects_dict = {s.id: s for s in data['subjects']}
-
-    missing_scores = []
-    for student in students_with_subjects:
-        enrolled_subj_ids = student_subject_map.get(student.id, set())
-        for subj_id in enrolled_subj_ids:
-            has_score = any(
-                (student.id, a.id) in scores_lookup
-                for a in assignments
-                if a.subject_id == subj_id
-            )
-            if not has_score:
-                subj = subjects_dict.get(subj_id)
-                if subj:
-                    missing_scores.append({
-                        'student': student.full_name,
-                        'subject': subj.short_name or subj.name,
-                    })
-
-    return missing_scores
-
-
 # ============ Grade Calculation Views ============
 
 @login_required
@@ -526,16 +55,16 @@ def calculate_grades(request):
 @teacher_or_admin_required
 def calculate_class_grades(request, class_id):
     """
-    Calculate grades for all students in a class.
+    Queue grade calculation for all students in a class.
     Uses Ghana grading standards with configurable pass marks,
     WAEC aggregate calculation, and promotion eligibility checks.
 
     Admins can recalculate any class. Teachers can only recalculate
     classes where they are the form master (class_teacher).
 
-    OPTIMIZED: Uses bulk prefetching and bulk_update to minimize queries.
-    Before: ~3000+ queries for 40 students x 12 subjects
-    After: ~20 queries total
+    The calculation runs as a Celery task (run_class_grade_calculation)
+    so large classes don't hit request timeouts. Returns the task ID;
+    poll calculate_class_status for per-phase progress.
     """
     if request.method != 'POST':
         return HttpResponse(status=405)
@@ -562,68 +91,17 @@ def calculate_class_grades(request, class_id):
         if not grading_system:
             return HttpResponse(f'No active {level} grading system found', status=400)
 
-    # Check if this is the final term (Term 3) for promotion decisions
-    is_final_term = current_term.term_number == 3 if hasattr(current_term, 'term_number') else False
-
-    try:
-        with signals_disabled(), transaction.atomic():
-            # Phase 1: Bulk prefetch
-            data = _prefetch_grade_data(class_obj, current_term)
-            if data is None:
-                return HttpResponse('No students or subjects in this class', status=400)
-
-            grade_scales = []
-            if grading_system:
-                grade_scales = list(grading_system.scales.all().order_by('-min_percentage'))
-
-            # Phase 2: Calculate subject grades
-            _calculate_subject_grades(data, current_term, grading_system, grade_scales)
-
-            # Phase 3: Subject positions
-            all_grades, students_with_subjects = _calculate_subject_positions(data, current_term)
-
-            # Phase 4: Term reports (attendance, aggregates, promotion)
-            reports_to_update = _calculate_term_reports(
-                data, all_grades, students_with_subjects, current_term,
-                class_obj, grading_system, grade_scales, is_final_term
-            )
-
-            # Phase 5: Overall positions
-            ranked_count, unranked_reports = _calculate_overall_positions(reports_to_update, class_obj)
-
-            # Detect missing scores
-            missing_scores = _detect_missing_scores(data, students_with_subjects)
-
-            logger.info(
-                f'Calculated grades for {class_obj.name}: '
-                f'{ranked_count} ranked, {len(unranked_reports)} unranked '
-                f'using {grading_system.name if grading_system else "default"} grading system'
-            )
-
-    except (ValueError, ValidationError, IntegrityError) as e:
-        logger.error(f'Error calculating grades for class {class_id}: {str(e)}')
-        return HttpResponse('An error occurred while calculating grades. Please try again.', status=500)
-
-    # Trigger grade drop alerts asynchronously
-    try:
-        from gradebook.tasks import send_grade_alerts
-        send_grade_alerts.delay(class_id, connection.tenant.schema_name)
-    except Exception:
-        pass  # Non-critical — don't block grade calculation response
-
-    # Return success response
-    # If HTMX request (e.g. from report cards page), trigger a content refresh
-    if request.headers.get('HX-Request'):
-        response = HttpResponse(status=204)
-        response['HX-Trigger'] = json.dumps({
-            'showToast': {
-                'message': f'Grades recalculated for {len(students_with_subjects)} students in {class_obj.name}',
-                'type': 'success',
-            },
-            'refreshReports': True,
-        })
-        return response
+    from ..tasks import run_class_grade_calculation
+
+    result = run_class_grade_calculation.delay(
+        class_obj.pk, connection.schema_name, str(grading_system.pk)
+    )
+    return JsonResponse({'success': True, 'task_id': result.id})
 
+
+def _render_calculation_result(info):
+    """Render the success alert (with missing-score warnings) for a finished calculation."""
+    missing_scores = info.get('missing_scores', [])
     missing_html = ''
     if missing_scores:
         items = ''.join(
@@ -644,18 +122,139 @@ def calculate_class_grades(request, class_id):
             </div>
         '''
 
-    return HttpResponse(f'''
+    return f'''
         <div class="alert alert-success mt-2">
             <i class="fa-solid fa-check-circle"></i>
             <div>
                 <div class="font-bold">Grades Calculated Successfully!</div>
-                <div class="text-sm">{len(students_with_subjects)} students in {html.escape(class_obj.name)} \
-using {html.escape(grading_system.name) if grading_system else "default"} grading system</div>
+                <div class="text-sm">{info.get('student_count', 0)} students in {html.escape(info.get('class_name', ''))} \
+using {html.escape(info.get('grading_system') or 'default')} grading system</div>
             </div>
-            <a href="/gradebook/reports/?class={class_id}" class="btn btn-sm btn-ghost">View Reports</a>
+            <a href="/gradebook/reports/?class={info.get('class_id')}" class="btn btn-sm btn-ghost">View Reports</a>
         </div>
         {missing_html}
-    ''')
+    '''
+
+
+@login_required
+@teacher_or_admin_required
+def calculate_class_status(request, task_id):
+    """Poll Celery task status for a class grade calculation."""
+    from celery.result import AsyncResult
+
+    result = AsyncResult(task_id)
+    state = result.state
+
+    if state == 'PROGRESS':
+        meta = result.info or {}
+        return JsonResponse({
+            'state': 'PROGRESS',
+            'phase': meta.get('phase', 0),
+            'total': meta.get('total', 0),
+            'label': meta.get('label', ''),
+        })
+
+    if state == 'SUCCESS':
+        info = result.result or {}
+        if not info.get('success'):
+            return JsonResponse({
+                'state': 'FAILURE',
+                'error': info.get('error', 'Grade calculation failed'),
+            })
+        return JsonResponse({
+            'state': 'SUCCESS',
+            'message': f"Grades recalculated for {info.get('student_count', 0)} students in {info.get('class_name', '')}",
+            'html': _render_calculation_result(info),
+        })
+
+    if state == 'FAILURE':
+        return JsonResponse({
+            'state': 'FAILURE',
+            'error': 'An error occurred while calculating grades. Please try again.',
+        })
+
+    # PENDING / STARTED / other
+    return JsonResponse({'state': state})
+
+
+@login_required
+@admin_required
+def calculate_all_classes(request):
+    """
+    Start (or resume) a school-wide grade calculation for the current term.
+
+    Every active class with active students gets a GradeCalculationJobClass
+    row and its own Celery subtask, so classes run in parallel across
+    workers. If the term's latest job is still running or finished with
+    failed classes it is resumed instead of starting a new one.
+    """
+    if request.method != 'POST':
+        return HttpResponse(status=405)
+
+    current_term = Term.get_current()
+    if not current_term:
+        return JsonResponse({'success': False, 'error': 'No current term set'}, status=400)
+
+    # Resume the term's latest job if it is still running or finished with
+    # failed classes; a completed job starts a fresh run
+    job = GradeCalculationJob.objects.filter(term=current_term).order_by('-created_at').first()
+    if job is not None and job.status == 'COMPLETED':
+        job = None
+    resumed = job is not None
+
+    if job is None:
+        classes = Class.objects.filter(
+            is_active=True, students__status='active'
+        ).distinct()
+        class_ids = list(classes.values_list('pk', flat=True))
+        if not class_ids:
+            return JsonResponse({'success': False, 'error': 'No active classes with students'}, status=400)
+
+        job = GradeCalculationJob.objects.create(term=current_term, started_by=request.user)
+        GradeCalculationJobClass.objects.bulk_create([
+            GradeCalculationJobClass(job=job, class_assigned_id=class_id)
+            for class_id in class_ids
+        ])
+
+    from ..tasks import run_school_grade_calculation
+
+    tenant_schema = connection.schema_name
+    job_id = str(job.pk)
+    transaction.on_commit(lambda: run_school_grade_calculation.delay(job_id, tenant_schema))
+
+    return JsonResponse({'success': True, 'job_id': job_id, 'resumed': resumed})
+
+
+@login_required
+@admin_required
+def calculate_all_status(request, job_id):
+    """Report per-class progress and timings for a school-wide calculation."""
+    job = get_object_or_404(GradeCalculationJob, pk=job_id)
+    runs = job.class_runs.select_related('class_assigned')
+
+    classes = []
+    counts = {'PENDING': 0, 'RUNNING': 0, 'DONE': 0, 'FAILED': 0}
+    for run in runs:
+        counts[run.status] += 1
+        classes.append({
+            'class_id': run.class_assigned_id,
+            'class_name': run.class_assigned.name,
+            'status': run.status,
+            'students': run.student_count,
+            'seconds': round(run.duration_ms / 1000, 1) if run.duration_ms is not None else None,
+            'attempts': run.attempts,
+            'error': run.error,
+        })
+
+    return JsonResponse({
+        'state': job.status,
+        'total': len(classes),
+        'done': counts['DONE'],
+        'failed': counts['FAILED'],
+        'running': counts['RUNNING'],
+        'pending': counts['PENDING'],
+        'classes': classes,
+    })
 
 
 # ============ Grade Locking ============
@@ -676,6 +275,13 @@ def toggle_grade_lock(request, term_id):
         term.lock_grades(request.user)
         message = f"Grades locked for {term.name}"
 
+        # Locked grades are final: rebuild the term's transcript snapshots
+        from gradebook.tasks import rebuild_academic_histories
+        tenant_schema = connection.tenant.schema_name
+        transaction.on_commit(
+            lambda: rebuild_academic_histories.delay(tenant_schema, str(term.pk))
+        )
+
         # Auto-distribute reports if enabled
         try:
             from core.models import SchoolSettings
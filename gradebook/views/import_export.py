@@ -4,26 +4,25 @@ import openpyxl
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.utils import get_column_letter
 from django.http import HttpResponse as DjangoHttpResponse
-from decimal import Decimal, InvalidOperation
+from decimal import InvalidOperation
 import logging
-import json
-import uuid
+import os
 
-from django.core.cache import cache as django_cache
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
-from django.db import transaction
+from django.http import HttpResponse, JsonResponse
+from django.db import connection
+from django.template.loader import render_to_string
 
 
 from .base import (
-    teacher_or_admin_required, admin_required, can_edit_scores, get_client_ip
+    teacher_or_admin_required, admin_required, can_edit_scores, get_client_ip,
+    is_school_admin,
 )
 from ..models import (
-    Assignment, Score, ScoreAuditLog, SubjectTermGrade, TermReport
+    Assignment, Score, SubjectTermGrade, TermReport
 )
-from ..signals import signals_disabled
-from .. import config
+from .. import config, score_import
 from academics.models import Class, ClassSubject, StudentSubjectEnrollment, Subject
 from students.models import Student
 from core.models import Term
@@ -32,6 +31,60 @@ logger = logging.getLogger(__name__)
 
 # ============ Bulk Score Import ============
 
+def _write_score_sheet(ws, assignments, students, existing_scores):
+    """Write the header and one pre-filled row per student to a score sheet."""
+    # Styles
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color=config.EXCEL_HEADER_COLOR, end_color=config.EXCEL_HEADER_COLOR, fill_type="solid")
+    thin_border = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+
+    # Header row
+    headers = ["Student ID", "Student Name"]
+    for assign in assignments:
+        headers.append(f"{assign.assessment_category.short_name}: {assign.name} (/{assign.points_possible})")
+
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=col, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = Alignment(horizontal='center', wrap_text=True)
+        cell.border = thin_border
+
+    # Data rows
+    for row, student in enumerate(students, 2):
+        ws.cell(row=row, column=1, value=student.admission_number).border = thin_border
+        ws.cell(row=row, column=2, value=f"{student.last_name}, {student.first_name}").border = thin_border
+
+        for col, assign in enumerate(assignments, 3):
+            cell = ws.cell(row=row, column=col)
+            cell.border = thin_border
+            cell.alignment = Alignment(horizontal='center')
+            # Pre-fill existing scores
+            existing = existing_scores.get((student.id, assign.id))
+            if existing is not None:
+                cell.value = float(existing)
+
+    # Adjust column widths
+    ws.column_dimensions['A'].width = 15
+    ws.column_dimensions['B'].width = 25
+    for col in range(3, len(headers) + 1):
+        ws.column_dimensions[get_column_letter(col)].width = 18
+
+
+def _xlsx_response(wb, filename):
+    response = DjangoHttpResponse(
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    wb.save(response)
+    return response
+
+
 @login_required
 @teacher_or_admin_required
 def score_import_template(request, class_id, subject_id):
@@ -66,28 +119,6 @@ def score_import_template(request, class_id, subject_id):
     ws = wb.active
     ws.title = "Scores"
 
-    # Styles
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color=config.EXCEL_HEADER_COLOR, end_color=config.EXCEL_HEADER_COLOR, fill_type="solid")
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-
-    # Header row
-    headers = ["Student ID", "Student Name"]
-    for assign in assignments:
-        headers.append(f"{assign.assessment_category.short_name}: {assign.name} (/{assign.points_possible})")
-
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', wrap_text=True)
-        cell.border = thin_border
-
     # Get existing scores
     existing_scores = {}
     for score in Score.objects.filter(
@@ -97,25 +128,7 @@ def score_import_template(request, class_id, subject_id):
         key = (score.student_id, score.assignment_id)
         existing_scores[key] = score.points
 
-    # Data rows
-    for row, student in enumerate(students, 2):
-        ws.cell(row=row, column=1, value=student.admission_number).border = thin_border
-        ws.cell(row=row, column=2, value=f"{student.last_name}, {student.first_name}").border = thin_border
-
-        for col, assign in enumerate(assignments, 3):
-            cell = ws.cell(row=row, column=col)
-            cell.border = thin_border
-            cell.alignment = Alignment(horizontal='center')
-            # Pre-fill existing scores
-            existing = existing_scores.get((student.id, assign.id))
-            if existing is not None:
-                cell.value = float(existing)
-
-    # Adjust column widths
-    ws.column_dimensions['A'].width = 15
-    ws.column_dimensions['B'].width = 25
-    for col in range(3, len(headers) + 1):
-        ws.column_dimensions[get_column_letter(col)].width = 18
+    _write_score_sheet(ws, assignments, students, existing_scores)
 
     # Add metadata sheet for import validation
     meta_ws = wb.create_sheet("_metadata")
@@ -133,15 +146,124 @@ def score_import_template(request, class_id, subject_id):
     # Hide metadata sheet
     meta_ws.sheet_state = 'hidden'
 
-    # Create response
-    response = DjangoHttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
     filename = f"scores_{class_obj.name}_{subject.short_name}_{current_term.name if current_term else 'noterm'}.xlsx"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    wb.save(response)
+    return _xlsx_response(wb, filename)
 
-    return response
+
+def _sheet_title(class_obj, subject, used):
+    """Excel-safe, unique worksheet title (max 31 chars)."""
+    title = f"{class_obj.name} {subject.short_name or subject.name}"
+    title = ''.join('-' if ch in '[]:*?/\\' else ch for ch in title)[:31].strip()
+    candidate, n = title, 2
+    while candidate.lower() in used:
+        suffix = f" ({n})"
+        candidate = title[:31 - len(suffix)] + suffix
+        n += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+@login_required
+@teacher_or_admin_required
+def score_import_bulk_template(request):
+    """
+    Download a multi-class score template: one sheet per class and subject.
+
+    Teachers get every class-subject they teach; admins choose a subject
+    (?subject=<id>) and get a sheet for each class that takes it.
+    """
+    current_term = Term.get_current()
+    if not current_term:
+        return HttpResponse('No current term set', status=400)
+
+    user = request.user
+    class_subjects = ClassSubject.objects.filter(
+        class_assigned__is_active=True
+    ).select_related('class_assigned', 'subject').order_by(
+        'subject__name', 'class_assigned__level_number', 'class_assigned__name'
+    )
+    subject_id = request.GET.get('subject')
+    if subject_id:
+        class_subjects = class_subjects.filter(subject_id=subject_id)
+
+    if not is_school_admin(user):
+        teacher = getattr(user, 'teacher_profile', None)
+        if not teacher:
+            return HttpResponse("Not authorized", status=403)
+        class_subjects = class_subjects.filter(teacher=teacher)
+    elif not subject_id:
+        return HttpResponse('Choose a subject for the multi-class template', status=400)
+
+    class_subjects = list(class_subjects)
+    if not class_subjects:
+        return HttpResponse('No classes to include in the template', status=404)
+
+    subject_ids = {cs.subject_id for cs in class_subjects}
+    assignments_by_subject = {}
+    for assign in Assignment.objects.filter(
+        subject_id__in=subject_ids, term=current_term
+    ).select_related('assessment_category').order_by('assessment_category__order', 'name'):
+        assignments_by_subject.setdefault(assign.subject_id, []).append(assign)
+
+    enrolled = {}
+    for class_subject_id, student_id in StudentSubjectEnrollment.objects.filter(
+        class_subject__in=class_subjects, is_active=True
+    ).values_list('class_subject_id', 'student_id'):
+        enrolled.setdefault(class_subject_id, set()).add(student_id)
+
+    students_by_class = {}
+    for student in Student.objects.filter(
+        current_class_id__in={cs.class_assigned_id for cs in class_subjects},
+        status='active',
+    ).order_by('last_name', 'first_name'):
+        students_by_class.setdefault(student.current_class_id, []).append(student)
+
+    existing_scores = {
+        (s.student_id, s.assignment_id): s.points
+        for s in Score.objects.filter(
+            assignment__subject_id__in=subject_ids,
+            assignment__term=current_term,
+            student__current_class_id__in=students_by_class.keys(),
+        ).only('student_id', 'assignment_id', 'points')
+    }
+
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    meta_ws = wb.create_sheet("_metadata")
+    meta_ws.sheet_state = 'hidden'
+    used_titles = {meta_ws.title.lower()}
+
+    meta_row = 0
+    for class_subject in class_subjects:
+        assignments = assignments_by_subject.get(class_subject.subject_id, [])
+        if not assignments:
+            continue
+        enrolled_ids = enrolled.get(class_subject.pk, set())
+        students = [
+            s for s in students_by_class.get(class_subject.class_assigned_id, [])
+            if s.pk in enrolled_ids
+        ]
+
+        title = _sheet_title(class_subject.class_assigned, class_subject.subject, used_titles)
+        _write_score_sheet(wb.create_sheet(title), assignments, students, existing_scores)
+
+        meta_row += 1
+        meta_values = [
+            'sheet', title, str(class_subject.class_assigned_id),
+            str(class_subject.subject_id), str(current_term.id),
+        ] + [str(a.id) for a in assignments]
+        for col, value in enumerate(meta_values, 1):
+            meta_ws.cell(row=meta_row, column=col, value=value)
+
+    if meta_row == 0:
+        return HttpResponse('No assignments set up for these classes this term', status=404)
+
+    # Open on the first score sheet rather than the hidden metadata
+    wb.move_sheet(meta_ws, offset=len(wb.sheetnames) - 1)
+    wb.active = 0
+
+    filename = f"scores_multi_class_{current_term.name}.xlsx".replace(' ', '_')
+    return _xlsx_response(wb, filename)
 
 
 @login_required
@@ -199,108 +321,18 @@ def score_import_upload(request, class_id, subject_id):
             subject=subject,
             term=current_term
         ).select_related('assessment_category').order_by('assessment_category__order', 'name'))
-
-        # Get only students enrolled in this subject
-        class_subject = ClassSubject.objects.filter(
-            class_assigned=class_obj, subject=subject
-        ).first()
-        enrolled_ids = set(StudentSubjectEnrollment.objects.filter(
-            class_subject=class_subject, is_active=True
-        ).values_list('student_id', flat=True)) if class_subject else set()
-
-        students_by_id = {
-            s.admission_number: s for s in Student.objects.filter(
-                id__in=enrolled_ids, current_class=class_obj
-            )
-        }
+        target = score_import.ImportTarget(class_obj, subject, current_term, assignments)
 
         # Parse data
         preview_data = []
         errors = []
-        row_num = 0
-
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            row_num += 1
-            if not row or not row[0]:  # Skip empty rows
-                continue
-
-            student_id = str(row[0]).strip()
-            student = students_by_id.get(student_id)
-
-            row_data = {
-                'row_num': row_num + 1,
-                'student_id': student_id,
-                'student_name': row[1] if len(row) > 1 else '',
-                'student': student,
-                'scores': [],
-                'has_error': False,
-            }
-
-            if not student:
-                row_data['has_error'] = True
-                errors.append(f"Row {row_num + 1}: Student ID '{student_id}' not found in this class.")
-
-            # Parse scores
-            for col, assign in enumerate(assignments, 2):
-                value = row[col] if len(row) > col else None
-                score_data = {
-                    'assignment': assign,
-                    'value': value,
-                    'error': None,
-                }
-
-                if value is not None and value != '':
-                    try:
-                        points = Decimal(str(value))
-                        if points < 0:
-                            score_data['error'] = 'Negative value'
-                            row_data['has_error'] = True
-                            errors.append(f"Row {row_num + 1}, {assign.name}: Negative value not allowed.")
-                        elif points > assign.points_possible:
-                            score_data['error'] = f'Exceeds max ({assign.points_possible})'
-                            row_data['has_error'] = True
-                            errors.append(f"Row {row_num + 1}, {assign.name}: Value {points} exceeds maximum {assign.points_possible}.")
-                        else:
-                            score_data['value'] = points
-                    except (InvalidOperation, ValueError):
-                        score_data['error'] = 'Invalid number'
-                        row_data['has_error'] = True
-                        errors.append(f"Row {row_num + 1}, {assign.name}: Invalid number '{value}'.")
-
-                row_data['scores'].append(score_data)
-
-            preview_data.append(row_data)
-
-        # Store data in session for confirmation
-        import_data = []
-        for row in preview_data:
-            if row['student'] and not row['has_error']:
-                for score in row['scores']:
-                    if score['value'] is not None and score['value'] != '' and not score['error']:
-                        import_data.append({
-                            'student_id': str(row['student'].id),
-                            'assignment_id': str(score['assignment'].id),
-                            'points': str(score['value']),
-                        })
-
-        nonce = uuid.uuid4().hex[:12]
-        cache_key = f'score_import:{request.user.pk}:{nonce}'
-        django_cache.set(cache_key, json.dumps({
-            'data': import_data,
-            'class_id': str(class_id),
-            'subject_id': str(subject_id),
-        }), 1800)  # 30 min TTL
-        request.session['score_import_cache_key'] = cache_key
-
-        return render(request, 'gradebook/partials/import_preview.html', {
-            'class_obj': class_obj,
-            'subject': subject,
-            'assignments': assignments,
-            'preview_data': preview_data,
-            'errors': errors,
-            'total_scores': len(import_data),
-            'has_errors': len(errors) > 0,
-        })
+        total_scores = 0
+        for chunk in score_import.iter_row_chunks(ws):
+            for row_num, row in chunk:
+                row_data, row_errors = score_import.parse_row(target, row_num, row)
+                preview_data.append(row_data)
+                errors.extend(row_errors)
+                total_scores += len(score_import.accepted_scores(row_data))
 
     except (KeyError, IndexError, TypeError, ValueError, InvalidOperation) as e:
         logger.exception("Error parsing import file: %s", e)
@@ -310,6 +342,27 @@ def score_import_upload(request, class_id, subject_id):
     finally:
         wb.close()
 
+    # Keep the file on disk; confirming streams it again instead of holding
+    # the parsed rows in the cache.
+    previous = request.session.get('score_import')
+    if previous:
+        score_import.remove_upload(previous['path'])
+    request.session['score_import'] = {
+        'path': score_import.save_upload(file, connection.schema_name, request.user.pk),
+        'class_id': str(class_id),
+        'subject_id': str(subject_id),
+    }
+
+    return render(request, 'gradebook/partials/import_preview.html', {
+        'class_obj': class_obj,
+        'subject': subject,
+        'assignments': assignments,
+        'preview_data': preview_data,
+        'errors': errors,
+        'total_scores': total_scores,
+        'has_errors': len(errors) > 0,
+    })
+
 
 @login_required
 @teacher_or_admin_required
@@ -334,172 +387,136 @@ def score_import_confirm(request, class_id, subject_id):
             'error': 'Grades are locked for this term.'
         })
 
-    # Get data from cache
-    cache_key = request.session.get('score_import_cache_key', '')
-    cached = django_cache.get(cache_key) if cache_key else None
-    if not cached:
+    # Get the uploaded file saved by score_import_upload
+    pending = request.session.get('score_import')
+    if not pending or not os.path.exists(pending.get('path', '')):
         return render(request, 'gradebook/partials/import_error.html', {
             'error': 'No import data found. Please upload the file again.'
         })
 
-    try:
-        cached_data = json.loads(cached)
-        import_data = cached_data['data']
-    except (json.JSONDecodeError, KeyError):
-        return render(request, 'gradebook/partials/import_error.html', {
-            'error': 'Invalid import data. Please upload the file again.'
-        })
-
-    # Validate cached data matches current request
-    if (cached_data.get('class_id') != str(class_id) or
-        cached_data.get('subject_id') != str(subject_id)):
+    # Validate the upload matches current request
+    if (pending.get('class_id') != str(class_id) or
+        pending.get('subject_id') != str(subject_id)):
         return render(request, 'gradebook/partials/import_error.html', {
             'error': 'Import data mismatch. Please upload the file again.'
         })
 
-    # Ownership validation: Verify all students are enrolled in this subject
-    class_subject = ClassSubject.objects.filter(
-        class_assigned=class_obj, subject=subject
-    ).first()
-    enrolled_ids = set(StudentSubjectEnrollment.objects.filter(
-        class_subject=class_subject, is_active=True
-    ).values_list('student_id', flat=True)) if class_subject else set()
-
-    valid_student_ids = set(
-        Student.objects.filter(
-            id__in=enrolled_ids,
-            current_class=class_obj,
-            status='active'
-        ).values_list('pk', flat=True)
-    )
-    valid_assignment_ids = set(
-        Assignment.objects.filter(
-            subject=subject,
-            term=current_term
-        ).values_list('pk', flat=True)
-    )
-
-    # Validate each item in import data
-    invalid_items = []
-    for idx, item in enumerate(import_data):
-        student_id = item.get('student_id')
-        assignment_id = item.get('assignment_id')
-
-        # Convert to appropriate types for comparison
-        try:
-            if isinstance(student_id, str):
-                student_id = int(student_id)
-        except (ValueError, TypeError):
-            pass
-        try:
-            if isinstance(assignment_id, str):
-                from uuid import UUID
-                assignment_id = UUID(assignment_id)
-        except (ValueError, TypeError):
-            pass
-
-        if student_id not in valid_student_ids:
-            invalid_items.append(f"Row {idx + 1}: Student ID {student_id} not in this class")
-        if assignment_id not in valid_assignment_ids:
-            invalid_items.append(f"Row {idx + 1}: Assignment ID {assignment_id} not for this subject/term")
-
-    if invalid_items:
-        logger.warning(f"Bulk import validation failed: {invalid_items[:5]}")
-        return render(request, 'gradebook/partials/import_error.html', {
-            'error': f'Data validation failed. {len(invalid_items)} items have invalid student or assignment references.',
-            'details': invalid_items[:10]  # Show first 10 errors
-        })
+    assignments = list(Assignment.objects.filter(
+        subject=subject,
+        term=current_term
+    ).order_by('assessment_category__order', 'name'))
+    target = score_import.ImportTarget(class_obj, subject, current_term, assignments)
 
     # Get audit context
     client_ip = get_client_ip(request)
     user_agent = request.META.get('HTTP_USER_AGENT', '')[:255]
 
-    # Import scores
-    created_count = 0
-    updated_count = 0
-    affected_combos = set()  # Track (student_id, subject_id, term_id) for batch recalc
+    wb = openpyxl.load_workbook(pending['path'], read_only=True)
+    try:
+        summary = score_import.import_sheet(
+            wb.active, target,
+            user=request.user,
+            ip_address=client_ip,
+            user_agent=f"BULK_IMPORT: {user_agent[:240]}",
+        )
+    except score_import.ScoreImportError as e:
+        return render(request, 'gradebook/partials/import_error.html', {'error': str(e)})
+    finally:
+        wb.close()
 
-    # Pre-fetch existing scores to avoid per-row queries
-    import_keys = [(item['student_id'], item['assignment_id']) for item in import_data]
-    existing_scores = {}
-    if import_keys:
-        student_ids = {k[0] for k in import_keys}
-        assignment_ids = {k[1] for k in import_keys}
-        for s in Score.objects.filter(student_id__in=student_ids, assignment_id__in=assignment_ids):
-            # Use string keys to match JSON-deserialized types from import_data
-            existing_scores[(str(s.student_id), str(s.assignment_id))] = s.points
-
-    with signals_disabled(), transaction.atomic():
-        for item in import_data:
-            student_id = item['student_id']
-            assignment_id = item['assignment_id']
-            points = Decimal(item['points'])
-
-            old_value = existing_scores.get((student_id, assignment_id))
-
-            score, created = Score.objects.update_or_create(
-                student_id=student_id,
-                assignment_id=assignment_id,
-                defaults={'points': points}
-            )
-
-            # Track affected combos for batch recalculation
-            affected_combos.add((student_id, str(subject.id), str(current_term.id)))
-
-            # Audit log
-            ScoreAuditLog.objects.create(
-                score=score,
-                student_id=student_id,
-                assignment_id=assignment_id,
-                user=request.user,
-                action='CREATE' if created else 'UPDATE',
-                old_value=old_value,
-                new_value=points,
-                ip_address=client_ip,
-                user_agent=f"BULK_IMPORT: {user_agent[:240]}"
-            )
-
-            if created:
-                created_count += 1
-            else:
-                updated_count += 1
-
-    # Batch recalculate grades for all affected students after signals re-enabled
-    from ..signals import recalculate_subject_grade, recalculate_term_report
-    affected_student_ids = {combo[0] for combo in affected_combos}
-    student_map = {s.pk: s for s in Student.objects.filter(pk__in=affected_student_ids)}
-
-    for student_id, subj_id, term_id in affected_combos:
-        student_obj = student_map.get(student_id)
-        if student_obj:
-            recalculate_subject_grade(
-                student=student_obj,
-                subject=subject,
-                term=current_term
-            )
-
-    for student_id in affected_student_ids:
-        student_obj = student_map.get(student_id)
-        if student_obj:
-            recalculate_term_report(
-                student=student_obj,
-                term=current_term
-            )
-
-    # Clear cached import data
-    cache_key = request.session.pop('score_import_cache_key', '')
-    if cache_key:
-        django_cache.delete(cache_key)
+    # Clear the saved upload
+    request.session.pop('score_import', None)
+    score_import.remove_upload(pending['path'])
 
     return render(request, 'gradebook/partials/import_success.html', {
-        'created_count': created_count,
-        'updated_count': updated_count,
-        'total_count': created_count + updated_count,
+        'created_count': summary['created'],
+        'updated_count': summary['updated'],
+        'total_count': summary['created'] + summary['updated'],
         'class_obj': class_obj,
         'subject': subject,
     })
 
 
+@login_required
+@teacher_or_admin_required
+def score_import_bulk_upload(request):
+    """
+    Start a background import of a multi-class score template.
+
+    The workbook is saved to disk and streamed by import_score_workbook;
+    poll score_import_bulk_status with the returned task ID.
+    """
+    if request.method != 'POST':
+        return HttpResponse(status=405)
+
+    current_term = Term.get_current()
+    if not current_term:
+        return JsonResponse({'success': False, 'error': 'No current term set.'}, status=400)
+    if current_term.grades_locked:
+        return JsonResponse({'success': False, 'error': 'Grades are locked for this term.'}, status=400)
+
+    file = request.FILES.get('file')
+    if not file:
+        return JsonResponse({'success': False, 'error': 'No file uploaded.'}, status=400)
+    if file.size > config.SCORE_IMPORT_MAX_FILE_SIZE:
+        max_mb = config.SCORE_IMPORT_MAX_FILE_SIZE // (1024 * 1024)
+        return JsonResponse({'success': False, 'error': f'File too large. Maximum size is {max_mb}MB.'}, status=400)
+    if not file.name.endswith('.xlsx'):
+        return JsonResponse({'success': False, 'error': 'Please upload an Excel file (.xlsx).'}, status=400)
+
+    path = score_import.save_upload(file, connection.schema_name, request.user.pk)
+
+    from ..tasks import import_score_workbook
+
+    result = import_score_workbook.delay(
+        path, connection.schema_name, request.user.pk,
+        get_client_ip(request),
+        f"BULK_IMPORT: {request.META.get('HTTP_USER_AGENT', '')[:240]}",
+    )
+    return JsonResponse({'success': True, 'task_id': result.id})
+
+
+@login_required
+@teacher_or_admin_required
+def score_import_bulk_status(request, task_id):
+    """Poll Celery task status for a multi-class score import."""
+    from celery.result import AsyncResult
+
+    result = AsyncResult(task_id)
+    state = result.state
+
+    if state == 'PROGRESS':
+        meta = result.info or {}
+        return JsonResponse({
+            'state': 'PROGRESS',
+            'current': meta.get('current', 0),
+            'total': meta.get('total', 0),
+            'label': meta.get('label', ''),
+        })
+
+    if state == 'SUCCESS':
+        info = result.result or {}
+        if not info.get('success'):
+            return JsonResponse({
+                'state': 'FAILURE',
+                'error': info.get('error') or 'No scores could be imported.',
+                'html': render_to_string('gradebook/partials/import_bulk_result.html', {'result': info}),
+            })
+        return JsonResponse({
+            'state': 'SUCCESS',
+            'html': render_to_string('gradebook/partials/import_bulk_result.html', {'result': info}),
+        })
+
+    if state == 'FAILURE':
+        return JsonResponse({
+            'state': 'FAILURE',
+            'error': 'Score import failed. Please try again.',
+        })
+
+    # PENDING / STARTED / other
+    return JsonResponse({'state': state})
+
+
 # ============ Grade Export ============
 
 @login_required
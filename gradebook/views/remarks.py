@@ -1,17 +1,17 @@
 import json
 import logging
-import random
 
 from django.utils import timezone
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.db import transaction
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from django.contrib import messages
 from django.core.paginator import Paginator
 
 from .base import admin_required, htmx_render, is_school_admin
+from .. import config
 from ..models import RemarkTemplate, TermReport
+from ..remarks import REMARK_FIELDS, compile_active_templates, generate_remarks, save_remarks
 from academics.models import Class
 from students.models import Student
 from core.models import Term
@@ -113,6 +113,29 @@ def bulk_remarks_entry(request, class_id):
     )
 
 
+def _can_edit_remarks(user, students):
+    """Admins edit any student's remarks; class teachers only their class's."""
+    if is_school_admin(user):
+        return True
+    if not (getattr(user, 'is_teacher', False) and hasattr(user, 'teacher_profile')):
+        return False
+    teacher = user.teacher_profile
+    return all(
+        student.current_class and student.current_class.class_teacher_id == teacher.pk
+        for student in students
+    )
+
+
+def _validate_remark(field, value):
+    """Return an error message for an invalid remark edit, else None."""
+    if field not in REMARK_FIELDS:
+        return 'Invalid field'
+    max_length = REMARK_FIELDS[field]
+    if len(value) > max_length:
+        return f'Value must be {max_length} characters or less'
+    return None
+
+
 @login_required
 def bulk_remark_save(request):
     """Save individual student remark via HTMX (auto-save)."""
@@ -127,39 +150,16 @@ def bulk_remark_save(request):
     if not current_term:
         return HttpResponse('No current term', status=400)
 
-    # Field-specific max lengths matching model definitions
-    allowed_fields = {
-        'class_teacher_remark': 2000,   # TextField, apply reasonable limit
-        'conduct_rating': 100,          # CharField(max_length=100)
-        'attitude_rating': 100,         # CharField(max_length=100)
-        'interest_rating': 100,         # CharField(max_length=100)
-    }
-
-    if field not in allowed_fields:
-        return HttpResponse('Invalid field', status=400)
-
-    max_length = allowed_fields[field]
-    if len(value) > max_length:
-        return HttpResponse(f'Value must be {max_length} characters or less', status=400)
+    error = _validate_remark(field, value)
+    if error:
+        return HttpResponse(error, status=400)
 
     student = get_object_or_404(Student.objects.select_related('current_class'), pk=student_id)
 
-    # Permission check
-    user = request.user
-    if not is_school_admin(user):
-        if not (getattr(user, 'is_teacher', False) and hasattr(user, 'teacher_profile')):
-            return HttpResponse(status=403)
-        if not student.current_class or student.current_class.class_teacher != user.teacher_profile:
-            return HttpResponse(status=403)
+    if not _can_edit_remarks(request.user, [student]):
+        return HttpResponse(status=403)
 
-    with transaction.atomic():
-        term_report, created = TermReport.objects.get_or_create(
-            student=student,
-            term=current_term,
-            defaults={'out_of': 0}
-        )
-        setattr(term_report, field, value)
-        term_report.save(update_fields=[field])
+    save_remarks(current_term, {student.pk: {field: value}})
 
     response = HttpResponse(status=200)
     response['HX-Trigger'] = json.dumps({
@@ -171,6 +171,86 @@ def bulk_remark_save(request):
     return response
 
 
+@login_required
+def bulk_remark_save_batch(request):
+    """
+    Save many edited remarks in one request.
+
+    Expects a JSON body {"remarks": [{"student_id", "field", "value"}, ...]};
+    the last value for a student's field wins. Each edit gets the same
+    checks as bulk_remark_save; the valid ones are written with one
+    bulk_update and the rest are reported back.
+
+    Returns JSON {"saved": [student ids], "errors": [{"student_id",
+    "field", "error"}, ...]}.
+    """
+    if request.method != 'POST':
+        return HttpResponse(status=405)
+
+    try:
+        payload = json.loads(request.body or b'{}')
+        raw_remarks = payload['remarks']
+        if not isinstance(raw_remarks, list):
+            raise TypeError
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Expected a JSON body with a "remarks" list'}, status=400)
+
+    if len(raw_remarks) > config.REMARK_BATCH_MAX_ENTRIES:
+        return JsonResponse(
+            {'error': f'At most {config.REMARK_BATCH_MAX_ENTRIES} remarks per request'},
+            status=400
+        )
+
+    current_term = Term.get_current()
+    if not current_term:
+        return JsonResponse({'error': 'No current term'}, status=400)
+
+    errors = []
+
+    def reject(raw, error):
+        errors.append({
+            'student_id': str(raw.get('student_id') or ''),
+            'field': str(raw.get('field') or ''),
+            'error': error,
+        })
+
+    edits = {}
+    requested = []
+    for raw in raw_remarks:
+        raw = raw if isinstance(raw, dict) else {}
+        field = raw.get('field')
+        value = str(raw.get('value') or '').strip()
+        error = _validate_remark(field, value)
+        if error:
+            reject(raw, error)
+            continue
+        try:
+            student_pk = int(raw.get('student_id'))
+        except (ValueError, TypeError):
+            reject(raw, 'Missing student')
+            continue
+        edits.setdefault(student_pk, {})[field] = value
+        requested.append((student_pk, raw))
+
+    students = Student.objects.select_related('current_class').in_bulk(edits.keys())
+    for student_pk, raw in requested:
+        student = students.get(student_pk)
+        if student is None:
+            reject(raw, 'Student not found')
+        elif not _can_edit_remarks(request.user, [student]):
+            reject(raw, 'Not authorized to edit remarks for this student')
+        else:
+            continue
+        edits.pop(student_pk, None)
+
+    saved = save_remarks(current_term, edits)
+
+    return JsonResponse({
+        'saved': [str(report.student_id) for report in saved],
+        'errors': errors,
+    })
+
+
 @login_required
 def bulk_remarks_sign(request, class_id):
     """Sign off all remarks for a class (class teacher confirmation)."""
@@ -235,67 +315,20 @@ def bulk_remarks_generate(request, class_id):
 
     overwrite = request.POST.get('overwrite') == 'true'
 
-    # Get all term reports for this class
-    reports = TermReport.objects.filter(
+    if not TermReport.objects.filter(
         student__current_class=class_obj,
         student__status='active',
         term=current_term,
-    ).select_related('student')
-
-    if not reports.exists():
+    ).exists():
         return HttpResponse('No reports found. Calculate grades first.', status=400)
 
-    # Get active templates grouped by category
-    templates = list(RemarkTemplate.objects.filter(is_active=True))
-    templates_by_category = {}
-    for t in templates:
-        templates_by_category.setdefault(t.category, []).append(t)
-
+    templates = compile_active_templates()
     if not templates:
         return HttpResponse('No remark templates found. Create templates first.', status=400)
 
-    generated = 0
-    skipped = 0
-
-    with transaction.atomic():
-        for report in reports:
-            # Skip if already has a remark and not overwriting
-            if report.class_teacher_remark and not overwrite:
-                skipped += 1
-                continue
-
-            # Determine performance category based on average
-            avg = float(report.average) if report.average else 0
-            if avg >= 80:
-                category = 'EXCELLENT'
-            elif avg >= 60:
-                category = 'GOOD'
-            elif avg >= 50:
-                category = 'AVERAGE'
-            elif avg > 0:
-                category = 'NEEDS_IMPROVEMENT'
-            else:
-                continue  # No scores, skip
-
-            # Pick a template — prefer matching category, fall back to GENERAL
-            category_templates = templates_by_category.get(category, [])
-            if not category_templates:
-                category_templates = templates_by_category.get('GENERAL', [])
-            if not category_templates:
-                continue
-
-            template = random.choice(category_templates)
-
-            # Render with student context
-            context = {
-                'student_name': report.student.first_name,
-                'full_name': report.student.full_name,
-                'average': f'{avg:.1f}',
-                'position': str(report.position or '-'),
-            }
-            report.class_teacher_remark = template.render(context)
-            report.save(update_fields=['class_teacher_remark'])
-            generated += 1
+    result = generate_remarks(current_term, [class_obj.pk], overwrite=overwrite, templates=templates)
+    generated = result['generated']
+    skipped = result['skipped']
 
     response = HttpResponse(status=200)
     msg = f'Generated {generated} remark(s)'
@@ -308,6 +341,35 @@ def bulk_remarks_generate(request, class_id):
     return response
 
 
+@login_required
+@admin_required
+def school_remarks_generate(request):
+    """Queue remark generation for every class in the school (end of term)."""
+    if request.method != 'POST':
+        return HttpResponse(status=405)
+
+    current_term = Term.get_current()
+    if not current_term:
+        return HttpResponse('No current term', status=400)
+
+    from django.db import connection
+    from ..tasks import generate_school_remarks
+
+    overwrite = request.POST.get('overwrite') == 'true'
+    generate_school_remarks.delay(
+        connection.schema_name, str(current_term.pk), overwrite=overwrite
+    )
+
+    response = HttpResponse(status=200)
+    response['HX-Trigger'] = json.dumps({
+        'showToast': {
+            'message': 'Remark generation queued for all classes',
+            'type': 'success',
+        },
+    })
+    return response
+
+
 # ============ Remark Templates Management ============
 
 @login_required
@@ -795,6 +795,58 @@ def export_class_reports(request, class_id):
     return JsonResponse({'success': True, 'task_id': result.id})
 
 
+@login_required
+@teacher_or_admin_required
+def export_class_transcripts(request, class_id):
+    """Queue a Celery task to generate a ZIP of transcripts for a class.
+
+    Uses the report cards page's status filter; only admins can export
+    non-active (graduated, withdrawn) students.
+    """
+    if request.method != 'POST':
+        return HttpResponse(status=405)
+
+    class_obj = get_object_or_404(Class, pk=class_id)
+    user = request.user
+    status = request.GET.get('status', Student.Status.ACTIVE)
+
+    if not is_school_admin(user):
+        if not (getattr(user, 'is_teacher', False) and hasattr(user, 'teacher_profile')):
+            return JsonResponse({'success': False, 'error': 'Permission denied'})
+        if class_obj.class_teacher != user.teacher_profile or status != Student.Status.ACTIVE:
+            return JsonResponse({'success': False, 'error': 'Permission denied'})
+
+    if status not in Student.Status.values:
+        return JsonResponse({'success': False, 'error': 'Invalid status'})
+
+    from ..tasks import export_transcripts_zip
+    from django.db import connection
+
+    result = export_transcripts_zip.delay(
+        connection.schema_name, class_id=class_id, status=status, user_id=user.pk
+    )
+    return JsonResponse({'success': True, 'task_id': result.id})
+
+
+@login_required
+@admin_required
+def export_graduate_transcripts(request, academic_year_id):
+    """Queue a Celery task to generate a ZIP of transcripts for a graduating cohort."""
+    if request.method != 'POST':
+        return HttpResponse(status=405)
+
+    from core.models import AcademicYear
+    academic_year = get_object_or_404(AcademicYear, pk=academic_year_id)
+
+    from ..tasks import export_transcripts_zip
+    from django.db import connection
+
+    result = export_transcripts_zip.delay(
+        connection.schema_name, academic_year_id=str(academic_year.pk), user_id=request.user.pk
+    )
+    return JsonResponse({'success': True, 'task_id': result.id})
+
+
 @login_required
 @teacher_or_admin_required
 def check_export_status(request, task_id):
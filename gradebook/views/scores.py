@@ -2,21 +2,23 @@ from collections import defaultdict
 from decimal import Decimal
 import json
 import logging
+import uuid
 
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import Http404, HttpResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.db import transaction
+from django.utils import timezone
 
 from .base import (
     teacher_or_admin_required, htmx_render, is_school_admin,
     can_edit_scores, get_client_ip, admin_required, ratelimit
 )
 from ..models import (
-    AssessmentCategory, Assignment, Score, ScoreAuditLog
+    AssessmentCategory, Assignment, Score, ScoreAuditLog, SubjectTermGrade
 )
 from ..utils import validate_score
-from .. import config
+from .. import audit_log, config
 from academics.models import Class, Subject, ClassSubject, StudentSubjectEnrollment
 from students.models import Student
 from core.models import Term
@@ -65,6 +67,40 @@ def _build_error_response(
     return response
 
 
+def _build_success_response(request, student, assignment) -> HttpResponse:
+    """
+    Build the response for a successful score save or delete.
+
+    Subject grades are normally recalculated in the background (see
+    recalc_queue). When the client posts fresh=1 the grade is recalculated
+    now and its new total is sent back via a scoreTotals HX-Trigger, so the
+    UI can show read-your-writes totals.
+    """
+    response = HttpResponse(status=200)
+    if request.POST.get('fresh') != '1':
+        return response
+
+    from ..recalc_queue import recalculate_now
+
+    try:
+        grade = recalculate_now(student.pk, assignment.subject_id, assignment.term_id)
+    except Exception as e:
+        # The score itself is saved; the queued recalculation will catch up.
+        logger.error(f"Error recalculating grade for student {student.pk}: {e}")
+        return response
+
+    total = grade.total_score if grade else None
+    response['HX-Trigger'] = json.dumps({
+        'scoreTotals': {
+            'student': str(student.pk),
+            'subject': str(assignment.subject_id),
+            'total': float(total) if total is not None else None,
+            'grade': grade.grade if grade else '',
+        }
+    })
+    return response
+
+
 def _get_score_entry_base_context(request, class_id, subject_id):
     """
     Shared helper to build base context for score entry views.
@@ -168,11 +204,21 @@ def score_entry(request):
 
     class_options = [(c.pk, c.name) for c in classes]
 
+    # Admins pick a subject for the multi-class import template
+    bulk_subject_options = []
+    if is_school_admin(user):
+        bulk_subject_options = [
+            (s.pk, s.name) for s in Subject.objects.filter(
+                class_allocations__class_assigned__is_active=True
+            ).distinct().order_by('name')
+        ]
+
     context = {
         'current_term': current_term,
         'classes': classes,
         'class_options': class_options,
         'subject_options': [],
+        'bulk_subject_options': bulk_subject_options,
         'is_admin': is_school_admin(request.user),
         # Navigation
         'breadcrumbs': [
@@ -287,6 +333,9 @@ def score_entry_student(request, class_id, subject_id, student_id):
     context['feedback_dict'] = feedback_dict
     context['total_assignments'] = total_assignments
     context['filled_scores'] = filled_scores
+    context['subject_grade'] = SubjectTermGrade.objects.filter(
+        student=student, subject=context['subject'], term=context['current_term']
+    ).only('total_score', 'grade').first()
 
     return htmx_render(
         request,
@@ -389,9 +438,8 @@ def score_save(request):
     if points == '':
         try:
             with transaction.atomic():
-                # Re-check grade lock inside transaction with row lock
-                term = Term.objects.select_for_update().get(pk=assignment.term_id)
-                if term.grades_locked:
+                # Re-check grade lock inside transaction (shared row lock)
+                if Term.locked_for_score_writes([assignment.term_id]):
                     return _build_error_response(
                         message="Grades are locked for this term",
                         student_id=student_id,
@@ -403,7 +451,7 @@ def score_save(request):
 
                 if existing_score:
                     # Log deletion first
-                    ScoreAuditLog.objects.create(
+                    audit_log.record([ScoreAuditLog(
                         score=None,
                         student=student,
                         assignment=assignment,
@@ -413,11 +461,11 @@ def score_save(request):
                         new_value=None,
                         ip_address=client_ip,
                         user_agent=user_agent
-                    )
+                    )])
                     existing_score.delete()
 
             # Success - return 200 with no error trigger
-            return HttpResponse(status=200)
+            return _build_success_response(request, student, assignment)
 
         except Exception as e:
             logger.error(f"Error deleting score for student {student_id}, assignment {assignment_id}: {e}")
@@ -451,9 +499,9 @@ def score_save(request):
     # Save score with transaction handling and race condition protection
     try:
         with transaction.atomic():
-            # Re-check grade lock inside transaction with row lock to prevent race condition
-            term = Term.objects.select_for_update().get(pk=assignment.term_id)
-            if term.grades_locked:
+            # Re-check grade lock inside transaction. The shared row lock
+            # can't race with lock_grades() but doesn't serialize writers.
+            if Term.locked_for_score_writes([assignment.term_id]):
                 return _build_error_response(
                     message="Grades are locked for this term",
                     student_id=student_id,
@@ -470,7 +518,7 @@ def score_save(request):
             )
 
             # Log the change
-            ScoreAuditLog.objects.create(
+            audit_log.record([ScoreAuditLog(
                 score=score,
                 student=student,
                 assignment=assignment,
@@ -480,10 +528,10 @@ def score_save(request):
                 new_value=points_decimal,
                 ip_address=client_ip,
                 user_agent=user_agent
-            )
+            )])
 
         # Success response
-        return HttpResponse(status=200)
+        return _build_success_response(request, student, assignment)
 
     except Exception as e:
         logger.error(f"Error saving score for student {student_id}, assignment {assignment_id}: {e}")
@@ -497,6 +545,259 @@ def score_save(request):
         )
 
 
+def _batch_error(entry, message, error_code, hint='', max_value=None):
+    """Per-cell error for score_save_batch, mirroring _build_error_response."""
+    error = {
+        'student_id': entry['student_id'],
+        'assignment_id': entry['assignment_id'],
+        'message': message,
+        'code': error_code,
+        'hint': hint,
+    }
+    if max_value is not None:
+        error['max'] = max_value
+    return error
+
+
+@login_required
+@teacher_or_admin_required
+@ratelimit(key='user', rate='200/h')
+def score_save_batch(request):
+    """
+    Save many score cells in one request.
+
+    Expects a JSON body {"scores": [{"student_id", "assignment_id",
+    "points"}, ...]}; an empty points value deletes the score. Cells get the
+    same checks as score_save (enrollment, authorization, grade lock,
+    validate_score) but are looked up together, written with bulk
+    operations in one transaction and audited with one bulk insert. Each
+    affected subject grade is queued for recalculation once.
+
+    Returns JSON {"saved", "deleted", "unchanged", "errors"}, where errors
+    lists the rejected cells with the same codes as score_save. If the
+    write itself fails nothing is saved and the response is a 500.
+    """
+    from ..recalc_queue import mark_stale_many
+    from ..score_progress import recount_for_scores
+    from ..signals import _invalidate_report_pdfs, signals_disabled
+
+    if request.method != 'POST':
+        return HttpResponse(status=405)
+
+    try:
+        payload = json.loads(request.body or b'{}')
+        raw_entries = payload['scores']
+        if not isinstance(raw_entries, list):
+            raise TypeError
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Expected a JSON body with a "scores" list'}, status=400)
+
+    if len(raw_entries) > config.SCORE_BATCH_MAX_ENTRIES:
+        return JsonResponse(
+            {'error': f'At most {config.SCORE_BATCH_MAX_ENTRIES} scores per request'},
+            status=400
+        )
+
+    errors = []
+
+    # Normalise and deduplicate; the last value for a cell wins
+    entries = {}
+    for raw in raw_entries:
+        raw = raw if isinstance(raw, dict) else {}
+        entry = {
+            'student_id': str(raw.get('student_id') or ''),
+            'assignment_id': str(raw.get('assignment_id') or ''),
+            'points': str(raw.get('points') if raw.get('points') is not None else '').strip(),
+        }
+        try:
+            student_pk = int(entry['student_id'])
+            assignment_pk = uuid.UUID(entry['assignment_id'])
+        except ValueError:
+            errors.append(_batch_error(
+                entry, "Missing required data", 'missing_data',
+                "Please refresh the page and try again"
+            ))
+            continue
+        entries[(student_pk, assignment_pk)] = entry
+
+    students = Student.objects.select_related('current_class').in_bulk(
+        {student_pk for student_pk, _ in entries}
+    )
+    assignments = Assignment.objects.select_related('term', 'subject').in_bulk(
+        {assignment_pk for _, assignment_pk in entries}
+    )
+
+    class_ids = {s.current_class_id for s in students.values() if s.current_class_id}
+    subject_ids = {a.subject_id for a in assignments.values()}
+    class_subjects = {
+        (cs.class_assigned_id, cs.subject_id): cs
+        for cs in ClassSubject.objects.filter(
+            class_assigned_id__in=class_ids, subject_id__in=subject_ids
+        )
+    }
+    enrolled = set(StudentSubjectEnrollment.objects.filter(
+        student_id__in=students.keys(),
+        class_subject__in=class_subjects.values(),
+        is_active=True,
+    ).values_list('student_id', 'class_subject_id'))
+
+    # Same rule as can_edit_scores, using the ClassSubjects fetched above
+    is_admin = request.user.is_superuser or getattr(request.user, 'is_school_admin', False)
+    teacher = getattr(request.user, 'teacher_profile', None)
+
+    # Validate each cell against the prefetched data
+    valid = []
+    for key, entry in entries.items():
+        student = students.get(key[0])
+        assignment = assignments.get(key[1])
+        if student is None or assignment is None:
+            errors.append(_batch_error(
+                entry, "Invalid request", 'invalid_request',
+                "Please refresh the page and try again"
+            ))
+            continue
+
+        class_subject = class_subjects.get((student.current_class_id, assignment.subject_id))
+        if not class_subject or (student.pk, class_subject.pk) not in enrolled:
+            errors.append(_batch_error(
+                entry, "Student is not enrolled in this subject", 'not_enrolled',
+                "Ensure the student is enrolled in this subject for the current term"
+            ))
+            continue
+
+        if not is_admin and not (teacher and class_subject.teacher_id == teacher.pk):
+            errors.append(_batch_error(
+                entry, "Not authorized to edit scores for this subject", 'unauthorized',
+                "Contact your administrator if you need access"
+            ))
+            continue
+
+        points_decimal = None
+        if entry['points'] != '':
+            points_decimal, validation_error = validate_score(
+                value=entry['points'],
+                max_points=assignment.points_possible,
+                allow_empty=False
+            )
+            if validation_error:
+                errors.append(_batch_error(
+                    entry, validation_error.message, validation_error.error_code,
+                    validation_error.hint, float(assignment.points_possible)
+                ))
+                continue
+
+        valid.append((entry, student, assignment, points_decimal))
+
+    client_ip = get_client_ip(request)
+    user_agent = request.META.get('HTTP_USER_AGENT', '')[:255]
+    counts = {'saved': 0, 'deleted': 0, 'unchanged': 0}
+    affected = set()
+
+    try:
+        with transaction.atomic():
+            # Re-check grade locks inside the transaction (shared row locks)
+            locked_terms = Term.locked_for_score_writes(
+                {assignment.term_id for _, _, assignment, _ in valid}
+            )
+
+            # Lock existing rows so the audited old values are the ones replaced
+            existing_scores = {
+                (score.student_id, score.assignment_id): score
+                for score in Score.objects.select_for_update().filter(
+                    student_id__in={student.pk for _, student, _, _ in valid},
+                    assignment_id__in={assignment.pk for _, _, assignment, _ in valid},
+                ).order_by('pk')
+            }
+
+            now = timezone.now()
+            to_create, to_update, to_delete, audit_logs = [], [], [], []
+            for entry, student, assignment, points_decimal in valid:
+                if assignment.term_id in locked_terms:
+                    errors.append(_batch_error(
+                        entry, "Grades are locked for this term", 'grades_locked',
+                        "Contact admin to unlock grades if needed"
+                    ))
+                    continue
+
+                existing = existing_scores.get((student.pk, assignment.pk))
+                old_value = existing.points if existing else None
+                if points_decimal is None and existing is None:
+                    counts['unchanged'] += 1
+                    continue
+                if existing is not None and points_decimal == old_value:
+                    counts['unchanged'] += 1
+                    continue
+
+                if points_decimal is None:
+                    to_delete.append(existing.pk)
+                    action, score = 'DELETE', None
+                    counts['deleted'] += 1
+                elif existing is None:
+                    score = Score(student=student, assignment=assignment, points=points_decimal)
+                    to_create.append(score)
+                    action = 'CREATE'
+                    counts['saved'] += 1
+                else:
+                    score = existing
+                    score.points = points_decimal
+                    score.updated_at = now
+                    to_update.append(score)
+                    action = 'UPDATE'
+                    counts['saved'] += 1
+
+                audit_logs.append(ScoreAuditLog(
+                    score=score,
+                    student=student,
+                    assignment=assignment,
+                    user=request.user,
+                    action=action,
+                    old_value=old_value,
+                    new_value=points_decimal,
+                    ip_address=client_ip,
+                    user_agent=user_agent
+                ))
+                affected.add((student.pk, assignment.subject_id, assignment.term_id))
+
+            # Signals are disabled: recalculation is queued once per
+            # affected subject grade below instead of once per score.
+            with signals_disabled():
+                if to_delete:
+                    Score.objects.filter(pk__in=to_delete).delete()
+                if to_create:
+                    # A cell created by a concurrent score_save since the
+                    # read above is overwritten rather than failing the batch
+                    Score.objects.bulk_create(
+                        to_create, batch_size=config.BULK_UPDATE_BATCH_SIZE,
+                        update_conflicts=True, unique_fields=['student', 'assignment'],
+                        update_fields=['points', 'updated_at'],
+                    )
+                    for log in audit_logs:
+                        if log.action == 'CREATE':
+                            log.score_id = log.score.pk
+                if to_update:
+                    Score.objects.bulk_update(
+                        to_update, ['points', 'updated_at'],
+                        batch_size=config.BULK_UPDATE_BATCH_SIZE
+                    )
+            audit_log.record(audit_logs)
+
+            if affected:
+                recount_for_scores(affected)
+                transaction.on_commit(lambda: mark_stale_many(affected))
+                for student_id, term_id in {(s, t) for s, _, t in affected}:
+                    _invalidate_report_pdfs(student_id, term_id)
+
+    except Exception as e:
+        # Nothing was written; a 5xx tells clients (the offline queue) to
+        # keep the batch and retry it rather than treat it as handled
+        logger.error(f"Error saving score batch: {e}")
+        return JsonResponse({
+            'error': 'Error saving scores. Please try again. If the problem persists, contact support.'
+        }, status=500)
+
+    return JsonResponse({**counts, 'errors': errors})
+
+
 # ============ Score Feedback ============
 
 @login_required
@@ -560,15 +861,21 @@ def score_audit_history(request, student_id, assignment_id):
     student = get_object_or_404(Student, pk=student_id)
     assignment = get_object_or_404(Assignment, pk=assignment_id)
 
-    logs = ScoreAuditLog.objects.filter(
-        student=student,
-        assignment=assignment
-    ).select_related('user').order_by('-created_at')[:config.AUDIT_LOG_DISPLAY_LIMIT]
+    # Keyset pagination: ?before=<cursor> pages to older entries
+    logs, next_cursor = audit_log.paginate(
+        ScoreAuditLog.objects.filter(
+            student=student,
+            assignment=assignment
+        ).select_related('user'),
+        cursor=request.GET.get('before'),
+    )
 
     return render(request, 'gradebook/partials/score_audit_history.html', {
         'student': student,
         'assignment': assignment,
         'logs': logs,
+        'next_cursor': next_cursor,
+        'is_older_page': bool(request.GET.get('before')),
     })
 
 
@@ -589,19 +896,25 @@ def score_changes_list(request, class_id, subject_id):
     # Get all students in this class
     students = Student.objects.filter(current_class=class_obj)
 
-    # Get all score changes for these students and assignments
-    logs = ScoreAuditLog.objects.filter(
-        student__in=students,
-        assignment__in=assignments
-    ).select_related(
-        'student', 'assignment', 'assignment__assessment_category', 'user'
-    ).order_by('-created_at')[:100]  # Limit to last 100 changes
+    # Get score changes for these students and assignments, 100 per page
+    logs, next_cursor = audit_log.paginate(
+        ScoreAuditLog.objects.filter(
+            student__in=students,
+            assignment__in=assignments
+        ).select_related(
+            'student', 'assignment', 'assignment__assessment_category', 'user'
+        ),
+        cursor=request.GET.get('before'),
+        limit=100,
+    )
 
     return render(request, 'gradebook/partials/score_changes_list.html', {
         'class_obj': class_obj,
         'subject': subject,
         'current_term': current_term,
         'logs': logs,
+        'next_cursor': next_cursor,
+        'is_older_page': bool(request.GET.get('before')),
     })
 
 
@@ -9,10 +9,9 @@ from django.db import IntegrityError
 from django.contrib import messages
 
 from .base import htmx_render
+from ..transcripts import get_academic_history
 from ..utils import (
     check_transcript_permission,
-    get_transcript_data,
-    build_academic_history,
     get_school_context,
 )
 from students.models import Student
@@ -65,23 +64,12 @@ def transcript(request, student_id):
     if denied:
         return denied
 
-    term_reports, all_grades, grades_by_term = get_transcript_data(student)
-    history_data = build_academic_history(term_reports, grades_by_term, include_all_grades=True)
-
-    promotion_history = term_reports.filter(promoted__isnull=False).values(
-        'term__academic_year__name',
-        'term__name',
-        'promoted',
-        'promoted_to__name',
-        'promotion_remarks'
-    )
-
+    history_data = get_academic_history(student, include_all_grades=True)
     school_ctx = get_school_context()
 
     context = {
         'student': student,
         'academic_history': history_data['academic_history'],
-        'term_reports': term_reports,
         'cumulative_stats': {
             'total_terms': history_data['term_count'],
             'total_subjects_taken': history_data['total_subjects_taken'],
@@ -90,7 +78,7 @@ def transcript(request, student_id):
             'cumulative_average': history_data['cumulative_average'],
             'unique_subjects': len(history_data['unique_subjects']),
         },
-        'promotion_history': list(promotion_history),
+        'promotion_history': history_data['promotion_history'],
         'school': school_ctx['school'],
         'breadcrumbs': [
             {'label': 'Home', 'url': '/', 'icon': 'fa-solid fa-home'},
@@ -120,8 +108,7 @@ def transcript_print(request, student_id):
     if denied:
         return denied
 
-    term_reports, _, grades_by_term = get_transcript_data(student)
-    history_data = build_academic_history(term_reports, grades_by_term)
+    history_data = get_academic_history(student)
     school_ctx = get_school_context()
     verification, qr_code_base64 = _create_transcript_verification(student, request.user, request)
 
@@ -152,41 +139,36 @@ def download_transcript_pdf(request, student_id):
     if denied:
         return denied
 
-    term_reports, _, grades_by_term = get_transcript_data(student)
+    history_data = get_academic_history(student)
 
-    if not term_reports.exists():
+    if not history_data['academic_history']:
         messages.error(request, 'No academic records found for this student.')
         return redirect('gradebook:reports')
 
-    history_data = build_academic_history(term_reports, grades_by_term)
-    school_ctx = get_school_context(include_logo_base64=True)
+    school = get_school_context()['school']
     verification, qr_code_base64 = _create_transcript_verification(student, request.user, request)
 
-    context = {
-        'student': student,
-        'academic_history': history_data['academic_history'],
-        'cumulative_average': history_data['cumulative_average'],
-        'total_terms': history_data['term_count'],
-        'total_credits': history_data['total_credits'],
-        'generated_date': timezone.now(),
-        'request': request,
-        'school': school_ctx['school'],
-        'logo_base64': school_ctx['logo_base64'],
-        'verification': verification,
-        'qr_code_base64': qr_code_base64,
-    }
-
     try:
-        from weasyprint import HTML
-        from django.template.loader import render_to_string
-        from django.conf import settings as django_settings
-        from io import BytesIO
-
-        html_string = render_to_string('gradebook/transcript_pdf.html', context)
-        html = HTML(string=html_string, base_url=str(django_settings.BASE_DIR))
-        pdf_buffer = BytesIO()
-        html.write_pdf(pdf_buffer)
-        pdf_buffer.seek(0)
+        from core.pdf import branding_assets, render_pdf
+
+        context = {
+            'student': student,
+            'academic_history': history_data['academic_history'],
+            'cumulative_average': history_data['cumulative_average'],
+            'total_terms': history_data['term_count'],
+            'total_credits': history_data['total_credits'],
+            'generated_date': timezone.now(),
+            'request': request,
+            'school': school,
+            'logo_base64': branding_assets(school)['logo_base64'],
+            'verification': verification,
+            'qr_code_base64': qr_code_base64,
+        }
+
+        pdf_buffer = render_pdf(
+            'gradebook/transcript_pdf.html', context,
+            stylesheet='gradebook/transcript_pdf.css', school=school,
+        )
 
         response = HttpResponse(pdf_buffer.getvalue(), content_type='application/pdf')
         response['Content-Disposition'] = f'attachment; filename="transcript_{student.admission_number}.pdf"'
@@ -0,0 +1,96 @@
+"""
+Bulk guardian contact lookup for notification senders.
+
+Senders used to call student.get_primary_guardian() per student, one
+query each (two when guardian_phone was read separately).
+get_guardian_contacts() resolves the primary guardian's name, phone,
+email and notification preference for any number of students with one
+query, and keeps the result in the cache per tenant and student.
+
+Guardian and StudentGuardian saves and deletes drop the affected entries
+(see students/signals.py). Bulk writes skip those signals, so entries also
+expire after CACHE_TIMEOUT.
+"""
+from django.core.cache import cache
+from django.db import connection, transaction
+
+CACHE_TIMEOUT = 6 * 60 * 60  # 6 hours
+
+# Cached for students without a primary guardian (None is a cache miss)
+_NO_GUARDIAN = {}
+
+
+def _cache_key(schema_name, student_id):
+    return f'guardian_contact_{schema_name}_{student_id}'
+
+
+def get_guardian_contacts(student_ids):
+    """
+    Primary guardian contacts for many students.
+
+    Returns:
+        dict mapping student_id to {'guardian_id', 'name', 'phone', 'email',
+        'notification_preference'}, or None without a primary guardian
+    """
+    schema_name = connection.schema_name
+    keys = {student_id: _cache_key(schema_name, student_id) for student_id in set(student_ids)}
+    if not keys:
+        return {}
+
+    cached = cache.get_many(keys.values())
+    contacts = {}
+    missing = []
+    for student_id, key in keys.items():
+        if key in cached:
+            contacts[student_id] = cached[key] or None
+        else:
+            missing.append(student_id)
+
+    if missing:
+        from .models import StudentGuardian
+
+        found = {}
+        for student_id, guardian_id, name, phone, email, preference in StudentGuardian.objects.filter(
+            student_id__in=missing, is_primary=True
+        ).order_by('-guardian__full_name').values_list(
+            'student_id', 'guardian_id', 'guardian__full_name', 'guardian__phone_number',
+            'guardian__email', 'guardian__notification_preference',
+        ):
+            # Reverse name order, so the first by name wins as in get_primary_guardian
+            found[student_id] = {
+                'guardian_id': guardian_id,
+                'name': name,
+                'phone': phone or None,
+                'email': email or None,
+                'notification_preference': preference,
+            }
+        cache.set_many(
+            {keys[student_id]: found.get(student_id, _NO_GUARDIAN) for student_id in missing},
+            CACHE_TIMEOUT,
+        )
+        for student_id in missing:
+            contacts[student_id] = found.get(student_id)
+
+    return contacts
+
+
+def get_guardian_contact(student):
+    """Primary guardian contact for one student (see get_guardian_contacts)."""
+    return get_guardian_contacts([student.pk]).get(student.pk)
+
+
+def invalidate(student_ids):
+    """Drop cached contacts of the given students once the transaction commits."""
+    schema_name = connection.schema_name
+    keys = [_cache_key(schema_name, student_id) for student_id in set(student_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_guardian(guardian_id):
+    """Drop cached contacts of every student linked to a guardian."""
+    from .models import StudentGuardian
+
+    invalidate(
+        StudentGuardian.objects.filter(guardian_id=guardian_id).values_list('student_id', flat=True)
+    )
@@ -1,7 +1,7 @@
 """Signals for the students app."""
 import logging
 from django.db import transaction
-from django.db.models.signals import post_delete
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 logger = logging.getLogger(__name__)
@@ -37,3 +37,23 @@ def reassign_primary_guardian(sender, instance, **kwargs):
             f"Failed to reassign primary guardian for student {instance.student_id}",
             exc_info=True
         )
+
+
+@receiver(post_save, sender='students.StudentGuardian')
+@receiver(post_delete, sender='students.StudentGuardian')
+def invalidate_student_guardian_contact(sender, instance, **kwargs):
+    """Drop the student's cached guardian contact (see students/contacts.py)."""
+    from students.contacts import invalidate
+
+    invalidate([instance.student_id])
+
+
+@receiver(post_save, sender='students.Guardian')
+def invalidate_guardian_contacts(sender, instance, created, **kwargs):
+    """Drop the cached contacts of the guardian's students."""
+    if created:
+        return  # No students linked yet
+
+    from students.contacts import invalidate_guardian
+
+    invalidate_guardian(instance.pk)
@@ -3,7 +3,6 @@ import logging
 from celery import shared_task
 from django.db.models import Q
 from django.utils import timezone
-from django_tenants.utils import schema_context
 
 logger = logging.getLogger(__name__)
 
@@ -17,96 +16,83 @@ def check_overdue_exeats(self):
 
     Recommended schedule: every 30 minutes via django-celery-beat DatabaseScheduler.
     """
-    from schools.models import School
+    from core.tasks import fan_out_to_tenants
 
-    tenants = School.objects.exclude(schema_name='public')
+    return fan_out_to_tenants(self, 'students.tasks._check_overdue_exeats_for_tenant')
 
-    for tenant in tenants:
+
+def _check_overdue_exeats_for_tenant(tenant):
+    """Mark a tenant's overdue exeats and notify their guardians."""
+    from students.models import Exeat
+
+    now = timezone.now()
+    today = now.date()
+    current_time = now.time()
+
+    # Find active/approved exeats past their expected return (DB-level filter)
+    overdue_exeats = list(Exeat.objects.filter(
+        status__in=[Exeat.Status.ACTIVE, Exeat.Status.APPROVED],
+    ).filter(
+        Q(expected_return_date__lt=today) |
+        Q(expected_return_date=today, expected_return_time__lt=current_time)
+    ).select_related('student'))
+
+    if not overdue_exeats:
+        return {'overdue': 0, 'notified': 0}
+
+    # Bulk update status to overdue
+    overdue_ids = [e.pk for e in overdue_exeats]
+    Exeat.objects.filter(pk__in=overdue_ids).update(
+        status=Exeat.Status.OVERDUE,
+    )
+
+    logger.info(
+        f"[{tenant.schema_name}] Marked {len(overdue_ids)} exeat(s) as overdue"
+    )
+
+    # Primary guardian contacts for all overdue students in one lookup
+    from communications.utils import send_sms
+    from students.contacts import get_guardian_contacts
+
+    to_notify = [e for e in overdue_exeats if not e.guardian_notified_overdue]
+    contacts = get_guardian_contacts([e.student_id for e in to_notify])
+
+    # Send SMS notifications for exeats not yet notified
+    notified_ids = []
+    for exeat in to_notify:
         try:
-            with schema_context(tenant.schema_name):
-                from students.models import Exeat
-
-                now = timezone.now()
-                today = now.date()
-                current_time = now.time()
-
-                # Find active/approved exeats past their expected return (DB-level filter)
-                overdue_exeats = list(Exeat.objects.filter(
-                    status__in=[Exeat.Status.ACTIVE, Exeat.Status.APPROVED],
-                ).filter(
-                    Q(expected_return_date__lt=today) |
-                    Q(expected_return_date=today, expected_return_time__lt=current_time)
-                ).select_related('student'))
-
-                if not overdue_exeats:
-                    continue
-
-                # Bulk update status to overdue
-                overdue_ids = [e.pk for e in overdue_exeats]
-                Exeat.objects.filter(pk__in=overdue_ids).update(
-                    status=Exeat.Status.OVERDUE,
-                )
-
-                logger.info(
-                    f"[{tenant.schema_name}] Marked {len(overdue_ids)} exeat(s) as overdue"
-                )
-
-                # Prefetch primary guardians for all overdue students (avoid N+1)
-                from students.models import StudentGuardian
-                overdue_student_ids = [e.student_id for e in overdue_exeats]
-                guardian_map = {}
-                for sg in StudentGuardian.objects.filter(
-                    student_id__in=overdue_student_ids, is_primary=True
-                ).select_related('guardian'):
-                    guardian_map[sg.student_id] = sg.guardian
-
-                # Set cache on each student to prevent extra queries
-                for exeat in overdue_exeats:
-                    exeat.student._cached_primary_guardian = guardian_map.get(
-                        exeat.student_id
-                    )
-
-                # Send SMS notifications for exeats not yet notified
-                for exeat in overdue_exeats:
-                    if exeat.guardian_notified_overdue:
-                        continue
-
-                    try:
-                        guardian = guardian_map.get(exeat.student_id)
-                        if not guardian or not guardian.phone_number:
-                            continue
-
-                        from communications.utils import send_sms
-
-                        message = (
-                            f"{tenant.name}: ALERT - {exeat.student.full_name} has not "
-                            f"returned from exeat. Expected return was "
-                            f"{exeat.expected_return_date.strftime('%d/%m/%Y')} "
-                            f"at {exeat.expected_return_time.strftime('%H:%M')}. "
-                            f"Please contact the school immediately."
-                        )
-
-                        send_sms(
-                            to_phone=guardian.phone_number,
-                            message=message,
-                            student=exeat.student,
-                            message_type='exeat',
-                        )
-
-                        Exeat.objects.filter(pk=exeat.pk).update(
-                            guardian_notified_overdue=True,
-                        )
-                        logger.info(
-                            f"[{tenant.schema_name}] Overdue SMS sent for "
-                            f"{exeat.student.full_name} to {guardian.phone_number}"
-                        )
-                    except Exception as e:
-                        logger.error(
-                            f"[{tenant.schema_name}] Failed to send overdue SMS "
-                            f"for exeat {exeat.pk}: {e}"
-                        )
+            contact = contacts.get(exeat.student_id)
+            if not contact or not contact['phone']:
+                continue
+
+            message = (
+                f"{tenant.name}: ALERT - {exeat.student.full_name} has not "
+                f"returned from exeat. Expected return was "
+                f"{exeat.expected_return_date.strftime('%d/%m/%Y')} "
+                f"at {exeat.expected_return_time.strftime('%H:%M')}. "
+                f"Please contact the school immediately."
+            )
+
+            send_sms(
+                to_phone=contact['phone'],
+                message=message,
+                student=exeat.student,
+                message_type='exeat',
+                recipient_name=contact['name'],
+            )
 
+            notified_ids.append(exeat.pk)
+            logger.info(
+                f"[{tenant.schema_name}] Overdue SMS sent for "
+                f"{exeat.student.full_name} to {contact['phone']}"
+            )
         except Exception as e:
             logger.error(
-                f"[{tenant.schema_name}] Error checking overdue exeats: {e}"
+                f"[{tenant.schema_name}] Failed to send overdue SMS "
+                f"for exeat {exeat.pk}: {e}"
             )
+
+    if notified_ids:
+        Exeat.objects.filter(pk__in=notified_ids).update(guardian_notified_overdue=True)
+
+    return {'overdue': len(overdue_ids), 'notified': len(notified_ids)}
@@ -1248,3 +1248,58 @@ class PromotionIntegrationTests(PromotionTestCase):
         self.assertFalse(
             Enrollment.objects.filter(student=student3, academic_year=self.next_year).exists()
         )
+
+
+class GuardianContactTests(TenantTestCase):
+    """students.contacts resolves primary guardian contacts for many
+    students in one query and drops cached contacts when they change."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from students.contacts import _cache_key
+
+        super().setUp()
+        self.students = []
+        for i in range(3):
+            student = Student.objects.create(
+                first_name=f'Kid{i}', last_name='Contact', date_of_birth=date(2012, 1, 1),
+                admission_number=f'GC-{i}', admission_date=date(2024, 9, 1),
+            )
+            self.students.append(student)
+        self.guardian = Guardian.objects.create(
+            full_name='Akosua Mensah', phone_number='233241110000', email='akosua@example.com',
+        )
+        for student in self.students[:2]:
+            student.add_guardian(self.guardian, Guardian.Relationship.MOTHER, is_primary=True)
+        # Entries from earlier runs may share student ids
+        cache.delete_many([_cache_key(self.tenant.schema_name, s.pk) for s in self.students])
+
+    def test_contacts_resolved_in_one_query_then_cached(self):
+        from students.contacts import get_guardian_contacts
+
+        ids = [s.pk for s in self.students]
+        with self.assertNumQueries(1):
+            contacts = get_guardian_contacts(ids)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_guardian_contacts(ids), contacts)
+
+        self.assertEqual(contacts[self.students[0].pk]['phone'], '233241110000')
+        self.assertEqual(contacts[self.students[1].pk]['email'], 'akosua@example.com')
+        self.assertIsNone(contacts[self.students[2].pk])
+
+    def test_guardian_change_invalidates_cached_contacts(self):
+        from students.contacts import get_guardian_contact
+
+        student = self.students[0]
+        self.assertEqual(get_guardian_contact(student)['name'], 'Akosua Mensah')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.guardian.phone_number = '233241119999'
+            self.guardian.save()
+        self.assertEqual(get_guardian_contact(student)['phone'], '233241119999')
+
+        orphan = self.students[2]
+        self.assertIsNone(get_guardian_contact(orphan))
+        with self.captureOnCommitCallbacks(execute=True):
+            orphan.add_guardian(self.guardian, Guardian.Relationship.FATHER, is_primary=True)
+        self.assertEqual(get_guardian_contact(orphan)['guardian_id'], self.guardian.pk)
@@ -84,10 +84,11 @@ def send_exeat_approval_sms(exeat, user=None):
     """
     try:
         from communications.utils import send_sms, get_sms_gateway_status
+        from students.contacts import get_guardian_contact
         from communications.models import SMSMessage
 
         student = exeat.student
-        guardian = student.get_primary_guardian()
+        guardian = get_guardian_contact(student)
 
         # Validate guardian exists
         if not guardian:
@@ -95,17 +96,17 @@ def send_exeat_approval_sms(exeat, user=None):
             return SMSResult(SMSResult.NO_GUARDIAN)
 
         # Validate guardian has phone
-        if not guardian.phone_number:
-            logger.warning(f"Guardian {guardian.full_name} has no phone - skipping SMS")
+        if not guardian['phone']:
+            logger.warning(f"Guardian {guardian['name']} has no phone - skipping SMS")
             return SMSResult(SMSResult.NO_PHONE)
 
         # Check guardian notification preference
-        pref = getattr(guardian, 'notification_preference', 'sms')
+        pref = guardian['notification_preference'] or 'sms'
         if pref == 'none':
-            logger.info(f"Guardian {guardian.full_name} opted out of notifications")
+            logger.info(f"Guardian {guardian['name']} opted out of notifications")
             return SMSResult(SMSResult.SMS_DISABLED)
         if pref == 'email':
-            logger.info(f"Guardian {guardian.full_name} prefers email only - skipping SMS")
+            logger.info(f"Guardian {guardian['name']} prefers email only - skipping SMS")
             return SMSResult(SMSResult.SMS_DISABLED)
 
         # Check SMS gateway status
@@ -124,13 +125,13 @@ def send_exeat_approval_sms(exeat, user=None):
         # Format message based on exeat type - keep concise for SMS
         if exeat.exeat_type == Exeat.ExeatType.INTERNAL:
             message = (
-                f"{school_name}: Dear {guardian.full_name}, {student.full_name} has been "
+                f"{school_name}: Dear {guardian['name']}, {student.full_name} has been "
                 f"granted internal exeat. Dest: {exeat.destination[:30]}. "
                 f"Return by {exeat.expected_return_time.strftime('%I:%M%p')}."
             )
         else:
             message = (
-                f"{school_name}: Dear {guardian.full_name}, {student.full_name} has been "
+                f"{school_name}: Dear {guardian['name']}, {student.full_name} has been "
                 f"granted external exeat. Dest: {exeat.destination[:30]}. "
                 f"Leaving {exeat.departure_date.strftime('%d/%m')}. "
                 f"Return {exeat.expected_return_date.strftime('%d/%m')}."
@@ -138,7 +139,7 @@ def send_exeat_approval_sms(exeat, user=None):
 
         # Send SMS with proper message type and recipient name
         result = send_sms(
-            to_phone=guardian.phone_number,
+            to_phone=guardian['phone'],
             message=message,
             student=student,
             message_type='exeat',
@@ -153,7 +154,7 @@ def send_exeat_approval_sms(exeat, user=None):
                 try:
                     sms_record = SMSMessage.objects.get(pk=message_id)
                     # Update recipient name (fix for missing guardian_name)
-                    sms_record.recipient_name = guardian.full_name
+                    sms_record.recipient_name = guardian['name']
                     sms_record.save(update_fields=['recipient_name'])
                     exeat.approval_sms = sms_record
                 except SMSMessage.DoesNotExist:
@@ -162,11 +163,11 @@ def send_exeat_approval_sms(exeat, user=None):
             exeat.guardian_notified_approval = True
             exeat.save(update_fields=['guardian_notified_approval', 'approval_sms'])
 
-            logger.info(f"Exeat approval SMS queued for {student.full_name} to {guardian.phone_number}")
+            logger.info(f"Exeat approval SMS queued for {student.full_name} to {guardian['phone']}")
             return SMSResult(
                 SMSResult.SUCCESS,
                 message_id=message_id,
-                guardian_phone=guardian.phone_number
+                guardian_phone=guardian['phone']
             )
         else:
             error = result.get('error', 'Unknown error')
@@ -191,10 +192,11 @@ def send_exeat_return_sms(exeat, user=None):
     """
     try:
         from communications.utils import send_sms, get_sms_gateway_status
+        from students.contacts import get_guardian_contact
         from communications.models import SMSMessage
 
         student = exeat.student
-        guardian = student.get_primary_guardian()
+        guardian = get_guardian_contact(student)
 
         # Validate guardian exists
         if not guardian:
@@ -202,17 +204,17 @@ def send_exeat_return_sms(exeat, user=None):
             return SMSResult(SMSResult.NO_GUARDIAN)
 
         # Validate guardian has phone
-        if not guardian.phone_number:
-            logger.warning(f"Guardian {guardian.full_name} has no phone - skipping return SMS")
+        if not guardian['phone']:
+            logger.warning(f"Guardian {guardian['name']} has no phone - skipping return SMS")
             return SMSResult(SMSResult.NO_PHONE)
 
         # Check guardian notification preference
-        pref = getattr(guardian, 'notification_preference', 'sms')
+        pref = guardian['notification_preference'] or 'sms'
         if pref == 'none':
-            logger.info(f"Guardian {guardian.full_name} opted out of notifications")
+            logger.info(f"Guardian {guardian['name']} opted out of notifications")
             return SMSResult(SMSResult.SMS_DISABLED)
         if pref == 'email':
-            logger.info(f"Guardian {guardian.full_name} prefers email only - skipping SMS")
+            logger.info(f"Guardian {guardian['name']} prefers email only - skipping SMS")
             return SMSResult(SMSResult.SMS_DISABLED)
 
         # Check SMS gateway status
@@ -230,13 +232,13 @@ def send_exeat_return_sms(exeat, user=None):
 
         # Keep message concise
         message = (
-            f"{school_name}: Dear {guardian.full_name}, {student.full_name} has safely "
+            f"{school_name}: Dear {guardian['name']}, {student.full_name} has safely "
             f"returned to campus. Thank you."
         )
 
         # Send SMS
         result = send_sms(
-            to_phone=guardian.phone_number,
+            to_phone=guardian['phone'],
             message=message,
             student=student,
             message_type='exeat',
@@ -250,7 +252,7 @@ def send_exeat_return_sms(exeat, user=None):
             if message_id:
                 try:
                     sms_record = SMSMessage.objects.get(pk=message_id)
-                    sms_record.recipient_name = guardian.full_name
+                    sms_record.recipient_name = guardian['name']
                     sms_record.save(update_fields=['recipient_name'])
                     exeat.return_sms = sms_record
                 except SMSMessage.DoesNotExist:
@@ -259,11 +261,11 @@ def send_exeat_return_sms(exeat, user=None):
             exeat.guardian_notified_return = True
             exeat.save(update_fields=['guardian_notified_return', 'return_sms'])
 
-            logger.info(f"Exeat return SMS queued for {student.full_name} to {guardian.phone_number}")
+            logger.info(f"Exeat return SMS queued for {student.full_name} to {guardian['phone']}")
             return SMSResult(
                 SMSResult.SUCCESS,
                 message_id=message_id,
-                guardian_phone=guardian.phone_number
+                guardian_phone=guardian['phone']
             )
         else:
             error = result.get('error', 'Unknown error')
@@ -288,17 +290,18 @@ def send_exeat_rejection_sms(exeat, user=None):
     """
     try:
         from communications.utils import send_sms, get_sms_gateway_status
+        from students.contacts import get_guardian_contact
 
         student = exeat.student
-        guardian = student.get_primary_guardian()
+        guardian = get_guardian_contact(student)
 
         if not guardian:
             return SMSResult(SMSResult.NO_GUARDIAN)
-        if not guardian.phone_number:
+        if not guardian['phone']:
             return SMSResult(SMSResult.NO_PHONE)
 
         # Check guardian notification preference
-        pref = getattr(guardian, 'notification_preference', 'sms')
+        pref = guardian['notification_preference'] or 'sms'
         if pref in ('none', 'email'):
             return SMSResult(SMSResult.SMS_DISABLED)
 
@@ -312,13 +315,13 @@ def send_exeat_rejection_sms(exeat, user=None):
 
         reason_text = f" Reason: {exeat.rejection_reason[:50]}" if exeat.rejection_reason else ""
         message = (
-            f"{school_name}: Dear {guardian.full_name}, the exeat request for "
+            f"{school_name}: Dear {guardian['name']}, the exeat request for "
             f"{student.full_name} has been declined.{reason_text} "
             f"Please contact the school for more info."
         )
 
         result = send_sms(
-            to_phone=guardian.phone_number,
+            to_phone=guardian['phone'],
             message=message,
             student=student,
             message_type='exeat',
@@ -329,7 +332,7 @@ def send_exeat_rejection_sms(exeat, user=None):
             return SMSResult(
                 SMSResult.SUCCESS,
                 message_id=result.get('message_id'),
-                guardian_phone=guardian.phone_number
+                guardian_phone=guardian['phone']
             )
         else:
             return SMSResult(SMSResult.QUEUE_FAILED, error=result.get('error', 'Unknown error'))